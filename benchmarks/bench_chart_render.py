@@ -0,0 +1,123 @@
+"""
+Benchmark del renderizador raster de NumPy contra matplotlib.
+
+Cada renderizador se mide en un proceso nuevo para aislar el costo de la
+primera imagen (incluye las importaciones diferidas) y el pico de memoria
+(RSS) que agrega. Se reportan imágenes por segundo para un gráfico de
+100 velas con volumen y EMA 20/50 (800x500).
+
+Si matplotlib no está instalado, su fila se informa como no disponible.
+
+Uso:
+    python benchmarks/bench_chart_render.py
+
+Autor: Sistema Botrading
+Fecha: 2025-11-15
+Ticket: T24 - Generación de imágenes de velas por timeframe (renderizador raster)
+"""
+import importlib.util
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+RENDERERS = ["raster", "matplotlib"]
+IMAGES = 50
+BARS = 100
+
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente del proceso actual en MB (Linux: ru_maxrss en KB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_request():
+    """Solicitud de gráfico M5 sintética con EMAs y volumen."""
+    import numpy as np
+
+    from src.core.chart_plotter import ChartRequest, ChartStyle
+    from src.core.mt5_data_extractor import MT5_RATES_DTYPE, OHLCVData, Timeframe
+
+    rng = np.random.default_rng(42)
+    rates = np.zeros(BARS + 50, dtype=MT5_RATES_DTYPE)
+    rates['time'] = 1_700_000_000 + np.arange(len(rates)) * 300
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, len(rates)))
+    rates['close'] = close
+    rates['open'] = np.roll(close, 1)
+    rates['high'] = np.maximum(rates['open'], close) + 0.0004
+    rates['low'] = np.minimum(rates['open'], close) - 0.0004
+    rates['tick_volume'] = rng.integers(50, 500, len(rates))
+    ohlcv = OHLCVData.from_rates("EURUSD", Timeframe.M5, rates)
+    return ChartRequest.from_ohlcv(ohlcv, ChartStyle(bars=BARS, show_ema=True))
+
+
+def worker(name: str) -> dict:
+    """Mide un renderizador dentro del proceso actual."""
+    request = make_request()
+    baseline_mb = peak_rss_mb()
+
+    if name == "raster":
+        from src.core.chart_raster import render_raster as renderer
+    else:
+        from src.core.chart_plotter import render_matplotlib as renderer
+        # find_spec no importa el paquete: su costo queda en la primera imagen
+        if importlib.util.find_spec("matplotlib") is None:
+            return {"renderer": name, "available": False}
+
+    # Primera imagen en frío: incluye las importaciones diferidas del renderizador
+    start = time.perf_counter()
+    renderer(request)
+    first_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    size = 0
+    for _ in range(IMAGES):
+        size = len(renderer(request))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "renderer": name,
+        "available": True,
+        "first_ms": first_ms,
+        "images_per_second": IMAGES / elapsed,
+        "ms_per_image": elapsed / IMAGES * 1000,
+        "png_kb": size / 1024,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_added_mb": peak_rss_mb() - baseline_mb,
+    }
+
+
+def main():
+    """Ejecuta cada renderizador en un subproceso e imprime la tabla."""
+    print(
+        f"{'renderizador':>12} | {'1ª img (ms)':>11} | {'img/s':>7} | {'ms/img':>7} | "
+        f"{'PNG (KB)':>8} | {'pico RSS (MB)':>13} | {'RSS agregado':>12}"
+    )
+    print("-" * 90)
+    for name in RENDERERS:
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", name],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if not result["available"]:
+            print(f"{name:>12} | no instalado")
+            continue
+        print(
+            f"{name:>12} | {result['first_ms']:>11.1f} | {result['images_per_second']:>7.1f} | "
+            f"{result['ms_per_image']:>7.2f} | {result['png_kb']:>8.1f} | "
+            f"{result['peak_rss_mb']:>13.1f} | {result['rss_added_mb']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--worker":
+        print(json.dumps(worker(sys.argv[2])))
+    else:
+        main()
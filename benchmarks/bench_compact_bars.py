@@ -0,0 +1,87 @@
+"""
+Benchmark de memoria y velocidad del almacenamiento compacto de velas.
+
+Imprime el reporte de memoria para 30 instrumentos en los 7 timeframes con
+5000 velas cada uno (layout de MT5, MT5 + DataFrame de OHLCVData, puntos
+int32 y float32) y mide la codificación y decodificación de una serie.
+
+Uso:
+    python benchmarks/bench_compact_bars.py
+
+Autor: Sistema Botrading
+Fecha: 2025-11-18
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (almacenamiento compacto)
+"""
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from src.core.compact_bars import COMPACT_MODES, BarCodec, memory_report
+from src.core.mt5_data_extractor import MT5_RATES_DTYPE, Timeframe
+
+
+INSTRUMENTS = 30
+BARS = 5000
+REPEATS = 50
+
+
+def make_rates(bars: int) -> np.ndarray:
+    """Serie M5 sintética con precios de 5 dígitos."""
+    rng = np.random.default_rng(42)
+    rates = np.zeros(bars, dtype=MT5_RATES_DTYPE)
+    rates['time'] = 1_700_000_000 + np.arange(bars) * 300
+    close = np.round(1.1 + np.cumsum(rng.normal(0, 0.0005, bars)), 5)
+    rates['open'] = np.roll(close, 1)
+    rates['high'] = np.round(np.maximum(rates['open'], close) + 0.0003, 5)
+    rates['low'] = np.round(np.minimum(rates['open'], close) - 0.0003, 5)
+    rates['close'] = close
+    rates['tick_volume'] = rng.integers(50, 5000, bars)
+    return rates
+
+
+def measure(func) -> float:
+    """Retorna el tiempo medio en ms de func()."""
+    func()  # calentamiento
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    """Ejecuta el benchmark e imprime las tablas de resultados."""
+    series = INSTRUMENTS * len(Timeframe)
+    report = memory_report([BARS] * series)
+
+    print(f"{INSTRUMENTS} instrumentos x {len(Timeframe)} timeframes x {BARS} velas = {report['bars']} velas")
+    print(f"{'layout':>16} | {'bytes/vela':>10} | {'MB':>8} | {'ahorro':>7}")
+    print("-" * 50)
+    for name, size in report["bytes"].items():
+        saving = report["savings"].get(name)
+        saving_text = f"{saving:>6.0%}" if saving is not None else f"{'-':>6}"
+        print(
+            f"{name:>16} | {report['bytes_per_bar'][name]:>10} | "
+            f"{size / 1e6:>8.1f} | {saving_text:>7}"
+        )
+
+    rates = make_rates(BARS)
+    print()
+    print(f"{'modo':>8} | {'encode (ms)':>11} | {'decode (ms)':>11} | {'exacto':>6}")
+    print("-" * 46)
+    for mode in COMPACT_MODES:
+        codec = BarCodec(mode=mode, digits=5)
+        compact = codec.encode(rates)
+        exact = np.array_equal(codec.decode(compact), rates)
+        print(
+            f"{mode:>8} | {measure(lambda: codec.encode(rates)):>11.3f} | "
+            f"{measure(lambda: codec.decode(compact)):>11.3f} | {str(exact):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark de la matriz de correlación incremental frente al recálculo completo.
+
+Para 30 instrumentos y ventanas de 100 a 1000 velas compara el costo por vela
+de CorrelationEngine (actualización + matriz + consulta de correlacionados)
+con recalcular la correlación de la ventana completa con pandas.
+
+Uso:
+    python benchmarks/bench_correlation_engine.py
+
+Autor: Sistema Botrading
+Fecha: 2025-11-19
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (correlación entre instrumentos)
+"""
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.core.correlation_engine import CorrelationEngine
+
+
+INSTRUMENTS = 30
+WINDOWS = (100, 250, 500, 1000)
+MEASURED_BARS = 500
+
+
+def make_closes(bars: int) -> np.ndarray:
+    """Cierres sintéticos (velas x instrumentos) con un factor común."""
+    rng = np.random.default_rng(42)
+    common = rng.normal(0, 1e-3, (bars, 1))
+    returns = 0.6 * common + rng.normal(0, 1e-3, (bars, INSTRUMENTS))
+    return np.exp(np.cumsum(returns, axis=0))
+
+
+def bench_incremental(window: int, closes: np.ndarray, symbols) -> float:
+    """Tiempo medio en µs por vela del motor incremental."""
+    engine = CorrelationEngine(symbols, window=window)
+    warmup = len(closes) - MEASURED_BARS
+    for i in range(warmup):
+        engine.update(i, dict(zip(symbols, closes[i])))
+
+    rows = [dict(zip(symbols, closes[i])) for i in range(warmup, len(closes))]
+    start = time.perf_counter()
+    for i, row in enumerate(rows):
+        engine.update(warmup + i, row)
+        engine.correlated_with(symbols[0], threshold=0.8)
+    return (time.perf_counter() - start) / MEASURED_BARS * 1e6
+
+
+def bench_full(window: int, closes: np.ndarray, symbols) -> float:
+    """Tiempo medio en µs por vela recalculando la ventana con pandas."""
+    returns = pd.DataFrame(np.log(closes), columns=symbols).diff()
+    warmup = len(closes) - MEASURED_BARS
+    start = time.perf_counter()
+    for i in range(warmup, len(closes)):
+        corr = returns.iloc[i - window + 1:i + 1].corr()
+        corr[symbols[0]].abs() > 0.8
+    return (time.perf_counter() - start) / MEASURED_BARS * 1e6
+
+
+def main():
+    """Ejecuta el benchmark e imprime la tabla de resultados."""
+    symbols = [f"SYM{i:02d}" for i in range(INSTRUMENTS)]
+    print(f"{INSTRUMENTS} instrumentos, {MEASURED_BARS} velas medidas")
+    print(f"{'ventana':>8} | {'incremental (µs)':>16} | {'completo (µs)':>13} | {'speedup':>7}")
+    print("-" * 55)
+    for window in WINDOWS:
+        closes = make_closes(window + MEASURED_BARS + 1)
+        incremental = bench_incremental(window, closes, symbols)
+        full = bench_full(window, closes, symbols)
+        print(f"{window:>8} | {incremental:>16.1f} | {full:>13.1f} | {full / incremental:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
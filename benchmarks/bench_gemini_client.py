@@ -0,0 +1,69 @@
+"""
+Benchmark de throughput de AsyncGeminiClient contra el servidor local.
+
+Simula un ciclo en el que 30 activos piden su decisión a la IA con una
+latencia fija por petición y compara:
+
+    - secuencial: una petición tras otra (como un cliente bloqueante)
+    - concurrente: todas en vuelo con distintos límites del semáforo
+
+No requiere red ni API key: usa GeminiStubServer.
+
+Uso:
+    python benchmarks/bench_gemini_client.py [latencia_segundos]
+
+Autor: Sistema Botrading
+Fecha: 2025-11-20
+Ticket: T10 - Construcción de prompt y recepción de JSON de decisión (cliente asíncrono)
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.gemini_client import AsyncGeminiClient
+from src.core.ia_config_manager import IAProfile, IAProvider
+from tests.gemini_stub_server import GeminiStubServer
+
+
+ASSETS = 30
+CONCURRENCY_LIMITS = (1, 5, 10, 30)
+PROFILE = IAProfile(name="gemini-pro", provider=IAProvider.GEMINI, model="gemini-2.5-pro")
+
+
+async def run_cycle(server: GeminiStubServer, max_concurrency: int):
+    """Una ronda de decisiones para todos los activos."""
+    prompts = [f"Analiza el activo {i} en M5, M15 y H1" for i in range(ASSETS)]
+    async with AsyncGeminiClient("bench-key", base_url=server.base_url, max_concurrency=max_concurrency) as client:
+        started = time.perf_counter()
+        results = await client.generate_many(PROFILE, prompts)
+        elapsed = time.perf_counter() - started
+        errors = sum(isinstance(result, Exception) for result in results)
+        return elapsed, errors, client.get_stats()
+
+
+async def main_async(latency: float):
+    """Ejecuta las rondas e imprime la tabla."""
+    print(f"{ASSETS} activos, latencia simulada {latency * 1000:.0f} ms por petición")
+    print(f"{'en vuelo':>8} | {'ciclo (s)':>9} | {'req/s':>7} | {'conexiones':>10} | {'errores':>7}")
+    print("-" * 56)
+    async with GeminiStubServer(latency=latency, jitter=latency * 0.2) as server:
+        for limit in CONCURRENCY_LIMITS:
+            elapsed, errors, stats = await run_cycle(server, limit)
+            print(
+                f"{limit:>8} | {elapsed:>9.2f} | {ASSETS / elapsed:>7.1f} | "
+                f"{stats['connections_opened']:>10} | {errors:>7}"
+            )
+
+
+def main():
+    """Punto de entrada."""
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    asyncio.run(main_async(latency))
+
+
+if __name__ == "__main__":
+    main()
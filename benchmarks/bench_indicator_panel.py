@@ -0,0 +1,87 @@
+"""
+Benchmark de indicadores por símbolo contra el panel vectorizado.
+
+Compara el cálculo de EMA 20/50, RSI, MACD y ATR símbolo por símbolo (un
+llamado por instrumento) contra compute_panel_indicators sobre la matriz
+(instrumentos x velas), para 30, 100 y 300 instrumentos.
+
+Uso:
+    python benchmarks/bench_indicator_panel.py
+
+Autor: Sistema Botrading
+Fecha: 2025-11-14
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (panel vectorizado)
+"""
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from src.core.indicator_panel import PricePanel, compute_panel_indicators
+from src.core.indicators_calculator import calculate_atr, calculate_indicators
+from src.core.mt5_data_extractor import MT5_RATES_DTYPE, OHLCVData, Timeframe
+
+
+INSTRUMENTS = [30, 100, 300]
+BARS = 500
+REPEATS = 10
+
+
+def make_data(instruments: int, bars: int) -> dict:
+    """Genera `instruments` series H1 sintéticas de `bars` velas."""
+    rng = np.random.default_rng(42)
+    data = {}
+    for i in range(instruments):
+        rates = np.zeros(bars, dtype=MT5_RATES_DTYPE)
+        rates['time'] = 1_700_000_000 + np.arange(bars) * 3600
+        close = 1.0 + np.cumsum(rng.normal(0, 0.001, bars))
+        rates['open'] = np.roll(close, 1)
+        rates['high'] = np.maximum(rates['open'], close) + 0.0005
+        rates['low'] = np.minimum(rates['open'], close) - 0.0005
+        rates['close'] = close
+        rates['tick_volume'] = rng.integers(50, 500, bars)
+        data[f"SYM{i:03d}"] = OHLCVData.from_rates(f"SYM{i:03d}", Timeframe.H1, rates)
+    return data
+
+
+def per_symbol(data: dict) -> None:
+    """Camino por símbolo: un cálculo completo por instrumento."""
+    for ohlcv in data.values():
+        calculate_indicators(ohlcv.close)
+        calculate_atr(ohlcv.high, ohlcv.low, ohlcv.close)
+
+
+def panel(data: dict) -> None:
+    """Camino panel: construcción de la matriz y una pasada vectorizada."""
+    compute_panel_indicators(PricePanel.from_ohlcv(data, Timeframe.H1, BARS))
+
+
+def measure(func, data: dict) -> float:
+    """Retorna el tiempo medio en ms de func(data)."""
+    func(data)  # calentamiento
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(data)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    """Ejecuta el benchmark e imprime la tabla de resultados."""
+    print(f"{'instrumentos':>12} | {'por símbolo (ms)':>16} | {'panel (ms)':>11} | {'speedup':>8}")
+    print("-" * 58)
+    for instruments in INSTRUMENTS:
+        data = make_data(instruments, BARS)
+        loop_ms = measure(per_symbol, data)
+        panel_ms = measure(panel, data)
+        print(
+            f"{instruments:>12} | {loop_ms:>16.2f} | {panel_ms:>11.2f} | "
+            f"{loop_ms / panel_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
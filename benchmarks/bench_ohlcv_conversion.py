@@ -0,0 +1,106 @@
+"""
+Benchmark de conversión de velas MT5 a OHLCVData.
+
+Compara el camino anterior (DataFrame completo + to_datetime + selección con
+copia + rename + head) contra OHLCVData respaldado por el structured array,
+midiendo tiempo de conversión y memoria pico para 1k, 10k y 100k velas.
+
+Uso:
+    python benchmarks/bench_ohlcv_conversion.py
+
+Autor: Sistema Botrading
+Fecha: 2025-11-12
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.core.mt5_data_extractor import MT5_RATES_DTYPE, OHLCVData, Timeframe
+
+
+SIZES = [1_000, 10_000, 100_000]
+REPEATS = 20
+
+
+def make_rates(n: int) -> np.ndarray:
+    """Genera n velas M5 sintéticas con el formato de copy_rates_*."""
+    rng = np.random.default_rng(42)
+    rates = np.zeros(n, dtype=MT5_RATES_DTYPE)
+    rates['time'] = 1_700_000_000 + np.arange(n) * 300
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0002, n))
+    rates['open'] = np.roll(close, 1)
+    rates['high'] = np.maximum(rates['open'], close) + 0.0001
+    rates['low'] = np.minimum(rates['open'], close) - 0.0001
+    rates['close'] = close
+    rates['tick_volume'] = rng.integers(50, 500, n)
+    rates['spread'] = 10
+    return rates
+
+
+def legacy_convert(rates: np.ndarray, count: int) -> pd.DataFrame:
+    """Camino anterior de _convert_to_dataframe + head(count) en get_ohlcv."""
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    columns_to_keep = ['time', 'open', 'high', 'low', 'close', 'tick_volume']
+    df = df[columns_to_keep].copy()
+    df.rename(columns={'tick_volume': 'volume'}, inplace=True)
+    return df.head(count)
+
+
+def array_convert(rates: np.ndarray, count: int) -> np.ndarray:
+    """Camino nuevo: OHLCVData sobre el array y lectura de close sin pandas."""
+    ohlcv = OHLCVData.from_rates("EURUSD", Timeframe.M5, rates[:count])
+    return ohlcv.close
+
+
+def lazy_dataframe_convert(rates: np.ndarray, count: int) -> pd.DataFrame:
+    """Camino nuevo materializando el DataFrame (acceso a .data)."""
+    return OHLCVData.from_rates("EURUSD", Timeframe.M5, rates[:count]).data
+
+
+def measure(func, rates: np.ndarray) -> tuple:
+    """Retorna (tiempo medio en ms, memoria pico en KiB) de func."""
+    count = len(rates)
+    func(rates, count)  # calentamiento
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(rates, count)
+    elapsed_ms = (time.perf_counter() - start) / REPEATS * 1000
+
+    tracemalloc.start()
+    func(rates, count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed_ms, peak / 1024
+
+
+def main():
+    """Ejecuta el benchmark e imprime la tabla de resultados."""
+    paths = [
+        ("legacy DataFrame", legacy_convert),
+        ("OHLCVData arrays", array_convert),
+        ("OHLCVData .data", lazy_dataframe_convert),
+    ]
+
+    print(f"{'velas':>8} | {'camino':<18} | {'tiempo (ms)':>12} | {'pico (KiB)':>12}")
+    print("-" * 60)
+    for size in SIZES:
+        rates = make_rates(size)
+        for name, func in paths:
+            elapsed_ms, peak_kib = measure(func, rates)
+            print(f"{size:>8} | {name:<18} | {elapsed_ms:>12.3f} | {peak_kib:>12.1f}")
+        print("-" * 60)
+
+
+if __name__ == "__main__":
+    main()
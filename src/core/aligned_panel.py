@@ -0,0 +1,429 @@
+"""
+AlignedPanel - Panel multi-símbolo alineado a una grilla de tiempo común.
+
+A diferencia de PricePanel (alineado a la derecha por fila), este panel pone
+a todos los instrumentos de un timeframe sobre el mismo eje de tiempo: cada
+fila es un instante de la grilla del timeframe y cada columna un símbolo.
+Es la base para features multi-activo (correlación, exposición por moneda,
+fuerza relativa), donde comparar la vela i de dos símbolos debe significar
+comparar el mismo instante.
+
+Las filas son la unión de los tiempos observados (no se crean filas para el
+fin de semana). Cuando un símbolo no tiene vela en una fila, la celda se
+rellena hacia adelante con su último cierre (vela plana, volumen 0) hasta
+`max_fill` filas; más allá queda en NaN. Las velas reales que llegan tarde
+reemplazan el relleno y se recalculan solo las celdas siguientes de ese
+símbolo.
+
+Los datos se guardan en matrices (tiempo x símbolos) en orden C con
+capacidad de reserva: agregar velas cerradas al final cuesta O(1) amortizado
+por símbolo y las vistas expuestas son bloques contiguos de filas.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-17
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (panel alineado por tiempo)
+"""
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+# Filas de antigüedad para celdas sin vela previa del símbolo
+NO_DATA = 2 ** 62
+PRICE_FIELDS = ("open", "high", "low", "close")
+FIELDS = PRICE_FIELDS + ("volume",)
+
+
+class AlignedPanelError(Exception):
+    """Excepción para errores del panel alineado."""
+    pass
+
+
+class AlignedPanel:
+    """
+    Velas de varios símbolos sobre una grilla de tiempo común.
+
+    Las propiedades `time`, `open`, `high`, `low`, `close` y `volume`
+    devuelven vistas de solo lectura sobre los buffers internos; son válidas
+    hasta la siguiente actualización.
+
+    Es thread-safe: las actualizaciones se realizan bajo un lock interno.
+
+    Example:
+        >>> panel = AlignedPanel(Timeframe.H1, ["EURUSD", "GBPUSD"], max_fill=3)
+        >>> for ohlcv in extractor.get_ohlcv_bulk(...):
+        ...     panel.update(ohlcv)
+        >>> returns = np.diff(np.log(panel.close[-200:]), axis=0)
+        >>> np.corrcoef(returns.T)
+    """
+
+    DEFAULT_MAX_BARS = 5000
+    INITIAL_CAPACITY = 64
+
+    def __init__(
+        self,
+        timeframe,
+        symbols: Iterable[str] = (),
+        max_bars: int = DEFAULT_MAX_BARS,
+        max_fill: Optional[int] = None
+    ):
+        """
+        Inicializa el AlignedPanel.
+
+        Args:
+            timeframe: Timeframe común (con `.value` en minutos)
+            symbols: Símbolos iniciales (se agregan columnas al recibir otros)
+            max_bars: Filas retenidas (las más antiguas se descartan)
+            max_fill: Filas máximas a rellenar hacia adelante tras la última
+                vela real (None = sin límite, 0 = sin relleno)
+
+        Raises:
+            AlignedPanelError: Si max_bars o max_fill son inválidos
+        """
+        if max_bars <= 0:
+            raise AlignedPanelError("max_bars debe ser mayor a 0")
+        if max_fill is not None and max_fill < 0:
+            raise AlignedPanelError("max_fill no puede ser negativo")
+
+        self.timeframe = timeframe
+        self.step = timeframe.value * 60
+        self.max_bars = max_bars
+        self.max_fill = NO_DATA - 1 if max_fill is None else max_fill
+
+        self._symbols: List[str] = []
+        self._columns: Dict[str, int] = {}
+        self._start = 0
+        self._end = 0
+        self._stats = {
+            "updates": 0,
+            "bars_written": 0,
+            "rows_appended": 0,
+            "rows_inserted": 0,
+            "reallocations": 0,
+            "compactions": 0
+        }
+        self._lock = threading.Lock()
+        self._allocate(self.INITIAL_CAPACITY, 0)
+        for symbol in symbols:
+            self._add_column(symbol)
+
+
+    # ------------------------------------------------------------------
+    # Vistas
+    # ------------------------------------------------------------------
+
+    @property
+    def symbols(self) -> List[str]:
+        """Símbolos en el orden de las columnas."""
+        return list(self._symbols)
+
+    @property
+    def shape(self):
+        """Forma (filas, símbolos) del panel."""
+        return (self._end - self._start, len(self._symbols))
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def time(self) -> np.ndarray:
+        """Epochs de la grilla (vista 1D)."""
+        return self._view(self._time)
+
+    @property
+    def open(self) -> np.ndarray:
+        """Aperturas (tiempo x símbolos)."""
+        return self._view(self._data["open"])
+
+    @property
+    def high(self) -> np.ndarray:
+        """Máximos (tiempo x símbolos)."""
+        return self._view(self._data["high"])
+
+    @property
+    def low(self) -> np.ndarray:
+        """Mínimos (tiempo x símbolos)."""
+        return self._view(self._data["low"])
+
+    @property
+    def close(self) -> np.ndarray:
+        """Cierres (tiempo x símbolos)."""
+        return self._view(self._data["close"])
+
+    @property
+    def volume(self) -> np.ndarray:
+        """Volumen de ticks (tiempo x símbolos; 0 en celdas rellenadas)."""
+        return self._view(self._data["volume"])
+
+    @property
+    def present(self) -> np.ndarray:
+        """Máscara de celdas con una vela real del símbolo."""
+        return self._age[self._start:self._end] == 0
+
+    @property
+    def filled(self) -> np.ndarray:
+        """Máscara de celdas rellenadas hacia adelante."""
+        return ~self.present & ~np.isnan(self.close)
+
+    def complete_rows(self) -> np.ndarray:
+        """Máscara de filas con valor (real o rellenado) para todos los símbolos."""
+        return ~np.isnan(self.close).any(axis=1)
+
+    def column(self, symbol: str, field: str = "close") -> np.ndarray:
+        """
+        Serie de un símbolo sobre la grilla.
+
+        Args:
+            symbol: Símbolo del instrumento
+            field: "open", "high", "low", "close" o "volume"
+
+        Returns:
+            Vista 1D de solo lectura (no contigua)
+
+        Raises:
+            KeyError: Si el símbolo o el campo no existen
+        """
+        if symbol not in self._columns:
+            raise KeyError(f"{symbol} no está en el panel")
+        return self._view(self._data[field])[:, self._columns[symbol]]
+
+    # ------------------------------------------------------------------
+    # Actualización
+    # ------------------------------------------------------------------
+
+    def update(self, ohlcv) -> int:
+        """
+        Incorpora velas cerradas de un símbolo.
+
+        Los tiempos se ajustan al inicio de su intervalo en la grilla del
+        timeframe; si se repite un tiempo, gana la última vela.
+
+        Args:
+            ohlcv: OHLCVData del timeframe del panel (solo velas cerradas)
+
+        Returns:
+            Filas nuevas agregadas a la grilla
+
+        Raises:
+            AlignedPanelError: Si el timeframe no coincide
+        """
+        if ohlcv.timeframe != self.timeframe:
+            raise AlignedPanelError(
+                f"Timeframe {ohlcv.timeframe.name} distinto al del panel ({self.timeframe.name})"
+            )
+        if ohlcv.count == 0:
+            return 0
+
+        times = np.asarray(ohlcv.time, dtype=np.int64)
+        times = times - times % self.step
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        last_of_run = np.append(times[1:] != times[:-1], True)
+        index = order[last_of_run][-self.max_bars:]
+        times = times[last_of_run][-self.max_bars:]
+        values = {name: np.asarray(getattr(ohlcv, name), dtype=np.float64)[index] for name in FIELDS}
+
+        with self._lock:
+            col = self._add_column(ohlcv.symbol)
+            added = 0
+
+            grid = self._time[self._start:self._end]
+            last = grid[-1] if len(grid) else None
+            if last is not None:
+                old = times[times <= last]
+                pos = np.searchsorted(grid, old)
+                known = (pos < len(grid)) & (grid[np.minimum(pos, len(grid) - 1)] == old)
+                if not known.all():
+                    self._insert_rows(old[~known])
+                    added += int(np.count_nonzero(~known))
+                new_times = times[times > last]
+            else:
+                new_times = times
+            if len(new_times):
+                self._append_rows(new_times)
+                added += len(new_times)
+
+            grid = self._time[self._start:self._end]
+            times_kept = times >= grid[0]
+            rows = np.searchsorted(grid, times[times_kept])
+            for name in FIELDS:
+                self._data[name][self._start + rows, col] = values[name][times_kept]
+            self._age[self._start + rows, col] = 0
+
+            first_new = len(grid) - len(new_times) if len(new_times) else len(grid)
+            if len(new_times):
+                self._refill(first_new, slice(None))
+            if len(rows) and rows[0] < first_new:
+                self._refill(int(rows[0]), slice(col, col + 1))
+
+            self._stats["updates"] += 1
+            self._stats["bars_written"] += len(rows)
+            return added
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del panel.
+
+        Returns:
+            Diccionario con actualizaciones, velas escritas, filas agregadas al
+            final e insertadas en el medio, realocaciones, compactaciones, filas
+            y símbolos
+        """
+        with self._lock:
+            return {**self._stats, "rows": len(self), "symbols": len(self._symbols)}
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _view(self, array: np.ndarray) -> np.ndarray:
+        """Vista de solo lectura de las filas visibles."""
+        view = array[self._start:self._end]
+        view.flags.writeable = False
+        return view
+
+    def _allocate(self, capacity: int, columns: int) -> None:
+        """Crea buffers vacíos de `capacity` filas y `columns` símbolos."""
+        self._time = np.zeros(capacity, dtype=np.int64)
+        self._data = {name: np.full((capacity, columns), np.nan) for name in FIELDS}
+        self._age = np.full((capacity, columns), NO_DATA, dtype=np.int64)
+
+    def _add_column(self, symbol: str) -> int:
+        """Columna de un símbolo, agregándola si no existe (realoca los buffers)."""
+        if symbol in self._columns:
+            return self._columns[symbol]
+
+        length = self._end - self._start
+        old_data, old_age = self._data, self._age
+        columns = len(self._symbols)
+        capacity = len(self._time)
+        self._data = {name: np.full((capacity, columns + 1), np.nan) for name in FIELDS}
+        self._age = np.full((capacity, columns + 1), NO_DATA, dtype=np.int64)
+        for name in FIELDS:
+            self._data[name][self._start:self._end, :columns] = old_data[name][self._start:self._end]
+        self._age[self._start:self._end, :columns] = old_age[self._start:self._end]
+
+        self._columns[symbol] = columns
+        self._symbols.append(symbol)
+        if length:
+            self._stats["reallocations"] += 1
+        return columns
+
+    def _append_rows(self, times: np.ndarray) -> None:
+        """Agrega filas vacías al final (O(1) amortizado por fila)."""
+        count = len(times)
+        self._reserve(count)
+        end = self._end + count
+        self._time[self._end:end] = times
+        for name in FIELDS:
+            self._data[name][self._end:end] = np.nan
+        self._age[self._end:end] = NO_DATA
+        self._end = end
+        self._stats["rows_appended"] += count
+        self._trim()
+
+    def _reserve(self, count: int) -> None:
+        """Garantiza lugar para `count` filas más tras las visibles."""
+        capacity = len(self._time)
+        if self._end + count <= capacity:
+            return
+
+        length = self._end - self._start
+        needed = length + count
+        limit = 2 * self.max_bars
+        if capacity < limit or needed > capacity:
+            # Crecer duplicando hasta 2 * max_bars
+            new_capacity = max(min(capacity * 2, limit), needed)
+            old_time, old_data, old_age = self._time, self._data, self._age
+            self._allocate(new_capacity, len(self._symbols))
+            self._time[:length] = old_time[self._start:self._end]
+            for name in FIELDS:
+                self._data[name][:length] = old_data[name][self._start:self._end]
+            self._age[:length] = old_age[self._start:self._end]
+            self._stats["reallocations"] += 1
+        else:
+            # Compactar: mover las filas visibles al inicio del buffer
+            self._time[:length] = self._time[self._start:self._end]
+            for name in FIELDS:
+                self._data[name][:length] = self._data[name][self._start:self._end]
+            self._age[:length] = self._age[self._start:self._end]
+            self._stats["compactions"] += 1
+        self._start, self._end = 0, length
+
+    def _trim(self) -> None:
+        """Descarta las filas más antiguas por encima de max_bars."""
+        if self._end - self._start > self.max_bars:
+            self._start = self._end - self.max_bars
+
+    def _insert_rows(self, times: np.ndarray) -> None:
+        """
+        Inserta filas en el medio de la grilla (camino lento, O(filas)).
+
+        Ocurre solo si un símbolo trae una vela anterior a la última fila en
+        un instante que ningún otro símbolo tenía.
+        """
+        grid = self._time[self._start:self._end]
+        merged = np.union1d(grid, times)
+        positions = np.searchsorted(merged, grid)
+        length = len(merged)
+
+        old_data, old_age = self._data, self._age
+        start, end = self._start, self._end
+        self._allocate(max(len(self._time), length), len(self._symbols))
+        self._time[:length] = merged
+        for name in FIELDS:
+            self._data[name][positions] = old_data[name][start:end]
+        self._age[positions] = old_age[start:end]
+        self._start, self._end = 0, length
+
+        self._stats["rows_inserted"] += len(times)
+        self._stats["reallocations"] += 1
+        self._refill(int(np.searchsorted(merged, times[0])), slice(None))
+        self._trim()
+
+    def _refill(self, row: int, columns: slice) -> None:
+        """
+        Recalcula el relleno hacia adelante desde la fila `row` (relativa).
+
+        Cada celda sin vela toma el cierre de la última vela real anterior
+        si está a no más de max_fill filas; si no, queda en NaN. El costo es
+        proporcional a las filas desde `row` por las columnas indicadas.
+        """
+        start = self._start + row
+        end = self._end
+        if start >= end:
+            return
+
+        age = self._age[start:end, columns]
+        close = self._data["close"][start:end, columns]
+        present = age == 0
+        relative = np.arange(end - start)[:, None]
+        last = np.maximum.accumulate(np.where(present, relative, -1), axis=0)
+
+        if start > self._start:
+            seed_age = self._age[start - 1, columns]
+            seed_close = self._data["close"][start - 1, columns]
+        else:
+            seed_age = np.full(age.shape[1], NO_DATA, dtype=np.int64)
+            seed_close = np.full(age.shape[1], np.nan)
+
+        new_age = np.where(
+            last >= 0,
+            relative - last,
+            np.minimum(seed_age + relative + 1, NO_DATA)
+        )
+        source = np.where(
+            last >= 0,
+            np.take_along_axis(close, np.maximum(last, 0), axis=0),
+            seed_close
+        )
+        value = np.where(new_age <= self.max_fill, source, np.nan)
+
+        fill = ~present
+        for name in PRICE_FIELDS:
+            target = self._data[name][start:end, columns]
+            target[fill] = value[fill]
+        volume = self._data["volume"][start:end, columns]
+        volume[fill] = np.where(np.isnan(value), np.nan, 0.0)[fill]
+        age[...] = new_age
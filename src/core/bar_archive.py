@@ -0,0 +1,644 @@
+"""
+BarArchive - Archivo histórico de velas en disco, columnar y memory-mapped.
+
+Este módulo persiste velas cerradas en un archivo por (símbolo, timeframe).
+Cada archivo guarda las columnas de MT5 en bloques contiguos y se abre con
+memory-mapping, de modo que una consulta por rango se resuelve con búsqueda
+binaria sobre la columna de tiempo sin cargar el histórico completo. Solo las
+partes que faltan (cola reciente, inicio anterior al archivo o huecos) se
+piden al terminal, y el archivo sobrevive a reinicios del proceso.
+
+Formato del archivo (little-endian):
+    - Cabecera de 64 bytes: magic (8), capacity (u8), length (u8),
+      timeframe en segundos (u8), layout (u8: 0 = MT5, 1 = puntos int32,
+      2 = float32), dígitos (u8), reservado.
+    - Un bloque por columna del layout con `capacity` elementos.
+
+Los archivos compactos (opcionales, ver compact_bars) guardan los precios en
+puntos o en float32 y se decodifican de forma exacta al leer. Los archivos
+anteriores tienen layout 0 y se siguen leyendo sin cambios.
+
+El archivo no está pensado para escrituras concurrentes desde varios procesos.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-12
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (archivo histórico)
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple, Any
+
+import numpy as np
+
+from src.core.compact_bars import COMPACT_MODES, BarCodec, CompactBarsError
+from src.core.mt5_types import MT5_RATES_DTYPE
+
+
+logger = logging.getLogger(__name__)
+
+
+class BarArchiveError(Exception):
+    """Excepción para errores del archivo histórico de velas."""
+    pass
+
+
+# Layout de columnas del archivo (igual al formato de copy_rates_* de MT5)
+ARCHIVE_DTYPE = MT5_RATES_DTYPE
+
+ARCHIVE_MAGIC = b"BTRBAR01"
+HEADER_SIZE = 64
+
+
+def to_epoch(value: datetime) -> int:
+    """
+    Convierte un datetime a epoch (segundos).
+
+    Las fechas naive se interpretan en UTC, igual que los tiempos de las
+    velas de MT5 (hora del servidor expresada como epoch).
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def from_epoch(value: int) -> datetime:
+    """Convierte un epoch (segundos) a datetime UTC."""
+    return datetime.fromtimestamp(int(value), tz=timezone.utc)
+
+
+class ArchiveFile:
+    """
+    Archivo columnar memory-mapped de una serie de velas.
+
+    Las columnas son vistas sobre el mismo memory-map; `length` indica cuántas
+    filas son válidas y `capacity` cuántas caben antes de crecer el archivo.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Abre un archivo existente.
+
+        Args:
+            path: Ruta del archivo
+
+        Raises:
+            BarArchiveError: Si el archivo no tiene el formato esperado
+        """
+        self.path = Path(path)
+        mm = np.memmap(self.path, dtype=np.uint8, mode='r+')
+        self._mm: Optional[np.memmap] = mm
+        self._header: np.ndarray = mm[8:48].view('<u8')
+
+        if bytes(mm[:8]) != ARCHIVE_MAGIC:
+            self.close()
+            raise BarArchiveError(f"Archivo de velas inválido: {self.path}")
+
+        layout = int(self._header[3])
+        self.codec: Optional[BarCodec] = (
+            BarCodec(mode=COMPACT_MODES[layout - 1], digits=int(self._header[4]))
+            if layout else None
+        )
+        self._columns: Dict[str, np.ndarray] = {}
+        offset = HEADER_SIZE
+        for name in self.dtype.names or ():
+            dtype = self.dtype[name]
+            size = self.capacity * dtype.itemsize
+            self._columns[name] = mm[offset:offset + size].view(dtype)
+            offset += size
+
+    @classmethod
+    def create(
+        cls,
+        path: Path,
+        capacity: int,
+        timeframe_seconds: int,
+        codec: Optional[BarCodec] = None
+    ) -> 'ArchiveFile':
+        """
+        Crea un archivo vacío con la capacidad indicada.
+
+        Args:
+            path: Ruta del archivo
+            capacity: Número de filas reservadas
+            timeframe_seconds: Duración de cada vela en segundos
+            codec: Layout compacto (None = layout de MT5)
+
+        Returns:
+            ArchiveFile abierto
+        """
+        dtype = codec.dtype if codec is not None else ARCHIVE_DTYPE
+        layout = COMPACT_MODES.index(codec.mode) + 1 if codec is not None else 0
+        digits = codec.digits if codec is not None else 0
+        size = HEADER_SIZE + capacity * dtype.itemsize
+        with open(path, 'wb') as f:
+            header = bytearray(HEADER_SIZE)
+            header[:8] = ARCHIVE_MAGIC
+            header[8:48] = np.array(
+                [capacity, 0, timeframe_seconds, layout, digits], dtype='<u8'
+            ).tobytes()
+            f.write(header)
+            f.truncate(size)
+        return cls(path)
+
+    @property
+    def capacity(self) -> int:
+        """Filas reservadas en el archivo."""
+        return int(self._header[0])
+
+    @property
+    def length(self) -> int:
+        """Filas válidas en el archivo."""
+        return int(self._header[1])
+
+    @property
+    def timeframe_seconds(self) -> int:
+        """Duración de cada vela en segundos."""
+        return int(self._header[2])
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Layout de las columnas en disco."""
+        return self.codec.dtype if self.codec is not None else ARCHIVE_DTYPE
+
+    @property
+    def time(self) -> np.ndarray:
+        """Columna de tiempo (vista sobre las filas válidas)."""
+        return self._columns['time'][:self.length]
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Lee las filas [start, stop) como structured array.
+
+        Args:
+            start: Índice inicial
+            stop: Índice final (exclusivo), por defecto length
+
+        Returns:
+            Structured array con ARCHIVE_DTYPE (decodificado si es compacto)
+        """
+        stop = self.length if stop is None else min(stop, self.length)
+        start = max(0, min(start, stop))
+        out = np.empty(stop - start, dtype=self.dtype)
+        for name, column in self._columns.items():
+            out[name] = column[start:stop]
+        return self.codec.decode(out) if self.codec is not None else out
+
+    def append(self, rates: np.ndarray) -> None:
+        """
+        Agrega filas al final (deben ser posteriores a la última fila).
+
+        Los datos se escriben antes de actualizar `length`, de modo que una
+        interrupción no deja filas a medio escribir visibles.
+
+        Args:
+            rates: Structured array con ARCHIVE_DTYPE
+
+        Raises:
+            BarArchiveError: Si no hay capacidad
+            CompactBarsError: Si las velas no entran sin pérdida en el layout
+                compacto (no se escribe nada)
+        """
+        if self._mm is None:
+            raise BarArchiveError(f"Archivo de velas cerrado: {self.path}")
+        length = self.length
+        end = length + len(rates)
+        if end > self.capacity:
+            raise BarArchiveError("Capacidad insuficiente para agregar velas")
+        if self.codec is not None:
+            rates = self.codec.encode(rates)
+
+        for name, column in self._columns.items():
+            column[length:end] = rates[name]
+        self._mm.flush()
+        self._header[1] = end
+        self._mm.flush()
+
+    def close(self) -> None:
+        """Libera el memory-map (necesario antes de reemplazar el archivo en Windows)."""
+        if self._mm is not None:
+            self._mm.flush()
+            self._columns = {}
+            self._header = np.zeros(5, dtype='<u8')  # Cerrado: length y capacity 0
+            self._mm = None
+
+
+class BarArchive:
+    """
+    Archivo histórico persistente de velas cerradas por (símbolo, timeframe).
+
+    Responde consultas por rango desde disco y solo pide al terminal los
+    tramos que faltan: el inicio anterior al archivo, la cola posterior a la
+    última vela archivada y los huecos internos sospechosos. Un hueco es
+    sospechoso si, descontando sábados y domingos, supera `gap_threshold_bars`
+    velas del timeframe (con un mínimo de MIN_GAP_THRESHOLD_SECONDS).
+    Cada hueco y el inicio del historial se consultan una sola vez por proceso
+    cuando el terminal responde; si no tiene velas, se considera un hueco real
+    del mercado o el inicio del historial del broker.
+
+    El lock del archivo solo protege el acceso a disco; las llamadas al
+    terminal se hacen con un lock por serie, de modo que una descarga lenta no
+    bloquea las consultas de otros símbolos.
+
+    Example:
+        >>> archive = BarArchive("data/bars")
+        >>> rates = archive.get_range(
+        ...     "EURUSD", Timeframe.M5, start_date, end_date,
+        ...     fetch=lambda s, e: mt5.copy_rates_range("EURUSD", tf, s, e)
+        ... )
+    """
+
+    DEFAULT_GAP_THRESHOLD_BARS = 3
+    MIN_GAP_THRESHOLD_SECONDS = 2 * 3600
+    DEFAULT_INITIAL_CAPACITY = 4096
+
+    # Fin de semana en hora del servidor: de sábado 00:00 a lunes 00:00.
+    # El epoch 345600 es el lunes 1970-01-05 00:00.
+    WEEK_ORIGIN = 4 * 86400
+    WEEK_SECONDS = 7 * 86400
+    WEEKEND_START = 5 * 86400
+
+    # Una vela es definitivamente cerrada si cerró hace más de este margen,
+    # sin importar el desfase de la hora del servidor respecto a UTC
+    CLOSED_MARGIN_SECONDS = 86400
+
+    def __init__(
+        self,
+        archive_dir: str,
+        gap_threshold_bars: int = DEFAULT_GAP_THRESHOLD_BARS,
+        gap_threshold_seconds: Optional[int] = None,
+        initial_capacity: int = DEFAULT_INITIAL_CAPACITY,
+        compact: Optional[str] = None
+    ):
+        """
+        Inicializa el BarArchive.
+
+        Args:
+            archive_dir: Directorio donde se guardan los archivos
+            gap_threshold_bars: Velas faltantes (sin contar fines de semana)
+                a partir de las cuales se considera un hueco a rellenar
+            gap_threshold_seconds: Umbral fijo en segundos para todos los
+                timeframes; None lo escala con `gap_threshold_bars`
+            initial_capacity: Filas reservadas al crear un archivo
+            compact: Layout compacto de los archivos que se escriban ("points"
+                o "float32"); None usa el layout de MT5. Las series que no se
+                pueden compactar sin pérdida se escriben sin compactar
+
+        Raises:
+            BarArchiveError: Si los parámetros son inválidos
+        """
+        if gap_threshold_bars <= 0:
+            raise BarArchiveError("gap_threshold_bars debe ser mayor a 0")
+        if gap_threshold_seconds is not None and gap_threshold_seconds <= 0:
+            raise BarArchiveError("gap_threshold_seconds debe ser mayor a 0")
+        if initial_capacity <= 0:
+            raise BarArchiveError("initial_capacity debe ser mayor a 0")
+        if compact is not None and compact not in COMPACT_MODES:
+            raise BarArchiveError(f"Modo compacto desconocido: {compact!r}")
+
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.gap_threshold_bars = gap_threshold_bars
+        self.gap_threshold_seconds = gap_threshold_seconds
+        self.initial_capacity = initial_capacity
+        self.compact = compact
+
+        self._files: Dict[Tuple[str, Any], ArchiveFile] = {}
+        self._checked_gaps: Set[Tuple[str, Any, int, int]] = set()
+        # Inicio más antiguo ya pedido al terminal por serie
+        self._checked_heads: Dict[Tuple[str, Any], int] = {}
+        self._series_locks: Dict[Tuple[str, Any], threading.Lock] = {}
+        self._lock = threading.RLock()
+        self._stats = {
+            "queries": 0,
+            "archive_only": 0,
+            "fetches": 0,
+            "bars_fetched": 0,
+            "bars_archived": 0
+        }
+
+    def get_range(
+        self,
+        symbol: str,
+        timeframe,
+        start_date: datetime,
+        end_date: datetime,
+        fetch: Callable[[datetime, datetime], Optional[np.ndarray]]
+    ) -> np.ndarray:
+        """
+        Obtiene las velas de [start_date, end_date], completando desde MT5 lo que falte.
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas (con `.value` en minutos)
+            start_date: Inicio del rango (naive = UTC)
+            end_date: Fin del rango (naive = UTC)
+            fetch: Función (desde, hasta) → velas MT5 o None
+
+        Returns:
+            Structured array con ARCHIVE_DTYPE en orden cronológico
+        """
+        start = to_epoch(start_date)
+        end = to_epoch(end_date)
+        tf_seconds = timeframe.value * 60
+        live_tail = np.empty(0, dtype=ARCHIVE_DTYPE)
+        fetched = False
+
+        with self._series_lock(symbol, timeframe):
+            with self._lock:
+                self._stats["queries"] += 1
+            bounds = self.bounds(symbol, timeframe)
+
+            head_key = (symbol, timeframe)
+            if bounds is None:
+                rates = self._fetch(fetch, start, end)
+                fetched = True
+                if rates is not None:
+                    self._checked_heads[head_key] = start
+                    if len(rates) > 0:
+                        live_tail = self._store_tail(symbol, timeframe, rates, tf_seconds)
+            else:
+                first, last = bounds
+
+                # Inicio anterior al archivo: todas las velas están cerradas.
+                # Si el terminal ya respondió desde `start` o antes, lo que
+                # falta no existe en el broker y no se vuelve a pedir.
+                if start < first and start < self._checked_heads.get(head_key, first):
+                    rates = self._fetch(fetch, start, first - 1)
+                    fetched = True
+                    if rates is not None:
+                        self._checked_heads[head_key] = start
+                        if len(rates) > 0:
+                            self.write(symbol, timeframe, rates)
+
+                # Huecos internos
+                for gap_start, gap_end in self.find_gaps(symbol, timeframe, start, end):
+                    key = (symbol, timeframe, gap_start, gap_end)
+                    if key in self._checked_gaps:
+                        continue
+                    rates = self._fetch(fetch, gap_start + 1, gap_end - 1)
+                    fetched = True
+                    if rates is None:
+                        continue  # Se reintenta en la próxima consulta
+                    self._checked_gaps.add(key)
+                    if len(rates) > 0:
+                        logger.info(
+                            f"Hueco rellenado en {symbol} {timeframe.name}: "
+                            f"{len(rates)} velas"
+                        )
+                        self.write(symbol, timeframe, rates)
+
+                # Cola posterior a la última vela archivada
+                if end >= last + tf_seconds:
+                    rates = self._fetch(fetch, last + 1, end)
+                    fetched = True
+                    if rates is not None and len(rates) > 0:
+                        live_tail = self._store_tail(symbol, timeframe, rates, tf_seconds)
+
+            with self._lock:
+                if not fetched:
+                    self._stats["archive_only"] += 1
+                result = self._read_range(symbol, timeframe, start, end)
+
+        # Agregar velas de la cola que no se archivaron (posible vela en formación)
+        if len(live_tail) > 0:
+            last_archived = result['time'][-1] if len(result) > 0 else None
+            mask = (live_tail['time'] >= start) & (live_tail['time'] <= end)
+            if last_archived is not None:
+                mask &= live_tail['time'] > last_archived
+            if mask.any():
+                result = np.concatenate([result, live_tail[mask]])
+
+        return result
+
+    def write(self, symbol: str, timeframe, rates) -> int:
+        """
+        Inserta velas cerradas en el archivo, ordenadas y sin duplicados.
+
+        Si todas las velas son posteriores a la última archivada se agregan al
+        final sin reescribir; en otro caso el archivo se fusiona y se reescribe
+        de forma atómica. Ante tiempos repetidos prevalecen las velas nuevas.
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            rates: Velas en formato MT5
+
+        Returns:
+            Número de velas escritas
+        """
+        rates = self._normalize(rates)
+        if len(rates) == 0:
+            return 0
+
+        with self._lock:
+            archive = self._open(symbol, timeframe)
+            tf_seconds = timeframe.value * 60
+
+            if archive is not None and archive.length > 0 and rates['time'][0] > archive.time[-1]:
+                appended = False
+                if archive.length + len(rates) <= archive.capacity:
+                    try:
+                        archive.append(rates)
+                        appended = True
+                    except CompactBarsError:
+                        pass  # Se reescribe con un layout que admita las velas nuevas
+                if not appended:
+                    self._rewrite(symbol, timeframe, np.concatenate([archive.read(), rates]), tf_seconds)
+            else:
+                existing = archive.read() if archive is not None else rates[:0]
+                combined = np.concatenate([existing, rates])
+                order = np.argsort(combined['time'], kind='stable')
+                combined = combined[order]
+                keep = np.append(combined['time'][1:] != combined['time'][:-1], True)
+                self._rewrite(symbol, timeframe, combined[keep], tf_seconds)
+
+            self._stats["bars_archived"] += len(rates)
+            return len(rates)
+
+    def bounds(self, symbol: str, timeframe) -> Optional[Tuple[int, int]]:
+        """
+        Obtiene el primer y último epoch archivados.
+
+        Returns:
+            Tupla (primero, último) o None si no hay velas archivadas
+        """
+        with self._lock:
+            archive = self._open(symbol, timeframe)
+            if archive is None or archive.length == 0:
+                return None
+            times = archive.time
+            return int(times[0]), int(times[-1])
+
+    def find_gaps(
+        self,
+        symbol: str,
+        timeframe,
+        start: int,
+        end: int
+    ) -> List[Tuple[int, int]]:
+        """
+        Detecta huecos internos del archivo dentro de [start, end].
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            start: Epoch inicial
+            end: Epoch final
+
+        Returns:
+            Lista de (epoch vela anterior, epoch vela siguiente) por hueco
+        """
+        with self._lock:
+            archive = self._open(symbol, timeframe)
+            if archive is None or archive.length < 2:
+                return []
+
+            times = archive.time
+            i = max(int(np.searchsorted(times, start, side='left')) - 1, 0)
+            j = int(np.searchsorted(times, end, side='right')) + 1
+            window = np.asarray(times[i:j], dtype=np.int64)
+            weekend = np.diff(self._weekend_seconds(window))
+            jumps = np.flatnonzero(
+                np.diff(window) - weekend > self._gap_threshold(timeframe)
+            )
+            return [(int(window[k]), int(window[k + 1])) for k in jumps]
+
+    def close(self) -> None:
+        """Cierra todos los archivos abiertos."""
+        with self._lock:
+            for archive in self._files.values():
+                archive.close()
+            self._files.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del archivo.
+
+        Returns:
+            Diccionario con consultas, consultas servidas solo desde disco,
+            llamadas al terminal y velas descargadas/archivadas
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _gap_threshold(self, timeframe) -> int:
+        """Separación (sin fines de semana) a partir de la cual hay un hueco."""
+        if self.gap_threshold_seconds is not None:
+            return self.gap_threshold_seconds
+        return max(
+            self.gap_threshold_bars * timeframe.value * 60,
+            self.MIN_GAP_THRESHOLD_SECONDS
+        )
+
+    @classmethod
+    def _weekend_seconds(cls, times: np.ndarray) -> np.ndarray:
+        """Segundos de fin de semana transcurridos desde WEEK_ORIGIN hasta cada epoch."""
+        weeks, offset = np.divmod(times - cls.WEEK_ORIGIN, cls.WEEK_SECONDS)
+        weekend = cls.WEEK_SECONDS - cls.WEEKEND_START
+        return weeks * weekend + np.maximum(offset - cls.WEEKEND_START, 0)
+
+    def _series_lock(self, symbol: str, timeframe) -> threading.Lock:
+        """Lock que serializa las descargas de una serie."""
+        with self._lock:
+            return self._series_locks.setdefault((symbol, timeframe), threading.Lock())
+
+    def _fetch(self, fetch, start: int, end: int) -> Optional[np.ndarray]:
+        """Pide un tramo al terminal (fuera del lock del archivo) y lo normaliza."""
+        if end < start:
+            return None
+        with self._lock:
+            self._stats["fetches"] += 1
+        rates = fetch(from_epoch(start), from_epoch(end))
+        if rates is None:
+            logger.warning(f"El terminal no retornó velas para {from_epoch(start)} - {from_epoch(end)}")
+            return None
+        rates = self._normalize(rates)
+        with self._lock:
+            self._stats["bars_fetched"] += len(rates)
+        return rates
+
+    def _store_tail(self, symbol: str, timeframe, rates: np.ndarray, tf_seconds: int) -> np.ndarray:
+        """
+        Archiva una cola descargada hasta el presente y retorna la cola completa.
+
+        Todas las velas salvo la última tienen una sucesora y por lo tanto
+        están cerradas. La última solo se archiva si cerró hace más de
+        CLOSED_MARGIN_SECONDS.
+        """
+        now = int(datetime.now(timezone.utc).timestamp())
+        closed = rates[:-1]
+        if int(rates['time'][-1]) + tf_seconds <= now - self.CLOSED_MARGIN_SECONDS:
+            closed = rates
+        if len(closed) > 0:
+            self.write(symbol, timeframe, closed)
+        return rates
+
+    def _read_range(self, symbol: str, timeframe, start: int, end: int) -> np.ndarray:
+        """Lee [start, end] con búsqueda binaria sobre la columna de tiempo."""
+        archive = self._open(symbol, timeframe)
+        if archive is None or archive.length == 0:
+            return np.empty(0, dtype=ARCHIVE_DTYPE)
+        times = archive.time
+        i = int(np.searchsorted(times, start, side='left'))
+        j = int(np.searchsorted(times, end, side='right'))
+        return archive.read(i, j)
+
+    def _path(self, symbol: str, timeframe) -> Path:
+        """Ruta del archivo de una serie."""
+        return self.archive_dir / f"{symbol}_{timeframe.name}.bars"
+
+    def _open(self, symbol: str, timeframe) -> Optional[ArchiveFile]:
+        """Abre (y mantiene abierto) el archivo de una serie si existe."""
+        key = (symbol, timeframe)
+        if key not in self._files:
+            path = self._path(symbol, timeframe)
+            if not path.exists():
+                return None
+            self._files[key] = ArchiveFile(path)
+        return self._files[key]
+
+    def _rewrite(self, symbol: str, timeframe, rates: np.ndarray, tf_seconds: int) -> None:
+        """Reescribe la serie completa en un archivo nuevo y lo reemplaza atómicamente."""
+        path = self._path(symbol, timeframe)
+        tmp_path = path.with_suffix('.tmp')
+        capacity = max(self.initial_capacity, len(rates) * 2)
+
+        new_file = ArchiveFile.create(tmp_path, capacity, tf_seconds, self._codec_for(rates))
+        new_file.append(rates)
+        new_file.close()
+
+        old = self._files.pop((symbol, timeframe), None)
+        if old is not None:
+            old.close()
+        os.replace(tmp_path, path)
+        self._files[(symbol, timeframe)] = ArchiveFile(path)
+
+    def _codec_for(self, rates: np.ndarray) -> Optional[BarCodec]:
+        """Codec compacto para una serie, o None si no se puede compactar sin pérdida."""
+        if self.compact is None or len(rates) == 0:
+            return None
+        try:
+            codec = BarCodec.infer(rates, self.compact)
+            codec.encode(rates)
+        except CompactBarsError:
+            logger.info("Serie sin compactar: los precios no admiten el layout compacto")
+            return None
+        return codec
+
+    @staticmethod
+    def _normalize(rates) -> np.ndarray:
+        """Convierte velas MT5 (structured array o tuplas) a ARCHIVE_DTYPE."""
+        if isinstance(rates, np.ndarray) and rates.dtype.names:
+            if rates.dtype == ARCHIVE_DTYPE:
+                return rates
+            out = np.zeros(len(rates), dtype=ARCHIVE_DTYPE)
+            for name in ARCHIVE_DTYPE.names or ():
+                if name in rates.dtype.names:
+                    out[name] = rates[name]
+            return out
+        if len(rates) == 0:
+            return np.empty(0, dtype=ARCHIVE_DTYPE)
+        return np.array([tuple(r) for r in rates], dtype=ARCHIVE_DTYPE)
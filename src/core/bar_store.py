@@ -0,0 +1,360 @@
+"""
+BarStore - Almacén incremental de velas por (símbolo, timeframe).
+
+Este módulo mantiene en memoria, para cada par (símbolo, timeframe), las velas
+cerradas ya descargadas de MT5 más la vela en formación. Recuerda el tiempo de
+la última vela cerrada para que el extractor solo pida al terminal las velas
+nuevas, y sirve cualquier `count` como un slice del histórico acumulado.
+
+Opcionalmente las velas cerradas se guardan en un layout compacto (precios
+en puntos int32 o float32, ver compact_bars) y se decodifican de forma exacta
+solo al servir cada slice.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-12
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (store incremental)
+"""
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Any
+
+import numpy as np
+
+from src.core.compact_bars import COMPACT_MODES, BarCodec, CompactBarsError
+
+
+class BarStoreError(Exception):
+    """Excepción para errores del almacén de velas."""
+    pass
+
+
+@dataclass
+class BarSeries:
+    """
+    Serie de velas almacenada para un (símbolo, timeframe).
+
+    Attributes:
+        closed: Structured array con las velas cerradas (orden cronológico),
+            en el layout compacto de `codec` si se indica
+        current: Structured array de 0 o 1 fila con la vela en formación
+        codec: Codec de las velas cerradas (None = layout de MT5)
+        max_bars: Máximo de velas cerradas retenidas por esta serie
+        exhausted: True si el terminal no tiene velas más antiguas que las
+            almacenadas (la descarga completa retornó menos de lo pedido)
+    """
+    closed: np.ndarray
+    current: np.ndarray
+    codec: Optional[BarCodec] = None
+    max_bars: int = 0
+    exhausted: bool = False
+
+    @property
+    def last_closed_time(self) -> Optional[int]:
+        """Epoch (segundos) de la última vela cerrada, o None si no hay."""
+        if len(self.closed) == 0:
+            return None
+        return int(self.closed['time'][-1])
+
+    def closed_rates(self, count: int) -> np.ndarray:
+        """Últimas `count` velas cerradas en el layout de MT5 (copia)."""
+        closed = self.closed[-count:] if count else self.closed[:0]
+        if self.codec is not None:
+            return self.codec.decode(closed)
+        return closed.copy()
+
+
+class BarStore:
+    """
+    Almacén append-only de velas por (símbolo, timeframe).
+
+    Cada respuesta del terminal termina con la vela en formación (posición 0
+    de MT5). El store separa esa vela del resto: las velas cerradas solo se
+    agregan al final, mientras que la vela en formación se reemplaza en cada
+    actualización.
+
+    Cada serie retiene al menos `max_bars` velas cerradas, o más si una
+    descarga completa pidió una ventana mayor. Si el terminal retornó menos
+    velas de las pedidas, la serie queda marcada como agotada y `covers`
+    la considera completa, así las series con poca historia también se
+    actualizan de forma incremental.
+
+    Es thread-safe: todas las operaciones se realizan bajo un lock interno.
+
+    Example:
+        >>> store = BarStore(max_bars=5000)
+        >>> store.replace("EURUSD", Timeframe.H1, rates, requested=201)
+        >>> if store.covers("EURUSD", Timeframe.H1, 200):
+        ...     last = store.last_closed_time("EURUSD", Timeframe.H1)
+        ...     store.append("EURUSD", Timeframe.H1, new_rates)
+        >>> window = store.slice("EURUSD", Timeframe.H1, 200, include_current=False)
+    """
+
+    DEFAULT_MAX_BARS = 5000
+
+    def __init__(self, max_bars: int = DEFAULT_MAX_BARS, compact: Optional[str] = None):
+        """
+        Inicializa el BarStore.
+
+        Args:
+            max_bars: Máximo de velas cerradas retenidas por serie
+            compact: Layout compacto de las velas cerradas ("points" o
+                "float32"); None las guarda en el formato de MT5. Las series
+                que no se pueden compactar sin pérdida se guardan sin compactar
+
+        Raises:
+            BarStoreError: Si max_bars no es positivo o compact es desconocido
+        """
+        if max_bars <= 0:
+            raise BarStoreError("max_bars debe ser mayor a 0")
+        if compact is not None and compact not in COMPACT_MODES:
+            raise BarStoreError(f"Modo compacto desconocido: {compact!r}")
+
+        self.max_bars = max_bars
+        self.compact = compact
+        self._series: Dict[Tuple[str, Any], BarSeries] = {}
+        self._lock = threading.Lock()
+
+    def replace(
+        self,
+        symbol: str,
+        timeframe,
+        rates: np.ndarray,
+        point: Optional[float] = None,
+        requested: Optional[int] = None
+    ) -> None:
+        """
+        Reemplaza la serie completa con una descarga desde la posición actual.
+
+        La última fila de `rates` se considera la vela en formación.
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            rates: Structured array con campo 'time', orden cronológico
+            point: Punto del símbolo para el layout compacto (si no se
+                indica, los dígitos se infieren de las velas)
+            requested: Velas pedidas al terminal (incluida la vela en
+                formación); la serie retiene al menos requested - 1 velas
+                cerradas y queda agotada si `rates` trae menos de lo pedido
+        """
+        if len(rates) == 0:
+            raise BarStoreError(f"No se puede almacenar una serie vacía para {symbol}")
+
+        max_bars = max(self.max_bars, (requested or 0) - 1)
+        exhausted = requested is not None and len(rates) < requested
+        closed, _ = self._trim(rates[:-1].copy(), max_bars)
+        codec, closed = self._compact(closed, point)
+        with self._lock:
+            self._series[(symbol, timeframe)] = BarSeries(
+                closed=closed,
+                current=rates[-1:].copy(),
+                codec=codec,
+                max_bars=max_bars,
+                exhausted=exhausted
+            )
+
+    def append(self, symbol: str, timeframe, rates: np.ndarray) -> int:
+        """
+        Agrega velas nuevas posteriores a la última vela cerrada.
+
+        Las filas con tiempo menor o igual a la última vela cerrada se
+        ignoran. La última fila recibida pasa a ser la vela en formación.
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            rates: Structured array con las velas nuevas
+
+        Returns:
+            Número de velas cerradas agregadas
+
+        Raises:
+            BarStoreError: Si la serie no existe en el store
+        """
+        with self._lock:
+            series = self._series.get((symbol, timeframe))
+            if series is None:
+                raise BarStoreError(
+                    f"No hay serie almacenada para {symbol} {getattr(timeframe, 'name', timeframe)}"
+                )
+
+            last_closed = series.last_closed_time
+            if last_closed is not None and len(rates) > 0:
+                rates = rates[rates['time'] > last_closed]
+
+            if len(rates) == 0:
+                return 0
+
+            new_closed = rates[:-1]
+            if len(new_closed) > 0:
+                self._append_closed(series, new_closed)
+            series.current = rates[-1:].copy()
+
+            return len(new_closed)
+
+    def slice(
+        self,
+        symbol: str,
+        timeframe,
+        count: int,
+        include_current: bool = True
+    ) -> Optional[np.ndarray]:
+        """
+        Retorna las últimas `count` velas de la serie.
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            count: Número de velas a retornar
+            include_current: Si True, la última vela es la vela en formación
+
+        Returns:
+            Structured array con hasta `count` velas, o None si no hay serie
+        """
+        with self._lock:
+            series = self._series.get((symbol, timeframe))
+            if series is None:
+                return None
+
+            if include_current:
+                closed_needed = max(count - len(series.current), 0)
+                closed = series.closed_rates(closed_needed)
+                return np.concatenate([closed, series.current])[-count:]
+
+            return series.closed_rates(count)
+
+    def last_closed_time(self, symbol: str, timeframe) -> Optional[int]:
+        """
+        Obtiene el epoch de la última vela cerrada almacenada.
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+
+        Returns:
+            Epoch en segundos, o None si no hay velas cerradas
+        """
+        with self._lock:
+            series = self._series.get((symbol, timeframe))
+            return series.last_closed_time if series else None
+
+    def covers(self, symbol: str, timeframe, closed_needed: int) -> bool:
+        """
+        Indica si la serie puede servir `closed_needed` velas cerradas.
+
+        Una serie agotada cubre cualquier cantidad: el terminal no tiene
+        velas más antiguas, así que basta con actualizarla incrementalmente.
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            closed_needed: Velas cerradas requeridas
+
+        Returns:
+            True si la serie existe, tiene velas cerradas y alcanza
+        """
+        with self._lock:
+            series = self._series.get((symbol, timeframe))
+            if series is None or series.last_closed_time is None:
+                return False
+            return series.exhausted or len(series.closed) >= closed_needed
+
+    def closed_count(self, symbol: str, timeframe) -> int:
+        """
+        Obtiene el número de velas cerradas almacenadas.
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+
+        Returns:
+            Número de velas cerradas (0 si no hay serie)
+        """
+        with self._lock:
+            series = self._series.get((symbol, timeframe))
+            return len(series.closed) if series else 0
+
+    def clear(self) -> None:
+        """Elimina todas las series almacenadas."""
+        with self._lock:
+            self._series.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del store.
+
+        Returns:
+            Diccionario con número de series, series compactadas, velas y
+            bytes retenidos
+        """
+        with self._lock:
+            total_bars = sum(len(s.closed) + len(s.current) for s in self._series.values())
+            total_bytes = sum(s.closed.nbytes + s.current.nbytes for s in self._series.values())
+            return {
+                "series": len(self._series),
+                "compact_series": sum(s.codec is not None for s in self._series.values()),
+                "bars": total_bars,
+                "bytes": total_bytes,
+                "max_bars": self.max_bars
+            }
+
+    @staticmethod
+    def _trim(closed: np.ndarray, max_bars: int) -> Tuple[np.ndarray, bool]:
+        """
+        Recorta las velas cerradas más antiguas que excedan `max_bars`.
+
+        Returns:
+            Tupla (velas retenidas, True si se descartaron velas)
+        """
+        if len(closed) > max_bars:
+            return closed[-max_bars:].copy(), True
+        return closed, False
+
+    def _compact(
+        self,
+        closed: np.ndarray,
+        point: Optional[float] = None
+    ) -> Tuple[Optional[BarCodec], np.ndarray]:
+        """
+        Compacta velas cerradas si el store lo tiene habilitado.
+
+        Returns:
+            Tupla (codec o None, velas en el layout correspondiente)
+        """
+        if self.compact is None or len(closed) == 0:
+            return None, closed
+        try:
+            if point is not None:
+                codec = BarCodec.for_point(point, self.compact)
+            else:
+                codec = BarCodec.infer(closed, self.compact)
+            return codec, codec.encode(closed)
+        except CompactBarsError:
+            return None, closed
+
+    def _append_closed(self, series: BarSeries, new_closed: np.ndarray) -> None:
+        """Agrega velas cerradas respetando el layout de la serie."""
+        max_bars = max(series.max_bars, self.max_bars)
+        if series.codec is None:
+            if len(series.closed) == 0:
+                closed, trimmed = self._trim(new_closed.copy(), max_bars)
+                series.codec, series.closed = self._compact(closed)
+            else:
+                series.closed, trimmed = self._trim(
+                    np.concatenate([series.closed, new_closed]), max_bars
+                )
+        else:
+            try:
+                encoded = series.codec.encode(new_closed)
+            except CompactBarsError:
+                # Velas con más dígitos o fuera de rango: se vuelve a compactar todo
+                closed = np.concatenate([series.codec.decode(series.closed), new_closed])
+                closed, trimmed = self._trim(closed, max_bars)
+                series.codec, series.closed = self._compact(closed)
+            else:
+                series.closed, trimmed = self._trim(
+                    np.concatenate([series.closed, encoded]), max_bars
+                )
+        if trimmed:
+            # Se descartaron velas antiguas: el terminal sí tiene más historia
+            series.exhausted = False
@@ -118,6 +118,21 @@ class CandleWaiter:
         )
     
     def get_next_candle_close_time(self, current_time: datetime) -> datetime:
+        """
+        Calcula el próximo cierre de vela para el timeframe configurado.
+        
+        Delega en next_close_for.
+        
+        Args:
+            current_time: Momento actual (timezone aware)
+            
+        Returns:
+            datetime del próximo cierre de vela
+        """
+        return self.next_close_for(self.timeframe, current_time)
+    
+    @classmethod
+    def next_close_for(cls, timeframe: str, current_time: datetime) -> datetime:
         """
         Calcula el momento exacto del próximo cierre de vela.
         
@@ -130,13 +145,28 @@ class CandleWaiter:
         - Para H4: Redondear al próximo múltiplo de 4 horas (00, 04, 08, 12, 16, 20)
         - Para D1: Medianoche del día siguiente
         
+        Es independiente de la instancia para que otros módulos (p. ej. el
+        caché del extractor) calculen el cierre exactamente igual.
+        
         Args:
+            timeframe: Timeframe MT5 ("M1", "M5", "H1", etc.)
             current_time: Momento actual (timezone aware)
             
         Returns:
             datetime del próximo cierre de vela
+            
+        Raises:
+            TimeframeNotSupportedError: Si el timeframe no está soportado
         """
-        if self.timeframe == "D1":
+        if timeframe not in cls.SUPPORTED_TIMEFRAMES:
+            supported = ", ".join(cls.SUPPORTED_TIMEFRAMES.keys())
+            raise TimeframeNotSupportedError(
+                f"Timeframe '{timeframe}' no soportado. "
+                f"Soportados: {supported}"
+            )
+        timeframe_seconds = cls.SUPPORTED_TIMEFRAMES[timeframe]
+        
+        if timeframe == "D1":
             # Vela diaria cierra a medianoche
             next_day = current_time.date() + timedelta(days=1)
             return datetime.combine(
@@ -145,7 +175,7 @@ class CandleWaiter:
                 tzinfo=current_time.tzinfo
             )
         
-        elif self.timeframe == "H4":
+        elif timeframe == "H4":
             # Velas H4 cierran a las 00, 04, 08, 12, 16, 20 horas
             current_hour = current_time.hour
             
@@ -176,7 +206,7 @@ class CandleWaiter:
                 tzinfo=current_time.tzinfo
             )
         
-        elif self.timeframe == "H1":
+        elif timeframe == "H1":
             # Vela horaria cierra en la próxima hora completa
             next_hour = current_time.replace(minute=0, second=0, microsecond=0)
             next_hour += timedelta(hours=1)
@@ -190,20 +220,20 @@ class CandleWaiter:
         else:
             # Timeframes de minutos (M1, M5, M15, M30)
             # Redondear al próximo múltiplo de minutos
-            minutes = self.timeframe_seconds // 60
+            minutes = timeframe_seconds // 60
             
             # Calcular timestamp actual
             current_timestamp = int(current_time.timestamp())
             
             # Redondear al próximo múltiplo de segundos del timeframe
-            remainder = current_timestamp % self.timeframe_seconds
+            remainder = current_timestamp % timeframe_seconds
             
             if remainder == 0:
                 # Estamos justo en un cierre, siguiente es +timeframe
-                next_timestamp = current_timestamp + self.timeframe_seconds
+                next_timestamp = current_timestamp + timeframe_seconds
             else:
                 # Redondear hacia arriba
-                next_timestamp = current_timestamp + (self.timeframe_seconds - remainder)
+                next_timestamp = current_timestamp + (timeframe_seconds - remainder)
             
             return datetime.fromtimestamp(next_timestamp, tz=current_time.tzinfo)
     
@@ -0,0 +1,482 @@
+"""
+ChartPlotter - Servicio de imágenes de velas con pool de procesos y caché.
+
+Los bots visuales (2, 4 y 5) envían a la IA una imagen de velas por
+timeframe y activo. Este módulo renderiza esas imágenes en un pool de
+procesos, fuera del hilo del ciclo, y las guarda en un caché direccionado
+por contenido: la clave es el hash de (símbolo, timeframe, última vela,
+estilo). El caché guarda también el payload base64 listo para la solicitud
+a la IA, de modo que los bots que comparten un gráfico no lo renderizan ni
+lo codifican dos veces.
+
+El renderizador es una función de nivel de módulo (serializable con pickle)
+que recibe un ChartRequest y retorna los bytes PNG. Por defecto se usa el
+renderizador raster de NumPy (chart_raster); render_matplotlib queda como
+alternativa e importa matplotlib solo dentro del proceso que renderiza.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-15
+Ticket: T24 - Generación de imágenes de velas por timeframe
+"""
+import base64
+import functools
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.chart_raster import render_raster
+from src.core.indicators_calculator import EMA_FAST_PERIOD, EMA_SLOW_PERIOD, calculate_ema
+
+
+class ChartPlotterError(Exception):
+    """Excepción para errores de renderizado de gráficos."""
+    pass
+
+
+@dataclass(frozen=True)
+class ChartStyle:
+    """
+    Estilo de un gráfico de velas.
+
+    Attributes:
+        width: Ancho en pixeles
+        height: Alto en pixeles
+        bars: Velas dibujadas (las últimas)
+        show_volume: Dibujar barras de volumen
+        show_ema: Dibujar EMA 20 y EMA 50 (Bot 3); False = solo velas
+        background: Color de fondo
+        up_color: Color de velas alcistas
+        down_color: Color de velas bajistas
+        ema_fast_color: Color de la EMA 20
+        ema_slow_color: Color de la EMA 50
+    """
+    width: int = 800
+    height: int = 500
+    bars: int = 100
+    show_volume: bool = True
+    show_ema: bool = False
+    background: str = "#ffffff"
+    up_color: str = "#26a69a"
+    down_color: str = "#ef5350"
+    ema_fast_color: str = "#1e88e5"
+    ema_slow_color: str = "#fb8c00"
+
+    def __post_init__(self):
+        if self.width <= 0 or self.height <= 0:
+            raise ChartPlotterError("width y height deben ser mayores a 0")
+        if self.bars <= 0:
+            raise ChartPlotterError("bars debe ser mayor a 0")
+
+
+@dataclass
+class ChartRequest:
+    """
+    Datos necesarios para dibujar un gráfico (serializable al pool).
+
+    Attributes:
+        symbol: Símbolo del instrumento
+        timeframe: Nombre del timeframe (ej: "M5")
+        time: Epochs de las velas
+        open, high, low, close, volume: Columnas OHLCV
+        style: Estilo del gráfico
+    """
+    symbol: str
+    timeframe: str
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    style: ChartStyle = field(default_factory=ChartStyle)
+
+    @classmethod
+    def from_ohlcv(cls, ohlcv, style: Optional[ChartStyle] = None) -> 'ChartRequest':
+        """
+        Construye la solicitud con las últimas `style.bars` velas.
+
+        Las columnas se copian para que solo viaje al pool la ventana dibujada.
+
+        Args:
+            ohlcv: OHLCVData con velas cerradas
+            style: Estilo del gráfico (por defecto ChartStyle())
+
+        Returns:
+            ChartRequest listo para renderizar
+
+        Raises:
+            ChartPlotterError: Si no hay velas
+        """
+        if ohlcv.count == 0:
+            raise ChartPlotterError(f"{ohlcv.symbol} no tiene velas para graficar")
+        style = style or ChartStyle()
+        window = slice(-style.bars, None)
+        return cls(
+            symbol=ohlcv.symbol,
+            timeframe=getattr(ohlcv.timeframe, 'name', str(ohlcv.timeframe)),
+            time=np.array(ohlcv.time[window], dtype=np.int64),
+            open=np.array(ohlcv.open[window], dtype=np.float64),
+            high=np.array(ohlcv.high[window], dtype=np.float64),
+            low=np.array(ohlcv.low[window], dtype=np.float64),
+            close=np.array(ohlcv.close[window], dtype=np.float64),
+            volume=np.array(ohlcv.volume[window], dtype=np.float64),
+            style=style
+        )
+
+    @property
+    def last_bar_time(self) -> int:
+        """Epoch de la última vela dibujada."""
+        return int(self.time[-1])
+
+    @property
+    def cache_key(self) -> str:
+        """Hash SHA-256 de (símbolo, timeframe, última vela, estilo)."""
+        content = repr((self.symbol, self.timeframe, self.last_bar_time, self.style))
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class ChartImage:
+    """
+    Imagen renderizada y su payload para la IA.
+
+    Attributes:
+        key: Clave de contenido (ChartRequest.cache_key)
+        symbol: Símbolo del instrumento
+        timeframe: Nombre del timeframe
+        last_bar_time: Epoch de la última vela dibujada
+        png: Bytes PNG
+        base64: PNG codificado en base64 (ASCII)
+        render_ms: Tiempo de renderizado en el proceso trabajador
+        mime_type: Tipo MIME de la imagen
+    """
+    key: str
+    symbol: str
+    timeframe: str
+    last_bar_time: int
+    png: bytes
+    base64: str
+    render_ms: float
+    mime_type: str = "image/png"
+
+    def to_payload(self) -> Dict[str, str]:
+        """
+        Parte inline de la solicitud a la IA.
+
+        Returns:
+            Dict con mime_type y data (base64)
+        """
+        return {"mime_type": self.mime_type, "data": self.base64}
+
+
+def render_matplotlib(request: ChartRequest) -> bytes:
+    """
+    Renderiza velas (y opcionalmente volumen y EMAs) con matplotlib.
+
+    matplotlib se importa aquí para no cargarlo en el proceso del bot.
+
+    Args:
+        request: Datos y estilo del gráfico
+
+    Returns:
+        Bytes PNG
+
+    Raises:
+        ChartPlotterError: Si matplotlib no está instalado
+    """
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError as e:
+        raise ChartPlotterError("matplotlib no está instalado") from e
+
+    style = request.style
+    dpi = 100
+    rows = 2 if style.show_volume else 1
+    fig, axes = plt.subplots(
+        rows, 1, sharex=True, squeeze=False,
+        figsize=(style.width / dpi, style.height / dpi), dpi=dpi,
+        gridspec_kw={"height_ratios": [4, 1][:rows]}
+    )
+    price_ax = axes[0][0]
+    fig.patch.set_facecolor(style.background)
+
+    x = np.arange(len(request.close))
+    up = request.close >= request.open
+    colors = np.where(up, style.up_color, style.down_color)
+    price_ax.vlines(x, request.low, request.high, colors=colors, linewidth=1)
+    price_ax.bar(
+        x, np.abs(request.close - request.open), bottom=np.minimum(request.open, request.close),
+        color=colors, width=0.6
+    )
+    if style.show_ema:
+        price_ax.plot(x, calculate_ema(request.close, EMA_FAST_PERIOD), color=style.ema_fast_color, linewidth=1)
+        price_ax.plot(x, calculate_ema(request.close, EMA_SLOW_PERIOD), color=style.ema_slow_color, linewidth=1)
+    if style.show_volume:
+        axes[1][0].bar(x, request.volume, color=colors, width=0.6)
+    price_ax.set_title(f"{request.symbol} {request.timeframe}")
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, facecolor=style.background)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def _render_in_worker(
+    renderer: Callable[[ChartRequest], bytes],
+    request: ChartRequest
+) -> Tuple[bytes, float]:
+    """Ejecuta el renderizador en el proceso trabajador y mide su duración."""
+    start = time.perf_counter()
+    png = renderer(request)
+    return png, (time.perf_counter() - start) * 1000
+
+
+class ChartRenderService:
+    """
+    Renderizado de gráficos en un pool de procesos con caché por contenido.
+
+    - Las solicitudes cuyo contenido ya está en caché no se renderizan.
+    - Solicitudes idénticas en vuelo (mismo lote o distintos hilos) se
+      agrupan sobre un único renderizado.
+    - La codificación base64 se hace una vez y queda en el caché.
+
+    Con max_workers=0 se renderiza en el proceso actual (sin pool).
+
+    Example:
+        >>> service = ChartRenderService(max_workers=2)
+        >>> images = service.render_many([
+        ...     ChartRequest.from_ohlcv(data[tf]) for tf in (M5, M15, H1)
+        ... ])
+        >>> parts = [image.to_payload() for image in images]
+    """
+
+    DEFAULT_CACHE_ENTRIES = 256
+
+    def __init__(
+        self,
+        renderer: Callable[[ChartRequest], bytes] = render_raster,
+        max_workers: Optional[int] = None,
+        cache_entries: int = DEFAULT_CACHE_ENTRIES
+    ):
+        """
+        Inicializa el servicio.
+
+        Args:
+            renderer: Función de nivel de módulo ChartRequest → PNG
+            max_workers: Procesos del pool (None = CPUs, 0 = sin pool)
+            cache_entries: Imágenes máximas en el caché (LRU)
+
+        Raises:
+            ChartPlotterError: Si los parámetros son inválidos
+        """
+        if max_workers is not None and max_workers < 0:
+            raise ChartPlotterError("max_workers no puede ser negativo")
+        if cache_entries <= 0:
+            raise ChartPlotterError("cache_entries debe ser mayor a 0")
+
+        self.renderer = renderer
+        self.max_workers = max_workers
+        self.cache_entries = cache_entries
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, ChartImage]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "renders": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "errors": 0,
+            "render_ms": 0.0
+        }
+        self._lock = threading.Lock()
+
+    def render(self, request: ChartRequest) -> ChartImage:
+        """
+        Renderiza (o recupera del caché) un gráfico.
+
+        Args:
+            request: Datos y estilo del gráfico
+
+        Returns:
+            ChartImage con PNG y base64
+
+        Raises:
+            ChartPlotterError: Si el renderizado falla
+        """
+        return self.render_many([request])[0]
+
+    def render_many(self, requests: Sequence[ChartRequest]) -> List[ChartImage]:
+        """
+        Renderiza un lote en paralelo; cada imagen distinta se renderiza una vez.
+
+        Args:
+            requests: Solicitudes (p. ej. 3 timeframes por activo)
+
+        Returns:
+            Imágenes en el mismo orden que las solicitudes
+
+        Raises:
+            ChartPlotterError: Si algún renderizado falla
+        """
+        futures: List[Future] = []
+        owned: Dict[str, Tuple[Future, ChartRequest]] = {}
+
+        with self._lock:
+            for request in requests:
+                key = request.cache_key
+                self._stats["requests"] += 1
+                image = self._cache.get(key)
+                if image is not None:
+                    self._cache.move_to_end(key)
+                    self._stats["hits"] += 1
+                    done: Future = Future()
+                    done.set_result(image)
+                    futures.append(done)
+                elif key in self._pending:
+                    self._stats["coalesced"] += 1
+                    futures.append(self._pending[key])
+                else:
+                    future: Future = Future()
+                    self._pending[key] = future
+                    owned[key] = (future, request)
+                    futures.append(future)
+
+        self._dispatch(owned)
+
+        images = []
+        for future in futures:
+            try:
+                images.append(future.result())
+            except ChartPlotterError:
+                raise
+            except Exception as e:
+                raise ChartPlotterError(f"Error renderizando gráfico: {e}") from e
+        return images
+
+    def get_cached(self, request: ChartRequest) -> Optional[ChartImage]:
+        """Imagen en caché para la solicitud, o None (no cuenta como acceso)."""
+        with self._lock:
+            return self._cache.get(request.cache_key)
+
+    def clear_cache(self) -> None:
+        """Elimina las imágenes en caché."""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del servicio.
+
+        Returns:
+            Diccionario con solicitudes, aciertos, renderizados, agrupados,
+            desalojos, errores, tiempo de renderizado y tamaño del caché
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._cache)
+            stats["cache_bytes"] = sum(len(i.png) + len(i.base64) for i in self._cache.values())
+        requests = stats["requests"]
+        stats["hit_rate"] = stats["hits"] / requests if requests else 0.0
+        return stats
+
+    def close(self) -> None:
+        """Cierra el pool de procesos."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'ChartRenderService':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _dispatch(self, owned: Dict[str, Tuple[Future, ChartRequest]]) -> None:
+        """Renderiza las solicitudes propias (en el pool o en línea)."""
+        if not owned:
+            return
+
+        if self.max_workers == 0:
+            for key, (future, request) in owned.items():
+                try:
+                    result = _render_in_worker(self.renderer, request)
+                except Exception as e:
+                    self._fail(key, future, e)
+                else:
+                    self._complete(key, future, request, result)
+            return
+
+        executor = self._get_executor()
+        for key, (future, request) in owned.items():
+            try:
+                worker = executor.submit(_render_in_worker, self.renderer, request)
+            except Exception as e:
+                self._fail(key, future, e)
+                continue
+            worker.add_done_callback(
+                functools.partial(self._on_worker_done, key, future, request)
+            )
+
+    def _on_worker_done(self, key: str, future: Future, request: ChartRequest, done: Future) -> None:
+        """Callback del pool: guarda la imagen o propaga el error."""
+        error = done.exception()
+        if error is not None:
+            self._fail(key, future, error)
+        else:
+            self._complete(key, future, request, done.result())
+
+    def _complete(
+        self,
+        key: str,
+        future: Future,
+        request: ChartRequest,
+        result: Tuple[bytes, float]
+    ) -> None:
+        """Codifica en base64 una sola vez, guarda en caché y resuelve el futuro."""
+        png, render_ms = result
+        image = ChartImage(
+            key=key,
+            symbol=request.symbol,
+            timeframe=request.timeframe,
+            last_bar_time=request.last_bar_time,
+            png=png,
+            base64=base64.b64encode(png).decode("ascii"),
+            render_ms=render_ms
+        )
+        with self._lock:
+            self._cache[key] = image
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._stats["renders"] += 1
+            self._stats["render_ms"] += render_ms
+            self._pending.pop(key, None)
+        future.set_result(image)
+
+    def _fail(self, key: str, future: Future, error: BaseException) -> None:
+        """Libera la clave en vuelo y propaga el error a quienes esperan."""
+        with self._lock:
+            self._stats["errors"] += 1
+            self._pending.pop(key, None)
+        if not isinstance(error, ChartPlotterError):
+            error = ChartPlotterError(f"Error renderizando gráfico: {error}")
+        future.set_exception(error)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Crea el pool de procesos la primera vez que se necesita."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
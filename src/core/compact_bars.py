@@ -0,0 +1,261 @@
+"""
+Representación compacta de velas para históricos largos en memoria y disco.
+
+Las velas de MT5 ocupan 60 bytes por fila (precios float64 y volúmenes
+uint64) y el DataFrame de OHLCVData agrega otros 48. Para mantener historia
+profunda de más de 30 instrumentos en varios timeframes este módulo ofrece
+dos layouts opcionales:
+
+    - "points": precios como enteros int32 en puntos del símbolo
+      (precio * 10^digits).
+    - "float32": precios en float32, solo si su precisión alcanza para
+      recuperar el precio exacto redondeando a los dígitos del símbolo.
+
+En ambos los volúmenes se reducen a int32. La decodificación es vectorizada
+y exacta: los precios de MT5 son decimales con `digits` dígitos, y dividir
+el entero de puntos por 10^digits produce el mismo float64 que entregó el
+terminal. La codificación verifica ese ida y vuelta y falla con
+CompactBarsError si no se cumple, de modo que nunca se pierde información en
+silencio.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-18
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (almacenamiento compacto)
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable
+
+import numpy as np
+
+from src.core.mt5_types import MT5_RATES_DTYPE, digits_from_point
+
+
+# Layout completo de copy_rates_* de MT5 (el que se decodifica)
+RATES_DTYPE = MT5_RATES_DTYPE
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+VOLUME_FIELDS = ('tick_volume', 'real_volume')
+
+COMPACT_MODES = ("points", "float32")
+
+# Columnas del DataFrame de OHLCVData (time, open, high, low, close, volume)
+DATAFRAME_BYTES_PER_BAR = 6 * 8
+
+MAX_DIGITS = 8
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def _compact_dtype(price_type: str) -> np.dtype:
+    """Layout compacto con el tipo de precio indicado."""
+    return np.dtype([
+        ('time', '<i8'),
+        ('open', price_type),
+        ('high', price_type),
+        ('low', price_type),
+        ('close', price_type),
+        ('tick_volume', '<i4'),
+        ('spread', '<i4'),
+        ('real_volume', '<i4'),
+    ])
+
+
+COMPACT_DTYPES = {
+    "points": _compact_dtype('<i4'),
+    "float32": _compact_dtype('<f4'),
+}
+
+
+class CompactBarsError(Exception):
+    """Excepción para velas que no se pueden compactar sin pérdida."""
+    pass
+
+
+def _round_trips(prices: np.ndarray, scale: float) -> bool:
+    """True si todos los precios son decimales exactos con la escala dada."""
+    return bool(np.all(np.rint(prices * scale) / scale == prices))
+
+
+def infer_digits(rates: np.ndarray, max_digits: int = MAX_DIGITS) -> int:
+    """
+    Menor cantidad de dígitos con la que todos los precios son exactos.
+
+    Sirve cuando no se tiene la especificación del símbolo a mano.
+
+    Args:
+        rates: Velas con campos open/high/low/close
+        max_digits: Máximo de dígitos a probar
+
+    Returns:
+        Dígitos del símbolo
+
+    Raises:
+        CompactBarsError: Si los precios no son decimales de hasta max_digits dígitos
+    """
+    prices = np.concatenate([np.asarray(rates[name], dtype=np.float64) for name in PRICE_FIELDS])
+    for digits in range(max_digits + 1):
+        if _round_trips(prices, 10.0 ** digits):
+            return digits
+    raise CompactBarsError(f"Los precios no tienen hasta {max_digits} dígitos decimales")
+
+
+@dataclass(frozen=True)
+class BarCodec:
+    """
+    Codificador compacto de velas para un símbolo.
+
+    Attributes:
+        mode: "points" o "float32"
+        digits: Dígitos de cotización del símbolo
+
+    Example:
+        >>> codec = BarCodec.for_point(spec.point)          # SymbolSpecification
+        >>> compact = codec.encode(rates)                    # 36 bytes por vela
+        >>> np.array_equal(codec.decode(compact), rates)     # exacto
+        True
+    """
+    mode: str = "points"
+    digits: int = 5
+
+    def __post_init__(self):
+        """Valida modo y dígitos."""
+        if self.mode not in COMPACT_MODES:
+            raise CompactBarsError(f"Modo compacto desconocido: {self.mode!r}")
+        if not 0 <= self.digits <= MAX_DIGITS:
+            raise CompactBarsError(f"digits debe estar entre 0 y {MAX_DIGITS}")
+
+    @classmethod
+    def for_point(cls, point: float, mode: str = "points") -> 'BarCodec':
+        """
+        Codec a partir del punto del símbolo (SymbolSpecification.point).
+
+        Raises:
+            CompactBarsError: Si point no es positivo
+        """
+        if point <= 0:
+            raise CompactBarsError(f"point debe ser mayor a 0, recibido {point}")
+        return cls(mode=mode, digits=digits_from_point(point))
+
+    @classmethod
+    def infer(cls, rates: np.ndarray, mode: str = "points") -> 'BarCodec':
+        """Codec con los dígitos inferidos de las propias velas."""
+        return cls(mode=mode, digits=infer_digits(rates))
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Layout compacto del codec."""
+        return COMPACT_DTYPES[self.mode]
+
+    @property
+    def scale(self) -> float:
+        """Factor precio → puntos (10^digits)."""
+        return 10.0 ** self.digits
+
+    def encode(self, rates: np.ndarray) -> np.ndarray:
+        """
+        Compacta velas verificando que la decodificación sea exacta.
+
+        Args:
+            rates: Structured array con los campos de MT5
+
+        Returns:
+            Structured array con el layout compacto
+
+        Raises:
+            CompactBarsError: Si algún precio o volumen no entra sin pérdida
+        """
+        out = np.empty(len(rates), dtype=self.dtype)
+        out['time'] = rates['time']
+        out['spread'] = rates['spread']
+
+        scale = self.scale
+        for name in PRICE_FIELDS:
+            prices = np.asarray(rates[name], dtype=np.float64)
+            points = np.rint(prices * scale)
+            if len(points) and np.abs(points).max() > INT32_MAX:
+                raise CompactBarsError(f"{name} excede el rango de int32 con {self.digits} dígitos")
+            if not np.array_equal(points / scale, prices):
+                raise CompactBarsError(f"{name} no es exacto con {self.digits} dígitos")
+            if self.mode == "points":
+                out[name] = points
+                continue
+            narrow = prices.astype(np.float32)
+            if not np.array_equal(np.rint(narrow.astype(np.float64) * scale), points):
+                raise CompactBarsError(f"{name} excede la precisión de float32")
+            out[name] = narrow
+
+        for name in VOLUME_FIELDS:
+            volume = np.asarray(rates[name])
+            if len(volume) and (volume.min() < 0 or volume.max() > INT32_MAX):
+                raise CompactBarsError(f"{name} excede el rango de int32")
+            out[name] = volume
+        return out
+
+    def decode(self, compact: np.ndarray) -> np.ndarray:
+        """
+        Reconstruye las velas originales (vectorizado, exacto).
+
+        Args:
+            compact: Structured array con el layout del codec
+
+        Returns:
+            Structured array con RATES_DTYPE
+        """
+        out = np.empty(len(compact), dtype=RATES_DTYPE)
+        out['time'] = compact['time']
+        out['spread'] = compact['spread']
+
+        scale = self.scale
+        for name in PRICE_FIELDS:
+            values = compact[name].astype(np.float64)
+            if self.mode == "float32":
+                values = np.rint(values * scale)
+            out[name] = values / scale
+
+        for name in VOLUME_FIELDS:
+            out[name] = compact[name]
+        return out
+
+    def fits(self, rates: np.ndarray) -> bool:
+        """True si las velas se pueden compactar sin pérdida con este codec."""
+        try:
+            self.encode(rates)
+        except CompactBarsError:
+            return False
+        return True
+
+
+def memory_report(
+    bars: Iterable[int],
+    modes: Iterable[str] = COMPACT_MODES
+) -> Dict[str, Any]:
+    """
+    Compara la memoria de los layouts actual y compacto.
+
+    Args:
+        bars: Velas retenidas por serie (símbolo x timeframe)
+        modes: Layouts compactos a incluir
+
+    Returns:
+        Diccionario con velas totales, bytes por layout ("rates" = structured
+        array de MT5, "rates+dataframe" = OHLCVData con el DataFrame ya
+        construido, y uno por modo compacto) y ahorro de cada modo frente a
+        "rates+dataframe"
+    """
+    total = int(sum(bars))
+    layouts = {
+        "rates": total * RATES_DTYPE.itemsize,
+        "rates+dataframe": total * (RATES_DTYPE.itemsize + DATAFRAME_BYTES_PER_BAR),
+    }
+    for mode in modes:
+        layouts[mode] = total * COMPACT_DTYPES[mode].itemsize
+
+    current = layouts["rates+dataframe"]
+    return {
+        "bars": total,
+        "bytes": layouts,
+        "bytes_per_bar": {name: size // total if total else 0 for name, size in layouts.items()},
+        "savings": {
+            mode: (1.0 - layouts[mode] / current) if current else 0.0
+            for mode in modes
+        },
+    }
@@ -0,0 +1,443 @@
+"""
+CorrelationEngine - Matriz de correlación móvil incremental entre instrumentos.
+
+Mantiene la correlación y la covarianza de los retornos logarítmicos de todos
+los instrumentos configurados sobre una ventana móvil de velas cerradas. En
+lugar de recalcular np.corrcoef sobre la ventana completa en cada vela
+(O(N²·ventana)), conserva sumas acumuladas por par de símbolos:
+
+    n[i, j]   = velas donde i y j tienen retorno
+    Sx[i, j]  = suma de los retornos de i en esas velas
+    Sxx[i, j] = suma de los cuadrados de i en esas velas
+    Sxy[i, j] = suma de los productos de i y j
+
+Cada vela nueva suma su fila y resta la que sale de la ventana, con costo
+O(N²). Las sumas por par reproducen la correlación de observaciones completas
+por pares (como DataFrame.corr de pandas) cuando a un símbolo le falta la
+vela. Para acotar el error de redondeo acumulado, cada `resync_every` velas
+las sumas se recalculan desde el buffer de la ventana.
+
+La matriz se calcula una sola vez por vela y se cachea, de modo que consultar
+antes de cada entrada ("¿qué instrumentos tienen correlación > 0.8 con
+EURUSD?") cuesta O(N).
+
+Autor: Sistema Botrading
+Fecha: 2025-11-19
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (correlación entre instrumentos)
+"""
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+class CorrelationEngineError(Exception):
+    """Excepción para errores del motor de correlación."""
+    pass
+
+
+class CorrelationEngine:
+    """
+    Correlación y covarianza móviles de retornos entre instrumentos.
+
+    Es thread-safe: las actualizaciones y consultas se realizan bajo un lock
+    interno.
+
+    Example:
+        >>> engine = CorrelationEngine(["EURUSD", "GBPUSD", "USDJPY"], window=200)
+        >>> engine.update(bar_time, {"EURUSD": 1.0842, "GBPUSD": 1.2711, "USDJPY": 151.32})
+        >>> engine.correlated_with("EURUSD", threshold=0.8)
+        [('GBPUSD', 0.87)]
+    """
+
+    DEFAULT_WINDOW = 200
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        window: int = DEFAULT_WINDOW,
+        min_periods: Optional[int] = None,
+        resync_every: Optional[int] = None
+    ):
+        """
+        Inicializa el CorrelationEngine.
+
+        Args:
+            symbols: Instrumentos a seguir (orden de filas y columnas)
+            window: Velas de retornos en la ventana móvil
+            min_periods: Observaciones comunes mínimas para reportar una
+                correlación (None = la mitad de la ventana, mínimo 2)
+            resync_every: Velas entre recálculos completos de las sumas
+                (None = una vez por ventana)
+
+        Raises:
+            CorrelationEngineError: Si la configuración es inválida
+        """
+        self._symbols = list(dict.fromkeys(symbols))
+        if not self._symbols:
+            raise CorrelationEngineError("Se requiere al menos un símbolo")
+        if window < 2:
+            raise CorrelationEngineError("window debe ser al menos 2")
+        if min_periods is None:
+            min_periods = max(2, window // 2)
+        if not 2 <= min_periods <= window:
+            raise CorrelationEngineError("min_periods debe estar entre 2 y window")
+        if resync_every is None:
+            resync_every = window
+        if resync_every <= 0:
+            raise CorrelationEngineError("resync_every debe ser mayor a 0")
+
+        self.window = window
+        self.min_periods = min_periods
+        self.resync_every = resync_every
+        self._index = {symbol: i for i, symbol in enumerate(self._symbols)}
+
+        n = len(self._symbols)
+        self._values = np.zeros((window, n))
+        self._mask = np.zeros((window, n), dtype=bool)
+        self._pos = 0
+        self._count = 0
+        self._last_log = np.full(n, np.nan)
+        self._last_time: Optional[int] = None
+
+        self._n = np.zeros((n, n))
+        self._sx = np.zeros((n, n))
+        self._sxx = np.zeros((n, n))
+        self._sxy = np.zeros((n, n))
+
+        self._corr: Optional[np.ndarray] = None
+        self._cov: Optional[np.ndarray] = None
+        self._since_resync = 0
+        self._stats = {
+            "updates": 0,
+            "stale_updates": 0,
+            "resyncs": 0,
+            "matrix_builds": 0
+        }
+        self._lock = threading.Lock()
+
+
+    # ------------------------------------------------------------------
+    # Actualización
+    # ------------------------------------------------------------------
+
+    @property
+    def symbols(self) -> List[str]:
+        """Símbolos en el orden de la matriz."""
+        return list(self._symbols)
+
+    @property
+    def last_time(self) -> Optional[int]:
+        """Epoch de la última vela procesada."""
+        return self._last_time
+
+    def update(self, time: int, closes: Mapping[str, float]) -> bool:
+        """
+        Incorpora los cierres de una vela cerrada.
+
+        El retorno de cada símbolo es log(cierre / cierre anterior) y solo se
+        cuenta si el símbolo tuvo cierre en esta vela y en la anterior. Los
+        símbolos no configurados se ignoran.
+
+        Args:
+            time: Epoch de la vela (debe ser posterior a la última procesada)
+            closes: Cierre por símbolo (los ausentes o no positivos cuentan
+                como vela faltante)
+
+        Returns:
+            True si se procesó, False si la vela no es posterior a la última
+        """
+        log_close = np.full(len(self._symbols), np.nan)
+        for symbol, price in closes.items():
+            column = self._index.get(symbol)
+            if column is not None and price is not None and price > 0:
+                log_close[column] = math.log(price)
+
+        with self._lock:
+            return self._push(int(time), log_close)
+
+    def update_from_panel(self, panel) -> int:
+        """
+        Consume las filas de un AlignedPanel posteriores a la última procesada.
+
+        Las celdas rellenadas hacia adelante por el panel cuentan como vela
+        faltante (una vela plana sumaría retornos 0 ficticios).
+
+        Una fila se procesa una sola vez, así que solo se consumen las filas
+        que ya no pueden cambiar: hasta la última fila en la que cada símbolo
+        del motor presente en el panel tiene una vela real en esa fila o en
+        una posterior. Un símbolo cuya última vela quedó a más de
+        `panel.max_fill` filas del final ya no detiene el avance (su
+        horizonte de relleno pasó y esas celdas serían NaN de todos modos).
+        Por eso el panel debe recibir las velas de todos los símbolos antes
+        de que sus filas cuenten; las filas pendientes se consumen en una
+        llamada posterior.
+
+        Args:
+            panel: AlignedPanel del timeframe de trabajo
+
+        Returns:
+            Filas procesadas
+        """
+        columns = [
+            (self._index[symbol], i)
+            for i, symbol in enumerate(panel.symbols)
+            if symbol in self._index
+        ]
+        engine_cols = np.array([c[0] for c in columns], dtype=np.intp)
+        panel_cols = np.array([c[1] for c in columns], dtype=np.intp)
+
+        with self._lock:
+            times = panel.time
+            first = 0
+            if self._last_time is not None:
+                first = int(np.searchsorted(times, self._last_time, side="right"))
+            end = self._ready_rows(panel, panel_cols)
+            if first >= end:
+                return 0
+
+            close = panel.close[first:end, panel_cols]
+            present = panel.present[first:end, panel_cols] & (close > 0)
+            log_close = np.full((len(close), len(self._symbols)), np.nan)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                log_close[:, engine_cols] = np.where(present, np.log(close), np.nan)
+
+            for row in range(len(close)):
+                self._push(int(times[first + row]), log_close[row])
+            return len(close)
+
+    @staticmethod
+    def _ready_rows(panel, panel_cols: np.ndarray) -> int:
+        """
+        Número de filas iniciales del panel que ya no pueden cambiar.
+
+        Cada símbolo limita el avance a la fila siguiente a su última vela
+        real, salvo que esa vela esté a más de `max_fill` filas del final.
+        """
+        present = panel.present[:, panel_cols]
+        rows = len(present)
+        if rows == 0 or present.shape[1] == 0:
+            return rows
+        has_bar = present.any(axis=0)
+        last_bar = np.where(has_bar, rows - 1 - np.argmax(present[::-1], axis=0), -1)
+        waiting = (rows - 1) - last_bar <= panel.max_fill
+        if not waiting.any():
+            return rows
+        return int(min(rows, last_bar[waiting].min() + 1))
+
+    def reset(self) -> None:
+        """Vacía la ventana y las sumas acumuladas."""
+        with self._lock:
+            self._values[:] = 0.0
+            self._mask[:] = False
+            self._pos = 0
+            self._count = 0
+            self._last_log[:] = np.nan
+            self._last_time = None
+            for sums in (self._n, self._sx, self._sxx, self._sxy):
+                sums[:] = 0.0
+            self._corr = None
+            self._cov = None
+            self._since_resync = 0
+
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def correlation(self) -> np.ndarray:
+        """
+        Matriz de correlación (símbolos x símbolos).
+
+        Los pares con menos de min_periods observaciones comunes o sin
+        varianza quedan en NaN.
+        """
+        with self._lock:
+            return self._matrices()[0].copy()
+
+    def covariance(self) -> np.ndarray:
+        """Matriz de covarianza muestral (ddof=1) de los retornos."""
+        with self._lock:
+            return self._matrices()[1].copy()
+
+    def correlation_between(self, symbol_a: str, symbol_b: str) -> float:
+        """
+        Correlación entre dos símbolos.
+
+        Raises:
+            KeyError: Si algún símbolo no está configurado
+        """
+        i, j = self._index[symbol_a], self._index[symbol_b]
+        with self._lock:
+            return float(self._matrices()[0][i, j])
+
+    def correlated_with(
+        self,
+        symbol: str,
+        threshold: float = 0.7,
+        absolute: bool = True
+    ) -> List[Tuple[str, float]]:
+        """
+        Instrumentos correlacionados por encima de un umbral con `symbol`.
+
+        Args:
+            symbol: Símbolo de referencia
+            threshold: Umbral de correlación
+            absolute: Si True compara |correlación| (incluye correlación
+                negativa fuerte, que también concentra riesgo)
+
+        Returns:
+            Lista (símbolo, correlación) ordenada de mayor a menor intensidad
+
+        Raises:
+            KeyError: Si el símbolo no está configurado
+        """
+        row = self._index[symbol]
+        with self._lock:
+            values = self._matrices()[0][row]
+            strength = np.abs(values) if absolute else values
+            with np.errstate(invalid="ignore"):
+                hits = np.flatnonzero(strength > threshold)
+            hits = hits[hits != row]
+            order = hits[np.argsort(-strength[hits], kind="stable")]
+            return [(self._symbols[i], float(values[i])) for i in order]
+
+    def max_correlation(
+        self,
+        symbol: str,
+        others: Iterable[str],
+        absolute: bool = True
+    ) -> Tuple[Optional[str], float]:
+        """
+        Mayor correlación de `symbol` con un conjunto de símbolos.
+
+        Pensado para el chequeo previo a una entrada: `others` son los
+        símbolos con posición abierta.
+
+        Args:
+            symbol: Símbolo de la nueva entrada
+            others: Símbolos contra los que comparar (se ignoran el propio
+                símbolo y los no configurados)
+            absolute: Si True compara |correlación|
+
+        Returns:
+            (símbolo, correlación) del más correlacionado, o (None, nan) si
+            no hay ninguno con correlación disponible
+
+        Raises:
+            KeyError: Si `symbol` no está configurado
+        """
+        row = self._index[symbol]
+        columns = [
+            self._index[other] for other in dict.fromkeys(others)
+            if other in self._index and other != symbol
+        ]
+        with self._lock:
+            values = self._matrices()[0][row, columns]
+        strength = np.abs(values) if absolute else values
+        if not len(values) or np.isnan(strength).all():
+            return None, math.nan
+        best = int(np.nanargmax(strength))
+        return self._symbols[columns[best]], float(values[best])
+
+    def observations(self) -> np.ndarray:
+        """Observaciones comunes por par en la ventana."""
+        with self._lock:
+            return self._n.astype(np.int64)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del motor.
+
+        Returns:
+            Diccionario con actualizaciones, velas descartadas por fuera de
+            orden, recálculos completos, matrices construidas y velas en la
+            ventana
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "symbols": len(self._symbols),
+                "window": self.window,
+                "bars": self._count
+            }
+
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _push(self, time: int, log_close: np.ndarray) -> bool:
+        """Agrega una vela a la ventana y actualiza las sumas (bajo lock)."""
+        if self._last_time is not None and time <= self._last_time:
+            self._stats["stale_updates"] += 1
+            return False
+
+        returns = log_close - self._last_log
+        self._last_log = log_close
+        self._last_time = time
+        valid = np.isfinite(returns)
+        values = np.where(valid, returns, 0.0)
+
+        if self._count == self.window:
+            self._accumulate(self._values[self._pos], self._mask[self._pos], -1.0)
+        else:
+            self._count += 1
+        self._values[self._pos] = values
+        self._mask[self._pos] = valid
+        self._pos = (self._pos + 1) % self.window
+
+        self._since_resync += 1
+        if self._since_resync >= self.resync_every:
+            self._resync()
+        else:
+            self._accumulate(values, valid, 1.0)
+
+        self._corr = None
+        self._cov = None
+        self._stats["updates"] += 1
+        return True
+
+    def _accumulate(self, values: np.ndarray, valid: np.ndarray, sign: float) -> None:
+        """Suma (sign=1) o resta (sign=-1) una fila de retornos a las sumas por par."""
+        mask = valid.astype(np.float64) * sign
+        self._n += np.outer(valid, mask)
+        self._sx += np.outer(values, mask)
+        self._sxx += np.outer(values * values, mask)
+        self._sxy += np.outer(values, values) * sign
+
+    def _resync(self) -> None:
+        """Recalcula las sumas desde el buffer de la ventana."""
+        values = self._values[:self._count]
+        mask = self._mask[:self._count].astype(np.float64)
+        self._n = mask.T @ mask
+        self._sx = values.T @ mask
+        self._sxx = (values * values).T @ mask
+        self._sxy = values.T @ values
+        self._since_resync = 0
+        self._stats["resyncs"] += 1
+
+    def _matrices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Correlación y covarianza a partir de las sumas (cacheadas por vela)."""
+        if self._corr is not None and self._cov is not None:
+            return self._corr, self._cov
+
+        n = np.rint(self._n)
+        sx, sxx, sxy = self._sx, self._sxx, self._sxy
+        enough = n >= self.min_periods
+        with np.errstate(divide="ignore", invalid="ignore"):
+            co_moment = n * sxy - sx * sx.T
+            var_row = n * sxx - sx * sx
+            var_col = var_row.T
+            denominator = np.sqrt(var_row * var_col)
+            corr = np.where(enough & (var_row > 0) & (var_col > 0), co_moment / denominator, np.nan)
+            cov = np.where(enough, co_moment / (n * (n - 1)), np.nan)
+
+        np.clip(corr, -1.0, 1.0, out=corr)
+        diagonal = np.diag_indices_from(corr)
+        corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+
+        self._corr, self._cov = corr, cov
+        self._stats["matrix_builds"] += 1
+        return corr, cov
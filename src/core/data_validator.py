@@ -0,0 +1,424 @@
+"""
+DataValidator - Validación vectorizada de calidad de velas OHLCV.
+
+Revisa en una sola pasada sobre los arrays de OHLCVData las anomalías que
+MT5 puede devolver: timestamps duplicados o fuera de orden, velas no
+alineadas al timeframe, high < low, apertura/cierre fuera del rango,
+precios no finitos o no positivos, velas sin volumen y velas faltantes.
+
+Las velas faltantes se calculan contra un calendario de sesiones
+(`MarketSessions`): el tiempo de mercado abierto acumulado hasta cada
+instante se obtiene en forma vectorizada, de modo que el cierre de fin de
+semana o una pausa diaria no cuentan como huecos en ningún timeframe. Solo
+los huecos reales se vuelven a pedir al extractor, por rango.
+
+El resultado incluye una máscara densa de validez (una posición por vela)
+para que el cálculo de indicadores pueda descartar o enmascarar las velas
+inválidas. El costo es de unas pocas operaciones vectorizadas por serie,
+por lo que puede ejecutarse en cada descarga.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-17
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (validación de calidad)
+"""
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.mt5_data_extractor import OHLCVData
+from src.core.mt5_types import MT5_RATES_DTYPE, MT5DataError
+
+
+logger = logging.getLogger(__name__)
+
+
+SECONDS_PER_DAY = 86400
+
+# Anomalías que invalidan la vela en la máscara
+INVALIDATING_ISSUES = (
+    "duplicate_time",
+    "unordered_time",
+    "misaligned_time",
+    "high_below_low",
+    "price_outside_range",
+    "invalid_price",
+)
+ZERO_VOLUME = "zero_volume"
+
+
+class DataValidatorError(Exception):
+    """Excepción para errores de validación de velas."""
+    pass
+
+
+class MarketSessions:
+    """
+    Calendario de sesiones del mercado en hora del servidor.
+
+    Por defecto el mercado cierra sábado y domingo (forex en la hora del
+    servidor de MT5). Opcionalmente se declaran pausas diarias, p. ej. el
+    rollover de algunos brokers.
+
+    Example:
+        >>> sessions = MarketSessions(daily_breaks=[(23 * 60 + 55, 24 * 60)])
+        >>> sessions.open_seconds(np.array([1_762_819_200]))
+    """
+
+    DEFAULT_CLOSED_WEEKDAYS = (5, 6)
+
+    def __init__(
+        self,
+        closed_weekdays: Iterable[int] = DEFAULT_CLOSED_WEEKDAYS,
+        daily_breaks: Iterable[Tuple[int, int]] = ()
+    ):
+        """
+        Inicializa el calendario.
+
+        Args:
+            closed_weekdays: Días sin sesión (0 = lunes ... 6 = domingo)
+            daily_breaks: Pausas diarias como (minuto inicio, minuto fin)
+                dentro del día, sin superponerse
+
+        Raises:
+            DataValidatorError: Si los días o las pausas son inválidos
+        """
+        self.closed_weekdays = frozenset(int(day) for day in closed_weekdays)
+        if not self.closed_weekdays <= set(range(7)):
+            raise DataValidatorError("closed_weekdays debe contener días entre 0 y 6")
+        if len(self.closed_weekdays) == 7:
+            raise DataValidatorError("El mercado debe abrir al menos un día")
+
+        breaks = sorted((int(start) * 60, int(end) * 60) for start, end in daily_breaks)
+        previous_end = 0
+        for start, end in breaks:
+            if not previous_end <= start < end <= SECONDS_PER_DAY:
+                raise DataValidatorError(f"Pausa diaria inválida: {start // 60}-{end // 60}")
+            previous_end = end
+        self.daily_breaks = tuple(breaks)
+
+        self._open_day = np.array([day not in self.closed_weekdays for day in range(7)])
+        # Días abiertos anteriores a cada día de la semana (desde el lunes)
+        self._open_days_before = np.concatenate([[0], np.cumsum(self._open_day)])
+        self._day_seconds = SECONDS_PER_DAY - sum(end - start for start, end in breaks)
+
+    def open_seconds(self, times: np.ndarray) -> np.ndarray:
+        """
+        Segundos de mercado abierto acumulados hasta cada instante.
+
+        Solo las diferencias entre dos valores tienen sentido: la diferencia
+        es el tiempo de sesión transcurrido entre ambos instantes.
+
+        Args:
+            times: Epochs (segundos, hora del servidor)
+
+        Returns:
+            Array int64 con los segundos abiertos acumulados
+        """
+        times = np.asarray(times, dtype=np.int64)
+        days, seconds = np.divmod(times, SECONDS_PER_DAY)
+        # El epoch 0 fue jueves: desplazar 3 días alinea las semanas al lunes
+        weeks, weekday = np.divmod(days + 3, 7)
+
+        in_day = seconds.copy()
+        for start, end in self.daily_breaks:
+            in_day -= np.clip(seconds - start, 0, end - start)
+
+        open_days = weeks * self._open_days_before[7] + self._open_days_before[weekday]
+        return open_days * self._day_seconds + np.where(self._open_day[weekday], in_day, 0)
+
+
+@dataclass
+class DataGap:
+    """
+    Tramo de velas faltantes dentro de una serie.
+
+    Attributes:
+        start: Epoch siguiente a la última vela presente (puede caer en
+            un cierre de sesión, p. ej. el sábado antes de un hueco del lunes)
+        end: Epoch de la vela presente que sigue al hueco (exclusivo)
+        missing: Velas faltantes según el calendario de sesiones
+    """
+    start: int
+    end: int
+    missing: int
+
+
+@dataclass
+class ValidationReport:
+    """
+    Resultado de validar una serie de velas.
+
+    Attributes:
+        symbol: Símbolo del instrumento
+        timeframe: Timeframe de las velas
+        count: Cantidad de velas revisadas
+        valid: Máscara densa (una posición por vela) de velas utilizables
+        issues: Anomalía → índices de las velas afectadas
+        gaps: Huecos de velas faltantes, en orden cronológico
+    """
+    symbol: str
+    timeframe: Any
+    count: int
+    valid: np.ndarray
+    issues: Dict[str, np.ndarray] = field(default_factory=dict)
+    gaps: List[DataGap] = field(default_factory=list)
+
+    @property
+    def invalid_count(self) -> int:
+        """Cantidad de velas marcadas como inválidas."""
+        return self.count - int(np.count_nonzero(self.valid))
+
+    @property
+    def missing_bars(self) -> int:
+        """Total de velas faltantes en todos los huecos."""
+        return sum(gap.missing for gap in self.gaps)
+
+    @property
+    def is_clean(self) -> bool:
+        """True si no hay anomalías ni huecos."""
+        return not self.gaps and all(len(indices) == 0 for indices in self.issues.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Resumen serializable (p. ej. para el log).
+
+        Returns:
+            Dict con símbolo, timeframe, velas, inválidas, cantidad por
+            anomalía y huecos como (inicio, fin, faltantes)
+        """
+        return {
+            "symbol": self.symbol,
+            "timeframe": self.timeframe.name,
+            "count": self.count,
+            "invalid": self.invalid_count,
+            "issues": {name: len(indices) for name, indices in self.issues.items()},
+            "gaps": [(gap.start, gap.end, gap.missing) for gap in self.gaps],
+        }
+
+
+def _naive_utc(epoch: int) -> datetime:
+    """Epoch como datetime naive en UTC (la convención del extractor)."""
+    return datetime.fromtimestamp(int(epoch), tz=timezone.utc).replace(tzinfo=None)
+
+
+def _as_rates(ohlcv: OHLCVData) -> np.ndarray:
+    """Structured array de MT5 de un OHLCVData (se arma si viene de un DataFrame)."""
+    if ohlcv.rates is not None:
+        return ohlcv.rates
+    rates = np.zeros(ohlcv.count, dtype=MT5_RATES_DTYPE)
+    rates['time'] = ohlcv.time
+    for name in ('open', 'high', 'low', 'close'):
+        rates[name] = getattr(ohlcv, name)
+    rates['tick_volume'] = ohlcv.volume
+    return rates
+
+
+class DataValidator:
+    """
+    Validador vectorizado de velas con detección de huecos y relleno.
+
+    Es thread-safe; solo las estadísticas son estado compartido.
+
+    Example:
+        >>> validator = DataValidator()
+        >>> ohlcv = extractor.get_ohlcv("EURUSD", Timeframe.M5, 300, exclude_current=True)
+        >>> report = validator.validate(ohlcv)
+        >>> if report.gaps:
+        ...     ohlcv, report = validator.backfill(extractor, ohlcv, report)
+        >>> close = ohlcv.close[report.valid]
+    """
+
+    def __init__(
+        self,
+        sessions: Optional[MarketSessions] = None,
+        zero_volume_invalid: bool = False
+    ):
+        """
+        Inicializa el DataValidator.
+
+        Args:
+            sessions: Calendario de sesiones (por defecto, cierre sábado y domingo)
+            zero_volume_invalid: Si True, las velas sin volumen se excluyen de
+                la máscara (por defecto solo se informan)
+        """
+        self.sessions = sessions or MarketSessions()
+        self.zero_volume_invalid = zero_volume_invalid
+        self._stats = {
+            "validations": 0,
+            "bars_checked": 0,
+            "invalid_bars": 0,
+            "gaps": 0,
+            "missing_bars": 0,
+            "backfill_requests": 0,
+            "bars_backfilled": 0,
+            "unfilled_gaps": 0
+        }
+        self._lock = threading.Lock()
+
+    def validate(self, ohlcv: OHLCVData) -> ValidationReport:
+        """
+        Valida una serie de velas.
+
+        Args:
+            ohlcv: OHLCVData en orden cronológico
+
+        Returns:
+            ValidationReport con la máscara de validez, anomalías y huecos
+        """
+        times = np.asarray(ohlcv.time, dtype=np.int64)
+        step = ohlcv.timeframe.value * 60
+        n = len(times)
+
+        open_ = ohlcv.open
+        high = ohlcv.high
+        low = ohlcv.low
+        close = ohlcv.close
+        volume = ohlcv.volume
+
+        # Tiempos: la vela posterior a un duplicado o retroceso es la inválida
+        diff = np.diff(times)
+        later = np.zeros(n, dtype=bool)
+
+        checks = {}
+        later[1:] = diff == 0
+        checks["duplicate_time"] = later.copy()
+        later[1:] = diff < 0
+        checks["unordered_time"] = later
+        checks["misaligned_time"] = times % step != 0
+        checks["high_below_low"] = high < low
+        with np.errstate(invalid='ignore'):
+            checks["price_outside_range"] = (
+                (open_ > high) | (open_ < low) | (close > high) | (close < low)
+            )
+            finite = np.isfinite(open_) & np.isfinite(high) & np.isfinite(low) & np.isfinite(close)
+            checks["invalid_price"] = ~finite | (low <= 0)
+        checks[ZERO_VOLUME] = volume == 0
+
+        valid = np.ones(n, dtype=bool)
+        for name in INVALIDATING_ISSUES:
+            valid &= ~checks[name]
+        if self.zero_volume_invalid:
+            valid &= ~checks[ZERO_VOLUME]
+
+        report = ValidationReport(
+            symbol=ohlcv.symbol,
+            timeframe=ohlcv.timeframe,
+            count=n,
+            valid=valid,
+            issues={name: np.flatnonzero(mask) for name, mask in checks.items()},
+            gaps=self._find_gaps(times, diff, step)
+        )
+
+        with self._lock:
+            self._stats["validations"] += 1
+            self._stats["bars_checked"] += n
+            self._stats["invalid_bars"] += report.invalid_count
+            self._stats["gaps"] += len(report.gaps)
+            self._stats["missing_bars"] += report.missing_bars
+
+        if not report.is_clean:
+            logger.warning(
+                f"Velas con anomalías en {ohlcv.symbol} {ohlcv.timeframe.name}: {report.to_dict()}"
+            )
+        return report
+
+    def backfill(
+        self,
+        extractor,
+        ohlcv: OHLCVData,
+        report: Optional[ValidationReport] = None
+    ) -> Tuple[OHLCVData, ValidationReport]:
+        """
+        Vuelve a pedir solo los tramos faltantes y los une a la serie.
+
+        Un hueco que el broker no puede completar (p. ej. un feriado) se
+        registra en las estadísticas y se conserva en el nuevo reporte.
+
+        Args:
+            extractor: MT5DataExtractor conectado (usa get_ohlcv_range)
+            ohlcv: Serie original
+            report: Reporte de validate (se calcula si no se pasa)
+
+        Returns:
+            Tupla (OHLCVData completada, ValidationReport de la serie completada)
+        """
+        if report is None:
+            report = self.validate(ohlcv)
+        if not report.gaps:
+            return ohlcv, report
+
+        pieces = [_as_rates(ohlcv)]
+        filled = 0
+        unfilled = 0
+        for gap in report.gaps:
+            try:
+                data = extractor.get_ohlcv_range(
+                    ohlcv.symbol,
+                    ohlcv.timeframe,
+                    _naive_utc(gap.start),
+                    _naive_utc(gap.end - 1)
+                )
+            except MT5DataError as e:
+                logger.warning(
+                    f"No se pudo rellenar el hueco {gap} de {ohlcv.symbol} "
+                    f"{ohlcv.timeframe.name}: {e}"
+                )
+                unfilled += 1
+                continue
+
+            rates = _as_rates(data)
+            rates = rates[(rates['time'] >= gap.start) & (rates['time'] < gap.end)]
+            if len(rates) == 0:
+                unfilled += 1
+                continue
+            pieces.append(rates.astype(MT5_RATES_DTYPE, copy=False))
+            filled += len(rates)
+
+        with self._lock:
+            self._stats["backfill_requests"] += len(report.gaps)
+            self._stats["bars_backfilled"] += filled
+            self._stats["unfilled_gaps"] += unfilled
+
+        if filled == 0:
+            return ohlcv, report
+
+        merged = np.concatenate(pieces)
+        # np.unique devuelve la primera aparición: se conserva la vela original
+        _, first = np.unique(merged['time'], return_index=True)
+        completed = OHLCVData.from_rates(ohlcv.symbol, ohlcv.timeframe, merged[first])
+        return completed, self.validate(completed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de validación.
+
+        Returns:
+            Diccionario con validaciones, velas revisadas e inválidas, huecos,
+            velas faltantes, tramos pedidos, velas recuperadas y huecos sin rellenar
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _find_gaps(self, times: np.ndarray, diff: np.ndarray, step: int) -> List[DataGap]:
+        """
+        Huecos entre velas consecutivas según el calendario de sesiones.
+
+        Solo los saltos mayores a un timeframe (pocos) pasan por el
+        calendario; el resto de la serie no se toca.
+        """
+        jumps = np.flatnonzero(diff > step)
+        if len(jumps) == 0:
+            return []
+
+        start = times[jumps] + step
+        end = times[jumps + 1]
+        missing = (self.sessions.open_seconds(end) - self.sessions.open_seconds(start)) // step
+        return [
+            DataGap(start=int(s), end=int(e), missing=int(m))
+            for s, e, m in zip(start, end, missing)
+            if m > 0
+        ]
@@ -0,0 +1,263 @@
+"""
+FeatureStore - Features compartidas por ciclo (ATR, spread, indicadores).
+
+Este módulo calcula una sola vez por ciclo las features que necesitan varios
+consumidores a partir de las mismas velas: el ATR para VolatilityFilter y el
+stop del PositionSizer, el spread para SpreadFilter y los indicadores para el
+prompt de la IA y los logs. Cada valor se memoiza con la clave
+(símbolo, timeframe, feature, última vela) y se entrega en modo solo lectura,
+de modo que ningún consumidor puede alterar lo que ven los demás.
+
+Las estadísticas cuentan cálculos contra aciertos por feature, y los
+recálculos de claves que ya se habían calculado en el ciclo anterior (velas
+sin cambios), para que el trabajo duplicado sea visible.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-14
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (feature store por ciclo)
+"""
+import copy
+import dataclasses
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+import numpy as np
+
+from src.core.indicators_calculator import (
+    calculate_atr,
+    calculate_indicators,
+    IndicatorValues,
+    WARMUP_BARS
+)
+
+
+class FeatureStoreError(Exception):
+    """Excepción para errores del feature store."""
+    pass
+
+
+def _last(values: np.ndarray) -> Optional[float]:
+    """Último valor de una serie (None si está en calentamiento)."""
+    value = values[-1]
+    return None if np.isnan(value) else float(value)
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Versión de solo lectura de un valor memoizado.
+
+    Los arrays se entregan como vistas no escribibles, los diccionarios como
+    MappingProxyType (recursivamente) y los dataclasses como copias, de modo
+    que modificar lo recibido no afecta al valor guardado.
+    """
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.setflags(write=False)
+        return view
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return copy.copy(value)
+    return value
+
+
+class FeatureStore:
+    """
+    Memoización por ciclo de features derivadas de las velas.
+
+    Features incluidas:
+        - "atr": ATR 14 de la última vela (float o None en calentamiento)
+        - "atr_series": serie completa del ATR
+        - "spread_pips": spread de la última vela en pips (None sin rates)
+        - "indicators": IndicatorValues de la última vela
+        - "indicator_series": series completas de EMA, RSI y MACD
+
+    Se pueden registrar features adicionales con `register`. Es thread-safe.
+
+    Example:
+        >>> store = FeatureStore()
+        >>> store.begin_cycle()
+        >>> filter_manager.apply_filters(store.market_data(ohlcv))
+        >>> atr = store.get(ohlcv, "atr")          # acierto, no recalcula
+        >>> prompt_values = store.get(ohlcv, "indicators")
+    """
+
+    DEFAULT_POINTS_PER_PIP = 10
+
+    def __init__(self, points_per_pip: float = DEFAULT_POINTS_PER_PIP):
+        """
+        Inicializa el FeatureStore.
+
+        Args:
+            points_per_pip: Puntos de MT5 por pip (10 en cotizaciones de
+                5 y 3 decimales) para convertir el campo spread de las velas
+
+        Raises:
+            FeatureStoreError: Si points_per_pip no es positivo
+        """
+        if points_per_pip <= 0:
+            raise FeatureStoreError("points_per_pip debe ser mayor a 0")
+
+        self.points_per_pip = points_per_pip
+        self._features: Dict[str, Callable[[Any], Any]] = {
+            # "atr" reutiliza la serie memoizada en lugar de recalcularla
+            "atr": lambda ohlcv: _last(self.get(ohlcv, "atr_series")),
+            "atr_series": self._atr_series,
+            "spread_pips": self._spread_pips,
+            "indicators": self._indicator_values,
+            "indicator_series": lambda ohlcv: calculate_indicators(ohlcv.close),
+        }
+        self._values: Dict[Tuple, Any] = {}
+        self._previous_keys: Set[Tuple] = set()
+        self._cycle = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, func: Callable[[Any], Any]) -> None:
+        """
+        Registra una feature calculada a partir de un OHLCVData.
+
+        Args:
+            name: Nombre de la feature
+            func: Función OHLCVData → valor
+
+        Raises:
+            FeatureStoreError: Si el nombre ya está registrado
+        """
+        with self._lock:
+            if name in self._features:
+                raise FeatureStoreError(f"La feature {name!r} ya está registrada")
+            self._features[name] = func
+
+    def begin_cycle(self) -> int:
+        """
+        Inicia un ciclo nuevo descartando los valores del anterior.
+
+        Returns:
+            Número del ciclo iniciado
+        """
+        with self._lock:
+            self._previous_keys = set(self._values)
+            self._values.clear()
+            self._cycle += 1
+            return self._cycle
+
+    def get(self, ohlcv, feature: str) -> Any:
+        """
+        Obtiene una feature, calculándola solo si no está memoizada en el ciclo.
+
+        Args:
+            ohlcv: OHLCVData con velas cerradas
+            feature: Nombre de la feature
+
+        Returns:
+            Valor de solo lectura
+
+        Raises:
+            FeatureStoreError: Si la feature no existe o no hay velas
+        """
+        func = self._features.get(feature)
+        if func is None:
+            raise FeatureStoreError(f"Feature desconocida: {feature!r}")
+        if ohlcv.count == 0:
+            raise FeatureStoreError(f"{ohlcv.symbol} no tiene velas")
+
+        key = self.make_key(ohlcv, feature)
+        with self._lock:
+            stats = self._stats.setdefault(
+                feature, {"computations": 0, "hits": 0, "recomputations": 0}
+            )
+            if key in self._values:
+                stats["hits"] += 1
+                return _freeze(self._values[key])
+
+        value = func(ohlcv)
+
+        with self._lock:
+            if key in self._values:
+                # Otro hilo la calculó mientras tanto; se conserva la primera
+                stats["hits"] += 1
+                return _freeze(self._values[key])
+            self._values[key] = value
+            stats["computations"] += 1
+            if key in self._previous_keys:
+                stats["recomputations"] += 1
+            return _freeze(value)
+
+    def market_data(self, ohlcv) -> Dict[str, Any]:
+        """
+        Datos de mercado en el formato de FilterManager.apply_filters.
+
+        Args:
+            ohlcv: OHLCVData con velas cerradas
+
+        Returns:
+            Diccionario con "atr" y "spread_pips"
+        """
+        return {
+            "atr": self.get(ohlcv, "atr"),
+            "spread_pips": self.get(ohlcv, "spread_pips"),
+        }
+
+    @staticmethod
+    def make_key(ohlcv, feature: str) -> Tuple[Hashable, ...]:
+        """Clave (símbolo, timeframe, feature, epoch de la última vela)."""
+        return (ohlcv.symbol, ohlcv.timeframe, feature, int(ohlcv.time[-1]))
+
+    def __len__(self) -> int:
+        """Cantidad de valores memoizados en el ciclo actual."""
+        with self._lock:
+            return len(self._values)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de uso.
+
+        Returns:
+            Diccionario con el ciclo, totales de cálculos, aciertos y
+            recálculos, hit_rate y el detalle por feature
+        """
+        with self._lock:
+            features = {name: dict(stats) for name, stats in self._stats.items()}
+            cycle, entries = self._cycle, len(self._values)
+
+        computations = sum(s["computations"] for s in features.values())
+        hits = sum(s["hits"] for s in features.values())
+        total = computations + hits
+        return {
+            "cycle": cycle,
+            "entries": entries,
+            "computations": computations,
+            "hits": hits,
+            "recomputations": sum(s["recomputations"] for s in features.values()),
+            "hit_rate": hits / total if total else 0.0,
+            "features": features,
+        }
+
+    def reset_stats(self) -> None:
+        """Reinicia las estadísticas."""
+        with self._lock:
+            self._stats.clear()
+
+    @staticmethod
+    def _atr_series(ohlcv) -> np.ndarray:
+        """ATR completo de las velas."""
+        return calculate_atr(ohlcv.high, ohlcv.low, ohlcv.close)
+
+    def _indicator_values(self, ohlcv) -> IndicatorValues:
+        """Valores de la última vela a partir de las series memoizadas."""
+        series = self.get(ohlcv, "indicator_series")
+        return IndicatorValues(
+            time=int(ohlcv.time[-1]),
+            close=float(ohlcv.close[-1]),
+            volume=float(ohlcv.volume[-1]),
+            **{name: _last(series[name]) for name in WARMUP_BARS}
+        )
+
+    def _spread_pips(self, ohlcv) -> Optional[float]:
+        """Spread de la última vela en pips (las velas de MT5 lo traen en puntos)."""
+        rates = ohlcv.rates
+        if rates is None or "spread" not in (rates.dtype.names or ()):
+            return None
+        return float(rates["spread"][-1]) / self.points_per_pip
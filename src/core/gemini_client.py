@@ -0,0 +1,447 @@
+"""
+AsyncGeminiClient - Cliente asíncrono de Gemini con conexiones keep-alive.
+
+La consulta a la IA es la etapa más larga de cada ciclo. Con un cliente
+bloqueante cada bot queda detenido durante toda la petición; este cliente
+usa asyncio para que un solo proceso tenga en vuelo las decisiones de los 30
+activos a la vez:
+
+    - Pool de conexiones HTTP/1.1 keep-alive por host: las peticiones
+      reutilizan la conexión (y el handshake TLS) de las anteriores.
+    - Semáforo de concurrencia compartido entre bots: acota las peticiones
+      en vuelo aunque cada bot llame por su cuenta.
+    - Timeout por perfil (IAProfile.timeout_seconds) sobre cada petición.
+
+Se implementa sobre asyncio.open_connection (sin dependencias externas) y
+habla el endpoint REST generateContent de Gemini. Para medir throughput sin
+red ni API key se puede apuntar base_url a GeminiStubServer.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-20
+Ticket: T10 - Construcción de prompt y recepción de JSON de decisión (cliente asíncrono)
+"""
+import asyncio
+import json
+import ssl
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.core.ia_config_manager import IAProfile, IAProvider
+
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com"
+API_VERSION = "v1beta"
+
+
+class GeminiClientError(Exception):
+    """Excepción para errores del cliente de Gemini."""
+    pass
+
+
+class GeminiTimeoutError(GeminiClientError):
+    """La petición excedió el timeout del perfil."""
+    pass
+
+
+class GeminiHTTPError(GeminiClientError):
+    """La API respondió con un estado HTTP de error."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+@dataclass
+class GeminiResponse:
+    """
+    Respuesta de generateContent.
+
+    Attributes:
+        text: Texto concatenado de las partes del primer candidato
+        model: Modelo consultado
+        prompt_tokens: Tokens de entrada reportados por la API
+        output_tokens: Tokens de salida reportados por la API
+        total_tokens: Tokens totales reportados por la API
+        latency: Segundos desde el envío hasta la respuesta completa
+        raw: JSON completo de la respuesta
+    """
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    latency: float = 0.0
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+class _Connection:
+    """Conexión HTTP/1.1 persistente."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones keep-alive hacia un host.
+
+    Las conexiones libres se reutilizan en orden LIFO (la más reciente tiene
+    menos probabilidad de haber sido cerrada por el servidor). No limita la
+    cantidad de conexiones abiertas: eso lo hace el semáforo del cliente.
+    """
+
+    def __init__(self, host: str, port: int, use_tls: bool, max_idle: int = 32):
+        """
+        Inicializa el pool.
+
+        Args:
+            host: Host del servidor
+            port: Puerto del servidor
+            use_tls: Si True abre conexiones TLS
+            max_idle: Conexiones libres retenidas (las demás se cierran)
+        """
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self._ssl = ssl.create_default_context() if use_tls else None
+        self._idle: List[_Connection] = []
+        self.opened = 0
+        self.reused = 0
+
+    async def acquire(self) -> Tuple[_Connection, bool]:
+        """Retorna (conexión, reutilizada)."""
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.reader.at_eof() or connection.writer.is_closing():
+                connection.close()
+                continue
+            self.reused += 1
+            return connection, True
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+        self.opened += 1
+        return _Connection(reader, writer), False
+
+    def release(self, connection: _Connection, reusable: bool) -> None:
+        """Devuelve la conexión al pool o la cierra."""
+        if reusable and len(self._idle) < self.max_idle and not connection.writer.is_closing():
+            self._idle.append(connection)
+        else:
+            connection.close()
+
+    async def close(self) -> None:
+        """Cierra todas las conexiones libres."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+        for connection in idle:
+            try:
+                await connection.writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+
+    @property
+    def idle(self) -> int:
+        """Conexiones libres en el pool."""
+        return len(self._idle)
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bytes]:
+    """Lee una respuesta HTTP/1.1 (Content-Length o chunked)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise GeminiClientError(f"Línea de estado inválida: {lines[0]!r}")
+    status = int(parts[1])
+
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await reader.readuntil(b"\r\n")
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()
+        headers["connection"] = "close"
+    return status, headers, body
+
+
+class AsyncGeminiClient:
+    """
+    Cliente asíncrono de generateContent de Gemini.
+
+    Una instancia se comparte entre todos los bots del proceso: el semáforo
+    y el pool son comunes. Debe usarse desde un único event loop.
+
+    Example:
+        >>> async with AsyncGeminiClient(api_key, max_concurrency=16) as client:
+        ...     responses = await asyncio.gather(*(
+        ...         client.generate(profile, prompts[symbol]) for symbol in symbols
+        ...     ))
+    """
+
+    DEFAULT_MAX_CONCURRENCY = 8
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = DEFAULT_BASE_URL,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_idle_connections: Optional[int] = None
+    ):
+        """
+        Inicializa el AsyncGeminiClient.
+
+        Args:
+            api_key: API key de Gemini (header x-goog-api-key)
+            base_url: URL base de la API (http o https)
+            max_concurrency: Peticiones en vuelo máximas entre todos los bots
+            max_idle_connections: Conexiones keep-alive retenidas
+                (None = max_concurrency)
+
+        Raises:
+            GeminiClientError: Si la configuración es inválida
+        """
+        if not api_key:
+            raise GeminiClientError("api_key es requerida")
+        if max_concurrency <= 0:
+            raise GeminiClientError("max_concurrency debe ser mayor a 0")
+
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise GeminiClientError(f"base_url inválida: {base_url!r}")
+
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self._host = url.hostname
+        self._host_header = url.netloc
+        self._prefix = url.path.rstrip("/")
+        self._pool = ConnectionPool(
+            url.hostname,
+            url.port or (443 if url.scheme == "https" else 80),
+            use_tls=url.scheme == "https",
+            max_idle=max_idle_connections or max_concurrency
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._closed = False
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "retries": 0,
+            "max_in_flight": 0,
+            "total_latency": 0.0
+        }
+
+    async def __aenter__(self) -> 'AsyncGeminiClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def generate(
+        self,
+        profile: IAProfile,
+        prompt: str,
+        system_instruction: Optional[str] = None
+    ) -> GeminiResponse:
+        """
+        Envía un prompt con los parámetros del perfil.
+
+        El timeout del perfil cubre la petición desde que obtiene turno en el
+        semáforo; la espera por turno no cuenta.
+
+        Args:
+            profile: Perfil de IA (provider gemini)
+            prompt: Texto del prompt
+            system_instruction: Instrucción de sistema opcional
+
+        Returns:
+            GeminiResponse con texto y uso de tokens
+
+        Raises:
+            GeminiTimeoutError: Si se excede profile.timeout_seconds
+            GeminiHTTPError: Si la API responde con error
+            GeminiClientError: Si el perfil no es de Gemini o la respuesta es inválida
+        """
+        if self._closed:
+            raise GeminiClientError("El cliente está cerrado")
+        if profile.provider != IAProvider.GEMINI:
+            raise GeminiClientError(
+                f"El perfil '{profile.name}' usa {profile.provider.value}, no gemini"
+            )
+
+        path = f"{self._prefix}/{API_VERSION}/models/{profile.model}:generateContent"
+        body = json.dumps(self._build_payload(profile, prompt, system_instruction)).encode()
+
+        async with self._semaphore:
+            self._in_flight += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._in_flight)
+            started = time.perf_counter()
+            try:
+                status, payload = await asyncio.wait_for(
+                    self._post(path, body), timeout=profile.timeout_seconds
+                )
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                raise GeminiTimeoutError(
+                    f"Gemini no respondió en {profile.timeout_seconds}s (perfil '{profile.name}')"
+                ) from None
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                self._stats["errors"] += 1
+                raise GeminiClientError(f"Error de conexión con Gemini: {e}") from e
+            finally:
+                self._in_flight -= 1
+            latency = time.perf_counter() - started
+
+        self._stats["requests"] += 1
+        self._stats["total_latency"] += latency
+        if status >= 400:
+            self._stats["errors"] += 1
+            raise GeminiHTTPError(status, self._error_message(payload))
+        return self._parse_response(profile.model, payload, latency)
+
+    async def generate_many(
+        self,
+        profile: IAProfile,
+        prompts: Iterable[str]
+    ) -> List[Any]:
+        """
+        Envía varios prompts concurrentemente.
+
+        Returns:
+            Lista en el orden de los prompts con GeminiResponse o la
+            excepción de cada uno
+        """
+        return await asyncio.gather(
+            *(self.generate(profile, prompt) for prompt in prompts),
+            return_exceptions=True
+        )
+
+    async def close(self) -> None:
+        """Cierra las conexiones del pool."""
+        self._closed = True
+        await self._pool.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del cliente.
+
+        Returns:
+            Diccionario con peticiones, errores, timeouts, reintentos por
+            conexión caída, máximo en vuelo, latencia media y conexiones
+            abiertas/reutilizadas
+        """
+        requests = self._stats["requests"]
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "avg_latency": self._stats["total_latency"] / requests if requests else 0.0,
+            "connections_opened": self._pool.opened,
+            "connections_reused": self._pool.reused,
+            "idle_connections": self._pool.idle
+        }
+
+    async def _post(self, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """
+        POST sobre una conexión del pool.
+
+        Si una conexión reutilizada resulta cerrada por el servidor antes de
+        responder, se reintenta una vez con una conexión nueva.
+        """
+        request = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {self._host_header}\r\n"
+            f"x-goog-api-key: {self.api_key}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n"
+            "\r\n"
+        ).encode() + body
+
+        while True:
+            connection, reused = await self._pool.acquire()
+            reusable = False
+            try:
+                connection.writer.write(request)
+                await connection.writer.drain()
+                status, headers, raw = await _read_response(connection.reader)
+                reusable = headers.get("connection", "").lower() != "close"
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if reused:
+                    self._stats["retries"] += 1
+                    continue
+                raise
+            finally:
+                self._pool.release(connection, reusable)
+            break
+
+        try:
+            payload = json.loads(raw) if raw else {}
+        except ValueError as e:
+            raise GeminiClientError(f"Respuesta de Gemini no es JSON (HTTP {status})") from e
+        return status, payload
+
+    @staticmethod
+    def _build_payload(
+        profile: IAProfile,
+        prompt: str,
+        system_instruction: Optional[str]
+    ) -> Dict[str, Any]:
+        """Cuerpo de generateContent con la configuración del perfil."""
+        payload: Dict[str, Any] = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "temperature": profile.temperature,
+                "maxOutputTokens": profile.max_tokens,
+                "topP": profile.top_p,
+            },
+        }
+        if system_instruction:
+            payload["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+        return payload
+
+    @staticmethod
+    def _error_message(payload: Dict[str, Any]) -> str:
+        """Mensaje de error de la API."""
+        error = payload.get("error")
+        if isinstance(error, dict):
+            return str(error.get("message", error))
+        return str(payload)[:200]
+
+    @staticmethod
+    def _parse_response(model: str, payload: Dict[str, Any], latency: float) -> GeminiResponse:
+        """Extrae texto y uso de tokens de la respuesta."""
+        candidates = payload.get("candidates") or []
+        if not candidates:
+            raise GeminiClientError("La respuesta de Gemini no tiene candidatos")
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        usage = payload.get("usageMetadata") or {}
+        return GeminiResponse(
+            text="".join(part.get("text", "") for part in parts),
+            model=model,
+            prompt_tokens=int(usage.get("promptTokenCount", 0)),
+            output_tokens=int(usage.get("candidatesTokenCount", 0)),
+            total_tokens=int(usage.get("totalTokenCount", 0)),
+            latency=latency,
+            raw=payload
+        )
@@ -0,0 +1,280 @@
+"""
+HistoryPlanner - Cantidad mínima de velas que necesitan los indicadores.
+
+Las EMAs (y el RSI y ATR de Wilder) se siembran con la primera vela de la
+serie; el peso de esa semilla decae como (1 - alpha)^n. Este módulo calcula,
+para el conjunto de indicadores configurado en cada timeframe, cuántas velas
+hacen falta para que ese peso quede por debajo de una tolerancia, y pide al
+extractor exactamente esa cantidad en lugar de un `count` fijo.
+
+Si el IndicatorEngine ya tiene estado para la serie, basta con traer las
+velas nuevas más la última procesada: la solicitud se reduce a unas pocas
+velas. Si la ventana corta no alcanza para continuar (el bot estuvo detenido
+o el broker corrigió una vela), se vuelve a pedir la cantidad completa.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-16
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (planificación de historial)
+"""
+import math
+import threading
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from src.core.indicators_calculator import (
+    ATR_PERIOD,
+    EMA_FAST_PERIOD,
+    EMA_SLOW_PERIOD,
+    MACD_SIGNAL_PERIOD,
+    MACD_SLOW_PERIOD,
+    RSI_PERIOD,
+    WARMUP_BARS,
+    IndicatorValues
+)
+
+
+# Indicadores que mantiene el IndicatorEngine de forma incremental
+ENGINE_INDICATORS = frozenset({"ema_20", "ema_50", "rsi", "macd"})
+ALL_INDICATORS = ENGINE_INDICATORS | {"atr"}
+
+
+class HistoryPlannerError(Exception):
+    """Excepción para errores de planificación de historial."""
+    pass
+
+
+def stable_bars(alpha: float, tolerance: float) -> int:
+    """
+    Velas para que el peso de la semilla de una EMA quede bajo la tolerancia.
+
+    Args:
+        alpha: Factor de suavizado de la EMA
+        tolerance: Peso residual máximo de la primera vela
+
+    Returns:
+        Velas necesarias (incluye la vela semilla)
+    """
+    return math.ceil(math.log(tolerance) / math.log(1.0 - alpha)) + 1
+
+
+def indicator_bars(indicator: str, tolerance: float) -> int:
+    """
+    Velas mínimas para un indicador estable.
+
+    Args:
+        indicator: "ema_20", "ema_50", "rsi", "macd" o "atr"
+        tolerance: Peso residual máximo de la semilla
+
+    Returns:
+        Velas necesarias (nunca menos que el calentamiento del indicador)
+
+    Raises:
+        HistoryPlannerError: Si el indicador no es conocido
+    """
+    if indicator == "ema_20":
+        bars = stable_bars(2.0 / (EMA_FAST_PERIOD + 1), tolerance)
+        warmup = WARMUP_BARS["ema_20"]
+    elif indicator == "ema_50":
+        bars = stable_bars(2.0 / (EMA_SLOW_PERIOD + 1), tolerance)
+        warmup = WARMUP_BARS["ema_50"]
+    elif indicator == "rsi":
+        # La primera diferencia requiere una vela adicional
+        bars = stable_bars(1.0 / RSI_PERIOD, tolerance) + 1
+        warmup = WARMUP_BARS["rsi"]
+    elif indicator == "macd":
+        # La señal suaviza la línea MACD, que a su vez depende de la EMA 26
+        bars = (
+            stable_bars(2.0 / (MACD_SLOW_PERIOD + 1), tolerance)
+            + stable_bars(2.0 / (MACD_SIGNAL_PERIOD + 1), tolerance)
+        )
+        warmup = WARMUP_BARS["signal_line"]
+    elif indicator == "atr":
+        bars = stable_bars(1.0 / ATR_PERIOD, tolerance) + 1
+        warmup = ATR_PERIOD - 1
+    else:
+        raise HistoryPlannerError(f"Indicador desconocido: {indicator!r}")
+    return max(bars, warmup + 1)
+
+
+class HistoryPlanner:
+    """
+    Planifica el `count` de get_ohlcv según los indicadores de cada timeframe.
+
+    Example:
+        >>> planner = HistoryPlanner(
+        ...     {"M5": ["ema_20", "ema_50", "rsi", "macd"], "H1": ["ema_50", "atr"]},
+        ...     engine=engine
+        ... )
+        >>> planner.required_bars(Timeframe.M5)
+        232
+        >>> ohlcv = planner.fetch(extractor, "EURUSD", Timeframe.M5)
+        >>> values = planner.update(extractor, "EURUSD", Timeframe.M5)  # vía engine
+    """
+
+    DEFAULT_TOLERANCE = 1e-4
+    DEFAULT_WARM_BARS = 3
+
+    def __init__(
+        self,
+        indicators: Mapping[str, Iterable[str]],
+        tolerance: float = DEFAULT_TOLERANCE,
+        min_bars: Optional[Mapping[str, int]] = None,
+        engine=None,
+        warm_bars: int = DEFAULT_WARM_BARS
+    ):
+        """
+        Inicializa el HistoryPlanner.
+
+        Args:
+            indicators: Nombre de timeframe → indicadores configurados
+            tolerance: Peso residual máximo de la semilla de cada EMA (0 < t < 1)
+            min_bars: Velas mínimas por timeframe requeridas por otros
+                consumidores (p. ej. las velas que se envían en el prompt)
+            engine: IndicatorEngine opcional; con estado, la solicitud se reduce
+            warm_bars: Velas a pedir con estado (última procesada + nuevas)
+
+        Raises:
+            HistoryPlannerError: Si los parámetros son inválidos
+        """
+        if not 0 < tolerance < 1:
+            raise HistoryPlannerError("tolerance debe estar entre 0 y 1")
+        if warm_bars < 2:
+            raise HistoryPlannerError("warm_bars debe ser al menos 2")
+
+        self.tolerance = tolerance
+        self.engine = engine
+        self.warm_bars = warm_bars
+        self.min_bars = dict(min_bars or {})
+        self.indicators: Dict[str, frozenset] = {}
+        for timeframe, names in indicators.items():
+            names = frozenset(names)
+            unknown = names - ALL_INDICATORS
+            if unknown:
+                raise HistoryPlannerError(f"Indicadores desconocidos en {timeframe}: {sorted(unknown)}")
+            self.indicators[timeframe] = names
+
+        self._stats = {
+            "requests": 0,
+            "warm_requests": 0,
+            "fallbacks": 0,
+            "bars_requested": 0,
+            "bars_saved": 0
+        }
+        self._lock = threading.Lock()
+
+    def required_bars(self, timeframe) -> int:
+        """
+        Velas necesarias sin estado previo (arranque en frío).
+
+        Args:
+            timeframe: Timeframe a planificar
+
+        Returns:
+            Máximo entre las velas de cada indicador y min_bars del timeframe
+
+        Raises:
+            HistoryPlannerError: Si el timeframe no tiene indicadores configurados
+        """
+        names = self._indicators_for(timeframe)
+        bars = max((indicator_bars(name, self.tolerance) for name in names), default=1)
+        return max(bars, self.min_bars.get(timeframe.name, 0))
+
+    def plan(self, symbol: str, timeframe) -> int:
+        """
+        Velas a pedir ahora para una serie.
+
+        Con estado en el engine y solo indicadores incrementales, alcanzan
+        warm_bars (o min_bars si es mayor); si no, required_bars.
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe a planificar
+
+        Returns:
+            Cantidad de velas
+        """
+        if self._is_warm(symbol, timeframe):
+            return max(self.warm_bars, self.min_bars.get(timeframe.name, 0))
+        return self.required_bars(timeframe)
+
+    def fetch(self, extractor, symbol: str, timeframe):
+        """
+        Descarga las velas cerradas planificadas.
+
+        Si con estado la ventana corta no continúa la serie, se descarga la
+        cantidad completa (arranque en frío).
+
+        Args:
+            extractor: MT5DataExtractor conectado
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe a descargar
+
+        Returns:
+            OHLCVData con las velas cerradas
+        """
+        full = self.required_bars(timeframe)
+        warm = self._is_warm(symbol, timeframe)
+        count = self.plan(symbol, timeframe)
+
+        data = extractor.get_ohlcv(symbol, timeframe, count, exclude_current=True)
+        requested = count
+        fallback = warm and not self.engine.continues(data)
+        if fallback:
+            data = extractor.get_ohlcv(symbol, timeframe, full, exclude_current=True)
+            requested += full
+
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["bars_requested"] += requested
+            self._stats["bars_saved"] += max(full - requested, 0)
+            if warm:
+                self._stats["warm_requests"] += 1
+            if fallback:
+                self._stats["fallbacks"] += 1
+        return data
+
+    def update(self, extractor, symbol: str, timeframe) -> IndicatorValues:
+        """
+        Descarga lo planificado y actualiza el IndicatorEngine.
+
+        Args:
+            extractor: MT5DataExtractor conectado
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe a actualizar
+
+        Returns:
+            IndicatorValues de la última vela cerrada
+
+        Raises:
+            HistoryPlannerError: Si no se configuró un engine
+        """
+        if self.engine is None:
+            raise HistoryPlannerError("update requiere un IndicatorEngine")
+        return self.engine.update(self.fetch(extractor, symbol, timeframe))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de planificación.
+
+        Returns:
+            Diccionario con solicitudes, solicitudes con estado, recargas
+            completas, velas pedidas y velas ahorradas frente al arranque en frío
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _indicators_for(self, timeframe) -> frozenset:
+        """Indicadores configurados para el timeframe."""
+        try:
+            return self.indicators[timeframe.name]
+        except KeyError:
+            raise HistoryPlannerError(
+                f"No hay indicadores configurados para {timeframe.name}"
+            ) from None
+
+    def _is_warm(self, symbol: str, timeframe) -> bool:
+        """True si el engine tiene estado y cubre todos los indicadores."""
+        return (
+            self.engine is not None
+            and self._indicators_for(timeframe) <= ENGINE_INDICATORS
+            and self.engine.get(symbol, timeframe) is not None
+        )
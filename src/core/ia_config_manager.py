@@ -84,6 +84,7 @@ class IAProfile:
         cost_per_1k_tokens: Costo por 1000 tokens (default 0.005)
         quota_limits: Límites de cuota específicos del perfil
         fallback_profile: Perfil alternativo si este falla
+        timeout_seconds: Timeout por petición a la IA en segundos (default 30)
     """
     name: str
     provider: IAProvider
@@ -96,6 +97,7 @@ class IAProfile:
     cost_per_1k_tokens: float = 0.005
     quota_limits: Optional[Dict[str, int]] = None
     fallback_profile: Optional[str] = None
+    timeout_seconds: float = 30.0
     
     def to_dict(self) -> Dict[str, Any]:
         """Convierte el perfil a diccionario"""
@@ -303,12 +305,15 @@ class IAConfigManager:
             try:
                 from src.core.quota_validator import QuotaValidator
                 
-                validator = QuotaValidator(config={
-                    "quota_validation": {
-                        "enabled": True,
-                        "provider": profile.provider.value
-                    }
-                })
+                # El validador lee y carga el libro de cuota compartido del
+                # provider, por lo que ve el consumo de todos los bots
+                quota_config: Dict[str, Any] = {
+                    "enabled": True,
+                    "provider": profile.provider.value
+                }
+                if profile.quota_limits:
+                    quota_config["quota_limits"] = profile.quota_limits
+                validator = QuotaValidator(config={"quota_validation": quota_config})
                 
                 result = validator.validate_quota()
                 
@@ -429,6 +434,12 @@ class IAConfigManager:
             if not isinstance(max_tokens, int) or max_tokens <= 0:
                 errors.append(f"max_tokens debe ser entero positivo, recibido: {max_tokens}")
         
+        # Validar timeout_seconds (positivo)
+        if "timeout_seconds" in profile_data:
+            timeout = profile_data["timeout_seconds"]
+            if not isinstance(timeout, (int, float)) or timeout <= 0:
+                errors.append(f"timeout_seconds debe ser positivo, recibido: {timeout}")
+        
         is_valid = len(errors) == 0
         return is_valid, errors if errors else None
     
@@ -0,0 +1,284 @@
+"""
+IndicatorPanel - Indicadores vectorizados sobre un panel de instrumentos.
+
+Este módulo agrupa las velas de todos los instrumentos de un timeframe en
+matrices (instrumentos x velas) alineadas a la derecha (la última columna es
+la última vela cerrada de cada instrumento) y calcula EMA 20/50, RSI 14,
+MACD (12, 26, 9) y ATR 14 para todas las filas en una sola pasada. El costo
+depende del ancho de las matrices y no del número de llamadas en Python.
+
+Las series con menos velas se rellenan con NaN a la izquierda; cada fila
+produce los mismos valores que el cálculo por símbolo de indicators_calculator.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-14
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (panel vectorizado)
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core.indicators_calculator import (
+    ATR_PERIOD,
+    EMA_FAST_PERIOD,
+    EMA_SLOW_PERIOD,
+    MACD_FAST_PERIOD,
+    MACD_SIGNAL_PERIOD,
+    MACD_SLOW_PERIOD,
+    RSI_PERIOD,
+    WARMUP_BARS,
+    IndicatorError,
+    IndicatorValues,
+    true_range
+)
+from src.core.mt5_data_extractor import OHLCVData
+
+
+# Calentamiento del ATR (índice de la primera vela válida)
+PANEL_WARMUP_BARS = {**WARMUP_BARS, "atr": ATR_PERIOD - 1}
+
+
+def _ewm_rows(values: np.ndarray, alpha: float) -> np.ndarray:
+    """EMA recursiva (adjust=False) de cada fila; el NaN inicial se omite."""
+    return pd.DataFrame(values.T).ewm(alpha=alpha, adjust=False).mean().to_numpy().T
+
+
+def _rsi_rows(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    """RSI elemento a elemento (100 sin pérdidas, 50 sin movimiento)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    return np.where(np.isnan(avg_gain), np.nan, rsi)
+
+
+@dataclass
+class PricePanel:
+    """
+    Velas de varios instrumentos alineadas en matrices (instrumentos x velas).
+
+    Attributes:
+        symbols: Símbolos en el orden de las filas
+        timeframe: Timeframe de las velas
+        time: Epochs (0 en el relleno)
+        open, high, low, close, volume: Precios y volumen (NaN en el relleno)
+        lengths: Velas válidas por fila
+        missing: Símbolos sin datos y el motivo
+    """
+    symbols: List[str]
+    timeframe: object
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    lengths: np.ndarray
+    missing: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_ohlcv(
+        cls,
+        data: Mapping[str, Optional[OHLCVData]],
+        timeframe,
+        bars: int,
+        missing: Optional[Dict[str, str]] = None
+    ) -> 'PricePanel':
+        """
+        Construye el panel con las últimas `bars` velas de cada OHLCVData.
+
+        Args:
+            data: Diccionario símbolo → OHLCVData (solo velas cerradas)
+            timeframe: Timeframe común
+            bars: Ancho del panel (columnas)
+            missing: Símbolos ya descartados y su motivo
+
+        Returns:
+            PricePanel alineado a la derecha
+
+        Raises:
+            IndicatorError: Si bars no es positivo
+        """
+        if bars <= 0:
+            raise IndicatorError("bars debe ser mayor a 0")
+
+        missing = dict(missing or {})
+        rows = {s: d for s, d in data.items() if d is not None and d.count > 0}
+        for symbol in data:
+            if symbol not in rows:
+                missing.setdefault(symbol, "sin velas")
+
+        symbols = list(rows)
+        n = len(symbols)
+        panel = {
+            name: np.full((n, bars), np.nan)
+            for name in ("open", "high", "low", "close", "volume")
+        }
+        time = np.zeros((n, bars), dtype=np.int64)
+        lengths = np.zeros(n, dtype=np.int64)
+
+        for i, symbol in enumerate(symbols):
+            ohlcv = rows[symbol]
+            length = min(ohlcv.count, bars)
+            lengths[i] = length
+            time[i, bars - length:] = ohlcv.time[-length:]
+            for name in ("open", "high", "low", "close", "volume"):
+                panel[name][i, bars - length:] = getattr(ohlcv, name)[-length:]
+
+        return cls(
+            symbols=symbols,
+            timeframe=timeframe,
+            time=time,
+            lengths=lengths,
+            missing=missing,
+            **panel
+        )
+
+    @property
+    def shape(self):
+        """Forma (instrumentos, velas) del panel."""
+        return self.close.shape
+
+    def row(self, symbol: str) -> int:
+        """
+        Obtiene la fila de un símbolo.
+
+        Raises:
+            KeyError: Si el símbolo no está en el panel
+        """
+        try:
+            return self.symbols.index(symbol)
+        except ValueError:
+            raise KeyError(f"{symbol} no está en el panel") from None
+
+
+@dataclass
+class PanelIndicators:
+    """
+    Indicadores calculados sobre un PricePanel.
+
+    Attributes:
+        panel: Panel de origen
+        arrays: Nombre del indicador → matriz (instrumentos x velas)
+    """
+    panel: PricePanel
+    arrays: Dict[str, np.ndarray]
+
+    def series(self, symbol: str) -> Dict[str, np.ndarray]:
+        """
+        Indicadores de un símbolo como vistas de las filas (sin el relleno).
+
+        Args:
+            symbol: Símbolo del instrumento
+
+        Returns:
+            Diccionario indicador → array 1D (vista, sin copia)
+        """
+        i = self.panel.row(symbol)
+        start = self.panel.shape[1] - int(self.panel.lengths[i])
+        return {name: array[i, start:] for name, array in self.arrays.items()}
+
+    def values(self, symbol: str) -> IndicatorValues:
+        """
+        Valores en la última vela de un símbolo.
+
+        Args:
+            symbol: Símbolo del instrumento
+
+        Returns:
+            IndicatorValues (None en los indicadores aún en calentamiento)
+        """
+        i = self.panel.row(symbol)
+
+        def last(name: str) -> Optional[float]:
+            value = self.arrays[name][i, -1]
+            return None if np.isnan(value) else float(value)
+
+        return IndicatorValues(
+            time=int(self.panel.time[i, -1]),
+            close=float(self.panel.close[i, -1]),
+            volume=float(self.panel.volume[i, -1]),
+            **{name: last(name) for name in WARMUP_BARS}
+        )
+
+    def atr(self, symbol: str) -> Optional[float]:
+        """ATR de la última vela de un símbolo (None en calentamiento)."""
+        value = self.arrays["atr"][self.panel.row(symbol), -1]
+        return None if np.isnan(value) else float(value)
+
+
+def compute_panel_indicators(panel: PricePanel) -> PanelIndicators:
+    """
+    Calcula todos los indicadores para todas las filas del panel.
+
+    Args:
+        panel: PricePanel alineado a la derecha
+
+    Returns:
+        PanelIndicators con ema_20, ema_50, rsi, macd_line, signal_line,
+        histogram y atr
+    """
+    close = panel.close
+    n, bars = close.shape
+
+    prev_close = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    diff = close - prev_close
+    diff = np.where(np.isnan(prev_close) & ~np.isnan(close), 0.0, diff)
+
+    ema_fast = _ewm_rows(close, 2.0 / (MACD_FAST_PERIOD + 1))
+    ema_slow = _ewm_rows(close, 2.0 / (MACD_SLOW_PERIOD + 1))
+    macd_line = ema_fast - ema_slow
+    signal_line = _ewm_rows(macd_line, 2.0 / (MACD_SIGNAL_PERIOD + 1))
+
+    arrays = {
+        "ema_20": _ewm_rows(close, 2.0 / (EMA_FAST_PERIOD + 1)),
+        "ema_50": _ewm_rows(close, 2.0 / (EMA_SLOW_PERIOD + 1)),
+        "rsi": _rsi_rows(
+            _ewm_rows(np.maximum(diff, 0.0), 1.0 / RSI_PERIOD),
+            _ewm_rows(np.maximum(-diff, 0.0), 1.0 / RSI_PERIOD)
+        ),
+        "macd_line": macd_line,
+        "signal_line": signal_line,
+        "histogram": macd_line - signal_line,
+        "atr": _ewm_rows(true_range(panel.high, panel.low, close), 1.0 / ATR_PERIOD),
+    }
+
+    # Calentamiento por fila: la primera vela válida depende del relleno
+    columns = np.arange(bars)
+    first_valid = bars - panel.lengths
+    for name, warmup in PANEL_WARMUP_BARS.items():
+        mask = columns[None, :] < (first_valid + warmup)[:, None]
+        arrays[name][mask] = np.nan
+
+    return PanelIndicators(panel=panel, arrays=arrays)
+
+
+def load_panel(extractor, config_manager, timeframe, bars: int) -> PricePanel:
+    """
+    Descarga las velas cerradas de todos los instrumentos configurados.
+
+    Usa GlobalConfigManager.get_all_instruments() y una sola extracción
+    masiva (get_ohlcv_bulk). Los símbolos con error quedan en `missing`.
+
+    Args:
+        extractor: MT5DataExtractor conectado
+        config_manager: GlobalConfigManager con la lista de instrumentos
+        timeframe: Timeframe del panel
+        bars: Velas por instrumento
+
+    Returns:
+        PricePanel con los instrumentos disponibles
+    """
+    symbols = config_manager.get_all_instruments()
+    result = extractor.get_ohlcv_bulk(symbols, [timeframe], bars, exclude_current=True)
+
+    data, missing = {}, {}
+    for symbol in symbols:
+        item = result.items[symbol][timeframe]
+        if item.success:
+            data[symbol] = item.data
+        else:
+            missing[symbol] = item.error
+
+    return PricePanel.from_ohlcv(data, timeframe, bars, missing=missing)
@@ -0,0 +1,555 @@
+"""
+Cálculo de indicadores técnicos por timeframe.
+
+Este módulo implementa el cálculo de EMA 20/50, RSI 14, MACD (12, 26, 9) y
+volumen sobre OHLCVData. Además del cálculo vectorizado completo, ofrece un
+motor incremental que guarda el estado de cada (símbolo, timeframe) y, al
+llegar una vela cerrada nueva, actualiza todos los indicadores en O(1). Solo
+se recalcula desde cero ante un hueco, una corrección de datos o un reinicio.
+
+Las recursiones son las mismas en ambos caminos (EMA con adjust=False, RSI
+con suavizado de Wilder), por lo que el resultado incremental coincide con el
+cálculo completo sobre la misma serie.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-14
+Ticket: T23 - Cálculo y formato de indicadores por timeframe
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Parámetros definidos en los requerimientos (sección 10.2)
+EMA_FAST_PERIOD = 20
+EMA_SLOW_PERIOD = 50
+RSI_PERIOD = 14
+MACD_FAST_PERIOD = 12
+MACD_SLOW_PERIOD = 26
+MACD_SIGNAL_PERIOD = 9
+ATR_PERIOD = 14
+
+
+class IndicatorError(Exception):
+    """Excepción para errores en el cálculo de indicadores."""
+    pass
+
+
+def _alpha(span: int) -> float:
+    """Factor de suavizado de una EMA de `span` períodos."""
+    return 2.0 / (span + 1.0)
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """EMA recursiva (adjust=False) sembrada con el primer valor."""
+    return pd.Series(values, dtype=np.float64).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def _rsi(avg_gain, avg_loss):
+    """RSI a partir de ganancias y pérdidas promedio (100 si no hay pérdidas)."""
+    avg_gain = np.asarray(avg_gain, dtype=np.float64)
+    avg_loss = np.asarray(avg_loss, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    return rsi
+
+
+def _recursions(close: np.ndarray) -> Dict[str, np.ndarray]:
+    """Calcula todas las recursiones sobre la serie completa de cierres."""
+    close = np.asarray(close, dtype=np.float64)
+    diff = np.diff(close, prepend=close[:1])
+    ema_fast = _ewm(close, _alpha(MACD_FAST_PERIOD))
+    ema_slow = _ewm(close, _alpha(MACD_SLOW_PERIOD))
+    macd_line = ema_fast - ema_slow
+    return {
+        "ema_20": _ewm(close, _alpha(EMA_FAST_PERIOD)),
+        "ema_50": _ewm(close, _alpha(EMA_SLOW_PERIOD)),
+        "ema_12": ema_fast,
+        "ema_26": ema_slow,
+        "macd_line": macd_line,
+        "signal_line": _ewm(macd_line, _alpha(MACD_SIGNAL_PERIOD)),
+        "avg_gain": _ewm(np.maximum(diff, 0.0), 1.0 / RSI_PERIOD),
+        "avg_loss": _ewm(np.maximum(-diff, 0.0), 1.0 / RSI_PERIOD),
+    }
+
+
+# Índice (0-based) de la primera vela con valor válido de cada indicador
+WARMUP_BARS = {
+    "ema_20": EMA_FAST_PERIOD - 1,
+    "ema_50": EMA_SLOW_PERIOD - 1,
+    "rsi": RSI_PERIOD,
+    "macd_line": MACD_SLOW_PERIOD - 1,
+    "signal_line": MACD_SLOW_PERIOD + MACD_SIGNAL_PERIOD - 2,
+    "histogram": MACD_SLOW_PERIOD + MACD_SIGNAL_PERIOD - 2,
+}
+
+
+def calculate_indicators(close: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Cálculo vectorizado completo de los indicadores sobre una serie.
+
+    Los valores anteriores al período de calentamiento de cada indicador
+    se devuelven como NaN.
+
+    Args:
+        close: Precios de cierre en orden cronológico
+
+    Returns:
+        Diccionario con arrays ema_20, ema_50, rsi, macd_line, signal_line, histogram
+
+    Raises:
+        IndicatorError: Si la serie está vacía
+    """
+    if len(close) == 0:
+        raise IndicatorError("Se requiere al menos una vela para calcular indicadores")
+
+    rec = _recursions(close)
+    result = {
+        "ema_20": rec["ema_20"],
+        "ema_50": rec["ema_50"],
+        "rsi": _rsi(rec["avg_gain"], rec["avg_loss"]),
+        "macd_line": rec["macd_line"],
+        "signal_line": rec["signal_line"],
+        "histogram": rec["macd_line"] - rec["signal_line"],
+    }
+    for name, first_valid in WARMUP_BARS.items():
+        result[name][:first_valid] = np.nan
+    return result
+
+
+def calculate_ema(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    EMA de `period` períodos (NaN durante el calentamiento).
+
+    Útil cuando solo se necesitan las medias (p. ej. para dibujarlas) y no
+    el resto de los indicadores.
+
+    Args:
+        values: Serie en orden cronológico
+        period: Períodos de la EMA
+
+    Returns:
+        Array con la EMA de cada vela
+
+    Raises:
+        IndicatorError: Si la serie está vacía o period no es positivo
+    """
+    if len(values) == 0:
+        raise IndicatorError("Se requiere al menos una vela para calcular la EMA")
+    if period <= 0:
+        raise IndicatorError("period debe ser mayor a 0")
+
+    ema = _ewm(values, _alpha(period))
+    ema[:period - 1] = np.nan
+    return ema
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Rango verdadero por vela (la primera vela usa high - low).
+
+    Funciona sobre arrays 1D o 2D (instrumentos x velas, a lo largo del último eje).
+
+    Args:
+        high: Precios máximos
+        low: Precios mínimos
+        close: Precios de cierre
+
+    Returns:
+        Array con el rango verdadero de cada vela
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    prev_close = np.concatenate([close[..., :1], close[..., :-1]], axis=-1)
+    # fmax/fmin ignoran el NaN del relleno a la izquierda en paneles 2D
+    return np.fmax(high, prev_close) - np.fmin(low, prev_close)
+
+
+def calculate_atr(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    period: int = ATR_PERIOD
+) -> np.ndarray:
+    """
+    ATR con suavizado de Wilder (NaN durante el calentamiento).
+
+    Args:
+        high: Precios máximos
+        low: Precios mínimos
+        close: Precios de cierre
+        period: Períodos del ATR
+
+    Returns:
+        Array con el ATR de cada vela
+
+    Raises:
+        IndicatorError: Si la serie está vacía o period no es positivo
+    """
+    if len(close) == 0:
+        raise IndicatorError("Se requiere al menos una vela para calcular el ATR")
+    if period <= 0:
+        raise IndicatorError("period debe ser mayor a 0")
+
+    atr = _ewm(true_range(high, low, close), 1.0 / period)
+    atr[:period - 1] = np.nan
+    return atr
+
+
+@dataclass
+class IndicatorValues:
+    """
+    Valores de los indicadores en la última vela cerrada.
+
+    Los indicadores aún en calentamiento son None.
+
+    Attributes:
+        time: Epoch (segundos) de la vela
+        close: Precio de cierre
+        volume: Volumen de ticks de la vela
+        ema_20: EMA de 20 períodos
+        ema_50: EMA de 50 períodos
+        rsi: RSI de 14 períodos
+        macd_line: Línea MACD (EMA 12 - EMA 26)
+        signal_line: Señal (EMA 9 de la línea MACD)
+        histogram: Histograma (MACD - señal)
+    """
+    time: int
+    close: float
+    volume: float
+    ema_20: Optional[float] = None
+    ema_50: Optional[float] = None
+    rsi: Optional[float] = None
+    macd_line: Optional[float] = None
+    signal_line: Optional[float] = None
+    histogram: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convierte a diccionario con el formato de envío a la IA.
+
+        Returns:
+            Dict con ema_20, ema_50, rsi, macd{macd_line, signal_line, histogram} y volumen
+        """
+        return {
+            "ema_20": self.ema_20,
+            "ema_50": self.ema_50,
+            "rsi": self.rsi,
+            "macd": {
+                "macd_line": self.macd_line,
+                "signal_line": self.signal_line,
+                "histogram": self.histogram
+            },
+            "volumen": self.volume
+        }
+
+
+@dataclass
+class IndicatorState:
+    """
+    Estado recursivo de los indicadores de una serie.
+
+    Attributes:
+        bars: Velas procesadas desde el último recálculo completo
+        last_time: Epoch de la última vela procesada
+        last_close: Cierre de la última vela procesada
+        ema_20, ema_50, ema_12, ema_26: EMAs de cierre
+        signal_line: EMA 9 de la línea MACD
+        avg_gain, avg_loss: Promedios de Wilder para el RSI
+        last_volume: Volumen de la última vela
+    """
+    bars: int
+    last_time: int
+    last_close: float
+    ema_20: float
+    ema_50: float
+    ema_12: float
+    ema_26: float
+    signal_line: float
+    avg_gain: float
+    avg_loss: float
+    last_volume: float
+
+    def advance(self, time: int, close: float, volume: float) -> None:
+        """
+        Incorpora una vela cerrada en O(1).
+
+        Args:
+            time: Epoch de la vela
+            close: Precio de cierre
+            volume: Volumen de la vela
+        """
+        diff = close - self.last_close
+        self.ema_20 += _alpha(EMA_FAST_PERIOD) * (close - self.ema_20)
+        self.ema_50 += _alpha(EMA_SLOW_PERIOD) * (close - self.ema_50)
+        self.ema_12 += _alpha(MACD_FAST_PERIOD) * (close - self.ema_12)
+        self.ema_26 += _alpha(MACD_SLOW_PERIOD) * (close - self.ema_26)
+        self.signal_line += _alpha(MACD_SIGNAL_PERIOD) * (
+            (self.ema_12 - self.ema_26) - self.signal_line
+        )
+        self.avg_gain += (max(diff, 0.0) - self.avg_gain) / RSI_PERIOD
+        self.avg_loss += (max(-diff, 0.0) - self.avg_loss) / RSI_PERIOD
+        self.bars += 1
+        self.last_time = int(time)
+        self.last_close = float(close)
+        self.last_volume = float(volume)
+
+    def values(self) -> IndicatorValues:
+        """Valores actuales con None para los indicadores en calentamiento."""
+        index = self.bars - 1
+        macd_line = self.ema_12 - self.ema_26
+
+        def ready(name: str, value: float) -> Optional[float]:
+            return float(value) if index >= WARMUP_BARS[name] else None
+
+        return IndicatorValues(
+            time=self.last_time,
+            close=self.last_close,
+            volume=self.last_volume,
+            ema_20=ready("ema_20", self.ema_20),
+            ema_50=ready("ema_50", self.ema_50),
+            rsi=ready("rsi", _rsi(self.avg_gain, self.avg_loss)),
+            macd_line=ready("macd_line", macd_line),
+            signal_line=ready("signal_line", self.signal_line),
+            histogram=ready("histogram", macd_line - self.signal_line)
+        )
+
+
+class IndicatorEngine:
+    """
+    Motor incremental de indicadores por (símbolo, timeframe).
+
+    Cada llamada a `update` recibe las últimas velas cerradas. Si la serie
+    continúa la anterior (la última vela procesada está presente y su cierre
+    no cambió), solo se procesan las velas nuevas en O(1) cada una. Si hay un
+    hueco, una corrección o no existe estado, se recalcula sobre toda la serie.
+
+    Es thread-safe: todas las operaciones se realizan bajo un lock interno.
+
+    Example:
+        >>> engine = IndicatorEngine()
+        >>> ohlcv = extractor.get_ohlcv("EURUSD", Timeframe.H1, 200, exclude_current=True)
+        >>> values = engine.update(ohlcv)
+        >>> values.to_dict()["rsi"]
+    """
+
+    DEFAULT_TOLERANCE = 1e-9
+
+    def __init__(self, tolerance: float = DEFAULT_TOLERANCE):
+        """
+        Inicializa el IndicatorEngine.
+
+        Args:
+            tolerance: Diferencia máxima aceptada entre el cierre guardado y el
+                recibido para la misma vela antes de considerarla corregida
+
+        Raises:
+            IndicatorError: Si tolerance es negativa
+        """
+        if tolerance < 0:
+            raise IndicatorError("tolerance no puede ser negativa")
+
+        self.tolerance = tolerance
+        self._states: Dict[Tuple[str, Any], IndicatorState] = {}
+        self._stats = {
+            "incremental_updates": 0,
+            "full_recomputes": 0,
+            "bars_folded": 0
+        }
+        self._lock = threading.Lock()
+
+    def update(self, ohlcv) -> IndicatorValues:
+        """
+        Actualiza los indicadores con las velas cerradas de un OHLCVData.
+
+        Args:
+            ohlcv: OHLCVData solo con velas cerradas (exclude_current=True)
+
+        Returns:
+            IndicatorValues de la última vela
+
+        Raises:
+            IndicatorError: Si no hay velas
+        """
+        if ohlcv.count == 0:
+            raise IndicatorError(f"No hay velas para {ohlcv.symbol} {ohlcv.timeframe.name}")
+
+        times = ohlcv.time
+        close = ohlcv.close
+        volume = ohlcv.volume
+        key = (ohlcv.symbol, ohlcv.timeframe)
+
+        with self._lock:
+            state = self._states.get(key)
+            start = self._continuation_index(state, times, close)
+
+            if state is None or start is None:
+                state = self._full_state(times, close, volume)
+                self._states[key] = state
+                self._stats["full_recomputes"] += 1
+            else:
+                for i in range(start, len(times)):
+                    state.advance(times[i], float(close[i]), float(volume[i]))
+                self._stats["incremental_updates"] += 1
+                self._stats["bars_folded"] += len(times) - start
+
+            return state.values()
+
+    def update_bar(
+        self,
+        symbol: str,
+        timeframe,
+        time: int,
+        close: float,
+        volume: float
+    ) -> Optional[IndicatorValues]:
+        """
+        Incorpora una sola vela cerrada (p. ej. desde el stream de ticks).
+
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de la vela
+            time: Epoch de apertura de la vela
+            close: Precio de cierre
+            volume: Volumen de la vela
+
+        Returns:
+            IndicatorValues actualizados, o None si no hay estado previo
+            (se requiere un `update` inicial con historial)
+        """
+        with self._lock:
+            state = self._states.get((symbol, timeframe))
+            if state is None:
+                return None
+            if int(time) > state.last_time:
+                state.advance(int(time), float(close), float(volume))
+                self._stats["incremental_updates"] += 1
+                self._stats["bars_folded"] += 1
+            return state.values()
+
+    def get(self, symbol: str, timeframe) -> Optional[IndicatorValues]:
+        """Obtiene los últimos valores calculados, o None si no hay estado."""
+        with self._lock:
+            state = self._states.get((symbol, timeframe))
+            return state.values() if state else None
+
+    def continues(self, ohlcv) -> bool:
+        """
+        Indica si las velas continúan el estado guardado de su serie.
+
+        Permite saber, antes de llamar a `update`, si una ventana corta
+        alcanza para avanzar de forma incremental.
+
+        Args:
+            ohlcv: OHLCVData con velas cerradas
+
+        Returns:
+            True si existe estado y la ventana contiene su última vela sin cambios
+        """
+        if ohlcv.count == 0:
+            return False
+        with self._lock:
+            state = self._states.get((ohlcv.symbol, ohlcv.timeframe))
+            return self._continuation_index(state, ohlcv.time, ohlcv.close) is not None
+
+    def reset(self, symbol: Optional[str] = None) -> None:
+        """
+        Elimina el estado guardado (todo, o solo el de un símbolo).
+
+        Args:
+            symbol: Símbolo a reiniciar (None = todos)
+        """
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                for key in [k for k in self._states if k[0] == symbol]:
+                    del self._states[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del motor.
+
+        Returns:
+            Diccionario con actualizaciones incrementales, recálculos completos,
+            velas procesadas incrementalmente y series con estado
+        """
+        with self._lock:
+            return {**self._stats, "series": len(self._states)}
+
+    def _continuation_index(
+        self,
+        state: Optional[IndicatorState],
+        times: np.ndarray,
+        close: np.ndarray
+    ) -> Optional[int]:
+        """
+        Índice de la primera vela nueva si la serie continúa el estado.
+
+        Returns:
+            Índice desde el que avanzar, o None si se requiere recálculo completo
+        """
+        if state is None:
+            return None
+
+        position = int(np.searchsorted(times, state.last_time))
+        if position >= len(times) or int(times[position]) != state.last_time:
+            return None  # Hueco o serie que no contiene la última vela procesada
+        if abs(float(close[position]) - state.last_close) > self.tolerance:
+            return None  # La vela fue corregida por el broker
+        return position + 1
+
+    @staticmethod
+    def _full_state(
+        times: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray
+    ) -> IndicatorState:
+        """Recalcula el estado recursivo sobre toda la serie."""
+        rec = _recursions(close)
+        return IndicatorState(
+            bars=len(close),
+            last_time=int(times[-1]),
+            last_close=float(close[-1]),
+            ema_20=float(rec["ema_20"][-1]),
+            ema_50=float(rec["ema_50"][-1]),
+            ema_12=float(rec["ema_12"][-1]),
+            ema_26=float(rec["ema_26"][-1]),
+            signal_line=float(rec["signal_line"][-1]),
+            avg_gain=float(rec["avg_gain"][-1]),
+            avg_loss=float(rec["avg_loss"][-1]),
+            last_volume=float(volume[-1])
+        )
+
+
+def indicator_values_at(close: np.ndarray, times: np.ndarray, volume: np.ndarray) -> IndicatorValues:
+    """
+    Calcula los valores de la última vela con el cálculo completo.
+
+    Útil como referencia para verificar el motor incremental.
+
+    Args:
+        close: Precios de cierre
+        times: Epochs de las velas
+        volume: Volúmenes
+
+    Returns:
+        IndicatorValues de la última vela
+    """
+    series = calculate_indicators(close)
+
+    def last(name: str) -> Optional[float]:
+        value = series[name][-1]
+        return None if np.isnan(value) else float(value)
+
+    return IndicatorValues(
+        time=int(times[-1]),
+        close=float(close[-1]),
+        volume=float(volume[-1]),
+        **{name: last(name) for name in WARMUP_BARS}
+    )
@@ -0,0 +1,367 @@
+"""
+IndicatorsFormatter - Formato de velas e indicadores para el prompt de la IA.
+
+Este módulo arma los datos numéricos que reciben los bots 1 y 2 en dos
+variantes:
+
+- build_payload / format_json: el JSON de la sección 10.3 de los
+  requerimientos (timeframe_5M, ultima_vela, indicadores, ultimas_N_velas).
+- format_compact: la misma información con menos tokens. Los precios se
+  redondean a los dígitos del símbolo y se expresan como enteros en puntos
+  relativos a una referencia (el precio actual); las velas van en forma
+  tabular con el encabezado una sola vez; se omiten los campos redundantes
+  (la última vela ya es la última fila, la apertura igual al cierre
+  anterior, el tiempo se deduce del timeframe salvo que haya huecos y el
+  histograma MACD es macd - señal).
+
+Ambas variantes reportan una estimación de tokens, la misma magnitud que
+IAConfigManager.track_usage factura por cada 1k tokens.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-16
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (formato compacto)
+"""
+import json
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+
+from src.core import mt5_types
+from src.core.indicators_calculator import IndicatorValues, indicator_values_at
+
+
+# Velas enviadas por timeframe (sección 10.3 de los requerimientos)
+DEFAULT_BARS_PER_TIMEFRAME = {"M5": 100, "M15": 80, "H1": 50}
+DEFAULT_BARS = 50
+DEFAULT_DIGITS = 5
+
+COMPACT_LEGEND = (
+    "# precios, EMAs y MACD en puntos relativos a ref; "
+    "velas de la más antigua a la actual; o vacío = cierre anterior; "
+    "g = velas faltantes antes de la fila"
+)
+
+_TOKEN_PATTERN = re.compile(r"\d{1,3}|[^\W\d_]+|[^\s\w]|_")
+
+
+class FormatterError(Exception):
+    """Excepción para errores de formato del prompt."""
+    pass
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimación de tokens de un texto para modelos tipo Gemini.
+
+    Aproximación conservadora: cada grupo de hasta 3 dígitos cuenta como un
+    token, cada palabra como un token por cada 4 letras y cada signo de
+    puntuación como un token. Los espacios no cuentan.
+
+    Args:
+        text: Texto del prompt
+
+    Returns:
+        Tokens estimados
+    """
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+
+def digits_from_point(point: float) -> int:
+    """
+    Dígitos de cotización a partir del punto del símbolo.
+
+    Args:
+        point: Tamaño del punto (ej: 0.00001 → 5, 0.01 → 2)
+
+    Returns:
+        Cantidad de decimales
+
+    Raises:
+        FormatterError: Si point no es positivo
+    """
+    try:
+        return mt5_types.digits_from_point(point)
+    except ValueError as e:
+        raise FormatterError(str(e)) from e
+
+
+def timeframe_label(timeframe) -> str:
+    """Etiqueta de los requerimientos para un timeframe (M5 → "5M", H1 → "1H")."""
+    name = getattr(timeframe, "name", str(timeframe))
+    return f"{name[1:]}{name[0]}"
+
+
+@dataclass(frozen=True)
+class FormattedPrompt:
+    """
+    Texto listo para el prompt y su tamaño.
+
+    Attributes:
+        text: Contenido a enviar
+        estimated_tokens: Tokens estimados (estimate_tokens)
+        chars: Largo en caracteres
+    """
+    text: str
+    estimated_tokens: int
+    chars: int
+
+    @classmethod
+    def from_text(cls, text: str) -> 'FormattedPrompt':
+        """Crea el resultado calculando la estimación de tokens."""
+        return cls(text=text, estimated_tokens=estimate_tokens(text), chars=len(text))
+
+
+class IndicatorsFormatter:
+    """
+    Formateador de velas e indicadores por timeframe para la IA.
+
+    Los indicadores se toman de un FeatureStore si se proporciona (así el
+    prompt reutiliza lo ya calculado para filtros y sizer) o se calculan
+    sobre todas las velas recibidas.
+
+    Example:
+        >>> formatter = IndicatorsFormatter(feature_store=store)
+        >>> prompt = formatter.format_compact("EURUSD", {Timeframe.M5: m5, Timeframe.H1: h1}, digits=5)
+        >>> send(prompt.text), prompt.estimated_tokens
+    """
+
+    def __init__(
+        self,
+        bars_per_timeframe: Optional[Mapping[str, int]] = None,
+        feature_store=None
+    ):
+        """
+        Inicializa el formateador.
+
+        Args:
+            bars_per_timeframe: Velas a enviar por nombre de timeframe
+                (por defecto M5=100, M15=80, H1=50; el resto 50)
+            feature_store: FeatureStore opcional para obtener los indicadores
+
+        Raises:
+            FormatterError: Si alguna cantidad de velas no es positiva
+        """
+        bars = dict(DEFAULT_BARS_PER_TIMEFRAME)
+        bars.update(bars_per_timeframe or {})
+        if any(count <= 0 for count in bars.values()):
+            raise FormatterError("Las velas por timeframe deben ser mayores a 0")
+
+        self.bars_per_timeframe = bars
+        self.feature_store = feature_store
+        self._stats = {"prompts": 0, "estimated_tokens": 0}
+
+    def build_payload(
+        self,
+        symbol: str,
+        data: Mapping[Any, Any],
+        digits: int = DEFAULT_DIGITS
+    ) -> Dict[str, Any]:
+        """
+        Construye el JSON de la sección 10.3 (formato de referencia).
+
+        Args:
+            symbol: Símbolo del instrumento
+            data: Timeframe → OHLCVData (velas cerradas)
+            digits: Dígitos de cotización del símbolo
+
+        Returns:
+            Diccionario con activo, precio_actual y un bloque por timeframe
+        """
+        payload: Dict[str, Any] = {"activo": symbol}
+        for timeframe, ohlcv in self._ordered(data):
+            rates = self._window(timeframe, ohlcv)
+            values = self._indicators(ohlcv)
+            payload.setdefault("precio_actual", round(float(ohlcv.close[-1]), digits))
+
+            candles = [
+                {
+                    "time": _iso(int(t)),
+                    "open": round(float(o), digits),
+                    "high": round(float(h), digits),
+                    "low": round(float(lo), digits),
+                    "close": round(float(c), digits),
+                    "volume": int(v),
+                }
+                for t, o, h, lo, c, v in zip(*rates)
+            ]
+            last = dict(candles[-1])
+            last.pop("time")
+            payload[f"timeframe_{timeframe_label(timeframe)}"] = {
+                "ultima_vela": last,
+                "indicadores": {
+                    "ema_20": _round(values.ema_20, digits),
+                    "ema_50": _round(values.ema_50, digits),
+                    "rsi": _round(values.rsi, 1),
+                    "macd": {
+                        "macd_line": _round(values.macd_line, digits + 1),
+                        "signal_line": _round(values.signal_line, digits + 1),
+                        "histogram": _round(values.histogram, digits + 1),
+                    },
+                },
+                f"ultimas_{len(candles)}_velas": candles,
+            }
+        return payload
+
+    def format_json(
+        self,
+        symbol: str,
+        data: Mapping[Any, Any],
+        digits: int = DEFAULT_DIGITS
+    ) -> FormattedPrompt:
+        """
+        Serializa build_payload como JSON (formato de referencia).
+
+        Args:
+            symbol: Símbolo del instrumento
+            data: Timeframe → OHLCVData
+            digits: Dígitos de cotización del símbolo
+
+        Returns:
+            FormattedPrompt con el JSON
+        """
+        text = json.dumps(self.build_payload(symbol, data, digits), ensure_ascii=False)
+        return self._record(FormattedPrompt.from_text(text))
+
+    def format_compact(
+        self,
+        symbol: str,
+        data: Mapping[Any, Any],
+        digits: int = DEFAULT_DIGITS
+    ) -> FormattedPrompt:
+        """
+        Formato compacto: enteros en puntos relativos al precio actual.
+
+        Ejemplo:
+            # precios, EMAs y MACD en puntos relativos a ref; ...
+            EURUSD ref=1.10450 pt=0.00001
+            5M n=100 desde=2025-11-11T00:00Z
+            ind e20=-8 e50=-42 rsi=58.3 macd=3.1 sig=2.0
+            o,h,l,c,v
+            -20,5,-31,-2,150
+            ,8,-4,6,97
+            ...
+
+        Args:
+            symbol: Símbolo del instrumento
+            data: Timeframe → OHLCVData
+            digits: Dígitos de cotización del símbolo
+
+        Returns:
+            FormattedPrompt con el texto compacto
+
+        Raises:
+            FormatterError: Si no hay timeframes o alguno no tiene velas
+        """
+        ordered = self._ordered(data)
+        point = 10.0 ** -digits
+        ref = round(float(ordered[0][1].close[-1]), digits)
+        lines = [COMPACT_LEGEND, f"{symbol} ref={ref:.{digits}f} pt={point:.{digits}f}"]
+
+        for timeframe, ohlcv in ordered:
+            times, o, h, lo, c, v = self._window(timeframe, ohlcv)
+            values = self._indicators(ohlcv)
+            step = timeframe.value * 60
+            gaps = np.diff(times, prepend=times[0]) // step - 1
+            gaps[0] = 0
+            has_gaps = bool((gaps > 0).any())
+
+            lines.append(f"{timeframe_label(timeframe)} n={len(times)} desde={_iso(int(times[0]), compact=True)}")
+            lines.append(
+                "ind "
+                f"e20={_points(values.ema_20, ref, point)} "
+                f"e50={_points(values.ema_50, ref, point)} "
+                f"rsi={_fmt(values.rsi, 1)} "
+                f"macd={_fmt(None if values.macd_line is None else values.macd_line / point, 1)} "
+                f"sig={_fmt(None if values.signal_line is None else values.signal_line / point, 1)}"
+            )
+
+            columns = [np.rint((column - ref) / point).astype(np.int64) for column in (o, h, lo, c)]
+            rows = np.column_stack(
+                columns + [np.asarray(v, dtype=np.int64)] + ([gaps.astype(np.int64)] if has_gaps else [])
+            ).tolist()
+            # La apertura igual al cierre anterior es redundante: se deja vacía
+            same_open = np.zeros(len(rows), dtype=bool)
+            same_open[1:] = columns[0][1:] == columns[3][:-1]
+            if has_gaps:
+                same_open &= gaps == 0
+            lines.append("o,h,l,c,v,g" if has_gaps else "o,h,l,c,v")
+            for row, skip in zip(rows, same_open.tolist()):
+                if skip:
+                    row[0] = ""
+                lines.append(",".join(map(str, row)))
+
+        return self._record(FormattedPrompt.from_text("\n".join(lines)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de los prompts formateados.
+
+        Returns:
+            Diccionario con prompts, tokens estimados totales y promedio
+        """
+        prompts = self._stats["prompts"]
+        return {
+            **self._stats,
+            "avg_tokens": self._stats["estimated_tokens"] / prompts if prompts else 0.0
+        }
+
+    def _ordered(self, data: Mapping[Any, Any]) -> List:
+        """Timeframes del menor al mayor, validando que tengan velas."""
+        if not data:
+            raise FormatterError("Se requiere al menos un timeframe")
+        for timeframe, ohlcv in data.items():
+            if ohlcv is None or ohlcv.count == 0:
+                raise FormatterError(f"El timeframe {timeframe_label(timeframe)} no tiene velas")
+        return sorted(data.items(), key=lambda item: item[0].value)
+
+    def _window(self, timeframe, ohlcv) -> tuple:
+        """Columnas (time, open, high, low, close, volume) de las velas a enviar."""
+        count = self.bars_per_timeframe.get(timeframe.name, DEFAULT_BARS)
+        window = slice(-count, None)
+        return (
+            ohlcv.time[window], ohlcv.open[window], ohlcv.high[window],
+            ohlcv.low[window], ohlcv.close[window], ohlcv.volume[window]
+        )
+
+    def _indicators(self, ohlcv) -> IndicatorValues:
+        """Indicadores de la última vela (del FeatureStore si existe)."""
+        if self.feature_store is not None:
+            return self.feature_store.get(ohlcv, "indicators")
+        return indicator_values_at(ohlcv.close, ohlcv.time, ohlcv.volume)
+
+    def _record(self, prompt: FormattedPrompt) -> FormattedPrompt:
+        """Acumula estadísticas del prompt generado."""
+        self._stats["prompts"] += 1
+        self._stats["estimated_tokens"] += prompt.estimated_tokens
+        return prompt
+
+
+def _iso(epoch: int, compact: bool = False) -> str:
+    """Epoch a ISO 8601 UTC (compacto: sin segundos y con sufijo Z)."""
+    moment = datetime.fromtimestamp(epoch, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%MZ" if compact else "%Y-%m-%dT%H:%M:%S")
+
+
+def _round(value: Optional[float], digits: int) -> Optional[float]:
+    """Redondea un valor opcional."""
+    return None if value is None else round(value, digits)
+
+
+def _fmt(value: Optional[float], decimals: int) -> str:
+    """Valor opcional con decimales fijos ("na" en calentamiento)."""
+    return "na" if value is None else f"{value:.{decimals}f}"
+
+
+def _points(value: Optional[float], ref: float, point: float) -> str:
+    """Precio opcional como entero de puntos relativo a ref."""
+    return "na" if value is None else str(int(round((value - ref) / point)))
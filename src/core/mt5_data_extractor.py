@@ -8,10 +8,13 @@ Autor: Sistema Botrading
 Fecha: 2025-11-11
 Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe
 """
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional, List, Dict
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Tuple, Any, Iterator, Union, Callable, Deque
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import numpy as np
 import pandas as pd
 
 try:
@@ -20,12 +23,17 @@ except ImportError:
     mt5 = None  # Para entorno de testing
 
 from src.core.logger import get_bot_logger, LogConfig
+from src.core.mt5_types import MT5_RATES_DTYPE, MT5DataError
+from src.core.bar_store import BarStore
+from src.core.bar_archive import BarArchive, from_epoch, to_epoch
+from src.core.timeframe_resampler import TimeframeResampler
+from src.core.ohlcv_cache import OHLCVCache
+from src.core.candle_waiter import CandleWaiter
+from src.core.single_flight import SingleFlight
+from src.core.stale_fallback import StaleFallback
+import threading
 import logging
-
-
-class MT5DataError(Exception):
-    """Excepción personalizada para errores de extracción de datos MT5."""
-    pass
+import time
 
 
 class Timeframe(Enum):
@@ -85,21 +93,181 @@ class Timeframe(Enum):
         return mt5_map.get(self, self.value)
 
 
-@dataclass
 class OHLCVData:
     """
     Clase para representar datos OHLCV extraídos de MT5.
     
+    Conserva el structured array original de MT5 y expone vistas sin copia
+    de cada columna. El DataFrame solo se construye la primera vez que se
+    accede a `data`, de modo que indicadores y filtros pueden trabajar
+    directamente sobre arrays.
+    
     Attributes:
         symbol: Símbolo del instrumento (ej: "EURUSD")
         timeframe: Timeframe de las velas
-        data: DataFrame con columnas [time, open, high, low, close, volume]
+        data: DataFrame con columnas [time, open, high, low, close, volume] (lazy)
         count: Número de velas en el dataset
+        rates: Structured array de MT5 (None si se construyó desde un DataFrame)
+        staleness: Segundos desde que se obtuvieron los datos si se sirvieron
+            como respaldo tras una falla (0.0 = datos frescos)
+    
+    Example:
+        >>> ohlcv = OHLCVData.from_rates("EURUSD", Timeframe.H1, rates)
+        >>> ema_input = ohlcv.close      # vista sin copia, sin pandas
+        >>> df = ohlcv.data              # DataFrame construido bajo demanda
     """
-    symbol: str
-    timeframe: Timeframe
-    data: pd.DataFrame
-    count: int
+    
+    def __init__(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        data: Optional[pd.DataFrame] = None,
+        count: Optional[int] = None,
+        rates: Optional[np.ndarray] = None
+    ):
+        """
+        Inicializa OHLCVData desde un DataFrame o un structured array.
+        
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            data: DataFrame con columnas [time, open, high, low, close, volume]
+            count: Número de velas (por defecto, el largo de los datos)
+            rates: Structured array con campos de MT5_RATES_DTYPE
+            
+        Raises:
+            ValueError: Si no se proporciona data ni rates
+        """
+        source = rates if rates is not None else data
+        if source is None:
+            raise ValueError("Se requiere data o rates para crear OHLCVData")
+        
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self._data = data
+        self._rates = rates
+        
+        if count is None:
+            count = len(source)
+        self.count = count
+        self.staleness = 0.0
+    
+    @classmethod
+    def from_rates(
+        cls,
+        symbol: str,
+        timeframe: Timeframe,
+        rates: np.ndarray
+    ) -> 'OHLCVData':
+        """
+        Crea OHLCVData sobre un structured array de MT5 sin copiarlo.
+        
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            rates: Structured array con campos de MT5_RATES_DTYPE
+            
+        Returns:
+            OHLCVData respaldado por el array
+        """
+        return cls(symbol=symbol, timeframe=timeframe, count=len(rates), rates=rates)
+    
+    @property
+    def data(self) -> pd.DataFrame:
+        """DataFrame con columnas [time, open, high, low, close, volume] (se construye bajo demanda)."""
+        if self._data is None:
+            if self._rates is None:
+                raise ValueError("OHLCVData sin data ni rates")
+            self._data = rates_to_dataframe(self._rates)
+        return self._data
+    
+    @data.setter
+    def data(self, value: pd.DataFrame) -> None:
+        self._data = value
+        self._rates = None
+    
+    @property
+    def rates(self) -> Optional[np.ndarray]:
+        """Structured array original de MT5, si existe."""
+        return self._rates
+    
+    @property
+    def time(self) -> np.ndarray:
+        """Tiempos de apertura como epoch int64 (segundos)."""
+        if self._rates is not None:
+            return self._rates['time']
+        times = self.data['time']
+        if pd.api.types.is_datetime64_any_dtype(times):
+            return times.to_numpy().astype('datetime64[s]').astype(np.int64)
+        return times.to_numpy().astype(np.int64)
+    
+    @property
+    def open(self) -> np.ndarray:
+        """Precios de apertura (vista sin copia)."""
+        return self._column('open')
+    
+    @property
+    def high(self) -> np.ndarray:
+        """Precios máximos (vista sin copia)."""
+        return self._column('high')
+    
+    @property
+    def low(self) -> np.ndarray:
+        """Precios mínimos (vista sin copia)."""
+        return self._column('low')
+    
+    @property
+    def close(self) -> np.ndarray:
+        """Precios de cierre (vista sin copia)."""
+        return self._column('close')
+    
+    @property
+    def volume(self) -> np.ndarray:
+        """Volumen de ticks (vista sin copia)."""
+        if self._rates is not None:
+            return self._rates['tick_volume']
+        return self.data['volume'].to_numpy()
+    
+    def _column(self, name: str) -> np.ndarray:
+        """Obtiene una columna como array desde rates o desde el DataFrame."""
+        if self._rates is not None:
+            return self._rates[name]
+        return self.data[name].to_numpy()
+    
+    @property
+    def is_stale(self) -> bool:
+        """True si los datos se sirvieron como respaldo tras una falla de MT5."""
+        return self.staleness > 0
+    
+    def with_staleness(self, seconds: float) -> 'OHLCVData':
+        """
+        Crea una copia superficial marcada como desactualizada.
+        
+        Los arrays y el DataFrame se comparten con el original.
+        
+        Args:
+            seconds: Antigüedad de los datos en segundos
+            
+        Returns:
+            Nuevo OHLCVData con `staleness` asignado
+        """
+        stale = OHLCVData(
+            symbol=self.symbol,
+            timeframe=self.timeframe,
+            data=self._data,
+            count=self.count,
+            rates=self._rates
+        )
+        stale.staleness = max(float(seconds), 1e-9)
+        return stale
+    
+    @property
+    def nbytes(self) -> int:
+        """Memoria aproximada retenida (structured array + DataFrame si ya se construyó)."""
+        total = self._rates.nbytes if self._rates is not None else 0
+        if self._data is not None:
+            total += int(self._data.memory_usage(index=True, deep=False).sum())
+        return total
     
     def to_dict(self) -> Dict:
         """
@@ -112,8 +280,139 @@ class OHLCVData:
             'symbol': self.symbol,
             'timeframe': self.timeframe.name,
             'count': self.count,
+            'staleness': self.staleness,
             'data': self.data.to_dict(orient='records')
         }
+    
+    def __repr__(self) -> str:
+        """Representación del objeto"""
+        return (
+            f"OHLCVData(symbol={self.symbol!r}, timeframe={self.timeframe.name}, "
+            f"count={self.count})"
+        )
+
+
+def rates_to_dataframe(rates: np.ndarray) -> pd.DataFrame:
+    """
+    Construye el DataFrame OHLCV a partir de un structured array de MT5.
+    
+    Cada columna se crea directamente desde el campo correspondiente, sin
+    pasar por un DataFrame intermedio con todas las columnas de MT5.
+    
+    Args:
+        rates: Structured array con campos de MT5_RATES_DTYPE
+        
+    Returns:
+        DataFrame con columnas [time, open, high, low, close, volume]
+    """
+    return pd.DataFrame({
+        'time': pd.to_datetime(rates['time'], unit='s'),
+        'open': rates['open'],
+        'high': rates['high'],
+        'low': rates['low'],
+        'close': rates['close'],
+        'volume': rates['tick_volume'],
+    })
+
+
+@dataclass
+class BulkItemResult:
+    """
+    Resultado de un (símbolo, timeframe) dentro de una extracción masiva.
+    
+    Attributes:
+        symbol: Símbolo del instrumento
+        timeframe: Timeframe de las velas
+        data: OHLCVData extraído (None si hubo error)
+        error: Mensaje de error (None si fue exitoso)
+        fetch_ms: Tiempo de la llamada a MT5 en el worker de I/O
+        convert_ms: Tiempo de conversión en el pool de conversión
+        from_cache: Si el resultado se sirvió desde el caché
+    """
+    symbol: str
+    timeframe: Timeframe
+    data: Optional[OHLCVData] = None
+    error: Optional[str] = None
+    fetch_ms: float = 0.0
+    convert_ms: float = 0.0
+    from_cache: bool = False
+    
+    @property
+    def success(self) -> bool:
+        """True si el item se extrajo correctamente."""
+        return self.error is None and self.data is not None
+
+
+@dataclass
+class BulkExtractionResult:
+    """
+    Resultado anidado de get_ohlcv_bulk: símbolo → timeframe → BulkItemResult.
+    
+    Attributes:
+        items: Resultados por símbolo y timeframe
+        total_ms: Tiempo total de la extracción masiva
+    """
+    items: Dict[str, Dict[Timeframe, BulkItemResult]] = field(default_factory=dict)
+    total_ms: float = 0.0
+    
+    def get(self, symbol: str, timeframe: Timeframe) -> Optional[OHLCVData]:
+        """
+        Obtiene los datos de un (símbolo, timeframe).
+        
+        Returns:
+            OHLCVData o None si no existe o falló
+        """
+        item = self.items.get(symbol, {}).get(timeframe)
+        return item.data if item else None
+    
+    def errors(self) -> Dict[Tuple[str, Timeframe], str]:
+        """
+        Obtiene los errores por (símbolo, timeframe).
+        
+        Returns:
+            Dict con el mensaje de error de cada item fallido
+        """
+        return {
+            (symbol, tf): item.error
+            for symbol, by_tf in self.items.items()
+            for tf, item in by_tf.items()
+            if item.error is not None
+        }
+    
+    @property
+    def success_count(self) -> int:
+        """Número de items extraídos correctamente."""
+        return sum(
+            1 for by_tf in self.items.values() for item in by_tf.values() if item.success
+        )
+    
+    @property
+    def error_count(self) -> int:
+        """Número de items con error."""
+        return len(self.errors())
+    
+    def get_latency_summary(self) -> Dict[str, Any]:
+        """
+        Resume la latencia por llamada de la extracción.
+        
+        Returns:
+            Dict con latencias promedio y máximas de fetch y conversión (ms)
+        """
+        fetched = [
+            item for by_tf in self.items.values() for item in by_tf.values()
+            if not item.from_cache
+        ]
+        fetch_times = [item.fetch_ms for item in fetched]
+        convert_times = [item.convert_ms for item in fetched if item.success]
+        
+        return {
+            "calls": len(fetched),
+            "total_ms": round(self.total_ms, 3),
+            "fetch_avg_ms": round(sum(fetch_times) / len(fetch_times), 3) if fetch_times else 0.0,
+            "fetch_max_ms": round(max(fetch_times), 3) if fetch_times else 0.0,
+            "convert_avg_ms": round(sum(convert_times) / len(convert_times), 3) if convert_times else 0.0,
+            "convert_max_ms": round(max(convert_times), 3) if convert_times else 0.0,
+        }
 
 
 class MT5DataExtractor:
@@ -135,21 +434,65 @@ class MT5DataExtractor:
         >>> print(f"Extraídas {data.count} velas de {data.symbol}")
     """
     
+    # Reintentos en segundo plano por serie antes de esperar a la próxima llamada
+    MAX_BACKGROUND_REFRESHES = 5
+    
     def __init__(
         self,
         connector,
         enable_cache: bool = False,
-        candle_waiter: Optional[object] = None,
-        logger: Optional[object] = None
+        candle_waiter: Optional[Any] = None,
+        logger: Optional[Any] = None,
+        enable_bar_store: bool = False,
+        bar_store_max_bars: int = BarStore.DEFAULT_MAX_BARS,
+        bulk_conversion_workers: int = 2,
+        enable_resampling: bool = False,
+        resample_check_interval: int = TimeframeResampler.DEFAULT_CHECK_INTERVAL,
+        resample_max_base_bars: int = TimeframeResampler.DEFAULT_MAX_BASE_BARS,
+        archive_dir: Optional[str] = None,
+        cache_max_bytes: int = OHLCVCache.DEFAULT_MAX_BYTES,
+        cache_clock: Optional[Callable[[], datetime]] = None,
+        enable_single_flight: bool = True,
+        serve_stale: bool = False,
+        max_stale_seconds: float = StaleFallback.DEFAULT_MAX_STALE_SECONDS,
+        stale_backoff_base: float = StaleFallback.DEFAULT_BACKOFF_BASE,
+        stale_backoff_max: float = StaleFallback.DEFAULT_BACKOFF_MAX,
+        compact_bars: Optional[str] = None
     ):
         """
         Inicializa el MT5DataExtractor.
         
         Args:
             connector: Instancia de MT5Connector con conexión activa
-            enable_cache: Si es True, habilita caché de datos (experimental)
+            enable_cache: Si es True, habilita el caché de datos; cada entrada
+                expira en el próximo cierre de vela de su timeframe
             candle_waiter: Instancia opcional de CandleWaiter para integración
             logger: Logger personalizado (usa el default si no se proporciona)
+            enable_bar_store: Si es True, get_ohlcv mantiene un store incremental
+                por (símbolo, timeframe) y solo pide a MT5 las velas nuevas
+            bar_store_max_bars: Máximo de velas cerradas retenidas por serie
+            bulk_conversion_workers: Hilos de conversión usados por get_ohlcv_bulk
+            enable_resampling: Si es True, get_ohlcv_multi_timeframe descarga solo
+                el timeframe más pequeño y deriva los superiores localmente
+            resample_check_interval: Cada cuántas derivaciones por (símbolo,
+                timeframe) se verifica contra las velas del terminal (0 = nunca)
+            resample_max_base_bars: Máximo de velas base para derivar; los
+                timeframes que necesitan más se descargan directamente
+            archive_dir: Directorio del archivo histórico en disco; si se indica,
+                get_ohlcv_range responde desde disco y solo pide a MT5 lo faltante
+            cache_max_bytes: Bytes máximos retenidos por el caché (LRU)
+            cache_clock: Función que retorna la hora actual para calcular la
+                expiración (por defecto, hora de Lima como CandleWaiter)
+            enable_single_flight: Si es True, las descargas concurrentes del mismo
+                (símbolo, timeframe, count) comparten una sola llamada a MT5
+            serve_stale: Si es True, cuando MT5 falla get_ohlcv retorna el último
+                dato válido (con `staleness` > 0) y reintenta en segundo plano
+            max_stale_seconds: Antigüedad máxima de un dato servido como respaldo
+            stale_backoff_base: Ventana negativa tras la primera falla (segundos);
+                se duplica con cada falla consecutiva
+            stale_backoff_max: Ventana negativa máxima (segundos)
+            compact_bars: Layout compacto ("points" o "float32") para las velas
+                del store incremental y del archivo histórico (None = layout de MT5)
             
         Raises:
             MT5DataError: Si el connector no está conectado
@@ -166,6 +509,7 @@ class MT5DataExtractor:
         self.candle_waiter = candle_waiter
         
         # Configurar logger
+        self.logger: Any
         if logger:
             self.logger = logger
         else:
@@ -180,11 +524,65 @@ class MT5DataExtractor:
                 self.logger.addHandler(handler)
                 self.logger.setLevel(logging.INFO)
         
-        # Caché simple (dict: key = (symbol, timeframe, count))
-        self._cache: Dict = {} if enable_cache else None
+        # Caché LRU con expiración al cierre de vela (key = (symbol, timeframe, count, exclude_current))
+        self._cache: Optional[OHLCVCache] = (
+            OHLCVCache(max_bytes=cache_max_bytes, clock=cache_clock)
+            if enable_cache else None
+        )
+        
+        # Deduplicación de descargas concurrentes (key = (symbol, timeframe, count, exclude_current))
+        self._single_flight: Optional[SingleFlight] = (
+            SingleFlight() if enable_single_flight else None
+        )
+        
+        # Respaldo con el último dato válido y ventanas negativas por serie
+        self._stale: Optional[StaleFallback] = (
+            StaleFallback(
+                max_stale_seconds=max_stale_seconds,
+                backoff_base=stale_backoff_base,
+                backoff_max=stale_backoff_max
+            )
+            if serve_stale else None
+        )
+        self._refresh_timers: Dict[Tuple, threading.Timer] = {}
+        self._refresh_lock = threading.Lock()
+        
+        # Store incremental (key = (symbol, timeframe))
+        self._bar_store: Optional[BarStore] = (
+            BarStore(max_bars=bar_store_max_bars, compact=compact_bars)
+            if enable_bar_store else None
+        )
+        
+        # Pools de get_ohlcv_bulk (se crean bajo demanda). El módulo MetaTrader5
+        # es global al proceso, por eso todas las llamadas van a un único worker
+        # y, además, toda llamada al terminal (también las hechas desde el hilo
+        # del llamador) se serializa con _terminal_lock.
+        self._terminal_lock = threading.Lock()
+        self.bulk_conversion_workers = max(1, bulk_conversion_workers)
+        self._io_executor: Optional[ThreadPoolExecutor] = None
+        self._conversion_executor: Optional[ThreadPoolExecutor] = None
+        
+        # Resampling local de timeframes superiores
+        self._resampler: Optional[TimeframeResampler] = (
+            TimeframeResampler(
+                check_interval=resample_check_interval,
+                max_base_bars=resample_max_base_bars
+            )
+            if enable_resampling else None
+        )
+        
+        # Archivo histórico memory-mapped para get_ohlcv_range
+        self._archive: Optional[BarArchive] = (
+            BarArchive(archive_dir, compact=compact_bars) if archive_dir else None
+        )
         
         self.logger.debug("MT5DataExtractor inicializado correctamente")
-    
+
+    @property
+    def terminal_lock(self) -> threading.Lock:
+        """Lock que serializa las llamadas al terminal (compartible con TickStream)."""
+        return self._terminal_lock
+
     def get_ohlcv(
         self,
         symbol: str,
@@ -218,77 +616,388 @@ class MT5DataExtractor:
             raise ValueError("count debe ser mayor a 0")
         
         # Verificar caché
-        if self.enable_cache:
-            cache_key = (symbol, timeframe, count)
-            if cache_key in self._cache:
+        if self._cache is not None:
+            cached = self._cache.get((symbol, timeframe, count, exclude_current))
+            if cached is not None:
                 self.logger.debug(f"Retornando datos del caché para {symbol} {timeframe.name}")
-                return self._cache[cache_key]
+                return cached
         
         # Esperar cierre de vela si se solicita
         if wait_for_close and self.candle_waiter:
             self.logger.debug(f"Esperando cierre de vela {timeframe.name} para {symbol}")
             self.candle_waiter.wait_for_candle_close(timeframe)
         
-        # Extraer datos de MT5
+        key = (symbol, timeframe, count, exclude_current)
+        
+        # Serie en ventana negativa: no consultar MT5 hasta que venza el backoff
+        stale = self._stale
+        failure = stale.get_failure(key) if stale is not None else None
+        if stale is not None and failure is not None and stale.is_suppressed(key):
+            error = MT5DataError(
+                f"{symbol} {timeframe.name} suspendido tras {failure.failures} fallas "
+                f"consecutivas: {failure.last_error}"
+            )
+            return self._serve_stale(key, error, record_failure=False)
+        
+        try:
+            ohlcv_data = self._extract(symbol, timeframe, count, exclude_current)
+        except MT5DataError as e:
+            if self._stale is None:
+                raise
+            return self._serve_stale(key, e)
+        
+        if self._stale is not None:
+            self._stale.record_success(key, ohlcv_data)
+        
+        # Guardar en caché si está habilitado
+        if self._cache is not None:
+            self._cache_put(symbol, timeframe, count, exclude_current, ohlcv_data)
+        
+        return ohlcv_data
+    
+    def _extract(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        count: int,
+        exclude_current: bool
+    ) -> OHLCVData:
+        """
+        Descarga y convierte las velas (sin caché ni respaldo).
+        
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            count: Número de velas a extraer
+            exclude_current: Si True, excluye la vela actual (parcial)
+            
+        Returns:
+            OHLCVData con las velas extraídas
+            
+        Raises:
+            MT5DataError: Si no se pueden obtener datos de MT5
+        """
         try:
             self.logger.info(
                 f"Extrayendo {count} velas de {symbol} en timeframe {timeframe.name}"
             )
             
-            # Si exclude_current, pedir una vela más y luego removerla
-            request_count = count + 1 if exclude_current else count
+            rates = self._fetch_rates(symbol, timeframe, count, exclude_current)
+            ohlcv_data = self._build_ohlcv(symbol, timeframe, rates, count, exclude_current)
             
-            rates = self._mt5.copy_rates_from_pos(
-                symbol,
-                timeframe.to_mt5_timeframe(),
-                0,  # Desde la posición actual
-                request_count
+            self.logger.info(
+                f"Extracción exitosa: {ohlcv_data.count} velas de {symbol} {timeframe.name}"
             )
             
-            if rates is None:
-                error_code = self._mt5.last_error() if hasattr(self._mt5, 'last_error') else "desconocido"
-                raise MT5DataError(
-                    f"No se pudieron obtener datos para {symbol} {timeframe.name}. "
-                    f"Error MT5: {error_code}"
-                )
+            return ohlcv_data
             
-            if len(rates) == 0:
-                raise MT5DataError(
-                    f"No se obtuvieron datos para {symbol} {timeframe.name}. "
-                    "Verifique que el símbolo sea válido y tenga datos disponibles."
-                )
+        except MT5DataError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error inesperado al extraer datos OHLCV: {e}")
+            raise MT5DataError(f"Error al extraer datos: {e}") from e
+    
+    def _serve_stale(
+        self,
+        key: Tuple,
+        error: MT5DataError,
+        record_failure: bool = True
+    ) -> OHLCVData:
+        """
+        Retorna el último dato válido tras una falla o relanza el error.
+        
+        Args:
+            key: (symbol, timeframe, count, exclude_current)
+            error: Falla de la descarga
+            record_failure: Si True, registra la falla y programa un reintento
             
-            # Convertir a DataFrame
-            df = self._convert_to_dataframe(rates)
+        Returns:
+            OHLCVData desactualizado (staleness > 0)
             
-            # Excluir vela actual si se solicita
-            if exclude_current and len(df) > count:
-                df = df.iloc[:-1]  # Remover última fila (vela actual)
+        Raises:
+            MT5DataError: Si no hay un dato válido suficientemente reciente
+        """
+        stale = self._stale
+        if stale is None:
+            raise error
+        
+        symbol, timeframe = key[0], key[1]
+        if record_failure:
+            failure = stale.record_failure(key, error)
+            self.logger.warning(
+                f"Falla #{failure.failures} al extraer {symbol} {timeframe.name}: {error}. "
+                f"Reintento en {failure.retry_at - stale.clock():.0f}s"
+            )
+            self._schedule_refresh(key)
+        
+        last_good = stale.get_last_good(key)
+        if last_good is None:
+            raise error
+        
+        ohlcv_data, age = last_good
+        self.logger.warning(
+            f"Sirviendo datos desactualizados de {symbol} {timeframe.name} ({age:.1f}s)"
+        )
+        return ohlcv_data.with_staleness(age)
+    
+    def _schedule_refresh(self, key: Tuple) -> None:
+        """Programa un reintento en segundo plano al vencer el backoff de la serie."""
+        stale = self._stale
+        if stale is None:
+            return
+        with self._refresh_lock:
+            if key in self._refresh_timers:
+                return
+            failure = stale.get_failure(key)
+            if failure is None or failure.failures > self.MAX_BACKGROUND_REFRESHES:
+                return
+            delay = max(failure.retry_at - stale.clock(), 0.0)
+            timer = threading.Timer(delay, self._run_refresh, args=(key,))
+            timer.daemon = True
+            self._refresh_timers[key] = timer
+            timer.start()
+    
+    def _run_refresh(self, key: Tuple) -> None:
+        """Reintenta la descarga en el worker de I/O de MT5."""
+        with self._refresh_lock:
+            if self._refresh_timers.pop(key, None) is None:
+                return  # Cancelado por close()
+        if self._stale is None or self._stale.get_failure(key) is None:
+            return  # Una llamada en primer plano ya recuperó la serie
+        
+        io_executor, _ = self._get_bulk_executors()
+        io_executor.submit(self._refresh_once, key)
+    
+    def _refresh_once(self, key: Tuple) -> None:
+        """Un intento de refresco; si falla extiende el backoff y reprograma."""
+        stale = self._stale
+        if stale is None:
+            return
+        symbol, timeframe, count, exclude_current = key
+        try:
+            ohlcv_data = self._extract(symbol, timeframe, count, exclude_current)
+        except MT5DataError as e:
+            stale.record_failure(key, e)
+            self._schedule_refresh(key)
+            return
+        
+        stale.record_success(key, ohlcv_data)
+        if self._cache is not None:
+            self._cache_put(symbol, timeframe, count, exclude_current, ohlcv_data)
+        self.logger.info(f"Serie {symbol} {timeframe.name} recuperada en segundo plano")
+    
+    def get_stale_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del modo serve-stale.
+        
+        Returns:
+            Diccionario con datos servidos desactualizados, fallas, supresiones
+            y series en ventana negativa; vacío si el modo está deshabilitado
+        """
+        if self._stale is None:
+            return {}
+        return self._stale.get_stats()
+    
+    def _fetch_rates(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        count: int,
+        exclude_current: bool
+    ):
+        """
+        Obtiene las velas crudas desde MT5 (o desde el store incremental).
+        
+        Es la única parte de get_ohlcv que llama al terminal. Si hay una
+        descarga en curso para la misma clave, espera y comparte su resultado.
+        
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            count: Número de velas solicitadas
+            exclude_current: Si True, se excluirá la vela en formación
             
-            # Crear OHLCVData
-            ohlcv_data = OHLCVData(
-                symbol=symbol,
-                timeframe=timeframe,
-                data=df.head(count),  # Asegurar que no exceda count
-                count=min(len(df), count)
+        Returns:
+            Velas en formato MT5
+        """
+        if self._single_flight is not None:
+            return self._single_flight.do(
+                (symbol, timeframe, count, exclude_current),
+                self._download_rates,
+                symbol,
+                timeframe,
+                count,
+                exclude_current
+            )
+        return self._download_rates(symbol, timeframe, count, exclude_current)
+    
+    def _download_rates(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        count: int,
+        exclude_current: bool
+    ):
+        """Descarga las velas crudas sin deduplicar (ver _fetch_rates)."""
+        if self._bar_store is not None:
+            return self._get_rates_from_bar_store(
+                self._bar_store, symbol, timeframe, count, exclude_current
             )
+        
+        # Si exclude_current, pedir una vela más y luego removerla
+        request_count = count + 1 if exclude_current else count
+        return self._copy_rates_from_pos(symbol, timeframe, request_count)
+    
+    def _build_ohlcv(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        rates,
+        count: int,
+        exclude_current: bool
+    ) -> OHLCVData:
+        """
+        Convierte velas crudas de MT5 en OHLCVData.
+        
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            rates: Velas en formato MT5
+            count: Número de velas solicitadas
+            exclude_current: Si True, excluye la vela en formación
             
-            # Guardar en caché si está habilitado
-            if self.enable_cache:
-                cache_key = (symbol, timeframe, count)
-                self._cache[cache_key] = ohlcv_data
+        Returns:
+            OHLCVData con hasta `count` velas
+        """
+        # Normalizar a structured array (sin copia si ya lo es)
+        rates = self._to_rates_array(rates)
+        
+        # Excluir vela actual si se solicita
+        if exclude_current and len(rates) > count:
+            rates = rates[:-1]  # Remover última fila (vela actual)
+        
+        # Crear OHLCVData (el DataFrame se construye solo si se accede a .data)
+        return OHLCVData.from_rates(
+            symbol,
+            timeframe,
+            rates[:count]  # Asegurar que no exceda count
+        )
+    
+    def _copy_rates_from_pos(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        request_count: int
+    ):
+        """
+        Descarga las últimas velas desde la posición actual (incluye la vela en formación).
+        
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            request_count: Número de velas a pedir a MT5
             
-            self.logger.info(
-                f"Extracción exitosa: {ohlcv_data.count} velas de {symbol} {timeframe.name}"
+        Returns:
+            Velas en formato MT5
+            
+        Raises:
+            MT5DataError: Si MT5 no retorna datos
+        """
+        with self._terminal_lock:
+            rates = self._mt5.copy_rates_from_pos(
+                symbol,
+                timeframe.to_mt5_timeframe(),
+                0,  # Desde la posición actual
+                request_count
+            )
+            if rates is None:
+                error_code = self._mt5.last_error() if hasattr(self._mt5, 'last_error') else "desconocido"
+        
+        if rates is None:
+            raise MT5DataError(
+                f"No se pudieron obtener datos para {symbol} {timeframe.name}. "
+                f"Error MT5: {error_code}"
             )
+        
+        if len(rates) == 0:
+            raise MT5DataError(
+                f"No se obtuvieron datos para {symbol} {timeframe.name}. "
+                "Verifique que el símbolo sea válido y tenga datos disponibles."
+            )
+        
+        return rates
+    
+    def _get_rates_from_bar_store(
+        self,
+        store: BarStore,
+        symbol: str,
+        timeframe: Timeframe,
+        count: int,
+        exclude_current: bool
+    ) -> np.ndarray:
+        """
+        Obtiene velas desde el store incremental, pidiendo a MT5 solo lo necesario.
+        
+        - Si el store no tiene suficientes velas cerradas, descarga la ventana
+          completa con copy_rates_from_pos y reemplaza la serie; la serie
+          crece hasta `count` aunque supere `bar_store_max_bars`.
+        - Si ya tiene la ventana (o el terminal no tiene más historia), pide
+          con copy_rates_range solo las velas posteriores a la última vela
+          cerrada conocida.
+        
+        Args:
+            store: Store incremental del extractor
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            count: Número de velas solicitadas
+            exclude_current: Si True, excluye la vela en formación
             
-            return ohlcv_data
+        Returns:
+            Structured array con hasta `count` velas
+        """
+        closed_needed = count if exclude_current else count - 1
+        last_closed = store.last_closed_time(symbol, timeframe)
+        
+        if last_closed is None or not store.covers(symbol, timeframe, closed_needed):
+            self._replace_bar_store_series(store, symbol, timeframe, closed_needed + 1)
+        else:
+            # Margen de un día para cubrir el desfase de la hora del servidor
+            delta = self._terminal_rates_range(
+                symbol,
+                timeframe,
+                datetime.fromtimestamp(last_closed + 1, tz=timezone.utc),
+                datetime.now(timezone.utc) + timedelta(days=1)
+            )
             
-        except MT5DataError:
-            raise
-        except Exception as e:
-            self.logger.error(f"Error inesperado al extraer datos OHLCV: {e}")
-            raise MT5DataError(f"Error al extraer datos: {e}") from e
+            if delta is None:
+                self.logger.warning(
+                    f"Actualización incremental fallida para {symbol} {timeframe.name}, "
+                    "descargando ventana completa"
+                )
+                self._replace_bar_store_series(store, symbol, timeframe, closed_needed + 1)
+            else:
+                added = store.append(symbol, timeframe, self._to_rates_array(delta))
+                self.logger.debug(
+                    f"Store incremental {symbol} {timeframe.name}: {added} velas cerradas nuevas"
+                )
+        
+        window = store.slice(symbol, timeframe, count, include_current=not exclude_current)
+        if window is None:
+            raise MT5DataError(f"El store incremental no tiene velas de {symbol} {timeframe.name}")
+        return window
+    
+    def _replace_bar_store_series(
+        self,
+        store: BarStore,
+        symbol: str,
+        timeframe: Timeframe,
+        request_count: int
+    ) -> None:
+        """Descarga la ventana completa y reemplaza la serie del store incremental."""
+        rates = self._copy_rates_from_pos(symbol, timeframe, request_count)
+        store.replace(
+            symbol, timeframe, self._to_rates_array(rates), requested=request_count
+        )
     
     def get_ohlcv_multi_timeframe(
         self,
@@ -300,6 +1009,11 @@ class MT5DataExtractor:
         """
         Extrae datos OHLCV para múltiples timeframes.
         
+        Con el resampling habilitado, se descarga el timeframe más pequeño y
+        los timeframes múltiplos de él se construyen localmente si la serie
+        base necesaria no supera `resample_max_base_bars`; el resto se
+        descarga directamente.
+        
         Args:
             symbol: Símbolo del instrumento
             timeframes: Lista de timeframes a extraer
@@ -321,8 +1035,15 @@ class MT5DataExtractor:
         )
         
         result = {}
+        pending = list(timeframes)
         
-        for tf in timeframes:
+        if self._resampler is not None and len(timeframes) > 1:
+            result.update(self._get_resampled_timeframes(
+                self._resampler, symbol, timeframes, count, exclude_current
+            ))
+            pending = [tf for tf in timeframes if tf not in result]
+        
+        for tf in pending:
             try:
                 ohlcv_data = self.get_ohlcv(
                     symbol=symbol,
@@ -348,6 +1069,299 @@ class MT5DataExtractor:
         
         return result
     
+    def _get_resampled_timeframes(
+        self,
+        resampler: TimeframeResampler,
+        symbol: str,
+        timeframes: List[Timeframe],
+        count: int,
+        exclude_current: bool
+    ) -> Dict[Timeframe, OHLCVData]:
+        """
+        Descarga el timeframe base y deriva localmente los timeframes superiores.
+        
+        Args:
+            resampler: Resampler del extractor
+            symbol: Símbolo del instrumento
+            timeframes: Timeframes solicitados
+            count: Número de velas por timeframe
+            exclude_current: Si True, excluye la vela actual
+            
+        Returns:
+            Dict con el timeframe base y los derivados con `count` velas
+            (vacío si no aplica o falla); los timeframes ausentes se
+            descargan directamente
+        """
+        base = min(timeframes, key=lambda tf: tf.value)
+        derivable = resampler.derivable_targets(base, timeframes, count)
+        if not derivable:
+            return {}
+        
+        base_count = resampler.required_base_count(base, derivable, count)
+        try:
+            base_data = self.get_ohlcv(
+                symbol=symbol,
+                timeframe=base,
+                count=base_count,
+                exclude_current=exclude_current
+            )
+        except Exception as e:
+            self.logger.error(f"Error al extraer serie base {symbol} {base.name}: {e}")
+            return {}
+        
+        rates = base_data.rates
+        if rates is None:
+            return {}  # Serie base sin velas crudas: se descargan directamente
+        result = {base: OHLCVData.from_rates(symbol, base, rates[-count:])}
+        
+        for tf in derivable:
+            derived = resampler.resample(
+                rates, base, tf, count, drop_incomplete_last=exclude_current
+            )
+            if resampler.should_verify(symbol, tf):
+                derived = self._verify_resampled(
+                    resampler, symbol, tf, derived, count, exclude_current
+                )
+            if len(derived) < count:
+                # Historia base insuficiente: se descarga directamente del terminal
+                self.logger.debug(
+                    f"Resampling {symbol} {tf.name}: {len(derived)}/{count} velas "
+                    "derivadas, se descarga del terminal"
+                )
+                continue
+            result[tf] = OHLCVData.from_rates(symbol, tf, derived)
+        
+        self.logger.debug(
+            f"Resampling {symbol}: "
+            f"{', '.join(tf.name for tf in result if tf != base) or 'ninguno'} "
+            f"derivados desde {base.name}"
+        )
+        
+        return result
+    
+    def _verify_resampled(
+        self,
+        resampler: TimeframeResampler,
+        symbol: str,
+        timeframe: Timeframe,
+        derived: np.ndarray,
+        count: int,
+        exclude_current: bool
+    ) -> np.ndarray:
+        """
+        Compara velas derivadas contra el terminal y usa las del terminal si difieren.
+        
+        Args:
+            resampler: Resampler del extractor
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe derivado
+            derived: Velas construidas localmente
+            count: Número de velas solicitadas
+            exclude_current: Si True, se excluye la vela actual
+            
+        Returns:
+            Las velas derivadas, o las del terminal si no coinciden
+        """
+        try:
+            terminal = self._to_rates_array(
+                self._copy_rates_from_pos(symbol, timeframe, count + 1)
+            )
+        except MT5DataError as e:
+            self.logger.warning(
+                f"No se pudo verificar resampling de {symbol} {timeframe.name}: {e}"
+            )
+            return derived
+        
+        # La última vela del terminal está en formación: comparar solo cerradas
+        closed = terminal[:-1]
+        if resampler.verify(symbol, timeframe, derived, closed):
+            return derived
+        
+        self.logger.warning(
+            f"Velas derivadas de {symbol} {timeframe.name} no coinciden con el "
+            "terminal, usando velas del terminal"
+        )
+        return closed[-count:] if exclude_current else terminal[-count:]
+    
+    def get_resample_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del resampling local.
+        
+        Returns:
+            Diccionario con derivaciones, verificaciones y discrepancias
+            (vacío si el resampling está deshabilitado)
+        """
+        if self._resampler is None:
+            return {}
+        return self._resampler.get_stats()
+    
+    def get_ohlcv_bulk(
+        self,
+        symbols: List[str],
+        timeframes: List[Timeframe],
+        count: int,
+        exclude_current: bool = False,
+        build_dataframe: bool = False
+    ) -> BulkExtractionResult:
+        """
+        Extrae OHLCV para múltiples símbolos y timeframes en una sola operación.
+        
+        Todas las llamadas a MT5 se encolan en un único worker de I/O (el
+        módulo MetaTrader5 es global al proceso). La conversión de cada
+        respuesta se ejecuta en un pool aparte, solapándose con las descargas
+        pendientes. Los errores se registran por item sin abortar el resto.
+        
+        Args:
+            symbols: Lista de símbolos
+            timeframes: Lista de timeframes
+            count: Número de velas por (símbolo, timeframe)
+            exclude_current: Si True, excluye la vela actual
+            build_dataframe: Si True, materializa el DataFrame en el pool de conversión
+            
+        Returns:
+            BulkExtractionResult anidado por símbolo y timeframe
+            
+        Raises:
+            ValueError: Si los parámetros son inválidos
+        """
+        if not symbols:
+            raise ValueError("La lista de símbolos no puede estar vacía")
+        
+        if any(not symbol or not symbol.strip() for symbol in symbols):
+            raise ValueError("El símbolo es requerido y no puede estar vacío")
+        
+        if not timeframes:
+            raise ValueError("La lista de timeframes no puede estar vacía")
+        
+        if count <= 0:
+            raise ValueError("count debe ser mayor a 0")
+        
+        start = time.perf_counter()
+        result = BulkExtractionResult()
+        io_executor, conversion_executor = self._get_bulk_executors()
+        
+        self.logger.info(
+            f"Extracción masiva: {len(symbols)} símbolos x {len(timeframes)} timeframes"
+        )
+        
+        fetch_futures: Dict[Future, BulkItemResult] = {}
+        for symbol in symbols:
+            by_tf = result.items.setdefault(symbol, {})
+            for tf in timeframes:
+                item = BulkItemResult(symbol=symbol, timeframe=tf)
+                by_tf[tf] = item
+                
+                if self._cache is not None:
+                    cached = self._cache.get((symbol, tf, count, exclude_current))
+                    if cached is not None:
+                        item.data = cached
+                        item.from_cache = True
+                        continue
+                
+                fetch_future = io_executor.submit(
+                    self._timed_fetch, symbol, tf, count, exclude_current
+                )
+                fetch_futures[fetch_future] = item
+        
+        # Convertir a medida que cada descarga termina
+        conversion_futures: Dict[Future, BulkItemResult] = {}
+        for fetch_future in as_completed(fetch_futures):
+            item = fetch_futures[fetch_future]
+            rates, item.fetch_ms, error = fetch_future.result()
+            if error is not None:
+                item.error = str(error)
+                self.logger.error(f"Error al extraer {item.symbol} {item.timeframe.name}: {error}")
+                continue
+            
+            conversion = conversion_executor.submit(
+                self._timed_build,
+                item.symbol,
+                item.timeframe,
+                rates,
+                count,
+                exclude_current,
+                build_dataframe
+            )
+            conversion_futures[conversion] = item
+        
+        for conversion_future in as_completed(conversion_futures):
+            item = conversion_futures[conversion_future]
+            try:
+                ohlcv_data, item.convert_ms = conversion_future.result()
+            except Exception as e:
+                item.error = f"Error al convertir datos: {e}"
+                self.logger.error(f"Error al convertir {item.symbol} {item.timeframe.name}: {e}")
+                continue
+            
+            item.data = ohlcv_data
+            if self._cache is not None:
+                self._cache_put(item.symbol, item.timeframe, count, exclude_current, ohlcv_data)
+        
+        result.total_ms = (time.perf_counter() - start) * 1000
+        
+        self.logger.info(
+            f"Extracción masiva completada: {result.success_count} exitosos, "
+            f"{result.error_count} con error en {result.total_ms:.1f} ms"
+        )
+        
+        return result
+    
+    def _timed_fetch(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        count: int,
+        exclude_current: bool
+    ) -> Tuple[Any, float, Optional[Exception]]:
+        """
+        Ejecuta _fetch_rates midiendo su latencia (corre en el worker de I/O).
+        
+        Returns:
+            Tupla (rates, milisegundos, excepción o None)
+        """
+        start = time.perf_counter()
+        try:
+            rates = self._fetch_rates(symbol, timeframe, count, exclude_current)
+            error = None
+        except Exception as e:
+            rates, error = None, e
+        return rates, (time.perf_counter() - start) * 1000, error
+    
+    def _timed_build(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        rates,
+        count: int,
+        exclude_current: bool,
+        build_dataframe: bool
+    ) -> Tuple[OHLCVData, float]:
+        """
+        Ejecuta _build_ohlcv midiendo su latencia (corre en el pool de conversión).
+        
+        Returns:
+            Tupla (OHLCVData, milisegundos)
+        """
+        start = time.perf_counter()
+        ohlcv_data = self._build_ohlcv(symbol, timeframe, rates, count, exclude_current)
+        if build_dataframe:
+            ohlcv_data.data
+        return ohlcv_data, (time.perf_counter() - start) * 1000
+    
+    def _get_bulk_executors(self) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        """Crea bajo demanda el worker de I/O de MT5 y el pool de conversión."""
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="mt5-io"
+            )
+        if self._conversion_executor is None:
+            self._conversion_executor = ThreadPoolExecutor(
+                max_workers=self.bulk_conversion_workers,
+                thread_name_prefix="mt5-convert"
+            )
+        return self._io_executor, self._conversion_executor
+    
     def get_ohlcv_range(
         self,
         symbol: str,
@@ -358,6 +1372,9 @@ class MT5DataExtractor:
         """
         Extrae datos OHLCV para un rango de fechas específico.
         
+        Si el archivo histórico está habilitado, el rango se lee desde disco
+        y solo los tramos faltantes se piden a MT5 (fechas naive = UTC).
+        
         Args:
             symbol: Símbolo del instrumento
             timeframe: Timeframe de las velas
@@ -379,25 +1396,17 @@ class MT5DataExtractor:
         )
         
         try:
-            rates = self._mt5.copy_rates_range(
-                symbol,
-                timeframe.to_mt5_timeframe(),
-                start_date,
-                end_date
-            )
+            rates = self._copy_rates_range(symbol, timeframe, start_date, end_date)
             
             if rates is None or len(rates) == 0:
                 raise MT5DataError(
                     f"No se obtuvieron datos para {symbol} en el rango especificado"
                 )
             
-            df = self._convert_to_dataframe(rates)
-            
-            ohlcv_data = OHLCVData(
-                symbol=symbol,
-                timeframe=timeframe,
-                data=df,
-                count=len(df)
+            ohlcv_data = OHLCVData.from_rates(
+                symbol,
+                timeframe,
+                self._to_rates_array(rates)
             )
             
             self.logger.info(
@@ -412,6 +1421,158 @@ class MT5DataExtractor:
             self.logger.error(f"Error al extraer datos por rango: {e}")
             raise MT5DataError(f"Error en extracción por rango: {e}") from e
     
+    def _copy_rates_range(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        start_date: datetime,
+        end_date: datetime
+    ):
+        """
+        Descarga velas por rango desde el archivo histórico o directamente de MT5.
+        
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            start_date: Fecha de inicio (inclusive)
+            end_date: Fecha de fin (inclusive)
+            
+        Returns:
+            Velas en formato MT5 (None si MT5 falla)
+        """
+        if self._archive is not None:
+            return self._archive.get_range(
+                symbol,
+                timeframe,
+                start_date,
+                end_date,
+                fetch=lambda date_from, date_to: self._terminal_rates_range(
+                    symbol, timeframe, date_from, date_to
+                )
+            )
+        return self._terminal_rates_range(symbol, timeframe, start_date, end_date)
+    
+    def _terminal_rates_range(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        date_from: datetime,
+        date_to: datetime
+    ):
+        """copy_rates_range serializado con el resto de las llamadas al terminal."""
+        with self._terminal_lock:
+            return self._mt5.copy_rates_range(
+                symbol, timeframe.to_mt5_timeframe(), date_from, date_to
+            )
+    
+    def iter_ohlcv_range(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        start_date: datetime,
+        end_date: datetime,
+        chunk: int = 50_000,
+        as_dataframe: bool = False,
+        prefetch: int = 1
+    ) -> Iterator[Union[np.ndarray, pd.DataFrame]]:
+        """
+        Recorre un rango de fechas en bloques de exactamente `chunk` velas.
+        
+        El rango se divide en ventanas de `chunk` velas de duración. Cada
+        ventana se descarga con copy_rates_range en el worker de I/O de MT5
+        mientras el consumidor procesa la anterior, así la memoria máxima
+        depende de `chunk` y no de la longitud del rango. Como las ventanas
+        con fines de semana, feriados o huecos traen menos velas, se
+        re-dividen llevando el resto a la siguiente: todos los bloques tienen
+        `chunk` velas salvo el último. Fechas naive = UTC.
+        
+        Args:
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas
+            start_date: Fecha de inicio del rango (inclusive)
+            end_date: Fecha de fin del rango (inclusive)
+            chunk: Velas por bloque (el último puede tener menos)
+            as_dataframe: Si True, entrega DataFrames en lugar de structured arrays
+            prefetch: Ventanas descargadas por adelantado (0 = sin solapamiento)
+            
+        Yields:
+            Structured array (MT5_RATES_DTYPE) o DataFrame por bloque, en orden cronológico
+            
+        Raises:
+            ValueError: Si los parámetros son inválidos
+            MT5DataError: Si MT5 falla al descargar una ventana
+        """
+        if start_date >= end_date:
+            raise ValueError("start_date debe ser anterior a end_date")
+        if chunk <= 0:
+            raise ValueError("chunk debe ser mayor a 0")
+        if prefetch < 0:
+            raise ValueError("prefetch no puede ser negativo")
+        
+        span = chunk * timeframe.value * 60
+        start, end = to_epoch(start_date), to_epoch(end_date)
+        windows = (
+            (w, min(w + span - 1, end)) for w in range(start, end + 1, span)
+        )
+        io_executor, _ = self._get_bulk_executors()
+        pending: Deque[Tuple[Tuple[int, int], Future]] = deque()
+        carry = np.empty(0, dtype=MT5_RATES_DTYPE)
+        
+        self.logger.info(
+            f"Recorriendo {symbol} {timeframe.name} desde {start_date} hasta {end_date} "
+            f"en bloques de {chunk} velas"
+        )
+        
+        def submit_next() -> None:
+            window = next(windows, None)
+            if window is not None:
+                pending.append((window, io_executor.submit(
+                    self._copy_rates_range,
+                    symbol,
+                    timeframe,
+                    from_epoch(window[0]),
+                    from_epoch(window[1])
+                )))
+        
+        try:
+            for _ in range(prefetch + 1):
+                submit_next()
+            
+            while pending:
+                (window_start, window_end), future = pending.popleft()
+                submit_next()
+                
+                try:
+                    rates = future.result()
+                except Exception as e:
+                    raise MT5DataError(
+                        f"Error al descargar {symbol} {timeframe.name} "
+                        f"[{from_epoch(window_start)} - {from_epoch(window_end)}]: {e}"
+                    ) from e
+                
+                if rates is None:
+                    raise MT5DataError(
+                        f"MT5 no retornó datos para {symbol} {timeframe.name} "
+                        f"[{from_epoch(window_start)} - {from_epoch(window_end)}]"
+                    )
+                if len(rates) == 0:
+                    continue
+                
+                rates = self._to_rates_array(rates)
+                if len(carry) > 0:
+                    rates = np.concatenate([carry, rates])
+                full = len(rates) - len(rates) % chunk
+                for offset in range(0, full, chunk):
+                    block = rates[offset:offset + chunk]
+                    yield rates_to_dataframe(block) if as_dataframe else block
+                carry = rates[full:]
+            
+            if len(carry) > 0:
+                yield rates_to_dataframe(carry) if as_dataframe else carry
+        finally:
+            for _, future in pending:
+                future.cancel()
+    
     def validate_symbol(self, symbol: str) -> bool:
         """
         Valida si un símbolo existe en MT5.
@@ -423,7 +1584,8 @@ class MT5DataExtractor:
             True si el símbolo existe, False en caso contrario
         """
         try:
-            symbol_info = self._mt5.symbol_info(symbol)
+            with self._terminal_lock:
+                symbol_info = self._mt5.symbol_info(symbol)
             return symbol_info is not None
         except Exception as e:
             self.logger.error(f"Error al validar símbolo {symbol}: {e}")
@@ -434,35 +1596,104 @@ class MT5DataExtractor:
         Convierte datos de MT5 (numpy structured array) a pandas DataFrame.
         
         Args:
-            rates: Datos en formato MT5
+            rates: Datos en formato MT5 (structured array o lista de tuplas)
             
         Returns:
             DataFrame con columnas [time, open, high, low, close, volume]
         """
-        # Convertir a DataFrame
-        # Los datos de MT5 vienen como structured array con nombres de campos
-        df = pd.DataFrame(rates)
-        
-        # Si el DataFrame tiene índices numéricos, significa que rates era una lista
-        # En ese caso, asignar nombres de columnas manualmente
-        if df.columns.dtype == 'int64':
-            # Formato MT5: (time, open, high, low, close, tick_volume, spread, real_volume)
-            df.columns = ['time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume']
+        return rates_to_dataframe(self._to_rates_array(rates))
+    
+    @staticmethod
+    def _to_rates_array(rates) -> np.ndarray:
+        """
+        Normaliza velas de MT5 a un structured array con MT5_RATES_DTYPE.
         
-        # Convertir timestamp a datetime
-        df['time'] = pd.to_datetime(df['time'], unit='s')
+        Args:
+            rates: Structured array de MT5 o secuencia de tuplas
+            
+        Returns:
+            Structured array con campos nombrados
+        """
+        if isinstance(rates, np.ndarray) and rates.dtype.names:
+            return rates
+        if len(rates) == 0:
+            return np.empty(0, dtype=MT5_RATES_DTYPE)
+        return np.array([tuple(r) for r in rates], dtype=MT5_RATES_DTYPE)
+    
+    def _cache_put(
+        self,
+        symbol: str,
+        timeframe: Timeframe,
+        count: int,
+        exclude_current: bool,
+        ohlcv_data: OHLCVData
+    ) -> None:
+        """Guarda datos en el caché hasta el próximo cierre de vela del timeframe."""
+        if self._cache is None:
+            return
+        expires_at = CandleWaiter.next_close_for(timeframe.name, self._cache.clock())
+        self._cache.put(
+            (symbol, timeframe, count, exclude_current),
+            ohlcv_data,
+            expires_at=expires_at,
+            nbytes=ohlcv_data.nbytes
+        )
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del caché de datos.
         
-        # Seleccionar solo las columnas OHLCV
-        columns_to_keep = ['time', 'open', 'high', 'low', 'close', 'tick_volume']
+        Returns:
+            Diccionario con hits, misses, expiraciones, desalojos y bytes
+            retenidos; vacío si el caché está deshabilitado
+        """
+        if self._cache is None:
+            return {}
+        return self._cache.get_stats()
+    
+    def get_single_flight_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Obtiene cuántas solicitudes se agruparon en una descarga compartida.
         
-        # Renombrar tick_volume a volume
-        df = df[columns_to_keep].copy()
-        df.rename(columns={'tick_volume': 'volume'}, inplace=True)
+        Returns:
+            Diccionario "SYMBOL TF xCOUNT" → {calls, executions, coalesced};
+            vacío si la deduplicación está deshabilitada
+        """
+        if self._single_flight is None:
+            return {}
         
-        return df
+        stats = {}
+        for (symbol, timeframe, count, exclude_current), counters in \
+                self._single_flight.get_stats().items():
+            label = f"{symbol} {timeframe.name} x{count}"
+            if exclude_current:
+                label += " (closed)"
+            stats[label] = counters
+        return stats
     
     def clear_cache(self):
-        """Limpia el caché de datos si está habilitado."""
+        """Limpia el caché de datos, el store incremental y el respaldo serve-stale si están habilitados."""
         if self._cache is not None:
             self._cache.clear()
             self.logger.debug("Caché de datos limpiado")
+        if self._bar_store is not None:
+            self._bar_store.clear()
+            self.logger.debug("Store incremental de velas limpiado")
+        if self._stale is not None:
+            self._stale.clear()
+            self.logger.debug("Respaldo de últimos datos válidos limpiado")
+    
+    def close(self):
+        """Cancela los reintentos pendientes, detiene los pools y cierra el archivo histórico."""
+        with self._refresh_lock:
+            for timer in self._refresh_timers.values():
+                timer.cancel()
+            self._refresh_timers.clear()
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=True)
+            self._io_executor = None
+        if self._conversion_executor is not None:
+            self._conversion_executor.shutdown(wait=True)
+            self._conversion_executor = None
+        if self._archive is not None:
+            self._archive.close()
@@ -0,0 +1,64 @@
+"""
+Tipos compartidos de bajo nivel para los datos de MetaTrader 5.
+
+Este módulo reúne los layouts de los arrays que retorna el terminal y la
+excepción base de extracción, junto con utilidades mínimas sobre ellos. No
+importa otros módulos del proyecto, de modo que el extractor, el streaming de
+ticks, el almacenamiento compacto, los validadores y el formato del prompt
+pueden depender de él sin cargarse entre sí.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-11
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe
+"""
+import math
+
+import numpy as np
+
+
+# Formato de las velas retornadas por copy_rates_* de MT5
+MT5_RATES_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('tick_volume', '<u8'),
+    ('spread', '<i4'),
+    ('real_volume', '<u8'),
+])
+
+# Formato de los ticks retornados por copy_ticks_* de MT5
+MT5_TICKS_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('last', '<f8'),
+    ('volume', '<u8'),
+    ('time_msc', '<i8'),
+    ('flags', '<u4'),
+    ('volume_real', '<f8'),
+])
+
+
+class MT5DataError(Exception):
+    """Excepción personalizada para errores de extracción de datos MT5."""
+    pass
+
+
+def digits_from_point(point: float) -> int:
+    """
+    Dígitos de cotización a partir del punto del símbolo.
+
+    Args:
+        point: Tamaño del punto (ej: 0.00001 → 5, 0.01 → 2)
+
+    Returns:
+        Cantidad de decimales
+
+    Raises:
+        ValueError: Si point no es positivo
+    """
+    if point <= 0:
+        raise ValueError(f"point debe ser mayor a 0, recibido {point}")
+    return max(0, int(round(-math.log10(point))))
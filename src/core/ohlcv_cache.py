@@ -0,0 +1,212 @@
+"""
+OHLCVCache - Caché LRU con expiración al cierre de vela.
+
+Este módulo implementa el caché usado por MT5DataExtractor. Cada entrada
+expira en el próximo cierre de vela de su timeframe (calculado igual que
+CandleWaiter), de modo que nunca se sirven velas de un período ya cerrado.
+El caché está acotado en bytes: al superar el límite se descartan las
+entradas menos usadas recientemente.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-13
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (caché con TTL)
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from zoneinfo import ZoneInfo
+
+
+class OHLCVCacheError(Exception):
+    """Excepción para errores de configuración del caché."""
+    pass
+
+
+def lima_now() -> datetime:
+    """Reloj por defecto del caché: hora actual de Lima (igual que TimeValidator)."""
+    return datetime.now(ZoneInfo("America/Lima"))
+
+
+@dataclass
+class CacheEntry:
+    """
+    Entrada del caché.
+
+    Attributes:
+        value: Objeto almacenado
+        expires_at: Momento a partir del cual la entrada deja de ser válida
+        nbytes: Tamaño estimado en bytes
+    """
+    value: Any
+    expires_at: datetime
+    nbytes: int
+
+
+class OHLCVCache:
+    """
+    Caché LRU acotado por bytes con expiración absoluta por entrada.
+
+    Es thread-safe: todas las operaciones se realizan bajo un lock interno.
+
+    Example:
+        >>> cache = OHLCVCache(max_bytes=64 * 1024 * 1024)
+        >>> cache.put(key, ohlcv, expires_at=next_close, nbytes=ohlcv.nbytes)
+        >>> data = cache.get(key)       # None si no existe o ya expiró
+        >>> cache.get_stats()["hits"]
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Optional[Callable[[], datetime]] = None
+    ):
+        """
+        Inicializa el OHLCVCache.
+
+        Args:
+            max_bytes: Bytes máximos retenidos entre todas las entradas
+            clock: Función que retorna la hora actual (timezone aware);
+                por defecto, hora de Lima
+
+        Raises:
+            OHLCVCacheError: Si max_bytes no es positivo
+        """
+        if max_bytes <= 0:
+            raise OHLCVCacheError("max_bytes debe ser mayor a 0")
+
+        self.max_bytes = max_bytes
+        self.clock = clock or lima_now
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expirations": 0,
+            "evictions": 0
+        }
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Obtiene una entrada vigente y la marca como usada recientemente.
+
+        Las entradas expiradas se eliminan al consultarlas.
+
+        Args:
+            key: Clave de la entrada
+
+        Returns:
+            Valor almacenado, o None si no existe o expiró
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            if now >= entry.expires_at:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry.value
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        expires_at: datetime,
+        nbytes: int
+    ) -> bool:
+        """
+        Guarda una entrada y descarta las menos usadas si se supera el límite.
+
+        Args:
+            key: Clave de la entrada
+            value: Objeto a guardar
+            expires_at: Momento de expiración (timezone aware)
+            nbytes: Tamaño estimado del objeto
+
+        Returns:
+            True si se guardó; False si el objeto por sí solo supera max_bytes
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if nbytes > self.max_bytes:
+                return False
+
+            self._entries[key] = CacheEntry(value, expires_at, nbytes)
+            self._bytes += nbytes
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+            return True
+
+    def purge_expired(self) -> int:
+        """
+        Elimina todas las entradas expiradas.
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        now = self.clock()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if now >= e.expires_at]
+            for key in expired:
+                self._remove(key)
+            self._stats["expirations"] += len(expired)
+            return len(expired)
+
+    def clear(self) -> None:
+        """Elimina todas las entradas (las estadísticas se conservan)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Indica si la clave existe y no ha expirado (no afecta estadísticas)."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and now < entry.expires_at
+
+    def __len__(self) -> int:
+        """Número de entradas almacenadas (incluye expiradas aún no purgadas)."""
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del caché.
+
+        Returns:
+            Diccionario con hits, misses, expiraciones, desalojos, bytes y entradas
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        """Elimina una entrada y descuenta sus bytes (llamar con el lock tomado)."""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
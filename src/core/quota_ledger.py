@@ -0,0 +1,275 @@
+"""
+QuotaLedger - Libro de consumo de cuota compartido entre bots y procesos.
+
+Cada QuotaValidator llevaba su propio registro de uso, de modo que cinco bots
+no veían el consumo de los demás. Este módulo guarda los contadores de
+ventana deslizante del limitador local en un único libro por provider y API
+key:
+
+    - Dentro de un proceso, un registro (QuotaLedgerRegistry) entrega la
+      misma instancia a todos los validadores de esa clave.
+    - Entre procesos, el libro vive en un archivo memory-mapped; cada
+      operación de lectura o escritura se hace bajo un lock exclusivo del
+      archivo (flock en POSIX, msvcrt.locking en Windows), por lo que las
+      actualizaciones son atómicas.
+
+El libro no interpreta los datos: expone arreglos int64 con nombre (uno por
+ventana) que SlidingWindowCounter usa como estado.
+
+Formato del archivo (little-endian):
+    - Cabecera de 32 bytes: magic (8), huella del layout (8), reservado.
+    - Los arreglos int64 en el orden del layout.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-21
+Ticket: T48 - Validación de cuota y disponibilidad de modelo IA (libro compartido)
+"""
+import hashlib
+import mmap
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+MAGIC = b"BTQLEDG1"
+HEADER_SIZE = 32
+SLOT_BYTES = 8
+
+
+class QuotaLedgerError(Exception):
+    """Excepción para errores del libro de cuota."""
+    pass
+
+
+def _layout_fingerprint(layout: Dict[str, int]) -> bytes:
+    """Huella de 8 bytes de los nombres y tamaños del layout."""
+    text = ";".join(f"{name}={size}" for name, size in layout.items())
+    return hashlib.sha256(text.encode()).digest()[:8]
+
+
+class QuotaLedger:
+    """
+    Arreglos int64 con nombre, en memoria o en un archivo compartido.
+
+    Toda lectura o escritura de los arreglos debe hacerse dentro de
+    `locked()`.
+
+    Example:
+        >>> ledger = QuotaLedger({"requests_per_minute": 62}, path="data/quota/gemini.ledger")
+        >>> with ledger.locked():
+        ...     state = ledger.array("requests_per_minute")
+        ...     state[1] += 1
+    """
+
+    def __init__(
+        self,
+        layout: Dict[str, int],
+        path: Optional[Union[str, Path]] = None
+    ):
+        """
+        Inicializa el libro.
+
+        Args:
+            layout: Cantidad de enteros int64 por nombre
+            path: Archivo compartido entre procesos (None = solo en memoria)
+
+        Raises:
+            QuotaLedgerError: Si el layout es inválido o el archivo existe
+                con otro formato
+        """
+        if not layout or any(size <= 0 for size in layout.values()):
+            raise QuotaLedgerError("El layout debe tener tamaños positivos")
+
+        self.layout = dict(layout)
+        self.path = Path(path) if path is not None else None
+        self.size = HEADER_SIZE + sum(self.layout.values()) * SLOT_BYTES
+        self._thread_lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._closed = False
+
+        self._buffer: Union[bytearray, mmap.mmap]
+        if self.path is None:
+            self._buffer = bytearray(self.size)
+            self._buffer[:8] = MAGIC
+        else:
+            self._mm = self._open_file(self.path)
+            self._buffer = self._mm
+
+        view = memoryview(self._buffer)
+        self._arrays: Dict[str, memoryview] = {}
+        offset = HEADER_SIZE
+        for name, count in self.layout.items():
+            end = offset + count * SLOT_BYTES
+            self._arrays[name] = view[offset:end].cast("q")
+            offset = end
+
+    @property
+    def shared(self) -> bool:
+        """True si el libro está respaldado por un archivo."""
+        return self.path is not None
+
+    @contextmanager
+    def locked(self) -> Iterator['QuotaLedger']:
+        """Lock exclusivo entre hilos y, si hay archivo, entre procesos."""
+        with self._thread_lock:
+            if self._closed:
+                raise QuotaLedgerError("El libro está cerrado")
+            fd = self._fd
+            if fd is None:
+                yield self
+                return
+            self._lock_file(fd)
+            try:
+                yield self
+            finally:
+                self._unlock_file(fd)
+
+    def array(self, name: str) -> memoryview:
+        """
+        Arreglo int64 de un nombre del layout.
+
+        Raises:
+            KeyError: Si el nombre no está en el layout
+        """
+        return self._arrays[name]
+
+    def clear(self) -> None:
+        """Pone en cero todos los arreglos."""
+        with self.locked():
+            for array in self._arrays.values():
+                array[:] = bytes(len(array) * SLOT_BYTES)
+
+    def close(self) -> None:
+        """Libera el mapeo y el descriptor del archivo."""
+        with self._thread_lock:
+            if self._closed:
+                return
+            self._closed = True
+            for array in self._arrays.values():
+                array.release()
+            self._arrays.clear()
+            if self._mm is not None:
+                self._mm.close()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _open_file(self, path: Path) -> mmap.mmap:
+        """Crea o abre el archivo, valida su formato y lo mapea en memoria."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        fd = os.open(path, flags, 0o600)
+        fingerprint = _layout_fingerprint(self.layout)
+        try:
+            self._lock_file(fd)
+            try:
+                current = os.fstat(fd).st_size
+                if current == 0:
+                    os.ftruncate(fd, self.size)
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    os.write(fd, MAGIC + fingerprint)
+                elif current != self.size:
+                    raise QuotaLedgerError(f"Libro de cuota con tamaño inesperado: {path}")
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    header = os.read(fd, 16)
+                    if header != MAGIC + fingerprint:
+                        raise QuotaLedgerError(f"Libro de cuota con otro formato: {path}")
+            finally:
+                self._unlock_file(fd)
+            mapped = mmap.mmap(fd, self.size)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return mapped
+
+    @staticmethod
+    def _lock_file(fd: int) -> None:
+        """Toma el lock exclusivo del archivo (bloqueante)."""
+        if sys.platform == "win32":
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+    @staticmethod
+    def _unlock_file(fd: int) -> None:
+        """Libera el lock del archivo."""
+        if sys.platform == "win32":
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class QuotaLedgerRegistry:
+    """
+    Un libro por (provider, API key) dentro del proceso.
+
+    La API key no se guarda ni aparece en el nombre del archivo: se usa un
+    hash corto.
+    """
+
+    def __init__(self):
+        self._ledgers: Dict[Tuple[str, str, Optional[str]], QuotaLedger] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        provider: str,
+        api_key: str,
+        layout: Dict[str, int],
+        directory: Optional[Union[str, Path]] = None
+    ) -> QuotaLedger:
+        """
+        Libro compartido para un provider y API key.
+
+        Args:
+            provider: Provider de IA
+            api_key: API key cuyo presupuesto se comparte
+            layout: Layout de arreglos (debe coincidir entre usuarios)
+            directory: Directorio del archivo compartido entre procesos
+                (None = compartido solo dentro del proceso)
+
+        Returns:
+            La misma instancia para la misma clave y directorio
+
+        Raises:
+            QuotaLedgerError: Si el libro existente tiene otro layout
+        """
+        key_id = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        folder = str(Path(directory).resolve()) if directory is not None else None
+        key = (provider, key_id, folder)
+        with self._lock:
+            ledger = self._ledgers.get(key)
+            if ledger is None:
+                path = Path(folder) / f"quota_{provider}_{key_id}.ledger" if folder else None
+                ledger = QuotaLedger(layout, path=path)
+                self._ledgers[key] = ledger
+            elif ledger.layout != dict(layout):
+                raise QuotaLedgerError(f"El libro de {provider} ya existe con otro layout")
+            return ledger
+
+    def clear(self) -> None:
+        """Cierra y olvida todos los libros del proceso."""
+        with self._lock:
+            ledgers, self._ledgers = self._ledgers, {}
+        for ledger in ledgers.values():
+            ledger.close()
+
+    def __len__(self) -> int:
+        return len(self._ledgers)
+
+
+# Registro del proceso
+quota_ledgers = QuotaLedgerRegistry()
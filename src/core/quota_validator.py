@@ -4,17 +4,27 @@ Módulo para validar cuota y disponibilidad de modelo IA.
 Este módulo implementa el Ticket T48: Validación de cuota y disponibilidad
 de modelo IA, para evitar fallos por límites de uso.
 
+La cuota se controla localmente con contadores de ventana deslizante
+(requests y tokens por minuto y por día) alimentados con el uso real de cada
+consulta (record_usage), de modo que validate_quota responde desde memoria
+sin consultar la API. Para consultas concurrentes, reserve() aparta los
+tokens estimados de forma atómica y devuelve una reserva (QuotaLease) que se
+cierra con el uso real, se libera si la consulta falla o vence sola.
+
 Autor: Sistema Botrading
 Fecha: 2025-11-06
 Ticket: T48 - Validación de cuota y disponibilidad de modelo IA
 """
 import time
+from array import array
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from zoneinfo import ZoneInfo
 
+from src.core.quota_ledger import QuotaLedger, quota_ledgers
+
 
 # ==================== EXCEPCIONES PERSONALIZADAS ====================
 
@@ -23,6 +33,20 @@ class QuotaValidationError(Exception):
     pass
 
 
+class QuotaReservationError(QuotaValidationError):
+    """Excepción cuando una reserva de cuota no cabe en los límites"""
+    
+    def __init__(
+        self,
+        message: str,
+        limiting_window: Optional[str] = None,
+        retry_after_seconds: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.limiting_window = limiting_window
+        self.retry_after_seconds = retry_after_seconds
+
+
 # ==================== ENUMERACIONES ====================
 
 class QuotaStatus(Enum):
@@ -59,6 +83,23 @@ class QuotaValidationResult:
     timestamp: Optional[datetime] = None
 
 
+@dataclass
+class QuotaUsage:
+    """
+    Uso de cuota según el limitador local.
+
+    requests_* y tokens_* corresponden a la ventana (minuto o día) más
+    cercana a su límite.
+    """
+    available: bool
+    requests_used: int
+    requests_limit: int
+    tokens_used: int
+    tokens_limit: int
+    limiting_window: Optional[str] = None   # Límite excedido, ej. "tokens_per_minute"
+    retry_after_seconds: float = 0.0        # Espera hasta que vuelva a haber cuota
+
+
 @dataclass
 class CompleteValidationResult:
     """Resultado de validación completa (cuota + modelo)"""
@@ -70,6 +111,513 @@ class CompleteValidationResult:
     message: str = ""
 
 
+# ==================== LIMITADOR LOCAL ====================
+
+# Límite -> (métrica, duración de la ventana, resolución de los buckets) en segundos
+LIMIT_WINDOWS: Dict[str, Tuple[str, int, int]] = {
+    "requests_per_minute": ("requests", 60, 1),
+    "requests_per_day": ("requests", 86400, 60),
+    "tokens_per_minute": ("tokens", 60, 1),
+    "tokens_per_day": ("tokens", 86400, 60),
+}
+
+
+# Reservas abiertas a la vez por libro; cada slot es [id, vence (ms epoch), tokens, requests]
+MAX_LEASES = 64
+LEASE_FIELDS = 4
+
+DEFAULT_LEASE_SECONDS = 60.0
+
+# Enteros por ventana en el libro: último bucket, total y los buckets;
+# luego un contador de cambios, el último id de reserva y los slots de reservas
+LEDGER_LAYOUT: Dict[str, int] = {
+    **{
+        name: 2 + window // resolution
+        for name, (_, window, resolution) in LIMIT_WINDOWS.items()
+    },
+    "version": 1,
+    "lease_sequence": 1,
+    "leases": MAX_LEASES * LEASE_FIELDS,
+}
+
+NO_BUCKET = -1
+
+
+class SlidingWindowCounter:
+    """
+    Contador de ventana deslizante con buckets de resolución fija.
+
+    Guarda el total por bucket en un anillo y un total acumulado; los
+    buckets que salen de la ventana se descuentan al avanzar el tiempo, de
+    modo que sumar y consultar cuestan O(1) amortizado con memoria acotada.
+    La ventana efectiva incluye el bucket en curso completo, por lo que
+    nunca subestima el uso (puede sobreestimarlo en menos de un bucket).
+
+    El estado vive en una secuencia de enteros [último bucket, total,
+    buckets...] que puede ser propia o un arreglo de QuotaLedger; en ese
+    caso el llamador debe tener tomado el lock del libro.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int,
+        resolution_seconds: int,
+        state: Optional[Any] = None
+    ):
+        """
+        Args:
+            window_seconds: Duración de la ventana
+            resolution_seconds: Duración de cada bucket
+            state: Secuencia int64 de 2 + window/resolution elementos
+                (None = estado propio en memoria)
+        """
+        if resolution_seconds <= 0 or window_seconds % resolution_seconds:
+            raise QuotaValidationError(
+                "La ventana debe ser múltiplo positivo de la resolución"
+            )
+        self.window_seconds = window_seconds
+        self.resolution_seconds = resolution_seconds
+        self._size = window_seconds // resolution_seconds
+        if state is None:
+            state = array("q", [NO_BUCKET] + [0] * (self._size + 1))
+        if len(state) != self._size + 2:
+            raise QuotaValidationError("El estado no coincide con la ventana")
+        self._state = state
+
+    def add(self, amount: int, now: float) -> None:
+        """Suma `amount` en el instante `now`."""
+        bucket = self._advance(now)
+        self._state[2 + bucket % self._size] += amount
+        self._state[1] += amount
+
+    def total(self, now: float) -> int:
+        """Total dentro de la ventana que termina en `now`."""
+        self._advance(now)
+        return self._state[1]
+
+    def seconds_until_below(self, limit: int, now: float) -> float:
+        """
+        Segundos hasta que el total baje de `limit` sin nuevo uso.
+
+        Returns:
+            0.0 si ya está por debajo
+        """
+        current = self._advance(now)
+        remaining = self._state[1]
+        if remaining < limit:
+            return 0.0
+        for bucket in range(current - self._size + 1, current + 1):
+            remaining -= self._state[2 + bucket % self._size]
+            if remaining < limit:
+                expires = (bucket + self._size) * self.resolution_seconds
+                return max(0.0, expires - now)
+        return float(self.window_seconds)
+
+    def clear(self) -> None:
+        """Vacía el contador."""
+        self._state[0] = NO_BUCKET
+        self._zero()
+
+    def _zero(self) -> None:
+        """Pone en cero el total y los buckets."""
+        self._state[1:] = array("q", bytes(8 * (self._size + 1)))
+
+    def _advance(self, now: float) -> int:
+        """Descuenta los buckets que salieron de la ventana; retorna el bucket actual."""
+        state = self._state
+        bucket = int(now // self.resolution_seconds)
+        last = state[0]
+        if last == NO_BUCKET or bucket - last >= self._size:
+            if state[1]:
+                self._zero()
+            state[0] = bucket
+        elif bucket > last:
+            for expired in range(last + 1, bucket + 1):
+                slot = 2 + expired % self._size
+                state[1] -= state[slot]
+                state[slot] = 0
+            state[0] = bucket
+        return max(bucket, state[0])
+
+
+class QuotaLease:
+    """
+    Reserva de cuota para una consulta a la IA en curso.
+
+    Mientras está abierta, sus tokens y requests cuentan contra los límites
+    de todos los limitadores que usan el mismo libro. Se cierra con commit()
+    y el uso real de la respuesta, o con release() si la consulta falla; si
+    no se cierra antes de `expires_at`, el limitador la libera solo.
+
+    Como context manager, una excepción la libera y una salida normal sin
+    cerrarla la confirma con los tokens estimados.
+
+    Example:
+        >>> with validator.reserve(estimated_tokens=3000) as lease:
+        ...     response = call_gemini_api(...)
+        ...     lease.commit(response.total_tokens)
+    """
+
+    def __init__(
+        self,
+        limiter: 'LocalRateLimiter',
+        lease_id: int,
+        tokens: int,
+        requests: int,
+        expires_at: float,
+        on_close: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            limiter: Limitador que emitió la reserva
+            lease_id: Id de la reserva en el libro
+            tokens: Tokens reservados (estimados)
+            requests: Requests reservados
+            expires_at: Vencimiento en segundos epoch
+            on_close: Se llama al cerrar la reserva
+        """
+        self.lease_id = lease_id
+        self.tokens = tokens
+        self.requests = requests
+        self.expires_at = expires_at
+        self.closed = False
+        self._limiter = limiter
+        self._on_close = on_close
+
+    def commit(self, actual_tokens: Optional[int] = None) -> None:
+        """
+        Cierra la reserva registrando el uso real.
+
+        Si la reserva ya venció, el uso se registra igual: la consulta se
+        hizo aunque su reserva se haya liberado.
+
+        Args:
+            actual_tokens: Tokens reportados por el provider (None = los estimados)
+
+        Raises:
+            QuotaValidationError: Si la reserva ya está cerrada o el uso es negativo
+        """
+        tokens = self.tokens if actual_tokens is None else actual_tokens
+        if tokens < 0:
+            raise QuotaValidationError("El uso registrado no puede ser negativo")
+        self._close(tokens)
+
+    def release(self) -> None:
+        """Cierra la reserva sin registrar uso. No hace nada si ya está cerrada."""
+        if not self.closed:
+            self._close(None)
+
+    def _close(self, tokens: Optional[int]) -> None:
+        """Libera el slot del libro y, con `tokens`, registra el uso."""
+        if self.closed:
+            raise QuotaValidationError(f"La reserva {self.lease_id} ya está cerrada")
+        self.closed = True
+        self._limiter._settle(self, tokens)
+        if self._on_close is not None:
+            self._on_close()
+
+    def __enter__(self) -> 'QuotaLease':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if not self.closed:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.release()
+
+
+class LocalRateLimiter:
+    """
+    Limitador local de requests y tokens por minuto y por día.
+
+    Es thread-safe. Con un QuotaLedger compartido, todos los limitadores
+    que usan el mismo libro (bots del proceso u otros procesos) leen y
+    cargan el mismo presupuesto; sin libro, el uso es propio. Las reservas
+    abiertas (reserve) cuentan como uso hasta que se cierran o vencen.
+
+    Example:
+        >>> limiter = LocalRateLimiter({"requests_per_minute": 60, "tokens_per_minute": 32000})
+        >>> if limiter.snapshot().available:
+        ...     response = call_gemini_api(...)
+        ...     limiter.record(tokens=response.total_tokens)
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        clock: Callable[[], float] = time.time,
+        ledger: Optional[QuotaLedger] = None
+    ):
+        """
+        Args:
+            limits: Límites por nombre (claves de LIMIT_WINDOWS; 0 = sin límite)
+            clock: Fuente de tiempo en segundos epoch
+            ledger: Libro donde viven los contadores (None = libro propio
+                en memoria)
+
+        Raises:
+            QuotaValidationError: Si el layout del libro no corresponde
+        """
+        self._clock = clock
+        self.ledger = ledger if ledger is not None else QuotaLedger(LEDGER_LAYOUT)
+        if self.ledger.layout != LEDGER_LAYOUT:
+            raise QuotaValidationError("El libro de cuota tiene otro layout")
+        self._counters = {
+            name: SlidingWindowCounter(window, resolution, state=self.ledger.array(name))
+            for name, (_, window, resolution) in LIMIT_WINDOWS.items()
+        }
+        self._limits: Dict[str, int] = {}
+        self.set_limits(limits)
+
+    def set_limits(self, limits: Dict[str, int]) -> None:
+        """Actualiza los límites conservando el uso registrado."""
+        self._limits = {name: int(limits.get(name, 0) or 0) for name in LIMIT_WINDOWS}
+
+    def record(self, tokens: int, requests: int = 1) -> None:
+        """
+        Registra el uso real de una consulta.
+
+        Args:
+            tokens: Tokens totales consumidos (entrada + salida)
+            requests: Requests consumidos
+        """
+        if tokens < 0 or requests < 0:
+            raise QuotaValidationError("El uso registrado no puede ser negativo")
+        now = self._clock()
+        amounts = {"requests": requests, "tokens": tokens}
+        with self.ledger.locked():
+            for name, (metric, _, _) in LIMIT_WINDOWS.items():
+                if amounts[metric]:
+                    self._counters[name].add(amounts[metric], now)
+            self._touch()
+
+    def version(self) -> int:
+        """
+        Contador de cambios del libro.
+
+        Avanza con cada registro, reserva, cierre de reserva o reset de
+        cualquier limitador que use el mismo libro, por lo que sirve para
+        invalidar resultados cacheados.
+        """
+        with self.ledger.locked():
+            return self.ledger.array("version")[0]
+
+    def snapshot(self) -> QuotaUsage:
+        """
+        Uso actual frente a los límites.
+
+        Hay cuota si todas las ventanas están por debajo de su límite. El
+        uso incluye las reservas abiertas.
+        """
+        now = self._clock()
+        limits = self._limits
+        with self.ledger.locked():
+            reserved, next_expiry = self._open_leases(now)
+            used = {
+                name: counter.total(now) + reserved[LIMIT_WINDOWS[name][0]]
+                for name, counter in self._counters.items()
+            }
+            exceeded: List[Tuple[float, str]] = [
+                (self._seconds_until_room(
+                    name, limit - reserved[LIMIT_WINDOWS[name][0]], now, next_expiry
+                ), name)
+                for name, limit in limits.items()
+                if limit > 0 and used[name] >= limit
+            ]
+
+        requests = self._binding("requests", used, limits)
+        tokens = self._binding("tokens", used, limits)
+        retry_after, limiting = max(exceeded) if exceeded else (0.0, None)
+        return QuotaUsage(
+            available=not exceeded,
+            requests_used=used[requests],
+            requests_limit=limits[requests],
+            tokens_used=used[tokens],
+            tokens_limit=limits[tokens],
+            limiting_window=limiting,
+            retry_after_seconds=retry_after
+        )
+
+    def reserve(
+        self,
+        tokens: int,
+        requests: int = 1,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        enforce: bool = True,
+        on_close: Optional[Callable[[], None]] = None
+    ) -> QuotaLease:
+        """
+        Reserva cuota para una consulta antes de hacerla.
+
+        Comprobar los límites y apartar la reserva es una sola operación
+        bajo el lock del libro, por lo que limitadores concurrentes (hilos,
+        bots u otros procesos) llegan hasta el límite sin pasarse.
+
+        Args:
+            tokens: Tokens estimados de la consulta (entrada + salida)
+            requests: Requests de la consulta
+            lease_seconds: Segundos hasta que la reserva vence y se libera
+            enforce: False = reservar aunque no quepa en los límites
+            on_close: Se llama al cerrar la reserva
+
+        Returns:
+            QuotaLease abierta
+
+        Raises:
+            QuotaReservationError: Si la reserva no cabe en algún límite o
+                no quedan slots libres
+            QuotaValidationError: Si los valores son negativos o la
+                duración no es positiva
+        """
+        if tokens < 0 or requests < 0:
+            raise QuotaValidationError("La reserva no puede ser negativa")
+        if lease_seconds <= 0:
+            raise QuotaValidationError("La duración de la reserva debe ser positiva")
+        now = self._clock()
+        limits = self._limits
+        amounts = {"requests": requests, "tokens": tokens}
+        with self.ledger.locked():
+            reserved, next_expiry = self._open_leases(now)
+            if enforce:
+                blocked: List[Tuple[float, str]] = []
+                for name, (metric, _, _) in LIMIT_WINDOWS.items():
+                    limit = limits[name]
+                    if limit <= 0:
+                        continue
+                    if amounts[metric] > limit:
+                        raise QuotaReservationError(
+                            f"La reserva ({amounts[metric]} {metric}) excede {name}={limit}",
+                            limiting_window=name
+                        )
+                    room = limit - reserved[metric] - amounts[metric]
+                    if self._counters[name].total(now) > room:
+                        blocked.append((
+                            self._seconds_until_room(name, room + 1, now, next_expiry),
+                            name
+                        ))
+                if blocked:
+                    retry_after, limiting = max(blocked)
+                    raise QuotaReservationError(
+                        f"Sin cuota para reservar en {limiting}; reintentar en {retry_after:.1f}s",
+                        limiting_window=limiting,
+                        retry_after_seconds=retry_after
+                    )
+
+            leases = self.ledger.array("leases")
+            free = next(
+                (slot for slot in range(0, len(leases), LEASE_FIELDS) if not leases[slot]),
+                None
+            )
+            if free is None:
+                raise QuotaReservationError(
+                    f"No quedan slots de reserva ({MAX_LEASES} abiertas)",
+                    retry_after_seconds=(
+                        max(0.0, next_expiry - now) if next_expiry is not None else 0.0
+                    )
+                )
+            sequence = self.ledger.array("lease_sequence")
+            sequence[0] += 1
+            lease_id = sequence[0]
+            expires_at = now + lease_seconds
+            leases[free] = lease_id
+            leases[free + 1] = int(expires_at * 1000)
+            leases[free + 2] = tokens
+            leases[free + 3] = requests
+            self._touch()
+
+        return QuotaLease(self, lease_id, tokens, requests, expires_at, on_close=on_close)
+
+    def usage(self) -> Dict[str, int]:
+        """Uso por ventana (requests/tokens por minuto y por día)."""
+        now = self._clock()
+        with self.ledger.locked():
+            return {name: counter.total(now) for name, counter in self._counters.items()}
+
+    def reset(self) -> None:
+        """Olvida todo el uso registrado y las reservas abiertas del libro."""
+        with self.ledger.locked():
+            for counter in self._counters.values():
+                counter.clear()
+            leases = self.ledger.array("leases")
+            for index in range(len(leases)):
+                leases[index] = 0
+            self._touch()
+
+    def _settle(self, lease: QuotaLease, tokens: Optional[int]) -> None:
+        """Libera el slot de `lease` y, con `tokens`, registra el uso real."""
+        now = self._clock()
+        with self.ledger.locked():
+            leases = self.ledger.array("leases")
+            for slot in range(0, len(leases), LEASE_FIELDS):
+                if leases[slot] == lease.lease_id:
+                    leases[slot:slot + LEASE_FIELDS] = array("q", bytes(8 * LEASE_FIELDS))
+                    break
+            self._touch()
+            if tokens is None:
+                return
+            amounts = {"requests": lease.requests, "tokens": tokens}
+            for name, (metric, _, _) in LIMIT_WINDOWS.items():
+                if amounts[metric]:
+                    self._counters[name].add(amounts[metric], now)
+
+    def _touch(self) -> None:
+        """Avanza el contador de cambios (con el lock del libro tomado)."""
+        self.ledger.array("version")[0] += 1
+
+    def _open_leases(self, now: float) -> Tuple[Dict[str, int], Optional[float]]:
+        """
+        Libera las reservas vencidas y suma las abiertas.
+
+        Debe llamarse con el lock del libro tomado.
+
+        Returns:
+            Tupla (reservado por métrica, próximo vencimiento o None)
+        """
+        leases = self.ledger.array("leases")
+        now_ms = int(now * 1000)
+        reserved = {"requests": 0, "tokens": 0}
+        next_expiry_ms: Optional[int] = None
+        for slot in range(0, len(leases), LEASE_FIELDS):
+            if not leases[slot]:
+                continue
+            expires_ms = leases[slot + 1]
+            if expires_ms <= now_ms:
+                leases[slot:slot + LEASE_FIELDS] = array("q", bytes(8 * LEASE_FIELDS))
+                continue
+            reserved["tokens"] += leases[slot + 2]
+            reserved["requests"] += leases[slot + 3]
+            if next_expiry_ms is None or expires_ms < next_expiry_ms:
+                next_expiry_ms = expires_ms
+        return reserved, next_expiry_ms / 1000 if next_expiry_ms is not None else None
+
+    def _seconds_until_room(
+        self,
+        name: str,
+        threshold: int,
+        now: float,
+        next_expiry: Optional[float]
+    ) -> float:
+        """
+        Segundos hasta que el uso registrado de `name` baje de `threshold`.
+
+        Si las reservas abiertas ya ocupan todo el límite, espera al
+        próximo vencimiento de una reserva.
+        """
+        if threshold > 0:
+            return self._counters[name].seconds_until_below(threshold, now)
+        return max(0.0, next_expiry - now) if next_expiry is not None else 0.0
+
+    @staticmethod
+    def _binding(metric: str, used: Dict[str, int], limits: Dict[str, int]) -> str:
+        """Ventana de la métrica con mayor proporción de uso frente a su límite."""
+        names = [name for name, (m, _, _) in LIMIT_WINDOWS.items() if m == metric]
+        return max(
+            names,
+            key=lambda name: used[name] / limits[name] if limits[name] > 0 else -1.0
+        )
+
+
 # ==================== CLASE PRINCIPAL ====================
 
 class QuotaValidator:
@@ -82,6 +630,7 @@ class QuotaValidator:
     
     Funcionalidades:
     - Validación de cuota (requests/minute, tokens/minute, daily limits)
+      con un limitador local de ventana deslizante
     - Verificación de disponibilidad de modelo
     - Sistema de caché para reducir llamadas a API
     - Reintentos con backoff exponencial
@@ -95,18 +644,24 @@ class QuotaValidator:
         
         # Validar antes de consultar IA
         if validator.validate_all().is_valid:
-            # Proceder con consulta a IA
+            # Proceder con consulta a IA y registrar el uso real
             response = call_gemini_api(...)
+            validator.record_usage(tokens=response.total_tokens)
         else:
             # Esperar o abortar
             print("Cuota excedida o modelo no disponible")
+        
+        # Con varios bots a la vez: reservar, consultar y confirmar
+        with validator.reserve(estimated_tokens=3000) as lease:
+            response = call_gemini_api(...)
+            lease.commit(response.total_tokens)
     """
     
     # Providers soportados
     SUPPORTED_PROVIDERS = ["gemini", "openai", "anthropic"]
     
     # Configuración por defecto
-    DEFAULT_CONFIG = {
+    DEFAULT_CONFIG: Dict[str, Any] = {
         "enabled": False,
         "provider": "gemini",
         "check_interval_seconds": 300,
@@ -125,15 +680,27 @@ class QuotaValidator:
             "max_attempts": 3,
             "backoff_factor": 2,
             "timeout_seconds": 10
+        },
+        "ledger": {
+            "shared": True,
+            "directory": None
+        },
+        "reservation": {
+            "lease_seconds": DEFAULT_LEASE_SECONDS
         }
     }
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        clock: Callable[[], float] = time.time
+    ):
         """
         Inicializa el QuotaValidator.
         
         Args:
             config: Configuración con parámetros de validación
+            clock: Fuente de tiempo del limitador local (segundos epoch)
             
         Raises:
             QuotaValidationError: Si la configuración es inválida
@@ -189,9 +756,32 @@ class QuotaValidator:
         self.backoff_factor = retry_config.get("backoff_factor", default_retry["backoff_factor"])
         self.timeout_seconds = retry_config.get("timeout_seconds", default_retry["timeout_seconds"])
         
+        # Libro de consumo: compartido por provider y API key dentro del
+        # proceso, y entre procesos si se configura un directorio
+        default_ledger = self.DEFAULT_CONFIG["ledger"]
+        ledger_config = {**default_ledger, **quota_config.get("ledger", {})}
+        ledger = None
+        if ledger_config["shared"]:
+            ledger = quota_ledgers.get(
+                self.provider,
+                self._get_api_credentials()["api_key"],
+                LEDGER_LAYOUT,
+                directory=ledger_config["directory"]
+            )
+        
+        # Reservas: segundos hasta que una reserva sin cerrar se libera sola
+        default_reservation = self.DEFAULT_CONFIG["reservation"]
+        reservation_config = {**default_reservation, **quota_config.get("reservation", {})}
+        self.lease_seconds = reservation_config["lease_seconds"]
+        
+        # Limitador local con los límites configurados
+        self._limiter = LocalRateLimiter(self.quota_limits, clock=clock, ledger=ledger)
+        
         # Caché
         self._cache: Optional[QuotaValidationResult] = None
         self._cache_timestamp: Optional[datetime] = None
+        self._cache_ttl_seconds: float = self.cache_duration_seconds
+        self._cache_version: Optional[int] = None
         
         # Estadísticas
         self._last_check_timestamp: Optional[datetime] = None
@@ -226,6 +816,9 @@ class QuotaValidator:
         if self._is_cache_valid() and self._cache:
             return self._cache
         
+        # Versión del libro antes de consultar: un cambio posterior invalida el caché
+        version = self._limiter.version()
+        
         # Intentar validar con reintentos
         last_error = None
         for attempt in range(self.max_attempts):
@@ -238,16 +831,16 @@ class QuotaValidator:
                         f"Provider {self.provider} no implementado aún"
                     )
                 
-                # Determinar status según uso
-                status = self._determine_quota_status(
-                    response.requests_used,
-                    response.requests_limit
-                )
+                # Determinar status según la métrica más cercana a su límite
+                _, used, limit = self._most_used(response)
+                status = self._determine_quota_status(used, limit)
+                if not response.available:
+                    status = QuotaStatus.EXCEEDED
                 
                 # Crear resultado
                 result = QuotaValidationResult(
                     is_valid=response.available,
-                    status=status if response.available else QuotaStatus.EXCEEDED,
+                    status=status,
                     message=self._build_quota_message(status, response),
                     requests_used=response.requests_used,
                     requests_limit=response.requests_limit,
@@ -256,9 +849,14 @@ class QuotaValidator:
                     timestamp=datetime.now()
                 )
                 
-                # Guardar en caché
+                # Guardar en caché (una cuota excedida se revisa cuando se libera)
                 self._cache = result
                 self._cache_timestamp = datetime.now()
+                self._cache_version = version
+                self._cache_ttl_seconds = self.cache_duration_seconds
+                retry_after = getattr(response, "retry_after_seconds", None)
+                if not response.available and isinstance(retry_after, (int, float)):
+                    self._cache_ttl_seconds = min(self.cache_duration_seconds, retry_after)
                 self._last_check_timestamp = datetime.now()
                 
                 return result
@@ -408,6 +1006,67 @@ class QuotaValidator:
         delta = next_minute - now
         return int(delta.total_seconds())
     
+    def record_usage(self, tokens: int, requests: int = 1) -> None:
+        """
+        Registra el uso real de una consulta a la IA.
+        
+        Debe llamarse después de cada consulta con los tokens reportados por
+        el provider (entrada + salida). Invalida el caché para que la
+        siguiente validación refleje el nuevo uso.
+        
+        Args:
+            tokens: Tokens totales consumidos
+            requests: Requests consumidos (default 1)
+            
+        Raises:
+            QuotaValidationError: Si el uso es negativo
+        """
+        self._limiter.record(tokens=tokens, requests=requests)
+        self.clear_cache()
+    
+    def reserve(self, estimated_tokens: int, requests: int = 1) -> QuotaLease:
+        """
+        Reserva cuota para una consulta a la IA.
+        
+        A diferencia de validate_quota + record_usage, comprobar y apartar
+        la cuota es atómico, por lo que varios bots concurrentes pueden
+        consultar hasta el límite sin pasarse. La reserva debe cerrarse con
+        commit(tokens reales) o release() si la consulta falla; si no, vence
+        a los `reservation.lease_seconds` segundos.
+        
+        Con la validación desactivada la reserva nunca se rechaza.
+        
+        Args:
+            estimated_tokens: Tokens estimados (entrada + salida máxima)
+            requests: Requests de la consulta (default 1)
+            
+        Returns:
+            QuotaLease abierta
+            
+        Raises:
+            QuotaReservationError: Si no hay cuota para la reserva (incluye
+                retry_after_seconds)
+            QuotaValidationError: Si los valores son inválidos
+        """
+        lease = self._limiter.reserve(
+            estimated_tokens,
+            requests=requests,
+            lease_seconds=self.lease_seconds,
+            enforce=self.enabled,
+            on_close=self.clear_cache
+        )
+        self.clear_cache()
+        return lease
+    
+    def get_usage(self) -> Dict[str, int]:
+        """
+        Obtiene el uso actual por ventana del limitador local.
+        
+        Returns:
+            Diccionario con requests/tokens por minuto y por día
+        """
+        return self._limiter.usage()
+    
     def clear_cache(self):
         """Limpia el caché de validaciones."""
         self._cache = None
@@ -428,10 +1087,14 @@ class QuotaValidator:
         
         if "quota_limits" in quota_config:
             self.quota_limits.update(quota_config["quota_limits"])
+            self._limiter.set_limits(self.quota_limits)
         
         if "thresholds" in quota_config:
             self.thresholds.update(quota_config["thresholds"])
         
+        if "lease_seconds" in quota_config.get("reservation", {}):
+            self.lease_seconds = quota_config["reservation"]["lease_seconds"]
+        
         # Limpiar caché para forzar re validación
         self.clear_cache()
     
@@ -449,29 +1112,17 @@ class QuotaValidator:
             "project_id": "dummy_project"
         }
     
-    def _check_gemini_quota(self):
+    def _check_gemini_quota(self) -> QuotaUsage:
         """
-        Verifica cuota de Gemini API.
+        Verifica cuota de Gemini con el limitador local.
+        
+        Responde desde memoria con el uso registrado mediante record_usage,
+        sin consultar la API.
         
         Returns:
-            Mock response con información de cuota
-            
-        Note:
-            Este método será implementado completamente cuando
-            integremos con Gemini API (Fase 2, T10)
+            QuotaUsage con el uso de la ventana más cercana a cada límite
         """
-        # TODO: Implementar llamada real a Gemini API
-        # Por ahora, retornar mock para desarrollo
-        from unittest.mock import MagicMock
-        
-        mock_response = MagicMock()
-        mock_response.available = True
-        mock_response.requests_used = 30
-        mock_response.requests_limit = 60
-        mock_response.tokens_used = 15000
-        mock_response.tokens_limit = 32000
-        
-        return mock_response
+        return self._limiter.snapshot()
     
     def _check_gemini_model_status(self) -> ModelAvailability:
         """
@@ -493,6 +1144,32 @@ class QuotaValidator:
             message="Modelo operativo"
         )
     
+    @staticmethod
+    def _most_used(response, metric: Optional[str] = None) -> Tuple[str, int, int]:
+        """
+        Métrica con mayor proporción de uso y su par (usado, límite).
+        
+        Args:
+            response: Respuesta con requests_* y tokens_*
+            metric: "requests" o "tokens" para forzar la métrica (si está
+                disponible en la respuesta)
+            
+        Returns:
+            Tupla (métrica, usado, límite)
+        """
+        triples = [
+            ("requests", response.requests_used, response.requests_limit),
+            ("tokens", getattr(response, "tokens_used", 0), getattr(response, "tokens_limit", 0))
+        ]
+        triples = [
+            triple for triple in triples
+            if all(isinstance(value, (int, float)) for value in triple[1:])
+        ]
+        forced = [triple for triple in triples if triple[0] == metric]
+        if forced:
+            return forced[0]
+        return max(triples, key=lambda triple: triple[1] / triple[2] if triple[2] else 0.0)
+    
     def _determine_quota_status(
         self,
         used: int,
@@ -528,23 +1205,39 @@ class QuotaValidator:
         """
         Construye mensaje descriptivo del estado de cuota.
         
+        Usa la métrica que determinó el estado: la ventana excedida si la
+        hay, o la métrica (requests o tokens) más cercana a su límite.
+        
         Args:
-            status: Estado de cuota
+            status: Estado final de la cuota
             response: Respuesta de API
             
         Returns:
             Mensaje descriptivo
         """
+        window = getattr(response, "limiting_window", None)
+        if window not in LIMIT_WINDOWS:
+            window = None
+        metric, used, limit = self._most_used(
+            response, LIMIT_WINDOWS[window][0] if window else None
+        )
+        
+        if limit > 0:
+            percentage = used / limit * 100
+            usage = f"{used}/{limit} {metric}"
+        else:
+            percentage = 0.0
+            usage = f"{used} {metric} (sin límite)"
+        
         if status == QuotaStatus.AVAILABLE:
-            return f"Cuota disponible: {response.requests_used}/{response.requests_limit} requests"
+            return f"Cuota disponible: {usage}"
         elif status == QuotaStatus.WARNING:
-            percentage = (response.requests_used / response.requests_limit * 100)
-            return f"⚠️ Advertencia: Usando {percentage:.1f}% de la cuota ({response.requests_used}/{response.requests_limit})"
+            return f"⚠️ Advertencia: Usando {percentage:.1f}% de la cuota ({usage})"
         elif status == QuotaStatus.CRITICAL:
-            percentage = (response.requests_used / response.requests_limit * 100)
-            return f"🚨 Crítico: Usando {percentage:.1f}% de la cuota ({response.requests_used}/{response.requests_limit})"
+            return f"🚨 Crítico: Usando {percentage:.1f}% de la cuota ({usage})"
         elif status == QuotaStatus.EXCEEDED:
-            return f"❌ Cuota excedida: {response.requests_used}/{response.requests_limit} requests"
+            limiting = f" en {window}" if window else ""
+            return f"❌ Cuota excedida{limiting}: {usage}"
         else:
             return "Estado de cuota desconocido"
     
@@ -552,11 +1245,16 @@ class QuotaValidator:
         """
         Verifica si el caché es válido.
         
+        El caché se invalida también cuando cualquier validador que comparte
+        el libro registra uso o reservas.
+        
         Returns:
-            True si el caché existe y no ha expirado
+            True si el caché existe, no ha expirado y el libro no cambió
         """
         if not self._cache or not self._cache_timestamp:
             return False
         
         age = datetime.now() - self._cache_timestamp
-        return age.total_seconds() < self.cache_duration_seconds
+        if age.total_seconds() >= self._cache_ttl_seconds:
+            return False
+        return self._limiter.version() == self._cache_version
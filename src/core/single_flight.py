@@ -0,0 +1,111 @@
+"""
+SingleFlight - Deduplicación de llamadas concurrentes por clave.
+
+Cuando varios hilos piden el mismo dato al mismo tiempo (p. ej. varios bots
+que despiertan en el cierre de la vela H1), solo el primero ejecuta la
+función; los demás esperan y comparten su resultado o su excepción. Así el
+terminal recibe una sola consulta por clave en lugar de una por llamador.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-13
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (single-flight)
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """Llamada en curso compartida entre el líder y los que esperan."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Ejecuta una sola llamada en curso por clave y comparte su resultado.
+
+    Es thread-safe. Los resultados no se guardan: al terminar la llamada la
+    clave se libera y la siguiente invocación vuelve a ejecutar la función.
+
+    Example:
+        >>> flight = SingleFlight()
+        >>> rates = flight.do(("EURUSD", Timeframe.H1), fetch, "EURUSD")
+        >>> flight.get_stats()[("EURUSD", Timeframe.H1)]["coalesced"]
+    """
+
+    def __init__(self):
+        """Inicializa el SingleFlight sin llamadas en curso."""
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: Dict[Hashable, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Ejecuta `fn` o espera la ejecución en curso para la misma clave.
+
+        Args:
+            key: Clave que identifica el dato solicitado
+            fn: Función a ejecutar si no hay una llamada en curso
+            *args: Argumentos posicionales de `fn`
+            **kwargs: Argumentos nombrados de `fn`
+
+        Returns:
+            Resultado de `fn` (el mismo objeto para todos los que comparten la llamada)
+
+        Raises:
+            Exception: La excepción lanzada por `fn`, propagada a todos los que esperan
+        """
+        with self._lock:
+            stats = self._stats.setdefault(
+                key, {"calls": 0, "executions": 0, "coalesced": 0}
+            )
+            stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Número de claves con una llamada en curso."""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict[Any, Dict[str, int]]:
+        """
+        Obtiene contadores por clave.
+
+        Returns:
+            Diccionario clave → {calls, executions, coalesced}
+        """
+        with self._lock:
+            return {key: dict(stats) for key, stats in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        """Reinicia los contadores (las llamadas en curso no se ven afectadas)."""
+        with self._lock:
+            self._stats.clear()
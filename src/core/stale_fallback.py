@@ -0,0 +1,206 @@
+"""
+StaleFallback - Último dato bueno, backoff y caché negativo por serie.
+
+Este módulo guarda, para cada solicitud de velas, el último resultado válido
+y el momento en que se obtuvo. Cuando la descarga falla, el extractor puede
+servir ese dato marcado como desactualizado en lugar de perder el ciclo.
+Las fallas consecutivas de un (símbolo, timeframe) abren una ventana negativa
+con backoff exponencial durante la cual no se vuelve a consultar al terminal.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-13
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (serve-stale)
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class StaleFallbackError(Exception):
+    """Excepción para errores de configuración del fallback."""
+    pass
+
+
+@dataclass
+class FailureState:
+    """
+    Estado de fallas consecutivas de una serie.
+
+    Attributes:
+        failures: Fallas consecutivas
+        retry_at: Momento (epoch) a partir del cual se puede reintentar
+        last_error: Mensaje de la última falla
+    """
+    failures: int
+    retry_at: float
+    last_error: str
+
+
+class StaleFallback:
+    """
+    Registro de últimos datos válidos y de ventanas negativas por serie.
+
+    Las claves de datos son libres (p. ej. (símbolo, timeframe, count, ...));
+    las fallas se agrupan por los dos primeros elementos de la clave, de modo
+    que un símbolo caído suprime todas sus solicitudes de ese timeframe.
+
+    Es thread-safe: todas las operaciones se realizan bajo un lock interno.
+
+    Example:
+        >>> fallback = StaleFallback(max_stale_seconds=600)
+        >>> fallback.record_success(key, ohlcv)
+        >>> fallback.record_failure(key, "copy_rates_from_pos retornó None")
+        >>> value, age = fallback.get_last_good(key)
+    """
+
+    DEFAULT_MAX_STALE_SECONDS = 900.0
+    DEFAULT_BACKOFF_BASE = 5.0
+    DEFAULT_BACKOFF_MAX = 300.0
+
+    def __init__(
+        self,
+        max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Inicializa el StaleFallback.
+
+        Args:
+            max_stale_seconds: Antigüedad máxima de un dato que se puede servir
+            backoff_base: Ventana negativa tras la primera falla (segundos)
+            backoff_max: Ventana negativa máxima (segundos)
+            clock: Reloj en segundos (epoch)
+
+        Raises:
+            StaleFallbackError: Si los parámetros son inválidos
+        """
+        if max_stale_seconds <= 0:
+            raise StaleFallbackError("max_stale_seconds debe ser mayor a 0")
+        if backoff_base < 0 or backoff_max < backoff_base:
+            raise StaleFallbackError("Se requiere 0 <= backoff_base <= backoff_max")
+
+        self.max_stale_seconds = max_stale_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+        self._last_good: Dict[Tuple, Tuple[Any, float]] = {}
+        self._failures: Dict[Tuple, FailureState] = {}
+        self._stats = {
+            "stale_served": 0,
+            "failures": 0,
+            "suppressed": 0,
+            "recoveries": 0
+        }
+        self._lock = threading.Lock()
+
+    def record_success(self, key: Tuple, value: Any) -> None:
+        """
+        Guarda el último dato válido y cierra la ventana negativa de la serie.
+
+        Args:
+            key: Clave de la solicitud
+            value: Dato obtenido
+        """
+        now = self.clock()
+        with self._lock:
+            self._last_good[key] = (value, now)
+            if self._failures.pop(self._series(key), None) is not None:
+                self._stats["recoveries"] += 1
+
+    def record_failure(self, key: Tuple, error: Any) -> FailureState:
+        """
+        Registra una falla y extiende la ventana negativa con backoff exponencial.
+
+        Args:
+            key: Clave de la solicitud
+            error: Excepción o mensaje de la falla
+
+        Returns:
+            Estado actualizado de la serie
+        """
+        now = self.clock()
+        with self._lock:
+            series = self._series(key)
+            previous = self._failures.get(series)
+            failures = previous.failures + 1 if previous else 1
+            delay = min(self.backoff_base * 2 ** (failures - 1), self.backoff_max)
+            state = FailureState(failures, now + delay, str(error))
+            self._failures[series] = state
+            self._stats["failures"] += 1
+            return state
+
+    def is_suppressed(self, key: Tuple) -> bool:
+        """
+        Indica si la serie está en ventana negativa (no se debe consultar MT5).
+
+        Args:
+            key: Clave de la solicitud
+
+        Returns:
+            True si la última falla de la serie aún no cumple su backoff
+        """
+        now = self.clock()
+        with self._lock:
+            state = self._failures.get(self._series(key))
+            suppressed = state is not None and now < state.retry_at
+            if suppressed:
+                self._stats["suppressed"] += 1
+            return suppressed
+
+    def get_failure(self, key: Tuple) -> Optional[FailureState]:
+        """Obtiene el estado de fallas de la serie, o None si está sana."""
+        with self._lock:
+            return self._failures.get(self._series(key))
+
+    def get_last_good(self, key: Tuple) -> Optional[Tuple[Any, float]]:
+        """
+        Obtiene el último dato válido si no supera la antigüedad máxima.
+
+        Args:
+            key: Clave de la solicitud
+
+        Returns:
+            Tupla (dato, antigüedad en segundos), o None si no hay o es muy antiguo
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._last_good.get(key)
+            if entry is None:
+                return None
+            value, fetched_at = entry
+            age = max(now - fetched_at, 0.0)
+            if age > self.max_stale_seconds:
+                return None
+            self._stats["stale_served"] += 1
+            return value, age
+
+    def clear(self) -> None:
+        """Elimina los datos guardados y las ventanas negativas."""
+        with self._lock:
+            self._last_good.clear()
+            self._failures.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del fallback.
+
+        Returns:
+            Diccionario con datos servidos desactualizados, fallas, supresiones,
+            recuperaciones y series actualmente en ventana negativa
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "failing_series": {
+                    f"{symbol} {getattr(timeframe, 'name', timeframe)}": state.failures
+                    for (symbol, timeframe), state in self._failures.items()
+                }
+            }
+
+    @staticmethod
+    def _series(key: Tuple) -> Tuple:
+        """Serie (símbolo, timeframe) a la que pertenece una clave."""
+        return tuple(key[:2])
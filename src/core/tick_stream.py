@@ -0,0 +1,540 @@
+"""
+TickStream - Ingesta de ticks en streaming con agregación incremental de velas.
+
+Este módulo consulta ticks con `copy_ticks_range`/`copy_ticks_from` usando una
+marca de agua (`time_msc` del último tick visto) y los acumula en la vela en
+formación del timeframe. Cuando llega un tick del siguiente período, o cuando
+la hora estimada del servidor supera el fin del período, la vela se emite como
+cerrada. Así el cierre y el spread quedan disponibles a milisegundos del
+cierre, sin volver a descargar toda la ventana después de un delay fijo.
+
+Las velas se construyen con el precio bid, igual que las velas del terminal.
+Todas las llamadas al terminal se serializan con el lock del extractor
+(`TickStream.from_extractor`), ya que el módulo MetaTrader5 es global al
+proceso y no admite llamadas concurrentes.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-13
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (streaming de ticks)
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional
+
+import numpy as np
+
+from src.core.mt5_types import MT5_RATES_DTYPE, MT5_TICKS_DTYPE, MT5DataError
+
+
+# Valor de mt5.COPY_TICKS_ALL
+COPY_TICKS_ALL = -1
+
+
+class TickStreamError(MT5DataError):
+    """Excepción para errores del streaming de ticks."""
+    pass
+
+
+@dataclass
+class SpreadStats:
+    """
+    Estadísticas acumuladas del spread (ask - bid, en unidades de precio).
+
+    Attributes:
+        count: Ticks considerados
+        mean: Spread promedio
+        min: Spread mínimo
+        max: Spread máximo
+        last: Spread del último tick
+    """
+    count: int = 0
+    mean: float = 0.0
+    min: float = float('inf')
+    max: float = 0.0
+    last: float = 0.0
+
+    def update(self, spreads: np.ndarray) -> None:
+        """
+        Incorpora un lote de spreads actualizando la media de forma incremental.
+
+        Args:
+            spreads: Spreads del lote en orden cronológico
+        """
+        n = len(spreads)
+        if n == 0:
+            return
+
+        total = self.count + n
+        self.mean += (float(spreads.mean()) - self.mean) * n / total
+        self.count = total
+        self.min = min(self.min, float(spreads.min()))
+        self.max = max(self.max, float(spreads.max()))
+        self.last = float(spreads[-1])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte las estadísticas a diccionario (min es None si no hay datos)."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else None,
+            "max": self.max,
+            "last": self.last
+        }
+
+
+class TickBarAggregator:
+    """
+    Acumula ticks en velas de un timeframe de forma incremental.
+
+    Cada lote de ticks se agrega de forma vectorizada por buckets del período
+    y se combina con la vela en formación. Los ticks de períodos ya cerrados
+    se descartan y se cuentan como tardíos.
+
+    Example:
+        >>> aggregator = TickBarAggregator(3600, point=0.00001)
+        >>> closed = aggregator.add_ticks(ticks)
+        >>> closed = aggregator.close_until(server_epoch)
+        >>> aggregator.current_bar
+    """
+
+    def __init__(self, timeframe_seconds: int, point: Optional[float] = None):
+        """
+        Inicializa el TickBarAggregator.
+
+        Args:
+            timeframe_seconds: Duración del período en segundos
+            point: Tamaño del punto del símbolo; si se indica, el campo
+                'spread' de cada vela es el spread mínimo en puntos
+
+        Raises:
+            TickStreamError: Si timeframe_seconds no es positivo
+        """
+        if timeframe_seconds <= 0:
+            raise TickStreamError("timeframe_seconds debe ser mayor a 0")
+
+        self.timeframe_seconds = timeframe_seconds
+        self.point = point
+        self.spread = SpreadStats()
+        self.bar_spread = SpreadStats()
+        self.late_ticks = 0
+        self._current: Optional[np.ndarray] = None
+        self._last_closed_time: Optional[int] = None
+
+    @property
+    def current_bar(self) -> Optional[np.ndarray]:
+        """Vela en formación (structured array de 1 fila) o None."""
+        return None if self._current is None else self._current.copy()
+
+    def add_ticks(self, ticks: np.ndarray) -> np.ndarray:
+        """
+        Agrega un lote de ticks en orden cronológico.
+
+        Args:
+            ticks: Structured array con campos de MT5_TICKS_DTYPE
+
+        Returns:
+            Velas cerradas por este lote (MT5_RATES_DTYPE, puede estar vacío)
+        """
+        ticks = ticks[ticks['bid'] > 0]
+        tf = self.timeframe_seconds
+        buckets = (ticks['time_msc'] // 1000) // tf
+
+        floor = self._last_closed_time
+        if self._current is not None:
+            floor = int(self._current['time'][0]) - tf
+        if floor is not None and len(ticks) > 0:
+            on_time = buckets * tf > floor
+            self.late_ticks += int(len(ticks) - on_time.sum())
+            ticks, buckets = ticks[on_time], buckets[on_time]
+
+        if len(ticks) == 0:
+            return np.empty(0, dtype=MT5_RATES_DTYPE)
+
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ends = np.concatenate((starts[1:], [len(ticks)]))
+        bid = ticks['bid']
+        spreads = ticks['ask'] - bid
+
+        bars = np.zeros(len(starts), dtype=MT5_RATES_DTYPE)
+        bars['time'] = buckets[starts] * tf
+        bars['open'] = bid[starts]
+        bars['high'] = np.maximum.reduceat(bid, starts)
+        bars['low'] = np.minimum.reduceat(bid, starts)
+        bars['close'] = bid[ends - 1]
+        bars['tick_volume'] = ends - starts
+        bars['real_volume'] = np.add.reduceat(ticks['volume'], starts)
+        if self.point:
+            bars['spread'] = np.rint(np.minimum.reduceat(spreads, starts) / self.point)
+
+        closed = bars[:-1]
+        if self._current is not None:
+            current = self._current[0]
+            if bars['time'][0] == current['time']:
+                first = bars[0]
+                first['open'] = current['open']
+                first['high'] = max(first['high'], current['high'])
+                first['low'] = min(first['low'], current['low'])
+                first['tick_volume'] += current['tick_volume']
+                first['real_volume'] += current['real_volume']
+                if self.point:
+                    first['spread'] = min(first['spread'], current['spread'])
+            else:
+                closed = np.concatenate([self._current, closed])
+
+        self.spread.update(spreads)
+        if len(closed) > 0:
+            self.bar_spread = SpreadStats()
+            self.bar_spread.update(spreads[starts[-1]:])
+            self._last_closed_time = int(closed['time'][-1])
+        else:
+            self.bar_spread.update(spreads)
+
+        self._current = bars[-1:].copy()
+        return closed
+
+    def close_until(self, server_time: float) -> np.ndarray:
+        """
+        Cierra la vela en formación si su período ya terminó.
+
+        Permite detectar el cierre aunque no llegue ningún tick del período
+        siguiente (mercado quieto).
+
+        Args:
+            server_time: Epoch estimado del servidor en segundos
+
+        Returns:
+            Structured array con la vela cerrada, o vacío
+        """
+        if self._current is None:
+            return np.empty(0, dtype=MT5_RATES_DTYPE)
+
+        if server_time < int(self._current['time'][0]) + self.timeframe_seconds:
+            return np.empty(0, dtype=MT5_RATES_DTYPE)
+
+        closed = self._current
+        self._current = None
+        self._last_closed_time = int(closed['time'][0])
+        self.bar_spread = SpreadStats()
+        return closed
+
+
+@dataclass
+class TickBatch:
+    """
+    Resultado de una consulta del stream.
+
+    Attributes:
+        symbol: Símbolo del instrumento
+        ticks: Ticks nuevos desde la consulta anterior (MT5_TICKS_DTYPE)
+        closed_bars: Velas cerradas en esta consulta (MT5_RATES_DTYPE)
+        current_bar: Vela en formación (1 fila) o None
+        spread: Estadísticas de spread de la sesión
+        bar_spread: Estadísticas de spread de la vela en formación
+        server_time: Hora estimada del servidor (epoch en segundos)
+    """
+    symbol: str
+    ticks: np.ndarray
+    closed_bars: np.ndarray
+    current_bar: Optional[np.ndarray]
+    spread: Dict[str, Any] = field(default_factory=dict)
+    bar_spread: Dict[str, Any] = field(default_factory=dict)
+    server_time: float = 0.0
+
+    @property
+    def has_close(self) -> bool:
+        """True si en esta consulta se cerró al menos una vela."""
+        return len(self.closed_bars) > 0
+
+
+class TickStream:
+    """
+    Stream de ticks de MT5 con marca de agua y agregación incremental.
+
+    La primera consulta descarga con `copy_ticks_range` los ticks desde la
+    apertura de la vela actual; las siguientes usan `copy_ticks_from` desde el
+    segundo del último tick visto y descartan los ya entregados.
+
+    Example:
+        >>> stream = TickStream.from_extractor(extractor, "EURUSD", Timeframe.M5)
+        >>> for batch in stream.stream():
+        ...     if batch.has_close:
+        ...         procesar(batch.closed_bars, batch.spread)
+    """
+
+    DEFAULT_POLL_INTERVAL = 0.1
+    DEFAULT_BATCH_SIZE = 10000
+
+    def __init__(
+        self,
+        mt5,
+        symbol: str,
+        timeframe,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        point: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        terminal_lock: Optional[ContextManager] = None
+    ):
+        """
+        Inicializa el TickStream.
+
+        Args:
+            mt5: Módulo MetaTrader5 (o connector._mt5)
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas a construir
+            poll_interval: Segundos entre consultas
+            batch_size: Máximo de ticks por llamada a copy_ticks_from
+            point: Tamaño del punto (si es None se consulta symbol_info)
+            clock: Reloj local en segundos (para estimar la hora del servidor)
+            sleep: Función de espera entre consultas
+            terminal_lock: Lock compartido con el resto de las llamadas al
+                terminal (por defecto, uno propio del stream)
+
+        Raises:
+            TickStreamError: Si los parámetros son inválidos
+        """
+        if poll_interval < 0:
+            raise TickStreamError("poll_interval no puede ser negativo")
+        if batch_size <= 0:
+            raise TickStreamError("batch_size debe ser mayor a 0")
+
+        self._mt5 = mt5
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._clock = clock
+        self._sleep = sleep
+        self._terminal_lock = terminal_lock if terminal_lock is not None else threading.Lock()
+        self._flags = getattr(mt5, "COPY_TICKS_ALL", COPY_TICKS_ALL)
+
+        if point is None:
+            with self._terminal_lock:
+                info = mt5.symbol_info(symbol)
+            point = getattr(info, "point", None) if info is not None else None
+        self.aggregator = TickBarAggregator(timeframe.value * 60, point=point)
+
+        self._last_msc: Optional[int] = None
+        self._seen_at_last = 0
+        self._received_at = 0.0
+        self._running = False
+        self._stats = {"polls": 0, "ticks": 0, "closed_bars": 0}
+
+    @classmethod
+    def from_extractor(cls, extractor, symbol: str, timeframe, **kwargs) -> "TickStream":
+        """
+        Crea un stream que comparte terminal y lock con un MT5DataExtractor.
+
+        Args:
+            extractor: MT5DataExtractor conectado
+            symbol: Símbolo del instrumento
+            timeframe: Timeframe de las velas a construir
+            **kwargs: Resto de los parámetros de TickStream
+
+        Returns:
+            TickStream serializado con las llamadas del extractor
+        """
+        return cls(extractor._mt5, symbol, timeframe, terminal_lock=extractor.terminal_lock, **kwargs)
+
+    def poll(self) -> TickBatch:
+        """
+        Consulta ticks nuevos y los agrega a la vela en formación.
+
+        Returns:
+            TickBatch con los ticks nuevos y las velas cerradas
+
+        Raises:
+            TickStreamError: Si MT5 no retorna ticks en la primera consulta
+        """
+        if self._last_msc is None:
+            ticks = self._initial_ticks()
+        else:
+            ticks = self._new_ticks()
+
+        now = self._clock()
+        if len(ticks) > 0:
+            self._received_at = now
+
+        closed = self.aggregator.add_ticks(ticks)
+        server_time = self.server_time(now)
+        expired = self.aggregator.close_until(server_time)
+        if len(expired) > 0:
+            closed = np.concatenate([closed, expired])
+
+        self._stats["polls"] += 1
+        self._stats["ticks"] += len(ticks)
+        self._stats["closed_bars"] += len(closed)
+
+        return TickBatch(
+            symbol=self.symbol,
+            ticks=ticks,
+            closed_bars=closed,
+            current_bar=self.aggregator.current_bar,
+            spread=self.aggregator.spread.to_dict(),
+            bar_spread=self.aggregator.bar_spread.to_dict(),
+            server_time=server_time
+        )
+
+    def stream(self, max_polls: Optional[int] = None) -> Iterator[TickBatch]:
+        """
+        Generador que consulta ticks de forma continua.
+
+        Solo entrega lotes con ticks nuevos o velas cerradas.
+
+        Args:
+            max_polls: Número máximo de consultas (None = hasta stop())
+
+        Yields:
+            TickBatch por cada consulta con novedades
+        """
+        self._running = True
+        polls = 0
+        while self._running and (max_polls is None or polls < max_polls):
+            batch = self.poll()
+            polls += 1
+            if len(batch.ticks) > 0 or batch.has_close:
+                yield batch
+            if self._running and (max_polls is None or polls < max_polls):
+                self._sleep(self.poll_interval)
+        self._running = False
+
+    def stop(self) -> None:
+        """Detiene el generador al terminar la consulta en curso."""
+        self._running = False
+
+    def server_time(self, now: Optional[float] = None) -> float:
+        """
+        Estima la hora actual del servidor.
+
+        Se toma el tiempo del último tick recibido más el tiempo local
+        transcurrido desde su recepción.
+
+        Args:
+            now: Hora local (por defecto, el reloj del stream)
+
+        Returns:
+            Epoch estimado del servidor en segundos (0 si aún no hay ticks)
+        """
+        if self._last_msc is None:
+            return 0.0
+        now = self._clock() if now is None else now
+        return self._last_msc / 1000 + (now - self._received_at)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del stream.
+
+        Returns:
+            Diccionario con consultas, ticks, velas cerradas, ticks tardíos y spread
+        """
+        return {
+            **self._stats,
+            "late_ticks": self.aggregator.late_ticks,
+            "watermark_msc": self._last_msc,
+            "spread": self.aggregator.spread.to_dict()
+        }
+
+    def _initial_ticks(self) -> np.ndarray:
+        """Descarga los ticks desde la apertura de la vela actual."""
+        with self._terminal_lock:
+            last_tick = self._mt5.symbol_info_tick(self.symbol)
+        if last_tick is None:
+            raise TickStreamError(f"No hay ticks disponibles para {self.symbol}")
+
+        tf = self.aggregator.timeframe_seconds
+        bar_open = int(last_tick.time) // tf * tf
+        ticks = self._terminal_ticks(
+            "copy_ticks_range", bar_open, int(last_tick.time) + 1, self._flags
+        )
+        if len(ticks) == 0:
+            self._last_msc = int(last_tick.time_msc)
+            self._seen_at_last = 0
+            return ticks
+
+        self._advance_watermark(ticks)
+        return ticks
+
+    def _new_ticks(self) -> np.ndarray:
+        """
+        Descarga los ticks posteriores a la marca de agua, en lotes.
+
+        copy_ticks_from solo admite segundos: si en un mismo segundo hay más
+        de batch_size ticks, cada pedido retorna el mismo primer lote. Un lote
+        completo sin ticks nuevos se resuelve pidiendo ese segundo entero con
+        copy_ticks_range y siguiendo desde el segundo siguiente.
+        """
+        if self._last_msc is None:
+            return np.empty(0, dtype=MT5_TICKS_DTYPE)
+
+        batches = []
+        second = self._last_msc // 1000
+        while True:
+            raw = self._terminal_ticks("copy_ticks_from", second, self.batch_size, self._flags)
+            fresh = self._drop_seen(raw)
+            saturated = len(fresh) == 0 and len(raw) >= self.batch_size
+            if saturated:
+                raw = self._terminal_ticks("copy_ticks_range", second, second + 1, self._flags)
+                fresh = self._drop_seen(raw)
+            elif len(fresh) == 0:
+                break
+
+            if len(fresh) > 0:
+                batches.append(fresh)
+                self._advance_watermark(raw)
+            if not saturated and len(raw) < self.batch_size:
+                break
+            if saturated:
+                second = max(second + 1, self._last_msc // 1000)
+            else:
+                second = self._last_msc // 1000
+
+        if not batches:
+            return np.empty(0, dtype=MT5_TICKS_DTYPE)
+        return np.concatenate(batches)
+
+    def _drop_seen(self, raw: np.ndarray) -> np.ndarray:
+        """Descarta los ticks ya entregados (anteriores o en el mismo ms de la marca)."""
+        msc = raw['time_msc']
+        keep = msc > self._last_msc
+        same = np.flatnonzero(msc == self._last_msc)
+        keep[same[self._seen_at_last:]] = True
+        return raw[keep]
+
+    def _advance_watermark(self, raw: np.ndarray) -> None:
+        """Actualiza la marca de agua al último ms visto en `raw`."""
+        last = int(raw['time_msc'][-1])
+        seen = int((raw['time_msc'] == last).sum())
+        if last == self._last_msc:
+            seen = max(seen, self._seen_at_last)
+        self._last_msc = last
+        self._seen_at_last = seen
+
+    def _terminal_ticks(self, call: str, *args) -> np.ndarray:
+        """
+        Pide ticks al terminal bajo el lock compartido y los normaliza.
+
+        Un lote vacío significa que no hay ticks nuevos; None significa que la
+        llamada falló y no debe confundirse con un mercado sin actividad.
+
+        Args:
+            call: Nombre de la función de MT5 (copy_ticks_from/copy_ticks_range)
+            *args: Argumentos posteriores al símbolo
+
+        Raises:
+            TickStreamError: Si el terminal retornó None
+        """
+        with self._terminal_lock:
+            raw = getattr(self._mt5, call)(self.symbol, *args)
+            if raw is None:
+                error_code = self._mt5.last_error() if hasattr(self._mt5, 'last_error') else "desconocido"
+        if raw is None:
+            raise TickStreamError(
+                f"{call} falló para {self.symbol}. Error MT5: {error_code}"
+            )
+        if len(raw) == 0:
+            return np.empty(0, dtype=MT5_TICKS_DTYPE)
+        if isinstance(raw, np.ndarray) and raw.dtype.names:
+            return raw
+        return np.array([tuple(t) for t in raw], dtype=MT5_TICKS_DTYPE)
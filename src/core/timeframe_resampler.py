@@ -0,0 +1,332 @@
+"""
+TimeframeResampler - Construcción local de timeframes superiores.
+
+Este módulo deriva velas de timeframes superiores (M15, M30, H1, H4, D1) a
+partir de una única serie base (el timeframe más pequeño solicitado) mediante
+agregación vectorizada por buckets. Así el extractor hace una sola llamada a
+MT5 por símbolo y todos los timeframes quedan alineados sobre el mismo cierre.
+
+Periódicamente la serie derivada se compara contra las velas del terminal
+para detectar diferencias (p. ej. sesiones del broker que no comienzan en
+múltiplos del timeframe).
+
+Autor: Sistema Botrading
+Fecha: 2025-11-12
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (resampling local)
+"""
+import threading
+from typing import Dict, List, Tuple, Any
+
+import numpy as np
+
+
+class ResampleError(Exception):
+    """Excepción para errores de resampling de velas."""
+    pass
+
+
+def can_resample(source, target) -> bool:
+    """
+    Indica si `target` puede derivarse de `source`.
+
+    Args:
+        source: Timeframe base (con `.value` en minutos)
+        target: Timeframe destino (con `.value` en minutos)
+
+    Returns:
+        True si target es múltiplo exacto y mayor que source
+    """
+    return target.value > source.value and target.value % source.value == 0
+
+
+def resample_rates(
+    rates: np.ndarray,
+    source,
+    target,
+    drop_incomplete_last: bool = False
+) -> np.ndarray:
+    """
+    Agrega velas de `source` en velas de `target` por buckets de tiempo.
+
+    Los buckets se alinean a múltiplos de la duración de `target` sobre el
+    epoch del servidor (H4 en 00/04/08..., D1 a medianoche), igual que MT5.
+
+    Args:
+        rates: Structured array de MT5 en orden cronológico
+        source: Timeframe de `rates`
+        target: Timeframe a construir
+        drop_incomplete_last: Si True, descarta el último bucket si sus velas
+            base no cubren todo el período (vela destino aún en formación)
+
+    Returns:
+        Structured array con el mismo dtype que `rates`
+
+    Raises:
+        ResampleError: Si target no es múltiplo de source
+    """
+    if not can_resample(source, target):
+        raise ResampleError(
+            f"No se puede derivar {target.name} desde {source.name}: "
+            "el timeframe destino debe ser múltiplo del base"
+        )
+
+    if len(rates) == 0:
+        return rates[:0].copy()
+
+    source_seconds = source.value * 60
+    target_seconds = target.value * 60
+
+    times = rates['time']
+    buckets = times // target_seconds
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(rates)]))
+
+    result = np.empty(len(starts), dtype=rates.dtype)
+    result['time'] = buckets[starts] * target_seconds
+    result['open'] = rates['open'][starts]
+    result['high'] = np.maximum.reduceat(rates['high'], starts)
+    result['low'] = np.minimum.reduceat(rates['low'], starts)
+    result['close'] = rates['close'][ends - 1]
+
+    names = rates.dtype.names
+    if 'tick_volume' in names:
+        result['tick_volume'] = np.add.reduceat(rates['tick_volume'], starts)
+    if 'real_volume' in names:
+        result['real_volume'] = np.add.reduceat(rates['real_volume'], starts)
+    if 'spread' in names:
+        result['spread'] = np.minimum.reduceat(rates['spread'], starts)
+
+    if drop_incomplete_last:
+        last_end = int(times[-1]) + source_seconds
+        if last_end < int(result['time'][-1]) + target_seconds:
+            result = result[:-1]
+
+    return result
+
+
+def compare_rates(
+    derived: np.ndarray,
+    reference: np.ndarray,
+    tolerance: float
+) -> List[int]:
+    """
+    Compara OHLC de velas derivadas contra velas del terminal.
+
+    Solo se comparan las velas con el mismo tiempo de apertura.
+
+    Args:
+        derived: Velas construidas localmente
+        reference: Velas cerradas obtenidas del terminal
+        tolerance: Diferencia absoluta máxima aceptada en precios
+
+    Returns:
+        Lista de epochs de las velas que no coinciden (vacía si todo coincide)
+    """
+    common, derived_idx, reference_idx = np.intersect1d(
+        derived['time'], reference['time'], return_indices=True
+    )
+    if len(common) == 0:
+        return [int(t) for t in reference['time']]
+
+    mismatch = np.zeros(len(common), dtype=bool)
+    for column in ('open', 'high', 'low', 'close'):
+        mismatch |= ~np.isclose(
+            derived[column][derived_idx],
+            reference[column][reference_idx],
+            rtol=0.0,
+            atol=tolerance
+        )
+
+    return [int(t) for t in common[mismatch]]
+
+
+class TimeframeResampler:
+    """
+    Coordina el resampling local y su verificación periódica contra MT5.
+
+    Solo se derivan los timeframes cuya serie base cabe en `max_base_bars`;
+    los demás conviene pedirlos directamente al terminal (derivar D1 desde
+    M5 requeriría cientos de veces más velas que descargarlo).
+
+    Example:
+        >>> resampler = TimeframeResampler(check_interval=24)
+        >>> targets = resampler.derivable_targets(Timeframe.M5, [Timeframe.H1, Timeframe.D1], 100)
+        >>> base_count = resampler.required_base_count(Timeframe.M5, targets, 100)
+        >>> h1 = resampler.resample(m5_rates, Timeframe.M5, Timeframe.H1, 100)
+        >>> if resampler.should_verify("EURUSD", Timeframe.H1):
+        ...     resampler.verify("EURUSD", Timeframe.H1, h1, terminal_rates)
+    """
+
+    DEFAULT_CHECK_INTERVAL = 24
+    DEFAULT_TOLERANCE = 1e-8
+    DEFAULT_MAX_BASE_BARS = 10_000
+
+    def __init__(
+        self,
+        check_interval: int = DEFAULT_CHECK_INTERVAL,
+        tolerance: float = DEFAULT_TOLERANCE,
+        max_base_bars: int = DEFAULT_MAX_BASE_BARS
+    ):
+        """
+        Inicializa el TimeframeResampler.
+
+        Args:
+            check_interval: Cada cuántas derivaciones por (símbolo, timeframe)
+                se verifica contra el terminal (0 desactiva la verificación)
+            tolerance: Diferencia absoluta máxima aceptada en precios
+            max_base_bars: Máximo de velas base a descargar para derivar
+
+        Raises:
+            ResampleError: Si los parámetros son inválidos
+        """
+        if check_interval < 0:
+            raise ResampleError("check_interval no puede ser negativo")
+        if tolerance < 0:
+            raise ResampleError("tolerance no puede ser negativa")
+        if max_base_bars <= 0:
+            raise ResampleError("max_base_bars debe ser mayor a 0")
+
+        self.check_interval = check_interval
+        self.tolerance = tolerance
+        self.max_base_bars = max_base_bars
+        self._calls: Dict[Tuple[str, Any], int] = {}
+        self._stats: Dict[str, Any] = {
+            "derived": 0,
+            "checks": 0,
+            "mismatches": 0,
+            "last_mismatch": None
+        }
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def required_base_count(source, targets: List[Any], count: int) -> int:
+        """
+        Calcula cuántas velas base se necesitan para derivar `count` velas.
+
+        Incluye un bucket adicional porque el primero puede quedar incompleto.
+
+        Args:
+            source: Timeframe base
+            targets: Timeframes a derivar
+            count: Velas requeridas por timeframe
+
+        Returns:
+            Número de velas base a pedir
+        """
+        ratio = max([t.value // source.value for t in targets] + [1])
+        return max(count, (count + 1) * ratio + 1)
+
+    def derivable_targets(self, source, targets: List[Any], count: int) -> List[Any]:
+        """
+        Filtra los timeframes que conviene derivar desde `source`.
+
+        Args:
+            source: Timeframe base
+            targets: Timeframes candidatos
+            count: Velas requeridas por timeframe
+
+        Returns:
+            Timeframes derivables cuya serie base no supera `max_base_bars`
+        """
+        return [
+            target for target in targets
+            if can_resample(source, target)
+            and self.required_base_count(source, [target], count) <= self.max_base_bars
+        ]
+
+    def resample(
+        self,
+        rates: np.ndarray,
+        source,
+        target,
+        count: int,
+        drop_incomplete_last: bool = False
+    ) -> np.ndarray:
+        """
+        Deriva las últimas `count` velas de `target` desde `rates`.
+
+        El primer bucket se descarta porque puede no contener todas sus velas base.
+
+        Args:
+            rates: Velas base
+            source: Timeframe base
+            target: Timeframe destino
+            count: Número de velas destino
+            drop_incomplete_last: Si True, descarta la vela destino en formación
+
+        Returns:
+            Structured array con hasta `count` velas destino
+        """
+        derived = resample_rates(rates, source, target, drop_incomplete_last)
+        if len(derived) > 1:
+            derived = derived[1:]
+
+        with self._lock:
+            self._stats["derived"] += 1
+
+        return derived[-count:]
+
+    def should_verify(self, symbol: str, target) -> bool:
+        """
+        Indica si toca verificar esta derivación contra el terminal.
+
+        La primera derivación de cada (símbolo, timeframe) siempre se verifica.
+
+        Args:
+            symbol: Símbolo del instrumento
+            target: Timeframe derivado
+
+        Returns:
+            True si se debe comparar contra velas del terminal
+        """
+        if self.check_interval == 0:
+            return False
+
+        with self._lock:
+            calls = self._calls.get((symbol, target), 0)
+            self._calls[(symbol, target)] = calls + 1
+            return calls % self.check_interval == 0
+
+    def verify(
+        self,
+        symbol: str,
+        target,
+        derived: np.ndarray,
+        reference: np.ndarray
+    ) -> bool:
+        """
+        Compara velas derivadas contra velas cerradas del terminal.
+
+        Args:
+            symbol: Símbolo del instrumento
+            target: Timeframe derivado
+            derived: Velas construidas localmente
+            reference: Velas cerradas del terminal
+
+        Returns:
+            True si las velas coinciden dentro de la tolerancia
+        """
+        mismatches = compare_rates(derived, reference, self.tolerance)
+
+        with self._lock:
+            self._stats["checks"] += 1
+            if mismatches:
+                self._stats["mismatches"] += 1
+                self._stats["last_mismatch"] = {
+                    "symbol": symbol,
+                    "timeframe": target.name,
+                    "bars": len(mismatches),
+                    "first_time": mismatches[0]
+                }
+
+        return not mismatches
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de resampling y verificación.
+
+        Returns:
+            Diccionario con derivaciones, verificaciones y discrepancias
+        """
+        with self._lock:
+            return dict(self._stats)
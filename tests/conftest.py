@@ -242,6 +242,69 @@ def sample_ohlcv_data():
     ]
 
 
+@pytest.fixture
+def make_rates():
+    """
+    Fábrica de velas sintéticas con el layout de copy_rates_* de MT5.
+
+    El precio parte de `price`, avanza `trend` por vela y, con
+    `volatility` > 0, suma un paseo aleatorio reproducible (`seed`). Por
+    defecto ese precio es la apertura, el cierre es open + body y high/low son
+    open ± wick. Con `continuous` el precio es el cierre, la apertura es el
+    cierre anterior y high/low envuelven el cuerpo ± wick. `price`, `wick`,
+    `volume` y `spread` aceptan arrays por vela. Con `digits` los precios se
+    redondean como los entrega MT5.
+
+    Returns:
+        Función (n, start, step, times, price, trend, volatility, body, wick,
+        volume, spread, digits, seed, continuous) → structured array
+    """
+    import numpy as np
+    from src.core.mt5_types import MT5_RATES_DTYPE
+
+    def factory(
+        n: int = 0,
+        start: int = 1_762_819_200,  # 2025-11-11 00:00 UTC
+        step: int = 300,
+        times=None,
+        price=1.1,
+        trend: float = 0.0,
+        volatility: float = 0.0,
+        body: float = 0.0,
+        wick: float = 0.0,
+        volume=100,
+        spread=0,
+        digits=None,
+        seed: int = 0,
+        continuous: bool = False
+    ):
+        times = start + np.arange(n) * step if times is None else np.asarray(times)
+        path = price + np.arange(len(times)) * trend
+        if volatility > 0:
+            rng = np.random.default_rng(seed)
+            path = path + np.cumsum(rng.normal(0, volatility, len(times)))
+        rates = np.zeros(len(times), dtype=MT5_RATES_DTYPE)
+        rates['time'] = times
+        if continuous:
+            rates['close'] = path
+            rates['open'] = np.concatenate([path[:1], path[:-1]])
+            rates['high'] = np.maximum(rates['open'], path) + wick
+            rates['low'] = np.minimum(rates['open'], path) - wick
+        else:
+            rates['open'] = path
+            rates['close'] = path + body
+            rates['high'] = path + wick
+            rates['low'] = path - wick
+        if digits is not None:
+            for name in ('open', 'high', 'low', 'close'):
+                rates[name] = np.round(rates[name], digits)
+        rates['tick_volume'] = volume
+        rates['spread'] = spread
+        return rates
+
+    return factory
+
+
 @pytest.fixture
 def sample_magic_number_data():
     """
@@ -0,0 +1,168 @@
+"""
+GeminiStubServer - Servidor local que imita generateContent de Gemini.
+
+Permite medir el throughput de AsyncGeminiClient sin red ni API key: atiende
+HTTP/1.1 con keep-alive, espera una latencia configurable antes de responder
+y devuelve un JSON con la forma de generateContent (candidatos y
+usageMetadata). Registra conexiones, peticiones y concurrencia máxima para
+verificar el reuso de conexiones y el límite del semáforo.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-20
+Ticket: T10 - Construcción de prompt y recepción de JSON de decisión (cliente asíncrono)
+"""
+import asyncio
+import json
+import random
+from typing import Any, Dict, Optional
+
+
+DEFAULT_DECISION = {
+    "accion": "NO_OPERAR",
+    "razonamiento": "Respuesta del servidor local de pruebas"
+}
+
+
+class GeminiStubServer:
+    """
+    Servidor local con latencia configurable.
+
+    Example:
+        >>> async with GeminiStubServer(latency=0.5) as server:
+        ...     client = AsyncGeminiClient("test-key", base_url=server.base_url)
+        ...     response = await client.generate(profile, prompt)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        status: int = 200,
+        response_text: Optional[str] = None,
+        max_requests_per_connection: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Inicializa el servidor (no lo arranca).
+
+        Args:
+            latency: Segundos de espera antes de cada respuesta
+            jitter: Variación uniforme adicional de la latencia (0 a jitter)
+            status: Estado HTTP de las respuestas
+            response_text: Texto del candidato (None = decisión NO_OPERAR)
+            max_requests_per_connection: Peticiones antes de cerrar la
+                conexión (None = sin límite), para simular cierres keep-alive
+            host: Host de escucha
+            port: Puerto de escucha (0 = puerto libre)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.status = status
+        self.response_text = response_text or json.dumps(DEFAULT_DECISION)
+        self.max_requests_per_connection = max_requests_per_connection
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._in_flight = 0
+        self._stats = {
+            "connections": 0,
+            "requests": 0,
+            "max_in_flight": 0
+        }
+
+    async def __aenter__(self) -> 'GeminiStubServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
+
+    @property
+    def base_url(self) -> str:
+        """URL base para AsyncGeminiClient."""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Arranca el servidor y resuelve el puerto asignado."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Detiene el servidor."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Conexiones aceptadas, peticiones atendidas y concurrencia máxima."""
+        return dict(self._stats)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atiende peticiones sobre una conexión hasta que se cierre."""
+        self._stats["connections"] += 1
+        served = 0
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                length = 0
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                request = json.loads(await reader.readexactly(length)) if length else {}
+
+                self._stats["requests"] += 1
+                self._in_flight += 1
+                self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._in_flight)
+                try:
+                    await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+                finally:
+                    self._in_flight -= 1
+
+                served += 1
+                close = (
+                    self.max_requests_per_connection is not None
+                    and served >= self.max_requests_per_connection
+                )
+                body = json.dumps(self._response_body(request)).encode()
+                writer.write(
+                    f"HTTP/1.1 {self.status} {'OK' if self.status < 400 else 'Error'}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'close' if close else 'keep-alive'}\r\n"
+                    "\r\n".encode() + body
+                )
+                await writer.drain()
+                if close:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _response_body(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON de respuesta con la forma de generateContent."""
+        if self.status >= 400:
+            return {"error": {"code": self.status, "message": "Error simulado"}}
+        prompt = " ".join(
+            part.get("text", "")
+            for content in request.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        prompt_tokens = len(prompt.split())
+        output_tokens = len(self.response_text.split())
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": self.response_text}]},
+                "finishReason": "STOP"
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens
+            }
+        }
@@ -0,0 +1,201 @@
+"""
+Tests unitarios para AlignedPanel.
+
+Verifica la alineación de varios símbolos sobre una grilla común, el relleno
+hacia adelante con límite, las velas tardías y que las vistas sean contiguas.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-17
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (panel alineado por tiempo)
+"""
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.core.aligned_panel import AlignedPanel, AlignedPanelError
+from src.core.mt5_data_extractor import OHLCVData, Timeframe
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+STEP = 300
+
+
+@pytest.fixture
+def make_ohlcv(make_rates):
+    """Velas M5 en los índices de grilla indicados."""
+    def build(symbol: str, bars, seed: int = 3, timeframe=Timeframe.M5) -> OHLCVData:
+        bars = np.asarray(bars)
+        rates = make_rates(
+            times=BASE_TIME + bars * STEP, volatility=0.001, body=0.0001, wick=0.0005,
+            volume=np.random.default_rng(seed).integers(1, 100, len(bars)), seed=seed
+        )
+        return OHLCVData.from_rates(symbol, timeframe, rates)
+    return build
+
+
+def reference_close(data, max_fill=None) -> pd.DataFrame:
+    """Cierres alineados con pandas: unión de tiempos y ffill con límite."""
+    frames = {
+        ohlcv.symbol: pd.Series(ohlcv.close, index=ohlcv.time)
+        for ohlcv in data
+    }
+    frame = pd.DataFrame(frames).sort_index()
+    if max_fill != 0:
+        frame = frame.ffill(limit=max_fill)
+    return frame
+
+
+class TestAlignment:
+    """Tests para la alineación por tiempo"""
+
+    def test_symbols_share_the_time_axis(self, make_ohlcv):
+        """
+        Dado EURUSD con todas las velas y GBPUSD sin las velas 3 y 4
+        Cuando se cargan en el panel
+        Entonces la fila de cada instante coincide y GBPUSD se rellena con su último cierre
+        """
+        eur = make_ohlcv("EURUSD", np.arange(10))
+        gbp = make_ohlcv("GBPUSD", [0, 1, 2, 5, 6, 7, 8, 9], seed=4)
+        panel = AlignedPanel(Timeframe.M5)
+
+        panel.update(eur)
+        panel.update(gbp)
+
+        assert panel.shape == (10, 2)
+        np.testing.assert_array_equal(panel.time, eur.time)
+        gbp_close = panel.column("GBPUSD")
+        assert gbp_close[3] == gbp_close[4] == gbp.close[2]
+        assert panel.column("GBPUSD", "volume")[3] == 0
+        assert panel.filled[:, 1].tolist() == [i in (3, 4) for i in range(10)]
+        assert panel.present.sum() == 18
+
+    def test_matches_pandas_union_with_ffill_limit(self, make_ohlcv):
+        """
+        Dado tres símbolos con huecos aleatorios, cargados en bloques desordenados
+        Cuando se compara contra pandas (unión de índices y ffill(limit=2))
+        Entonces los cierres coinciden
+        """
+        rng = np.random.default_rng(0)
+        data = []
+        for i, symbol in enumerate(("EURUSD", "GBPUSD", "USDJPY")):
+            bars = np.flatnonzero(rng.random(400) > 0.3)
+            data.append(make_ohlcv(symbol, bars, seed=i))
+
+        panel = AlignedPanel(Timeframe.M5, max_fill=2)
+        for start in range(0, 400, 50):
+            for ohlcv in reversed(data):
+                mask = (ohlcv.time >= BASE_TIME + start * STEP) & (ohlcv.time < BASE_TIME + (start + 50) * STEP)
+                panel.update(OHLCVData.from_rates(ohlcv.symbol, Timeframe.M5, ohlcv.rates[mask]))
+
+        expected = reference_close(data, max_fill=2)[panel.symbols]
+        np.testing.assert_array_equal(panel.time, expected.index.to_numpy())
+        np.testing.assert_allclose(panel.close, expected.to_numpy())
+
+    def test_no_fill_leaves_nan(self, make_ohlcv):
+        """Debe dejar NaN en las celdas sin vela si max_fill es 0"""
+        panel = AlignedPanel(Timeframe.M5, max_fill=0)
+        panel.update(make_ohlcv("EURUSD", np.arange(5)))
+        panel.update(make_ohlcv("GBPUSD", [0, 4]))
+
+        assert np.isnan(panel.column("GBPUSD")[1:4]).all()
+        assert panel.complete_rows().tolist() == [True, False, False, False, True]
+
+    def test_times_snap_to_the_grid(self, make_ohlcv):
+        """Debe ubicar una vela desalineada en el inicio de su intervalo"""
+        ohlcv = make_ohlcv("EURUSD", np.arange(3))
+        ohlcv.rates['time'][1] += 17
+        panel = AlignedPanel(Timeframe.M5)
+
+        panel.update(ohlcv)
+
+        assert panel.time[1] == BASE_TIME + STEP
+
+    def test_wrong_timeframe_raises_error(self, make_ohlcv):
+        """Debe lanzar AlignedPanelError con otro timeframe"""
+        panel = AlignedPanel(Timeframe.M5)
+        with pytest.raises(AlignedPanelError):
+            panel.update(make_ohlcv("EURUSD", np.arange(3), timeframe=Timeframe.H1))
+
+
+class TestIncrementalUpdates:
+    """Tests para las actualizaciones incrementales"""
+
+    def test_late_bar_replaces_fill_and_refreshes_following_cells(self, make_ohlcv):
+        """
+        Dado GBPUSD rellenado en las filas 5 a 7
+        Cuando llega tarde su vela de la fila 5
+        Entonces la fila 5 es real y las 6-7 se rellenan con ese cierre
+        """
+        eur = make_ohlcv("EURUSD", np.arange(8))
+        gbp = make_ohlcv("GBPUSD", np.arange(8), seed=9)
+        panel = AlignedPanel(Timeframe.M5)
+        panel.update(eur)
+        panel.update(OHLCVData.from_rates("GBPUSD", Timeframe.M5, gbp.rates[:5]))
+
+        added = panel.update(OHLCVData.from_rates("GBPUSD", Timeframe.M5, gbp.rates[5:6]))
+
+        column = panel.column("GBPUSD")
+        assert added == 0
+        assert column[5] == gbp.close[5]
+        assert column[6] == column[7] == gbp.close[5]
+        assert panel.present[:, 1].tolist() == [True] * 6 + [False] * 2
+
+    def test_bar_between_rows_is_inserted(self, make_ohlcv):
+        """
+        Dado filas 0, 1 y 3 en la grilla
+        Cuando un símbolo trae la vela 2
+        Entonces se inserta la fila y los demás símbolos se rellenan en ella
+        """
+        panel = AlignedPanel(Timeframe.M5)
+        panel.update(make_ohlcv("EURUSD", [0, 1, 3]))
+
+        added = panel.update(make_ohlcv("GBPUSD", [2]))
+
+        assert added == 1
+        assert (panel.time - BASE_TIME).tolist() == [0, STEP, 2 * STEP, 3 * STEP]
+        eur = panel.column("EURUSD")
+        assert eur[2] == eur[1]
+        assert panel.get_stats()["rows_inserted"] == 1
+
+    def test_appends_are_amortized_and_views_contiguous(self, make_ohlcv):
+        """
+        Dado 3000 velas agregadas de a una con max_bars 1000
+        Cuando se consulta el panel
+        Entonces retiene las últimas 1000, las vistas son contiguas y de solo
+        lectura, y hubo pocas realocaciones
+        """
+        eur = make_ohlcv("EURUSD", np.arange(3000))
+        gbp = make_ohlcv("GBPUSD", np.arange(3000), seed=5)
+        panel = AlignedPanel(Timeframe.M5, ["EURUSD", "GBPUSD"], max_bars=1000)
+
+        for i in range(3000):
+            for ohlcv in (eur, gbp):
+                panel.update(OHLCVData.from_rates(ohlcv.symbol, Timeframe.M5, ohlcv.rates[i:i + 1]))
+
+        assert len(panel) == 1000
+        np.testing.assert_array_equal(panel.close[:, 0], eur.close[-1000:])
+        np.testing.assert_array_equal(panel.close[:, 1], gbp.close[-1000:])
+        assert panel.close.flags.c_contiguous
+        assert not panel.close.flags.writeable
+        stats = panel.get_stats()
+        assert stats["reallocations"] + stats["compactions"] < 20
+        assert stats["bars_written"] == 6000
+
+    def test_new_symbol_adds_column(self, make_ohlcv):
+        """Debe agregar una columna al recibir un símbolo nuevo, con NaN antes de su primera vela"""
+        panel = AlignedPanel(Timeframe.M5, ["EURUSD"])
+        panel.update(make_ohlcv("EURUSD", np.arange(5)))
+
+        panel.update(make_ohlcv("USDJPY", [3, 4]))
+
+        assert panel.symbols == ["EURUSD", "USDJPY"]
+        assert np.isnan(panel.column("USDJPY")[:3]).all()
+        with pytest.raises(KeyError):
+            panel.column("AUDUSD")
+
+    def test_invalid_configuration_raises_error(self):
+        """Debe lanzar AlignedPanelError con max_bars o max_fill inválidos"""
+        with pytest.raises(AlignedPanelError):
+            AlignedPanel(Timeframe.M5, max_bars=0)
+        with pytest.raises(AlignedPanelError):
+            AlignedPanel(Timeframe.M5, max_fill=-1)
@@ -0,0 +1,410 @@
+"""
+Tests unitarios para el BarArchive.
+
+Verifica el archivo columnar memory-mapped: persistencia entre instancias,
+consultas por rango con búsqueda binaria, descarga solo de la cola faltante
+y relleno de huecos.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-12
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (archivo histórico)
+"""
+import threading
+
+import pytest
+import numpy as np
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+from src.core.bar_archive import (
+    ArchiveFile,
+    BarArchive,
+    BarArchiveError,
+    from_epoch,
+    to_epoch
+)
+from src.core.mt5_data_extractor import Timeframe
+
+
+BASE_TIME = 1_704_067_200  # 2024-01-01 00:00 UTC
+
+
+@pytest.fixture
+def h1_rates(make_rates):
+    """Crea n velas consecutivas desde el epoch `start`."""
+    def build(start: int, n: int, step: int = 3600, digits=None) -> np.ndarray:
+        return make_rates(n, start=start, step=step, trend=0.0001, body=0.0001, wick=0.0002, digits=digits)
+    return build
+
+
+class FakeTerminal:
+    """Terminal simulado que sirve velas H1 de una serie completa por rango."""
+
+    def __init__(self, rates: np.ndarray):
+        self.rates = rates
+        self.calls = []
+
+    def __call__(self, date_from: datetime, date_to: datetime):
+        start, end = to_epoch(date_from), to_epoch(date_to)
+        self.calls.append((start, end))
+        mask = (self.rates['time'] >= start) & (self.rates['time'] <= end)
+        return self.rates[mask]
+
+
+class TestArchiveFile:
+    """Tests para el archivo columnar"""
+
+    def test_create_append_and_reopen(self, temp_dir, h1_rates):
+        """
+        Dado un archivo nuevo
+        Cuando se agregan velas y se reabre
+        Entonces las velas persisten con su capacidad y length
+        """
+        path = temp_dir / "EURUSD_H1.bars"
+        archive = ArchiveFile.create(path, capacity=10, timeframe_seconds=3600)
+        archive.append(h1_rates(BASE_TIME, 4))
+        archive.close()
+
+        reopened = ArchiveFile(path)
+
+        assert reopened.length == 4
+        assert reopened.capacity == 10
+        assert reopened.timeframe_seconds == 3600
+        assert reopened.read(1, 3)['time'].tolist() == [BASE_TIME + 3600, BASE_TIME + 7200]
+        reopened.close()
+
+    def test_append_beyond_capacity_raises_error(self, temp_dir, h1_rates):
+        """
+        Dado un archivo con capacidad limitada
+        Cuando se agregan más velas de las que caben
+        Entonces debe lanzar BarArchiveError
+        """
+        archive = ArchiveFile.create(temp_dir / "x.bars", capacity=2, timeframe_seconds=3600)
+
+        with pytest.raises(BarArchiveError):
+            archive.append(h1_rates(BASE_TIME, 3))
+        archive.close()
+
+    def test_invalid_file_raises_error(self, temp_dir):
+        """
+        Dado un archivo sin la cabecera esperada
+        Cuando se abre
+        Entonces debe lanzar BarArchiveError
+        """
+        path = temp_dir / "bad.bars"
+        path.write_bytes(b"x" * 128)
+
+        with pytest.raises(BarArchiveError):
+            ArchiveFile(path)
+
+
+class TestBarArchive:
+    """Tests para el archivo histórico"""
+
+    @pytest.fixture
+    def archive(self, temp_dir):
+        """Fixture con BarArchive en directorio temporal"""
+        archive = BarArchive(str(temp_dir / "bars"), initial_capacity=8)
+        yield archive
+        archive.close()
+
+    def test_to_epoch_treats_naive_as_utc(self):
+        """
+        Dado un datetime naive
+        Cuando se convierte a epoch
+        Entonces se interpreta en UTC
+        """
+        assert to_epoch(datetime(2024, 1, 1)) == BASE_TIME
+        assert from_epoch(BASE_TIME) == datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def test_first_query_fetches_and_archives(self, archive, h1_rates):
+        """
+        Dado un archivo vacío
+        Cuando se consulta un rango histórico
+        Entonces se descarga del terminal y se archiva
+        """
+        terminal = FakeTerminal(h1_rates(BASE_TIME, 48))
+
+        rates = archive.get_range(
+            "EURUSD", Timeframe.H1,
+            from_epoch(BASE_TIME), from_epoch(BASE_TIME + 47 * 3600),
+            fetch=terminal
+        )
+
+        assert len(rates) == 48
+        assert archive.bounds("EURUSD", Timeframe.H1) == (BASE_TIME, BASE_TIME + 47 * 3600)
+
+    def test_repeated_query_is_served_from_disk(self, archive, h1_rates):
+        """
+        Dado un rango ya archivado
+        Cuando se consulta un sub-rango
+        Entonces no se llama al terminal y se usa búsqueda binaria
+        """
+        terminal = FakeTerminal(h1_rates(BASE_TIME, 48))
+        archive.get_range(
+            "EURUSD", Timeframe.H1,
+            from_epoch(BASE_TIME), from_epoch(BASE_TIME + 47 * 3600), fetch=terminal
+        )
+        calls = len(terminal.calls)
+
+        rates = archive.get_range(
+            "EURUSD", Timeframe.H1,
+            from_epoch(BASE_TIME + 10 * 3600), from_epoch(BASE_TIME + 19 * 3600),
+            fetch=terminal
+        )
+
+        assert len(terminal.calls) == calls
+        assert len(rates) == 10
+        assert rates['time'][0] == BASE_TIME + 10 * 3600
+        assert archive.get_stats()["archive_only"] == 1
+
+    def test_only_missing_tail_is_fetched(self, archive, h1_rates):
+        """
+        Dado un archivo con las primeras 24 velas
+        Cuando se consulta un rango que se extiende más allá
+        Entonces solo se pide la cola posterior a la última vela archivada
+        """
+        full = h1_rates(BASE_TIME, 48)
+        archive.write("EURUSD", Timeframe.H1, full[:24])
+        terminal = FakeTerminal(full)
+
+        rates = archive.get_range(
+            "EURUSD", Timeframe.H1,
+            from_epoch(BASE_TIME), from_epoch(BASE_TIME + 47 * 3600), fetch=terminal
+        )
+
+        assert terminal.calls == [(BASE_TIME + 23 * 3600 + 1, BASE_TIME + 47 * 3600)]
+        assert len(rates) == 48
+
+    def test_gap_is_detected_and_backfilled(self, temp_dir, h1_rates):
+        """
+        Dado un archivo con un hueco mayor al umbral
+        Cuando se consulta el rango que lo contiene
+        Entonces se pide el hueco una sola vez y se rellena
+        """
+        archive = BarArchive(str(temp_dir / "bars"), gap_threshold_seconds=6 * 3600)
+        full = h1_rates(BASE_TIME, 48)
+        archive.write("EURUSD", Timeframe.H1, np.concatenate([full[:10], full[30:]]))
+
+        assert archive.find_gaps("EURUSD", Timeframe.H1, BASE_TIME, BASE_TIME + 47 * 3600) == [
+            (BASE_TIME + 9 * 3600, BASE_TIME + 30 * 3600)
+        ]
+
+        terminal = FakeTerminal(full)
+        rates = archive.get_range(
+            "EURUSD", Timeframe.H1,
+            from_epoch(BASE_TIME), from_epoch(BASE_TIME + 47 * 3600), fetch=terminal
+        )
+
+        assert len(rates) == 48
+        assert archive.find_gaps("EURUSD", Timeframe.H1, BASE_TIME, BASE_TIME + 47 * 3600) == []
+        archive.close()
+
+    def test_gap_threshold_scales_with_timeframe_and_skips_weekends(self, archive, h1_rates):
+        """
+        Dado velas H1 y D1 que saltan un fin de semana y un hueco de 6 horas en H1
+        Cuando se buscan huecos
+        Entonces el fin de semana no cuenta y el hueco de H1 sí
+        """
+        friday = BASE_TIME + 4 * 86400
+        h1 = h1_rates(friday, 24)
+        monday = h1_rates(friday + 3 * 86400, 24)
+        archive.write("EURUSD", Timeframe.H1, np.concatenate([h1, monday[:5], monday[11:]]))
+        archive.write("EURUSD", Timeframe.D1, h1_rates(BASE_TIME, 5, step=86400))
+        archive.write("EURUSD", Timeframe.D1, h1_rates(BASE_TIME + 7 * 86400, 2, step=86400))
+
+        h1_gaps = archive.find_gaps("EURUSD", Timeframe.H1, friday, friday + 4 * 86400)
+
+        assert h1_gaps == [(int(monday['time'][4]), int(monday['time'][11]))]
+        assert archive.find_gaps("EURUSD", Timeframe.D1, BASE_TIME, BASE_TIME + 9 * 86400) == []
+
+    def test_failed_gap_fetch_is_retried(self, temp_dir, h1_rates):
+        """
+        Dado un hueco cuya primera descarga falla (None)
+        Cuando se vuelve a consultar el rango
+        Entonces el hueco se pide de nuevo y se rellena
+        """
+        archive = BarArchive(str(temp_dir / "bars"))
+        full = h1_rates(BASE_TIME, 48)
+        archive.write("EURUSD", Timeframe.H1, np.concatenate([full[:10], full[30:]]))
+        terminal = FakeTerminal(full)
+        answers = [None]
+
+        def fetch(date_from, date_to):
+            return answers.pop() if answers else terminal(date_from, date_to)
+
+        for _ in range(2):
+            rates = archive.get_range(
+                "EURUSD", Timeframe.H1,
+                from_epoch(BASE_TIME), from_epoch(BASE_TIME + 47 * 3600), fetch=fetch
+            )
+
+        assert len(rates) == 48
+        archive.close()
+
+    def test_exhausted_head_is_not_fetched_again(self, archive, h1_rates):
+        """
+        Dado un broker sin historial anterior a la primera vela archivada
+        Cuando se consulta dos veces un rango que empieza antes
+        Entonces el inicio solo se pide al terminal la primera vez
+        """
+        full = h1_rates(BASE_TIME, 24)
+        archive.write("EURUSD", Timeframe.H1, full)
+        terminal = FakeTerminal(full)
+
+        for _ in range(2):
+            archive.get_range(
+                "EURUSD", Timeframe.H1,
+                from_epoch(BASE_TIME - 10 * 3600), from_epoch(BASE_TIME + 23 * 3600),
+                fetch=terminal
+            )
+
+        assert terminal.calls == [(BASE_TIME - 10 * 3600, BASE_TIME - 1)]
+
+    def test_fetch_does_not_block_other_series(self, archive, h1_rates):
+        """
+        Dado una descarga en curso para EURUSD
+        Cuando otra serie consulta el archivo desde el terminal
+        Entonces no espera a que termine la descarga de EURUSD
+        """
+        gbpusd = h1_rates(BASE_TIME, 24)
+        archive.write("GBPUSD", Timeframe.H1, gbpusd)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_fetch(date_from, date_to):
+            started.set()
+            release.wait(5)
+            return None
+
+        worker = threading.Thread(target=archive.get_range, args=(
+            "EURUSD", Timeframe.H1,
+            from_epoch(BASE_TIME), from_epoch(BASE_TIME + 23 * 3600), slow_fetch
+        ))
+        worker.start()
+        assert started.wait(5)
+
+        rates = archive.get_range(
+            "GBPUSD", Timeframe.H1,
+            from_epoch(BASE_TIME), from_epoch(BASE_TIME + 23 * 3600),
+            fetch=Mock(return_value=None)
+        )
+        release.set()
+        worker.join(5)
+
+        assert len(rates) == 24
+
+    def test_write_merges_and_grows_file(self, archive, h1_rates):
+        """
+        Dado un archivo con velas
+        Cuando se escriben velas solapadas y más allá de la capacidad
+        Entonces el archivo queda ordenado, sin duplicados y con más capacidad
+        """
+        full = h1_rates(BASE_TIME, 30)
+        archive.write("EURUSD", Timeframe.H1, full[10:20])
+        archive.write("EURUSD", Timeframe.H1, full[:15])
+        archive.write("EURUSD", Timeframe.H1, full[20:])
+
+        rates = archive.get_range(
+            "EURUSD", Timeframe.H1,
+            from_epoch(BASE_TIME), from_epoch(BASE_TIME + 29 * 3600),
+            fetch=Mock(return_value=None)
+        )
+
+        assert rates['time'].tolist() == full['time'].tolist()
+
+    def test_archive_survives_restart(self, temp_dir, h1_rates):
+        """
+        Dado un archivo escrito por una instancia
+        Cuando otra instancia abre el mismo directorio
+        Entonces las velas están disponibles sin llamar al terminal
+        """
+        first = BarArchive(str(temp_dir / "bars"))
+        first.write("EURUSD", Timeframe.H1, h1_rates(BASE_TIME, 24))
+        first.close()
+
+        second = BarArchive(str(temp_dir / "bars"))
+        fetch = Mock(return_value=None)
+        rates = second.get_range(
+            "EURUSD", Timeframe.H1,
+            from_epoch(BASE_TIME), from_epoch(BASE_TIME + 23 * 3600), fetch=fetch
+        )
+
+        assert len(rates) == 24
+        fetch.assert_not_called()
+        second.close()
+
+    def test_recent_last_bar_is_returned_but_not_archived(self, archive, h1_rates):
+        """
+        Dado una cola descargada hasta el presente
+        Cuando se archiva
+        Entonces la última vela (posiblemente en formación) se retorna pero no se persiste
+        """
+        now = int(datetime.now(timezone.utc).timestamp()) // 3600 * 3600
+        recent = h1_rates(now - 5 * 3600, 6)
+        terminal = FakeTerminal(recent)
+
+        rates = archive.get_range(
+            "EURUSD", Timeframe.H1,
+            from_epoch(now - 5 * 3600), from_epoch(now + 3600), fetch=terminal
+        )
+
+        assert len(rates) == 6
+        assert archive.bounds("EURUSD", Timeframe.H1)[1] == now - 3600
+
+    def test_invalid_parameters_raise_error(self, temp_dir):
+        """
+        Dado parámetros inválidos
+        Cuando se crea el archivo histórico
+        Entonces debe lanzar BarArchiveError
+        """
+        with pytest.raises(BarArchiveError):
+            BarArchive(str(temp_dir), gap_threshold_seconds=0)
+        with pytest.raises(BarArchiveError):
+            BarArchive(str(temp_dir), initial_capacity=0)
+
+
+class TestCompactArchive:
+    """Tests para archivos con layout compacto"""
+
+    def test_compact_archive_round_trips_and_is_smaller(self, temp_dir, h1_rates):
+        """
+        Dado un archivo compacto y uno con el layout de MT5
+        Cuando se escriben las mismas velas y se reabren
+        Entonces la lectura es idéntica y el compacto ocupa menos en disco
+        """
+        rates = h1_rates(BASE_TIME, 3000, digits=5)
+        compact = BarArchive(temp_dir / "compact", compact="points")
+        plain = BarArchive(temp_dir / "plain")
+        compact.write("EURUSD", Timeframe.H1, rates)
+        plain.write("EURUSD", Timeframe.H1, rates)
+        compact.write("EURUSD", Timeframe.H1, h1_rates(BASE_TIME + 3000 * 3600, 10, digits=5))
+        compact.close()
+
+        reopened = ArchiveFile(temp_dir / "compact" / "EURUSD_H1.bars")
+
+        assert reopened.codec is not None and reopened.codec.digits == 4
+        np.testing.assert_array_equal(reopened.read(0, 3000), rates)
+        assert reopened.length == 3010
+        compact_size = (temp_dir / "compact" / "EURUSD_H1.bars").stat().st_size
+        plain_size = (temp_dir / "plain" / "EURUSD_H1.bars").stat().st_size
+        assert compact_size < plain_size * 0.65
+        reopened.close()
+        plain.close()
+
+    def test_bars_that_do_not_fit_trigger_rewrite(self, temp_dir, h1_rates):
+        """
+        Dado un archivo compactado con 5 dígitos
+        Cuando llega una vela con más dígitos
+        Entonces se reescribe sin compactar y no se pierde precisión
+        """
+        archive = BarArchive(temp_dir, compact="points")
+        archive.write("EURUSD", Timeframe.H1, h1_rates(BASE_TIME, 10, digits=5))
+        odd = h1_rates(BASE_TIME + 10 * 3600, 1, digits=5)
+        odd['close'] = 1.1234567891
+
+        archive.write("EURUSD", Timeframe.H1, odd)
+
+        stored = archive._open("EURUSD", Timeframe.H1)
+        assert stored.codec is None
+        assert stored.read()['close'][-1] == 1.1234567891
+        archive.close()
@@ -0,0 +1,202 @@
+"""
+Tests unitarios para el BarStore.
+
+Verifica que el almacén incremental separe la vela en formación de las
+velas cerradas, agregue solo velas nuevas y sirva cualquier count como slice.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-12
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (store incremental)
+"""
+import pytest
+import numpy as np
+
+from src.core.bar_store import BarStore, BarStoreError
+from src.core.mt5_data_extractor import Timeframe
+
+
+@pytest.fixture
+def h1_rates(make_rates):
+    """Crea n velas consecutivas desde el epoch `start`."""
+    def build(start: int, n: int, step: int = 3600, digits=None) -> np.ndarray:
+        return make_rates(n, start=start, step=step, trend=0.001, body=0.001, wick=0.002, digits=digits)
+    return build
+
+
+class TestBarStore:
+    """Tests para el almacén incremental de velas"""
+
+    @pytest.fixture
+    def store(self):
+        """Fixture con BarStore vacío"""
+        return BarStore(max_bars=100)
+
+    def test_invalid_max_bars_raises_error(self):
+        """
+        Dado un max_bars no positivo
+        Cuando se crea el store
+        Entonces debe lanzar BarStoreError
+        """
+        with pytest.raises(BarStoreError):
+            BarStore(max_bars=0)
+
+    def test_replace_separates_current_candle(self, store, h1_rates):
+        """
+        Dado una descarga desde la posición actual
+        Cuando se reemplaza la serie
+        Entonces la última vela se trata como vela en formación
+        """
+        rates = h1_rates(0, 10)
+
+        store.replace("EURUSD", Timeframe.H1, rates)
+
+        assert store.closed_count("EURUSD", Timeframe.H1) == 9
+        assert store.last_closed_time("EURUSD", Timeframe.H1) == 8 * 3600
+
+    def test_append_only_adds_newer_bars(self, store, h1_rates):
+        """
+        Dado una serie almacenada
+        Cuando se agregan velas que se solapan con las existentes
+        Entonces solo se agregan las posteriores a la última cerrada
+        """
+        store.replace("EURUSD", Timeframe.H1, h1_rates(0, 10))
+
+        # Incluye la vela que antes estaba en formación (t=9h) y una nueva
+        added = store.append("EURUSD", Timeframe.H1, h1_rates(8 * 3600, 3))
+
+        assert added == 1
+        assert store.closed_count("EURUSD", Timeframe.H1) == 10
+        assert store.last_closed_time("EURUSD", Timeframe.H1) == 9 * 3600
+
+    def test_append_without_series_raises_error(self, store, h1_rates):
+        """
+        Dado un store sin la serie solicitada
+        Cuando se intenta agregar velas
+        Entonces debe lanzar BarStoreError
+        """
+        with pytest.raises(BarStoreError):
+            store.append("EURUSD", Timeframe.H1, h1_rates(0, 2))
+
+    def test_slice_serves_any_count(self, store, h1_rates):
+        """
+        Dado una serie almacenada
+        Cuando se piden distintos counts
+        Entonces retorna las últimas velas con o sin la vela en formación
+        """
+        store.replace("EURUSD", Timeframe.H1, h1_rates(0, 10))
+
+        with_current = store.slice("EURUSD", Timeframe.H1, 3, include_current=True)
+        closed_only = store.slice("EURUSD", Timeframe.H1, 3, include_current=False)
+
+        assert list(with_current['time']) == [7 * 3600, 8 * 3600, 9 * 3600]
+        assert list(closed_only['time']) == [6 * 3600, 7 * 3600, 8 * 3600]
+
+    def test_slice_missing_series_returns_none(self, store):
+        """
+        Dado un store vacío
+        Cuando se pide un slice
+        Entonces retorna None
+        """
+        assert store.slice("EURUSD", Timeframe.H1, 5) is None
+
+    def test_max_bars_trims_oldest(self, h1_rates):
+        """
+        Dado un store con límite de velas
+        Cuando se agregan más velas de las permitidas
+        Entonces se descartan las más antiguas
+        """
+        store = BarStore(max_bars=5)
+        store.replace("EURUSD", Timeframe.H1, h1_rates(0, 4))
+        store.append("EURUSD", Timeframe.H1, h1_rates(3 * 3600, 6))
+
+        assert store.closed_count("EURUSD", Timeframe.H1) == 5
+        assert store.last_closed_time("EURUSD", Timeframe.H1) == 7 * 3600
+
+    def test_replace_grows_series_to_requested_window(self, h1_rates):
+        """
+        Dado un store con límite de 5 velas
+        Cuando se reemplaza con una descarga de 11 velas pedidas
+        Entonces retiene las 10 cerradas y las conserva al agregar
+        """
+        store = BarStore(max_bars=5)
+        store.replace("EURUSD", Timeframe.H1, h1_rates(0, 11), requested=11)
+        store.append("EURUSD", Timeframe.H1, h1_rates(10 * 3600, 2))
+
+        assert store.closed_count("EURUSD", Timeframe.H1) == 10
+        assert store.covers("EURUSD", Timeframe.H1, 10)
+        assert not store.covers("EURUSD", Timeframe.H1, 11)
+
+    def test_short_history_is_exhausted(self, store, h1_rates):
+        """
+        Dado un terminal que retorna menos velas de las pedidas
+        Cuando se consulta si la serie cubre la ventana
+        Entonces la serie agotada la cubre aunque tenga menos velas
+        """
+        store.replace("EURUSD", Timeframe.H1, h1_rates(0, 4), requested=51)
+
+        assert store.covers("EURUSD", Timeframe.H1, 50)
+        assert not store.covers("GBPUSD", Timeframe.H1, 1)
+
+    def test_get_stats_and_clear(self, store, h1_rates):
+        """
+        Dado un store con series
+        Cuando se consultan estadísticas y luego se limpia
+        Entonces refleja series y bytes y queda vacío tras clear
+        """
+        store.replace("EURUSD", Timeframe.H1, h1_rates(0, 10))
+        store.replace("GBPUSD", Timeframe.M5, h1_rates(0, 5, step=300))
+
+        stats = store.get_stats()
+        assert stats["series"] == 2
+        assert stats["bars"] == 15
+        assert stats["bytes"] > 0
+
+        store.clear()
+        assert store.get_stats()["series"] == 0
+
+
+class TestCompactBarStore:
+    """Tests para el store con layout compacto"""
+
+    def test_compact_store_serves_exact_slices(self, h1_rates):
+        """
+        Dado un store compacto en puntos
+        Cuando se reemplaza, se agregan velas y se pide un slice
+        Entonces las velas son idénticas a las originales y ocupan menos memoria
+        """
+        rates = h1_rates(0, 60, digits=5)
+        store = BarStore(max_bars=100, compact="points")
+        plain = BarStore(max_bars=100)
+        for target in (store, plain):
+            target.replace("EURUSD", Timeframe.H1, rates[:50])
+            target.append("EURUSD", Timeframe.H1, rates[49:])
+
+        window = store.slice("EURUSD", Timeframe.H1, 30)
+
+        np.testing.assert_array_equal(window, rates[-30:])
+        np.testing.assert_array_equal(
+            store.slice("EURUSD", Timeframe.H1, 30, include_current=False), rates[-31:-1]
+        )
+        assert store.get_stats()["compact_series"] == 1
+        assert store.get_stats()["bytes"] < plain.get_stats()["bytes"]
+
+    def test_append_with_more_digits_recompacts(self, h1_rates):
+        """
+        Dado una serie compactada con 3 dígitos inferidos
+        Cuando llega una vela con 5 dígitos
+        Entonces se vuelve a compactar sin perder precisión
+        """
+        rates = h1_rates(0, 20, digits=5)
+        for name in ('open', 'high', 'low', 'close'):
+            rates[name][:10] = np.round(rates[name][:10], 3)
+        store = BarStore(max_bars=100, compact="points")
+        store.replace("EURUSD", Timeframe.H1, rates[:10])
+
+        store.append("EURUSD", Timeframe.H1, rates[9:])
+
+        np.testing.assert_array_equal(store.slice("EURUSD", Timeframe.H1, 20), rates)
+
+    def test_unknown_compact_mode_raises_error(self):
+        """Debe lanzar BarStoreError con un modo compacto desconocido"""
+        with pytest.raises(BarStoreError):
+            BarStore(compact="int8")
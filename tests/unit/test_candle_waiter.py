@@ -217,6 +217,20 @@ class TestNextCandleCloseCalculation:
         
         # Debería dar el siguiente cierre: 10:31:00
         assert next_close.minute == 31
+    
+    def test_next_close_for_matches_instance_method(self, sample_candle_config, mock_time_validator, mock_lima_time):
+        """next_close_for debe calcular lo mismo que la instancia, sin instanciar"""
+        current = mock_lima_time(2025, 11, 6, 10, 47, 12)
+        
+        for timeframe in CandleWaiter.SUPPORTED_TIMEFRAMES:
+            waiter = CandleWaiter(timeframe, sample_candle_config, mock_time_validator)
+            assert CandleWaiter.next_close_for(timeframe, current) == \
+                waiter.get_next_candle_close_time(current)
+    
+    def test_next_close_for_invalid_timeframe(self, mock_lima_time):
+        """next_close_for debe rechazar timeframes no soportados"""
+        with pytest.raises(TimeframeNotSupportedError):
+            CandleWaiter.next_close_for("W1", mock_lima_time(2025, 11, 6, 10, 30))
 
 
 # ==================== TESTS DE VALIDACIÓN DE VELA CERRADA ====================
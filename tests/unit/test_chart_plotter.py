@@ -0,0 +1,241 @@
+"""
+Tests unitarios para ChartRenderService.
+
+Verifica el caché direccionado por contenido con el payload base64, el
+agrupamiento de solicitudes idénticas y el renderizado en el pool de procesos.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-15
+Ticket: T24 - Generación de imágenes de velas por timeframe
+"""
+import base64
+import threading
+import time
+
+import pytest
+import numpy as np
+
+from src.core.chart_plotter import (
+    ChartImage,
+    ChartPlotterError,
+    ChartRenderService,
+    ChartRequest,
+    ChartStyle
+)
+from src.core.mt5_data_extractor import OHLCVData, Timeframe
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+
+
+@pytest.fixture
+def make_ohlcv(make_rates):
+    """Crea n velas con cierres crecientes."""
+    def build(n: int = 150, symbol: str = "EURUSD", timeframe=Timeframe.M5) -> OHLCVData:
+        rates = make_rates(
+            n, start=BASE_TIME, step=timeframe.value * 60, trend=0.0001, body=0.00005, wick=0.0002
+        )
+        return OHLCVData.from_rates(symbol, timeframe, rates)
+    return build
+
+
+def fake_png(request: ChartRequest) -> bytes:
+    """Renderizador de prueba (nivel de módulo para poder enviarse al pool)."""
+    return f"PNG:{request.symbol}:{request.timeframe}:{request.last_bar_time}".encode()
+
+
+def failing_renderer(request: ChartRequest) -> bytes:
+    """Renderizador de prueba que siempre falla."""
+    raise RuntimeError("sin backend gráfico")
+
+
+class CountingRenderer:
+    """Renderizador en línea que cuenta llamadas y puede bloquearse."""
+
+    def __init__(self, gate: threading.Event = None):
+        self.calls = 0
+        self.gate = gate
+
+    def __call__(self, request: ChartRequest) -> bytes:
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        return fake_png(request)
+
+
+class TestChartRequest:
+    """Tests para la solicitud de gráfico"""
+
+    def test_from_ohlcv_keeps_last_bars(self, make_ohlcv):
+        """
+        Dado 150 velas y un estilo de 100 velas
+        Cuando se construye la solicitud
+        Entonces contiene copias de las últimas 100
+        """
+        ohlcv = make_ohlcv()
+        request = ChartRequest.from_ohlcv(ohlcv, ChartStyle(bars=100))
+
+        assert len(request.close) == 100
+        assert request.last_bar_time == int(ohlcv.time[-1])
+        assert request.timeframe == "M5"
+        assert not np.shares_memory(request.close, ohlcv.close)
+
+    def test_cache_key_depends_on_last_bar_and_style(self, make_ohlcv):
+        """
+        Dado la misma serie
+        Cuando cambia el estilo o llega una vela nueva
+        Entonces cambia la clave de contenido
+        """
+        ohlcv = make_ohlcv()
+        base = ChartRequest.from_ohlcv(ohlcv)
+        older = ChartRequest.from_ohlcv(OHLCVData.from_rates("EURUSD", Timeframe.M5, ohlcv.rates[:-1]))
+
+        assert base.cache_key == ChartRequest.from_ohlcv(ohlcv).cache_key
+        assert base.cache_key != ChartRequest.from_ohlcv(ohlcv, ChartStyle(show_ema=True)).cache_key
+        assert base.cache_key != older.cache_key
+
+    def test_invalid_style_raises_error(self):
+        """
+        Dado un estilo sin velas
+        Cuando se crea
+        Entonces debe lanzar ChartPlotterError
+        """
+        with pytest.raises(ChartPlotterError):
+            ChartStyle(bars=0)
+
+
+class TestRenderCache:
+    """Tests para el caché direccionado por contenido"""
+
+    def test_shared_chart_is_rendered_and_encoded_once(self, make_ohlcv):
+        """
+        Dado dos bots que piden el mismo gráfico
+        Cuando se renderiza dos veces
+        Entonces se renderiza una vez y el base64 queda listo en caché
+        """
+        renderer = CountingRenderer()
+        service = ChartRenderService(renderer=renderer, max_workers=0)
+        request = ChartRequest.from_ohlcv(make_ohlcv())
+
+        first = service.render(request)
+        second = service.render(ChartRequest.from_ohlcv(make_ohlcv()))
+
+        assert renderer.calls == 1
+        assert second is first
+        assert base64.b64decode(first.base64) == first.png
+        assert first.to_payload() == {"mime_type": "image/png", "data": first.base64}
+        stats = service.get_stats()
+        assert stats["hits"] == 1
+        assert stats["renders"] == 1
+
+    def test_batch_deduplicates_identical_requests(self, make_ohlcv):
+        """
+        Dado un lote con 3 timeframes y un duplicado
+        Cuando se renderiza
+        Entonces se renderizan 3 imágenes y se retornan en el orden pedido
+        """
+        renderer = CountingRenderer()
+        service = ChartRenderService(renderer=renderer, max_workers=0)
+        requests = [
+            ChartRequest.from_ohlcv(make_ohlcv(timeframe=tf))
+            for tf in (Timeframe.M5, Timeframe.M15, Timeframe.H1, Timeframe.M5)
+        ]
+
+        images = service.render_many(requests)
+
+        assert [i.timeframe for i in images] == ["M5", "M15", "H1", "M5"]
+        assert images[0] is images[3]
+        assert renderer.calls == 3
+        assert service.get_stats()["coalesced"] == 1
+
+    def test_concurrent_identical_requests_are_coalesced(self, make_ohlcv):
+        """
+        Dado un renderizado en curso
+        Cuando otro hilo pide el mismo gráfico
+        Entonces espera el mismo resultado sin renderizar de nuevo
+        """
+        gate = threading.Event()
+        renderer = CountingRenderer(gate)
+        service = ChartRenderService(renderer=renderer, max_workers=0)
+        request = ChartRequest.from_ohlcv(make_ohlcv())
+        results = []
+
+        owner = threading.Thread(target=lambda: results.append(service.render(request)))
+        owner.start()
+        while service.get_stats()["requests"] == 0:
+            time.sleep(0.001)
+        waiter = threading.Thread(target=lambda: results.append(service.render(request)))
+        waiter.start()
+        while service.get_stats()["coalesced"] == 0:
+            time.sleep(0.001)
+        gate.set()
+        owner.join()
+        waiter.join()
+
+        assert renderer.calls == 1
+        assert results[0] is results[1]
+
+    def test_lru_evicts_oldest_image(self, make_ohlcv):
+        """
+        Dado un caché de 2 imágenes
+        Cuando se renderizan 3 gráficos distintos
+        Entonces se desaloja el más antiguo
+        """
+        service = ChartRenderService(renderer=fake_png, max_workers=0, cache_entries=2)
+        requests = [
+            ChartRequest.from_ohlcv(make_ohlcv(symbol=s)) for s in ("EURUSD", "GBPUSD", "XAUUSD")
+        ]
+
+        service.render_many(requests)
+
+        assert service.get_cached(requests[0]) is None
+        assert isinstance(service.get_cached(requests[2]), ChartImage)
+        assert service.get_stats()["evictions"] == 1
+
+    def test_render_error_is_wrapped_and_not_cached(self, make_ohlcv):
+        """
+        Dado un renderizador que falla
+        Cuando se pide un gráfico
+        Entonces se lanza ChartPlotterError y la clave queda libre
+        """
+        service = ChartRenderService(renderer=failing_renderer, max_workers=0)
+        request = ChartRequest.from_ohlcv(make_ohlcv())
+
+        with pytest.raises(ChartPlotterError):
+            service.render(request)
+
+        assert service.get_cached(request) is None
+        assert service.get_stats()["errors"] == 1
+        assert service._pending == {}
+
+
+class TestProcessPool:
+    """Tests para el renderizado en el pool de procesos"""
+
+    def test_pool_renders_batch(self, make_ohlcv):
+        """
+        Dado un servicio con 2 procesos
+        Cuando se renderizan 3 timeframes
+        Entonces las imágenes vuelven del pool y quedan en caché
+        """
+        with ChartRenderService(renderer=fake_png, max_workers=2) as service:
+            requests = [
+                ChartRequest.from_ohlcv(make_ohlcv(timeframe=tf))
+                for tf in (Timeframe.M5, Timeframe.M15, Timeframe.H1)
+            ]
+
+            images = service.render_many(requests)
+
+            assert images[2].png == fake_png(requests[2])
+            assert service.render(requests[0]) is images[0]
+            assert service.get_stats()["renders"] == 3
+
+    def test_pool_errors_are_raised(self, make_ohlcv):
+        """
+        Dado un renderizador que falla en el proceso trabajador
+        Cuando se pide un gráfico
+        Entonces se lanza ChartPlotterError
+        """
+        with ChartRenderService(renderer=failing_renderer, max_workers=1) as service:
+            with pytest.raises(ChartPlotterError):
+                service.render(ChartRequest.from_ohlcv(make_ohlcv()))
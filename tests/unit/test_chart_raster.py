@@ -0,0 +1,216 @@
+"""
+Tests unitarios para el renderizador raster de velas.
+
+Verifica la codificación PNG con zlib, el dibujo de velas, volumen y EMAs
+con los colores del estilo y su uso como renderizador por defecto.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-15
+Ticket: T24 - Generación de imágenes de velas por timeframe (renderizador raster)
+"""
+import struct
+import zlib
+
+import pytest
+import numpy as np
+
+from src.core.chart_plotter import ChartRenderService, ChartRequest, ChartStyle
+from src.core.chart_raster import (
+    PADDING,
+    PNG_SIGNATURE,
+    ChartRasterError,
+    encode_png,
+    parse_color,
+    render_candles,
+    render_raster
+)
+from src.core.indicators_calculator import calculate_ema
+from src.core.mt5_data_extractor import OHLCVData, Timeframe
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+
+
+@pytest.fixture
+def make_request(make_rates):
+    """Crea una solicitud con n velas aleatorias reproducibles."""
+    def build(n: int = 100, style: ChartStyle = None, seed: int = 5) -> ChartRequest:
+        volume = np.random.default_rng(seed).integers(10, 100, n)
+        rates = make_rates(
+            n, start=BASE_TIME, volatility=0.001, wick=0.0004, volume=volume, seed=seed, continuous=True
+        )
+        ohlcv = OHLCVData.from_rates("EURUSD", Timeframe.M5, rates)
+        return ChartRequest.from_ohlcv(ohlcv, style or ChartStyle(bars=n))
+    return build
+
+
+def decode_png(data: bytes) -> np.ndarray:
+    """Decodifica un PNG RGB de 8 bits sin filtros (el formato de encode_png)."""
+    assert data[:8] == PNG_SIGNATURE
+    pos, chunks = 8, {}
+    while pos < len(data):
+        length, = struct.unpack(">I", data[pos:pos + 4])
+        kind = data[pos + 4:pos + 8]
+        body = data[pos + 8:pos + 8 + length]
+        crc, = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+        assert crc == zlib.crc32(kind + body) & 0xFFFFFFFF
+        chunks[kind] = body
+        pos += 12 + length
+    width, height, depth, color_type = struct.unpack(">IIBB", chunks[b"IHDR"][:10])
+    assert (depth, color_type) == (8, 2)
+    raw = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8)
+    raw = raw.reshape(height, width * 3 + 1)
+    assert (raw[:, 0] == 0).all()
+    return raw[:, 1:].reshape(height, width, 3)
+
+
+def has_color(pixels: np.ndarray, color: str) -> bool:
+    """Indica si algún pixel tiene exactamente el color dado."""
+    return bool((pixels == parse_color(color)).all(axis=-1).any())
+
+
+class TestEncodePng:
+    """Tests para la codificación PNG"""
+
+    def test_round_trip_preserves_pixels(self):
+        """
+        Dado una imagen RGB aleatoria
+        Cuando se codifica y se decodifica
+        Entonces se obtienen los mismos pixeles
+        """
+        pixels = np.random.default_rng(0).integers(0, 256, (7, 11, 3), dtype=np.uint8)
+
+        assert np.array_equal(decode_png(encode_png(pixels)), pixels)
+
+    def test_non_rgb_array_raises_error(self):
+        """
+        Dado un array en escala de grises
+        Cuando se codifica
+        Entonces debe lanzar ChartRasterError
+        """
+        with pytest.raises(ChartRasterError):
+            encode_png(np.zeros((4, 4), dtype=np.uint8))
+
+    def test_parse_color_rejects_invalid_values(self):
+        """
+        Dado colores mal formados
+        Cuando se convierten
+        Entonces debe lanzar ChartRasterError
+        """
+        assert parse_color("#26a69a").tolist() == [0x26, 0xa6, 0x9a]
+        with pytest.raises(ChartRasterError):
+            parse_color("#fff")
+        with pytest.raises(ChartRasterError):
+            parse_color("#gggggg")
+
+
+class TestRenderCandles:
+    """Tests para el dibujo de velas"""
+
+    def test_image_has_style_size_and_colors(self, make_request):
+        """
+        Dado un estilo de 400x300 con colores propios
+        Cuando se dibuja
+        Entonces la imagen usa ese tamaño, fondo y colores de vela
+        """
+        style = ChartStyle(width=400, height=300, bars=100, background="#101010",
+                           up_color="#00ff00", down_color="#ff0000")
+        pixels = render_candles(make_request(style=style))
+
+        assert pixels.shape == (300, 400, 3)
+        assert pixels.dtype == np.uint8
+        assert (pixels[0, 0] == parse_color("#101010")).all()
+        assert has_color(pixels, "#00ff00")
+        assert has_color(pixels, "#ff0000")
+
+    def test_candle_body_spans_open_to_close(self, make_request):
+        """
+        Dado una sola vela alcista que ocupa todo el rango
+        Cuando se dibuja sin volumen
+        Entonces la columna central se pinta de arriba a abajo con el color alcista
+        """
+        request = make_request(n=1, style=ChartStyle(width=40, height=40, bars=1, show_volume=False))
+        request.open[:] = request.low
+        request.close[:] = request.high
+
+        pixels = render_candles(request)
+
+        column = pixels[PADDING:40 - PADDING, 20]
+        assert (column == parse_color(request.style.up_color)).all()
+
+    def test_volume_panel_is_optional(self, make_request):
+        """
+        Dado el mismo gráfico con y sin volumen
+        Cuando se dibuja
+        Entonces solo con volumen se pintan velas en la franja inferior
+        """
+        with_volume = render_candles(make_request(style=ChartStyle(bars=100)))
+        without = render_candles(make_request(style=ChartStyle(bars=100, show_volume=False)))
+        bottom_row = 500 - PADDING - 1
+        background = parse_color("#ffffff")
+
+        assert (with_volume[bottom_row] != background).any(axis=-1).any()
+        assert not np.array_equal(with_volume, without)
+
+    def test_ema_lines_only_when_enabled(self, make_request):
+        """
+        Dado un estilo con show_ema
+        Cuando se dibuja
+        Entonces aparecen los colores de EMA 20 y EMA 50
+        """
+        plain = render_candles(make_request())
+        style = ChartStyle(bars=100, show_ema=True)
+        with_ema = render_candles(make_request(style=style))
+
+        assert not has_color(plain, style.ema_fast_color)
+        assert has_color(with_ema, style.ema_fast_color)
+        assert has_color(with_ema, style.ema_slow_color)
+
+    def test_ema_line_starts_after_warmup(self, make_request):
+        """
+        Dado una EMA 50 sobre 100 velas
+        Cuando se dibuja
+        Entonces no hay pixeles de la EMA 50 en la primera mitad del gráfico
+        """
+        style = ChartStyle(bars=100, show_ema=True, show_volume=False)
+        request = make_request(style=style)
+        pixels = render_candles(request)
+        ema_mask = (pixels == parse_color(style.ema_slow_color)).all(axis=-1)
+
+        assert np.isnan(calculate_ema(request.close, 50)[:49]).all()
+        assert not ema_mask[:, :style.width * 48 // 100].any()
+
+    def test_rendering_is_deterministic(self, make_request):
+        """
+        Dado la misma solicitud
+        Cuando se renderiza dos veces
+        Entonces el PNG es idéntico
+        """
+        request = make_request(style=ChartStyle(bars=100, show_ema=True))
+
+        assert render_raster(request) == render_raster(request)
+
+    def test_too_many_bars_for_canvas_raises_error(self, make_request):
+        """
+        Dado más velas que columnas disponibles
+        Cuando se dibuja
+        Entonces debe lanzar ChartRasterError
+        """
+        with pytest.raises(ChartRasterError):
+            render_candles(make_request(n=100, style=ChartStyle(width=50, bars=100)))
+
+
+class TestDefaultRenderer:
+    """Tests para el uso en ChartRenderService"""
+
+    def test_service_uses_raster_renderer_by_default(self, make_request):
+        """
+        Dado un servicio sin renderizador explícito
+        Cuando se renderiza un gráfico
+        Entonces produce un PNG válido del tamaño del estilo
+        """
+        service = ChartRenderService(max_workers=0)
+
+        image = service.render(make_request())
+
+        assert decode_png(image.png).shape == (500, 800, 3)
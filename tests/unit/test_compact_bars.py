@@ -0,0 +1,148 @@
+"""
+Tests unitarios para la representación compacta de velas.
+
+Verifica que la decodificación de los layouts en puntos y float32 sea exacta,
+que la codificación rechace lo que no entra sin pérdida y el reporte de
+memoria.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-18
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (almacenamiento compacto)
+"""
+import pytest
+import numpy as np
+
+from src.core.compact_bars import (
+    RATES_DTYPE,
+    BarCodec,
+    CompactBarsError,
+    infer_digits,
+    memory_report
+)
+from src.core.mt5_data_extractor import MT5_RATES_DTYPE
+
+
+@pytest.fixture
+def mt5_rates(make_rates):
+    """Velas con precios decimales de `digits` dígitos, como las entrega MT5."""
+    def build(n: int = 500, price: float = 1.1, digits: int = 5, seed: int = 2) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        return make_rates(
+            n, price=price, volatility=price * 1e-3, body=price * 1e-4, wick=price * 5e-4,
+            volume=rng.integers(0, 5000, n), spread=rng.integers(0, 30, n), digits=digits, seed=seed
+        )
+    return build
+
+
+class TestBarCodec:
+    """Tests para el codec compacto"""
+
+    @pytest.mark.parametrize("mode", ["points", "float32"])
+    @pytest.mark.parametrize("price,digits", [(1.1, 5), (150.0, 3), (2000.0, 2)])
+    def test_round_trip_is_exact(self, mode, price, digits, mt5_rates):
+        """
+        Dado velas de EURUSD, USDJPY y XAUUSD
+        Cuando se codifican y decodifican
+        Entonces se obtienen exactamente las mismas velas
+        """
+        rates = mt5_rates(price=price, digits=digits)
+        codec = BarCodec(mode=mode, digits=digits)
+
+        decoded = codec.decode(codec.encode(rates))
+
+        assert decoded.dtype == MT5_RATES_DTYPE
+        np.testing.assert_array_equal(decoded, rates)
+
+    def test_compact_layout_is_smaller(self, mt5_rates):
+        """Debe ocupar 36 bytes por vela frente a 60 del layout de MT5"""
+        rates = mt5_rates()
+
+        compact = BarCodec().encode(rates)
+
+        assert compact.dtype.itemsize == 36
+        assert compact.nbytes * 60 == rates.nbytes * 36
+        assert RATES_DTYPE is MT5_RATES_DTYPE
+
+    def test_for_point_uses_symbol_digits(self):
+        """Debe derivar los dígitos del punto de SymbolSpecification"""
+        assert BarCodec.for_point(0.00001).digits == 5
+        assert BarCodec.for_point(0.01, mode="float32").digits == 2
+        with pytest.raises(CompactBarsError):
+            BarCodec.for_point(0)
+
+    def test_price_with_more_digits_is_rejected(self, mt5_rates):
+        """
+        Dado un precio con más dígitos que el codec
+        Cuando se codifica
+        Entonces falla en lugar de redondear en silencio
+        """
+        rates = mt5_rates()
+        rates['close'][10] = 1.123456
+
+        with pytest.raises(CompactBarsError):
+            BarCodec(digits=5).encode(rates)
+
+    def test_float32_rejects_insufficient_precision(self, mt5_rates):
+        """
+        Dado precios de un índice cerca de 1e6 con 2 dígitos (8 cifras significativas)
+        Cuando se codifican en float32
+        Entonces falla, pero en puntos se codifican sin pérdida
+        """
+        rates = mt5_rates(price=987_654.32, digits=2)
+
+        with pytest.raises(CompactBarsError):
+            BarCodec(mode="float32", digits=2).encode(rates)
+        np.testing.assert_array_equal(BarCodec(digits=2).decode(BarCodec(digits=2).encode(rates)), rates)
+
+    def test_volume_out_of_int32_range_is_rejected(self, mt5_rates):
+        """Debe fallar si el volumen no entra en int32"""
+        rates = mt5_rates()
+        rates['real_volume'][0] = 2 ** 40
+
+        with pytest.raises(CompactBarsError):
+            BarCodec().encode(rates)
+
+    def test_invalid_codec_raises_error(self):
+        """Debe lanzar CompactBarsError con modo o dígitos inválidos"""
+        with pytest.raises(CompactBarsError):
+            BarCodec(mode="float16")
+        with pytest.raises(CompactBarsError):
+            BarCodec(digits=12)
+
+
+class TestInferDigits:
+    """Tests para la inferencia de dígitos"""
+
+    def test_infers_minimal_digits(self, mt5_rates):
+        """Debe inferir los dígitos de cotización a partir de los precios"""
+        assert infer_digits(mt5_rates(digits=5)) == 5
+        assert infer_digits(mt5_rates(price=150.0, digits=3)) == 3
+
+    def test_non_decimal_prices_raise_error(self, mt5_rates):
+        """Debe fallar con precios que no son decimales exactos"""
+        rates = mt5_rates()
+        rates['close'] += 1e-12
+
+        with pytest.raises(CompactBarsError):
+            infer_digits(rates)
+
+
+class TestMemoryReport:
+    """Tests para el reporte de memoria"""
+
+    def test_report_compares_layouts(self):
+        """
+        Dado 30 instrumentos en 7 timeframes con 5000 velas
+        Cuando se genera el reporte
+        Entonces el layout compacto ahorra dos tercios frente a rates + DataFrame
+        """
+        report = memory_report([5000] * 30 * 7)
+
+        assert report["bars"] == 1_050_000
+        assert report["bytes_per_bar"] == {
+            "rates": RATES_DTYPE.itemsize,
+            "rates+dataframe": 108,
+            "points": 36,
+            "float32": 36,
+        }
+        assert report["savings"]["points"] == pytest.approx(1 - 36 / 108)
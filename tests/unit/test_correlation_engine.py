@@ -0,0 +1,232 @@
+"""
+Tests unitarios para CorrelationEngine.
+
+Verifica que la correlación y covarianza incrementales coincidan con el
+recálculo completo de pandas sobre la ventana, el manejo de velas faltantes,
+las consultas por umbral y el consumo de un AlignedPanel.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-19
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (correlación entre instrumentos)
+"""
+import math
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.core.aligned_panel import AlignedPanel
+from src.core.correlation_engine import CorrelationEngine, CorrelationEngineError
+from src.core.mt5_data_extractor import OHLCVData, Timeframe
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+STEP = 300
+SYMBOLS = ["EURUSD", "GBPUSD", "USDCHF", "USDJPY"]
+
+
+def make_closes(bars: int = 600, seed: int = 7) -> pd.DataFrame:
+    """Cierres con GBPUSD correlacionado y USDCHF anticorrelacionado con EURUSD."""
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0, 1e-3, bars)
+    returns = np.column_stack([
+        base,
+        0.9 * base + 0.4 * rng.normal(0, 1e-3, bars),
+        -0.8 * base + 0.5 * rng.normal(0, 1e-3, bars),
+        rng.normal(0, 1e-3, bars),
+    ])
+    prices = np.array([1.1, 1.27, 0.88, 150.0]) * np.exp(np.cumsum(returns, axis=0))
+    return pd.DataFrame(prices, columns=SYMBOLS, index=BASE_TIME + np.arange(bars) * STEP)
+
+
+def feed(engine: CorrelationEngine, closes: pd.DataFrame) -> None:
+    """Pasa las velas al motor, omitiendo los NaN."""
+    for time, row in closes.iterrows():
+        engine.update(time, row.dropna().to_dict())
+
+
+def reference(closes: pd.DataFrame, window: int, min_periods: int):
+    """Correlación y covarianza recalculadas con pandas sobre la ventana."""
+    returns = np.log(closes).diff().iloc[-window:]
+    return returns.corr(min_periods=min_periods), returns.cov(min_periods=min_periods)
+
+
+@pytest.fixture
+def load_panel(make_rates):
+    """Carga en el panel las velas no NaN de cada símbolo."""
+    def load(panel: AlignedPanel, closes: pd.DataFrame) -> None:
+        for symbol in closes.columns:
+            series = closes[symbol].dropna()
+            rates = make_rates(times=series.index, price=series.to_numpy())
+            panel.update(OHLCVData.from_rates(symbol, Timeframe.M5, rates))
+    return load
+
+
+class TestIncrementalMatrices:
+    """Tests para las matrices incrementales"""
+
+    def test_matches_full_recomputation(self):
+        """
+        Dado 600 velas de 4 instrumentos y una ventana de 100
+        Cuando se alimentan vela a vela
+        Entonces correlación y covarianza coinciden con pandas sobre las últimas 100
+        """
+        closes = make_closes()
+        engine = CorrelationEngine(SYMBOLS, window=100, min_periods=10, resync_every=10_000)
+
+        feed(engine, closes)
+
+        corr, cov = reference(closes, 100, 10)
+        np.testing.assert_allclose(engine.correlation(), corr.to_numpy(), atol=1e-9)
+        np.testing.assert_allclose(engine.covariance(), cov.to_numpy(), rtol=1e-6, atol=1e-15)
+        assert engine.get_stats()["resyncs"] == 0
+
+    def test_missing_bars_use_pairwise_observations(self):
+        """
+        Dado cierres con velas faltantes aleatorias por símbolo
+        Cuando se alimentan al motor
+        Entonces coincide con la correlación por pares completos de pandas
+        """
+        closes = make_closes(seed=3)
+        rng = np.random.default_rng(1)
+        closes = closes.mask(rng.random(closes.shape) < 0.1)
+        engine = CorrelationEngine(SYMBOLS, window=150, min_periods=20, resync_every=64)
+
+        feed(engine, closes)
+
+        corr, cov = reference(closes, 150, 20)
+        np.testing.assert_allclose(engine.correlation(), corr.to_numpy(), atol=1e-9)
+        np.testing.assert_allclose(engine.covariance(), cov.to_numpy(), rtol=1e-6, atol=1e-15)
+        counts = np.log(closes).diff().iloc[-150:].notna().astype(int)
+        np.testing.assert_array_equal(engine.observations(), (counts.T @ counts).to_numpy())
+
+    def test_not_enough_observations_is_nan(self):
+        """Debe reportar NaN mientras no haya min_periods observaciones comunes"""
+        closes = make_closes(bars=10)
+        engine = CorrelationEngine(SYMBOLS, window=50, min_periods=20)
+
+        feed(engine, closes)
+
+        assert np.isnan(engine.correlation()).all()
+
+    def test_stale_bar_is_ignored(self):
+        """Debe ignorar una vela con tiempo no posterior a la última"""
+        engine = CorrelationEngine(SYMBOLS, window=10)
+        assert engine.update(BASE_TIME, {"EURUSD": 1.1})
+
+        assert not engine.update(BASE_TIME, {"EURUSD": 1.2})
+        assert engine.get_stats()["stale_updates"] == 1
+
+    def test_invalid_configuration_raises_error(self):
+        """Debe lanzar CorrelationEngineError con configuración inválida"""
+        with pytest.raises(CorrelationEngineError):
+            CorrelationEngine([])
+        with pytest.raises(CorrelationEngineError):
+            CorrelationEngine(SYMBOLS, window=1)
+        with pytest.raises(CorrelationEngineError):
+            CorrelationEngine(SYMBOLS, window=10, min_periods=20)
+
+
+class TestQueries:
+    """Tests para las consultas previas a una entrada"""
+
+    @pytest.fixture
+    def engine(self):
+        engine = CorrelationEngine(SYMBOLS, window=200)
+        feed(engine, make_closes())
+        return engine
+
+    def test_correlated_with_threshold(self, engine):
+        """
+        Dado GBPUSD correlacionado y USDCHF anticorrelacionado con EURUSD
+        Cuando se consultan los correlacionados por encima de 0.7
+        Entonces aparecen ambos en valor absoluto y solo GBPUSD con signo
+        """
+        absolute = engine.correlated_with("EURUSD", threshold=0.7)
+        signed = engine.correlated_with("EURUSD", threshold=0.7, absolute=False)
+
+        assert {symbol for symbol, _ in absolute} == {"GBPUSD", "USDCHF"}
+        assert abs(absolute[0][1]) >= abs(absolute[1][1])
+        assert [symbol for symbol, _ in signed] == ["GBPUSD"]
+        assert engine.correlation_between("EURUSD", "USDCHF") < -0.7
+
+    def test_max_correlation_against_open_positions(self, engine):
+        """Debe retornar el símbolo abierto más correlacionado con la entrada"""
+        symbol, value = engine.max_correlation("EURUSD", ["USDJPY", "GBPUSD", "EURUSD"])
+
+        assert symbol == "GBPUSD"
+        assert value == pytest.approx(engine.correlation_between("EURUSD", "GBPUSD"))
+        assert engine.max_correlation("EURUSD", [])[0] is None
+        assert math.isnan(engine.max_correlation("EURUSD", ["AUDUSD"])[1])
+
+    def test_matrix_is_built_once_per_bar(self, engine):
+        """Debe reutilizar la matriz entre consultas de la misma vela"""
+        builds = engine.get_stats()["matrix_builds"]
+
+        for symbol in SYMBOLS:
+            engine.correlated_with(symbol)
+
+        assert engine.get_stats()["matrix_builds"] == builds + 1
+
+    def test_unknown_symbol_raises_key_error(self, engine):
+        """Debe lanzar KeyError al consultar un símbolo no configurado"""
+        with pytest.raises(KeyError):
+            engine.correlated_with("AUDUSD")
+
+
+class TestAlignedPanelSource:
+    """Tests para el consumo de un AlignedPanel"""
+
+    def test_consumes_new_rows_and_skips_filled_cells(self, load_panel):
+        """
+        Dado un panel donde GBPUSD no tiene las velas 100 a 119 (rellenadas)
+        Cuando el motor consume el panel en dos tandas
+        Entonces procesa cada fila una vez y trata el relleno como faltante
+        """
+        closes = make_closes(bars=300)
+        closes.loc[closes.index[100:120], "GBPUSD"] = np.nan
+        panel = AlignedPanel(Timeframe.M5, SYMBOLS)
+        engine = CorrelationEngine(SYMBOLS, window=250, min_periods=10)
+
+        load_panel(panel, closes.iloc[:200])
+        first = engine.update_from_panel(panel)
+        load_panel(panel, closes.iloc[200:])
+        second = engine.update_from_panel(panel)
+
+        assert (first, second) == (200, 100)
+        assert engine.update_from_panel(panel) == 0
+        corr, _ = reference(closes, 250, 10)
+        np.testing.assert_allclose(engine.correlation(), corr.to_numpy(), atol=1e-9)
+
+    def test_waits_for_symbols_that_arrive_later(self, load_panel):
+        """
+        Dado un panel actualizado símbolo por símbolo entre llamadas al motor
+        Cuando EURUSD llega antes que GBPUSD
+        Entonces el motor espera a GBPUSD y la correlación usa todas las filas
+        """
+        closes = make_closes(bars=50)[["EURUSD", "GBPUSD"]]
+        closes["GBPUSD"] = closes["EURUSD"] * 1.2
+        panel = AlignedPanel(Timeframe.M5, ["EURUSD", "GBPUSD"])
+        engine = CorrelationEngine(["EURUSD", "GBPUSD"], window=100, min_periods=10)
+
+        load_panel(panel, closes[["EURUSD"]])
+        assert engine.update_from_panel(panel) == 0
+        load_panel(panel, closes[["GBPUSD"]])
+
+        assert engine.update_from_panel(panel) == 50
+        assert engine.correlation()[0, 1] == pytest.approx(1.0)
+
+    def test_stale_symbol_stops_blocking_after_fill_horizon(self, load_panel):
+        """
+        Dado un símbolo sin velas nuevas más allá de max_fill filas
+        Cuando el motor consume el panel
+        Entonces procesa todas las filas y el símbolo cuenta como faltante
+        """
+        closes = make_closes(bars=60)[["EURUSD", "GBPUSD"]]
+        closes.loc[closes.index[30:], "GBPUSD"] = np.nan
+        panel = AlignedPanel(Timeframe.M5, ["EURUSD", "GBPUSD"], max_fill=5)
+        engine = CorrelationEngine(["EURUSD", "GBPUSD"], window=100, min_periods=10)
+
+        load_panel(panel, closes)
+
+        assert engine.update_from_panel(panel) == 60
@@ -0,0 +1,264 @@
+"""
+Tests unitarios para DataValidator.
+
+Verifica la detección de anomalías en una sola pasada, que los cierres de
+fin de semana y las pausas diarias no cuenten como huecos y que el relleno
+pida solo los tramos faltantes.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-17
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (validación de calidad)
+"""
+import pytest
+import numpy as np
+
+from src.core.bar_archive import to_epoch
+from src.core.data_validator import (
+    DataValidator,
+    DataValidatorError,
+    MarketSessions
+)
+from src.core.mt5_data_extractor import MT5DataError, OHLCVData, Timeframe
+
+
+MONDAY = 1_762_732_800  # 2025-11-10 00:00 UTC
+DAY = 86400
+
+
+@pytest.fixture
+def valid_rates(make_rates):
+    """Velas válidas en los tiempos indicados."""
+    def build(times: np.ndarray) -> np.ndarray:
+        return make_rates(times=times, body=0.0002, wick=0.0005)
+    return build
+
+
+def session_times(timeframe: Timeframe, start: int, end: int) -> np.ndarray:
+    """Tiempos de las velas de lunes a viernes dentro de [start, end)."""
+    step = timeframe.value * 60
+    times = np.arange(start, end, step, dtype=np.int64)
+    weekday = (times // DAY + 3) % 7
+    return times[weekday < 5]
+
+
+@pytest.fixture
+def make_ohlcv(valid_rates):
+    """OHLCVData de EURUSD con velas válidas."""
+    def build(timeframe: Timeframe, times: np.ndarray) -> OHLCVData:
+        return OHLCVData.from_rates("EURUSD", timeframe, valid_rates(times))
+    return build
+
+
+class RangeExtractor:
+    """Extractor que sirve rangos de una serie completa y registra los pedidos."""
+
+    def __init__(self, rates: np.ndarray, timeframe: Timeframe):
+        self.rates = rates
+        self.timeframe = timeframe
+        self.requests = []
+
+    def get_ohlcv_range(self, symbol, timeframe, start_date, end_date):
+        start, end = to_epoch(start_date), to_epoch(end_date)
+        self.requests.append((start, end))
+        times = self.rates['time']
+        window = self.rates[(times >= start) & (times <= end)]
+        if len(window) == 0:
+            raise MT5DataError("sin datos")
+        return OHLCVData.from_rates(symbol, timeframe, window)
+
+
+class TestMarketSessions:
+    """Tests para el calendario de sesiones"""
+
+    def test_weekend_adds_no_open_time(self):
+        """
+        Dado el cierre del viernes y la apertura del lunes
+        Cuando se calculan los segundos abiertos
+        Entonces no hay tiempo de sesión entre ambos
+        """
+        sessions = MarketSessions()
+        saturday, next_monday = MONDAY + 5 * DAY, MONDAY + 7 * DAY
+
+        opened = sessions.open_seconds(np.array([saturday, next_monday, MONDAY + DAY]))
+
+        assert opened[0] == opened[1]
+        assert opened[1] - sessions.open_seconds(np.array([MONDAY]))[0] == 5 * DAY
+        assert opened[2] - sessions.open_seconds(np.array([MONDAY]))[0] == DAY
+
+    def test_daily_break_is_excluded(self):
+        """
+        Dado una pausa diaria de 23:55 a 24:00
+        Cuando se mide un día completo
+        Entonces se descuentan 5 minutos
+        """
+        sessions = MarketSessions(daily_breaks=[(23 * 60 + 55, 24 * 60)])
+
+        opened = sessions.open_seconds(np.array([MONDAY, MONDAY + DAY]))
+
+        assert opened[1] - opened[0] == DAY - 300
+
+    def test_invalid_calendar_raises_error(self):
+        """Debe lanzar DataValidatorError con días o pausas inválidos"""
+        with pytest.raises(DataValidatorError):
+            MarketSessions(closed_weekdays=range(7))
+        with pytest.raises(DataValidatorError):
+            MarketSessions(closed_weekdays=[7])
+        with pytest.raises(DataValidatorError):
+            MarketSessions(daily_breaks=[(60, 30)])
+
+
+class TestValidate:
+    """Tests para la validación vectorizada"""
+
+    def test_clean_series_across_weekend(self, make_ohlcv):
+        """
+        Dado dos semanas de velas M5, H4 y D1 sin sábados ni domingos
+        Cuando se validan
+        Entonces no hay anomalías ni huecos y la máscara es toda verdadera
+        """
+        validator = DataValidator()
+        for timeframe in (Timeframe.M5, Timeframe.H4, Timeframe.D1):
+            times = session_times(timeframe, MONDAY, MONDAY + 14 * DAY)
+
+            report = validator.validate(make_ohlcv(timeframe, times))
+
+            assert report.is_clean, timeframe
+            assert report.valid.all()
+
+    def test_anomalies_are_flagged_and_masked(self, valid_rates):
+        """
+        Dado velas con duplicado, high < low, cierre fuera de rango, NaN y volumen 0
+        Cuando se validan
+        Entonces se informan por índice y solo el volumen 0 sigue siendo válido
+        """
+        rates = valid_rates(MONDAY + np.arange(10) * 300)
+        rates['time'][4] = rates['time'][3]
+        rates['high'][5], rates['low'][5] = 1.0990, 1.1010
+        rates['close'][6] = 1.2
+        rates['open'][7] = np.nan
+        rates['tick_volume'][8] = 0
+
+        report = DataValidator().validate(OHLCVData.from_rates("EURUSD", Timeframe.M5, rates))
+
+        assert report.issues["duplicate_time"].tolist() == [4]
+        assert report.issues["high_below_low"].tolist() == [5]
+        assert 6 in report.issues["price_outside_range"]
+        assert report.issues["invalid_price"].tolist() == [7]
+        assert report.issues["zero_volume"].tolist() == [8]
+        assert np.flatnonzero(~report.valid).tolist() == [4, 5, 6, 7]
+        assert not report.is_clean
+
+    def test_unordered_and_misaligned_times(self, make_ohlcv):
+        """
+        Dado una vela que retrocede y otra desalineada
+        Cuando se validan
+        Entonces ambas quedan fuera de la máscara
+        """
+        times = MONDAY + np.arange(6) * 300
+        times[3] = times[1]
+        times[5] += 17
+
+        report = DataValidator().validate(make_ohlcv(Timeframe.M5, times))
+
+        assert report.issues["unordered_time"].tolist() == [3]
+        assert report.issues["misaligned_time"].tolist() == [5]
+        assert np.flatnonzero(~report.valid).tolist() == [3, 5]
+
+    def test_zero_volume_can_invalidate(self, valid_rates):
+        """Debe excluir las velas sin volumen si se configura"""
+        rates = valid_rates(MONDAY + np.arange(5) * 300)
+        rates['tick_volume'][2] = 0
+
+        report = DataValidator(zero_volume_invalid=True).validate(
+            OHLCVData.from_rates("EURUSD", Timeframe.M5, rates)
+        )
+
+        assert not report.valid[2]
+
+    def test_gaps_count_only_session_bars(self, make_ohlcv):
+        """
+        Dado una serie H1 sin las velas del viernes 10:00-12:00 y del lunes siguiente 00:00-02:00
+        Cuando se valida
+        Entonces hay dos huecos de 3 velas y el fin de semana no cuenta como faltante
+        """
+        times = session_times(Timeframe.H1, MONDAY, MONDAY + 9 * DAY)
+        friday, next_monday = MONDAY + 4 * DAY, MONDAY + 7 * DAY
+        drop = ((times >= friday + 10 * 3600) & (times <= friday + 12 * 3600)) | (
+            (times >= next_monday) & (times <= next_monday + 2 * 3600)
+        )
+
+        report = DataValidator().validate(make_ohlcv(Timeframe.H1, times[~drop]))
+
+        assert [(g.start, g.end, g.missing) for g in report.gaps] == [
+            (friday + 10 * 3600, friday + 13 * 3600, 3),
+            (friday + DAY, next_monday + 3 * 3600, 3),
+        ]
+        assert report.missing_bars == 6
+        assert report.valid.all()
+        assert report.to_dict()["gaps"][0][2] == 3
+
+    def test_dataframe_backed_data_is_validated(self, make_ohlcv):
+        """Debe validar OHLCVData construido desde un DataFrame"""
+        ohlcv = make_ohlcv(Timeframe.M5, MONDAY + np.arange(20) * 300)
+        from_frame = OHLCVData("EURUSD", Timeframe.M5, data=ohlcv.data)
+
+        assert DataValidator().validate(from_frame).is_clean
+
+
+class TestBackfill:
+    """Tests para el relleno de huecos"""
+
+    def test_backfill_requests_only_missing_ranges(self, valid_rates):
+        """
+        Dado una serie M5 con dos huecos
+        Cuando se rellena
+        Entonces se pide solo cada tramo faltante y la serie queda completa
+        """
+        full = valid_rates(session_times(Timeframe.M5, MONDAY, MONDAY + DAY))
+        keep = np.ones(len(full), dtype=bool)
+        keep[50:55] = False
+        keep[200:202] = False
+        extractor = RangeExtractor(full, Timeframe.M5)
+        validator = DataValidator()
+
+        ohlcv, report = validator.backfill(
+            extractor, OHLCVData.from_rates("EURUSD", Timeframe.M5, full[keep])
+        )
+
+        times = full['time']
+        assert extractor.requests == [
+            (int(times[50]), int(times[55]) - 1),
+            (int(times[200]), int(times[202]) - 1),
+        ]
+        np.testing.assert_array_equal(ohlcv.time, times)
+        assert report.is_clean
+        stats = validator.get_stats()
+        assert stats["bars_backfilled"] == 7
+        assert stats["backfill_requests"] == 2
+
+    def test_unfillable_gap_is_kept(self, valid_rates):
+        """
+        Dado un hueco que el broker no tiene (feriado)
+        Cuando se rellena
+        Entonces la serie no cambia y el hueco se cuenta como no rellenado
+        """
+        full = valid_rates(MONDAY + np.arange(30) * 300)
+        partial = OHLCVData.from_rates("EURUSD", Timeframe.M5, np.delete(full, [10, 11]))
+        extractor = RangeExtractor(np.delete(full, [10, 11]), Timeframe.M5)
+        validator = DataValidator()
+
+        ohlcv, report = validator.backfill(extractor, partial)
+
+        assert ohlcv is partial
+        assert report.missing_bars == 2
+        assert validator.get_stats()["unfilled_gaps"] == 1
+
+    def test_clean_series_makes_no_requests(self, make_ohlcv):
+        """Debe devolver la misma serie sin pedir nada si no hay huecos"""
+        ohlcv = make_ohlcv(Timeframe.M5, MONDAY + np.arange(30) * 300)
+        extractor = RangeExtractor(ohlcv.rates, Timeframe.M5)
+
+        result, _ = DataValidator().backfill(extractor, ohlcv)
+
+        assert result is ohlcv
+        assert extractor.requests == []
@@ -0,0 +1,235 @@
+"""
+Tests unitarios para FeatureStore.
+
+Verifica que cada feature se calcule una sola vez por ciclo y vela, que los
+valores entregados sean de solo lectura y que las estadísticas muestren el
+trabajo duplicado.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-14
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (feature store por ciclo)
+"""
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.core.feature_store import FeatureStore, FeatureStoreError
+from src.core.filter_manager import FilterManager
+from src.core.indicators_calculator import calculate_atr, indicator_values_at
+from src.core.mt5_data_extractor import OHLCVData, Timeframe
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+
+
+@pytest.fixture
+def make_ohlcv(make_rates):
+    """Crea n velas H1 con spread de 15 puntos en la última."""
+    def build(n: int = 120, symbol: str = "EURUSD", seed: int = 3) -> OHLCVData:
+        spread = np.full(n, 12)
+        spread[-1] = 15
+        rates = make_rates(
+            n, start=BASE_TIME, step=3600, volatility=0.001, wick=0.0005,
+            volume=np.random.default_rng(seed).integers(50, 500, n), spread=spread, seed=seed
+        )
+        return OHLCVData.from_rates(symbol, Timeframe.H1, rates)
+    return build
+
+
+class TestFeatureValues:
+    """Tests para los valores de las features incluidas"""
+
+    def test_atr_and_indicators_match_calculator(self, make_ohlcv):
+        """
+        Dado velas H1
+        Cuando se piden atr e indicators
+        Entonces coinciden con indicators_calculator
+        """
+        ohlcv = make_ohlcv()
+        store = FeatureStore()
+
+        expected_atr = calculate_atr(ohlcv.high, ohlcv.low, ohlcv.close)[-1]
+        expected = indicator_values_at(ohlcv.close, ohlcv.time, ohlcv.volume)
+
+        assert store.get(ohlcv, "atr") == pytest.approx(expected_atr)
+        assert store.get(ohlcv, "indicators") == expected
+
+    def test_spread_is_converted_to_pips(self, make_ohlcv):
+        """
+        Dado una última vela con spread de 15 puntos
+        Cuando se pide spread_pips
+        Entonces se retorna 1.5 pips
+        """
+        assert FeatureStore().get(make_ohlcv(), "spread_pips") == 1.5
+
+    def test_spread_without_rates_is_none(self):
+        """
+        Dado un OHLCVData construido desde un DataFrame (sin campo spread)
+        Cuando se pide spread_pips
+        Entonces se retorna None
+        """
+        df = pd.DataFrame({
+            'time': [BASE_TIME], 'open': [1.1], 'high': [1.2],
+            'low': [1.0], 'close': [1.1], 'volume': [10]
+        })
+        ohlcv = OHLCVData("EURUSD", Timeframe.H1, data=df)
+
+        assert FeatureStore().get(ohlcv, "spread_pips") is None
+
+    def test_market_data_feeds_filter_manager(self, make_ohlcv):
+        """
+        Dado filtros de volatilidad y spread habilitados
+        Cuando se aplican sobre market_data del store
+        Entonces reciben atr y spread_pips ya calculados
+        """
+        manager = FilterManager(config={
+            "volatility": {"enabled": True, "atr_minimum": 0.0001},
+            "spread": {"enabled": True, "spread_maximum_pips": 1.0}
+        })
+        store = FeatureStore()
+
+        results = {r.filter_name: r for r in manager.apply_filters(store.market_data(make_ohlcv()))}
+
+        assert results["volatility"].passed
+        assert not results["spread"].passed
+        assert results["spread"].value == 1.5
+
+
+class TestMemoization:
+    """Tests para la memoización por ciclo"""
+
+    def test_each_feature_is_computed_once_per_cycle(self, make_ohlcv):
+        """
+        Dado filtros, sizer, prompt y logs pidiendo las mismas features
+        Cuando se consultan varias veces en el ciclo
+        Entonces cada feature se calcula una sola vez
+        """
+        ohlcv = make_ohlcv()
+        store = FeatureStore()
+        store.begin_cycle()
+
+        store.market_data(ohlcv)          # filtros
+        store.get(ohlcv, "atr")           # position sizer
+        store.get(ohlcv, "indicators")    # prompt
+        store.get(ohlcv, "indicators")    # logs
+
+        stats = store.get_stats()
+        assert stats["features"]["atr"] == {"computations": 1, "hits": 1, "recomputations": 0}
+        assert stats["features"]["atr_series"]["computations"] == 1
+        assert stats["features"]["indicators"]["hits"] == 1
+        assert stats["features"]["indicator_series"]["computations"] == 1
+
+    def test_new_bar_is_a_new_key(self, make_ohlcv):
+        """
+        Dado una feature calculada para la última vela
+        Cuando llega una vela nueva en el mismo ciclo
+        Entonces se calcula de nuevo para esa vela
+        """
+        ohlcv = make_ohlcv(121)
+        previous = OHLCVData.from_rates("EURUSD", Timeframe.H1, ohlcv.rates[:-1])
+        store = FeatureStore()
+
+        store.get(previous, "atr_series")
+        store.get(ohlcv, "atr_series")
+
+        assert store.get_stats()["features"]["atr_series"]["computations"] == 2
+
+    def test_unchanged_bars_in_next_cycle_count_as_recomputation(self, make_ohlcv):
+        """
+        Dado un ciclo nuevo sin velas nuevas
+        Cuando se vuelve a pedir la feature
+        Entonces se recalcula y queda contada como recálculo
+        """
+        ohlcv = make_ohlcv()
+        store = FeatureStore()
+        store.begin_cycle()
+        store.get(ohlcv, "spread_pips")
+
+        assert store.begin_cycle() == 2
+        assert len(store) == 0
+        store.get(ohlcv, "spread_pips")
+
+        stats = store.get_stats()
+        assert stats["computations"] == 2
+        assert stats["recomputations"] == 1
+
+    def test_custom_feature_can_be_registered(self, make_ohlcv):
+        """
+        Dado una feature registrada
+        Cuando se pide dos veces
+        Entonces se calcula una vez; registrar el mismo nombre falla
+        """
+        calls = []
+        store = FeatureStore()
+        store.register("last_close", lambda o: calls.append(1) or float(o.close[-1]))
+        ohlcv = make_ohlcv()
+
+        assert store.get(ohlcv, "last_close") == store.get(ohlcv, "last_close")
+        assert len(calls) == 1
+        with pytest.raises(FeatureStoreError):
+            store.register("atr", lambda o: 0.0)
+
+
+class TestReadOnly:
+    """Tests para los valores de solo lectura"""
+
+    def test_arrays_are_not_writeable(self, make_ohlcv):
+        """
+        Dado la serie del ATR memoizada
+        Cuando un consumidor intenta modificarla
+        Entonces numpy lo rechaza
+        """
+        series = FeatureStore().get(make_ohlcv(), "atr_series")
+
+        with pytest.raises(ValueError):
+            series[-1] = 0.0
+
+    def test_indicator_series_mapping_is_read_only(self, make_ohlcv):
+        """
+        Dado las series de indicadores
+        Cuando se intenta reemplazar una entrada o escribir en un array
+        Entonces ambas operaciones fallan
+        """
+        series = FeatureStore().get(make_ohlcv(), "indicator_series")
+
+        with pytest.raises(TypeError):
+            series["rsi"] = None
+        with pytest.raises(ValueError):
+            series["rsi"][-1] = 0.0
+
+    def test_modifying_returned_values_does_not_leak(self, make_ohlcv):
+        """
+        Dado los IndicatorValues entregados al prompt
+        Cuando el consumidor modifica un campo
+        Entonces el siguiente consumidor recibe el valor original
+        """
+        ohlcv = make_ohlcv()
+        store = FeatureStore()
+        first = store.get(ohlcv, "indicators")
+        original = first.rsi
+
+        first.rsi = -1.0
+
+        assert store.get(ohlcv, "indicators").rsi == original
+
+
+class TestErrors:
+    """Tests para errores"""
+
+    def test_unknown_feature_raises_error(self, make_ohlcv):
+        """
+        Dado una feature no registrada
+        Cuando se pide
+        Entonces debe lanzar FeatureStoreError
+        """
+        with pytest.raises(FeatureStoreError):
+            FeatureStore().get(make_ohlcv(), "vwap")
+
+    def test_invalid_points_per_pip_raises_error(self):
+        """
+        Dado points_per_pip no positivo
+        Cuando se crea el store
+        Entonces debe lanzar FeatureStoreError
+        """
+        with pytest.raises(FeatureStoreError):
+            FeatureStore(points_per_pip=0)
@@ -0,0 +1,174 @@
+"""
+Tests unitarios para AsyncGeminiClient.
+
+Usa GeminiStubServer como servidor local para verificar el reuso de
+conexiones keep-alive, el límite de concurrencia, el timeout por perfil y el
+parseo de respuestas y errores.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-20
+Ticket: T10 - Construcción de prompt y recepción de JSON de decisión (cliente asíncrono)
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.core.gemini_client import (
+    AsyncGeminiClient,
+    GeminiClientError,
+    GeminiHTTPError,
+    GeminiTimeoutError
+)
+from src.core.ia_config_manager import IAProfile, IAProvider
+from tests.gemini_stub_server import GeminiStubServer
+
+
+def make_profile(timeout_seconds: float = 5.0, provider=IAProvider.GEMINI) -> IAProfile:
+    """Perfil de Gemini para los tests."""
+    return IAProfile(
+        name="gemini-flash",
+        provider=provider,
+        model="gemini-1.5-flash",
+        timeout_seconds=timeout_seconds
+    )
+
+
+def run(scenario, **server_options):
+    """Ejecuta scenario(server) con un GeminiStubServer levantado."""
+    async def main():
+        async with GeminiStubServer(**server_options) as server:
+            return await scenario(server)
+    return asyncio.run(main())
+
+
+class TestGenerate:
+    """Tests para generate"""
+
+    def test_returns_text_and_token_usage(self):
+        """
+        Dado el servidor local con una decisión JSON
+        Cuando se envía un prompt de 4 palabras
+        Entonces se obtiene el texto y el uso de tokens reportado
+        """
+        decision = json.dumps({"accion": "OPERAR", "direccion": "BUY"})
+
+        async def scenario(server):
+            async with AsyncGeminiClient("test-key", base_url=server.base_url) as client:
+                return await client.generate(make_profile(), "analiza EURUSD en H1")
+
+        response = run(scenario, response_text=decision)
+
+        assert json.loads(response.text)["accion"] == "OPERAR"
+        assert response.model == "gemini-1.5-flash"
+        assert response.prompt_tokens == 4
+        assert response.total_tokens == response.prompt_tokens + response.output_tokens
+        assert response.latency > 0
+
+    def test_requests_reuse_keep_alive_connections(self):
+        """
+        Dado 20 peticiones secuenciales
+        Cuando se envían con el mismo cliente
+        Entonces usan una sola conexión
+        """
+        async def scenario(server):
+            async with AsyncGeminiClient("test-key", base_url=server.base_url) as client:
+                for i in range(20):
+                    await client.generate(make_profile(), f"prompt {i}")
+                return client.get_stats(), server.get_stats()
+
+        client_stats, server_stats = run(scenario)
+
+        assert server_stats["connections"] == 1
+        assert server_stats["requests"] == 20
+        assert client_stats["connections_reused"] == 19
+
+    def test_closed_connection_is_replaced(self):
+        """Debe abrir otra conexión cuando el servidor cierra la anterior"""
+        async def scenario(server):
+            async with AsyncGeminiClient("test-key", base_url=server.base_url) as client:
+                responses = [await client.generate(make_profile(), "p") for _ in range(6)]
+                return responses, server.get_stats()
+
+        responses, server_stats = run(scenario, max_requests_per_connection=2)
+
+        assert len(responses) == 6
+        assert server_stats["connections"] == 3
+
+    def test_http_error_raises_with_status(self):
+        """Debe lanzar GeminiHTTPError con el estado de la API"""
+        async def scenario(server):
+            async with AsyncGeminiClient("test-key", base_url=server.base_url) as client:
+                with pytest.raises(GeminiHTTPError) as error:
+                    await client.generate(make_profile(), "p")
+                return error.value.status, client.get_stats()
+
+        status, stats = run(scenario, status=429)
+
+        assert status == 429
+        assert stats["errors"] == 1
+
+    def test_non_gemini_profile_is_rejected(self):
+        """Debe rechazar perfiles de otros providers"""
+        async def scenario(server):
+            async with AsyncGeminiClient("test-key", base_url=server.base_url) as client:
+                with pytest.raises(GeminiClientError):
+                    await client.generate(make_profile(provider=IAProvider.OPENAI), "p")
+
+        run(scenario)
+
+
+class TestConcurrency:
+    """Tests para concurrencia y timeouts"""
+
+    def test_concurrent_requests_are_capped_by_semaphore(self):
+        """
+        Dado 30 bots que piden su decisión a la vez con latencia 50 ms
+        Cuando el cliente permite 10 peticiones en vuelo
+        Entonces el servidor nunca ve más de 10 y el total tarda ~3 latencias
+        """
+        async def scenario(server):
+            async with AsyncGeminiClient("test-key", base_url=server.base_url, max_concurrency=10) as client:
+                started = time.perf_counter()
+                results = await client.generate_many(make_profile(), [f"activo {i}" for i in range(30)])
+                return results, time.perf_counter() - started, client.get_stats(), server.get_stats()
+
+        results, elapsed, client_stats, server_stats = run(scenario, latency=0.05)
+
+        assert all(not isinstance(result, Exception) for result in results)
+        assert server_stats["max_in_flight"] == 10
+        assert client_stats["max_in_flight"] == 10
+        assert server_stats["connections"] == 10
+        assert 0.15 <= elapsed < 1.0
+
+    def test_profile_timeout_is_enforced(self):
+        """
+        Dado un servidor que tarda 1 s
+        Cuando el perfil tiene timeout de 0.1 s
+        Entonces se lanza GeminiTimeoutError y la conexión no vuelve al pool
+        """
+        async def scenario(server):
+            async with AsyncGeminiClient("test-key", base_url=server.base_url) as client:
+                with pytest.raises(GeminiTimeoutError):
+                    await client.generate(make_profile(timeout_seconds=0.1), "p")
+                return client.get_stats()
+
+        stats = run(scenario, latency=1.0)
+
+        assert stats["timeouts"] == 1
+        assert stats["idle_connections"] == 0
+        assert stats["in_flight"] == 0
+
+
+class TestConfiguration:
+    """Tests para la configuración del cliente"""
+
+    def test_invalid_configuration_raises_error(self):
+        """Debe lanzar GeminiClientError con configuración inválida"""
+        with pytest.raises(GeminiClientError):
+            AsyncGeminiClient("")
+        with pytest.raises(GeminiClientError):
+            AsyncGeminiClient("key", max_concurrency=0)
+        with pytest.raises(GeminiClientError):
+            AsyncGeminiClient("key", base_url="ftp://example.com")
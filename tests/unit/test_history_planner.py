@@ -0,0 +1,199 @@
+"""
+Tests unitarios para HistoryPlanner.
+
+Verifica las velas mínimas por indicador, que esa cantidad produzca valores
+estables y que con estado en el IndicatorEngine la solicitud se reduzca.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-16
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (planificación de historial)
+"""
+import pytest
+import numpy as np
+
+from src.core.history_planner import (
+    HistoryPlanner,
+    HistoryPlannerError,
+    indicator_bars,
+    stable_bars
+)
+from src.core.indicators_calculator import (
+    IndicatorEngine,
+    calculate_atr,
+    calculate_indicators,
+    indicator_values_at
+)
+from src.core.mt5_data_extractor import OHLCVData, Timeframe
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+ENGINE_SET = ["ema_20", "ema_50", "rsi", "macd"]
+
+
+@pytest.fixture
+def m5_walk(make_rates):
+    """Crea n velas M5 con un paseo aleatorio reproducible."""
+    def build(n: int, seed: int = 21) -> np.ndarray:
+        return make_rates(n, start=BASE_TIME, volatility=0.001, wick=0.0005, seed=seed)
+    return build
+
+
+class FakeExtractor:
+    """Extractor que sirve las últimas `count` velas de una serie que avanza."""
+
+    def __init__(self, rates: np.ndarray, visible: int):
+        self.rates = rates
+        self.visible = visible
+        self.counts = []
+
+    def get_ohlcv(self, symbol, timeframe, count, exclude_current=False):
+        self.counts.append(count)
+        window = self.rates[max(0, self.visible - count):self.visible]
+        return OHLCVData.from_rates(symbol, timeframe, window)
+
+
+class TestIndicatorBars:
+    """Tests para las velas mínimas por indicador"""
+
+    def test_ema_50_needs_seed_weight_below_tolerance(self):
+        """
+        Dado una tolerancia de 1e-4
+        Cuando se calculan las velas de la EMA 50
+        Entonces (1 - alpha)^(n-1) queda bajo la tolerancia y con una vela menos no
+        """
+        alpha = 2.0 / 51
+        bars = indicator_bars("ema_50", 1e-4)
+
+        assert bars == stable_bars(alpha, 1e-4)
+        assert (1 - alpha) ** (bars - 1) <= 1e-4
+        assert (1 - alpha) ** (bars - 2) > 1e-4
+
+    def test_stricter_tolerance_needs_more_bars(self):
+        """Debe requerir más velas con una tolerancia menor"""
+        for name in ("ema_20", "ema_50", "rsi", "macd", "atr"):
+            assert indicator_bars(name, 1e-6) > indicator_bars(name, 1e-3)
+
+    def test_planned_bars_match_long_history(self, m5_walk):
+        """
+        Dado 3000 velas de historial
+        Cuando se calculan los indicadores solo con las velas planificadas
+        Entonces coinciden con el historial completo dentro de la tolerancia
+        """
+        rates = m5_walk(3000)
+        close, high, low = rates['close'], rates['high'], rates['low']
+        scale = close.max() - close.min()
+        full = calculate_indicators(close)
+        full_atr = calculate_atr(high, low, close)[-1]
+
+        for name, key in (("ema_20", "ema_20"), ("ema_50", "ema_50"), ("macd", "signal_line")):
+            n = indicator_bars(name, 1e-4)
+            short = calculate_indicators(close[-n:])
+            assert abs(short[key][-1] - full[key][-1]) <= 1e-4 * scale, name
+
+        n = indicator_bars("rsi", 1e-4)
+        assert abs(calculate_indicators(close[-n:])["rsi"][-1] - full["rsi"][-1]) <= 1e-4 * 100
+
+        n = indicator_bars("atr", 1e-4)
+        short_atr = calculate_atr(high[-n:], low[-n:], close[-n:])[-1]
+        assert abs(short_atr - full_atr) <= 1e-4 * scale
+
+    def test_unknown_indicator_raises_error(self):
+        """Debe lanzar HistoryPlannerError con un indicador desconocido"""
+        with pytest.raises(HistoryPlannerError):
+            indicator_bars("vwap", 1e-4)
+
+
+class TestHistoryPlanner:
+    """Tests para la planificación de solicitudes"""
+
+    def test_required_bars_is_max_of_indicators_and_min_bars(self):
+        """
+        Dado M5 con EMAs/RSI/MACD y H1 con EMA 20 y 300 velas para el prompt
+        Cuando se planifica en frío
+        Entonces M5 usa las velas de la EMA 50 y H1 las del prompt
+        """
+        planner = HistoryPlanner(
+            {"M5": ENGINE_SET, "H1": ["ema_20"]},
+            min_bars={"H1": 300}
+        )
+
+        assert planner.required_bars(Timeframe.M5) == indicator_bars("ema_50", 1e-4)
+        assert planner.required_bars(Timeframe.H1) == 300
+
+    def test_warm_engine_shrinks_request(self, m5_walk):
+        """
+        Dado un primer ciclo que carga el engine con el historial planificado
+        Cuando llega una vela nueva
+        Entonces se piden 3 velas y los valores coinciden con el cálculo completo
+        """
+        rates = m5_walk(1000)
+        extractor = FakeExtractor(rates, visible=900)
+        planner = HistoryPlanner({"M5": ENGINE_SET}, engine=IndicatorEngine())
+
+        planner.update(extractor, "EURUSD", Timeframe.M5)
+        extractor.visible += 1
+        values = planner.update(extractor, "EURUSD", Timeframe.M5)
+
+        full = indicator_values_at(rates['close'][:901], rates['time'][:901], rates['tick_volume'][:901])
+        assert extractor.counts == [planner.required_bars(Timeframe.M5), 3]
+        assert values.ema_50 == pytest.approx(full.ema_50, abs=1e-4 * 0.05)
+        assert values.rsi == pytest.approx(full.rsi, abs=1e-2)
+        stats = planner.get_stats()
+        assert stats["warm_requests"] == 1
+        assert stats["bars_saved"] == planner.required_bars(Timeframe.M5) - 3
+
+    def test_short_window_without_continuation_falls_back_to_full(self, m5_walk):
+        """
+        Dado un engine con estado y 10 velas nuevas (el bot estuvo detenido)
+        Cuando se descarga la ventana corta
+        Entonces no continúa la serie y se pide la cantidad completa
+        """
+        extractor = FakeExtractor(m5_walk(1000), visible=900)
+        planner = HistoryPlanner({"M5": ENGINE_SET}, engine=IndicatorEngine())
+        planner.update(extractor, "EURUSD", Timeframe.M5)
+
+        extractor.visible += 10
+        planner.update(extractor, "EURUSD", Timeframe.M5)
+
+        full = planner.required_bars(Timeframe.M5)
+        assert extractor.counts == [full, 3, full]
+        assert planner.get_stats()["fallbacks"] == 1
+
+    def test_atr_is_not_shrunk_by_engine_state(self, m5_walk):
+        """
+        Dado un timeframe con ATR (no lo mantiene el engine)
+        Cuando el engine tiene estado
+        Entonces se sigue pidiendo el historial completo
+        """
+        engine = IndicatorEngine()
+        planner = HistoryPlanner({"M5": ENGINE_SET + ["atr"]}, engine=engine)
+        engine.update(OHLCVData.from_rates("EURUSD", Timeframe.M5, m5_walk(300)))
+
+        assert planner.plan("EURUSD", Timeframe.M5) == planner.required_bars(Timeframe.M5)
+
+    def test_min_bars_still_apply_when_warm(self, m5_walk):
+        """
+        Dado 100 velas para el prompt
+        Cuando el engine tiene estado
+        Entonces se piden 100 velas y no 3
+        """
+        engine = IndicatorEngine()
+        planner = HistoryPlanner({"M5": ENGINE_SET}, min_bars={"M5": 100}, engine=engine)
+        engine.update(OHLCVData.from_rates("EURUSD", Timeframe.M5, m5_walk(300)))
+
+        assert planner.plan("EURUSD", Timeframe.M5) == 100
+
+    def test_invalid_configuration_raises_error(self, m5_walk):
+        """
+        Dado configuraciones inválidas
+        Cuando se crea o consulta el planner
+        Entonces debe lanzar HistoryPlannerError
+        """
+        with pytest.raises(HistoryPlannerError):
+            HistoryPlanner({"M5": ["vwap"]})
+        with pytest.raises(HistoryPlannerError):
+            HistoryPlanner({"M5": ENGINE_SET}, tolerance=0)
+        with pytest.raises(HistoryPlannerError):
+            HistoryPlanner({"M5": ENGINE_SET}).required_bars(Timeframe.H1)
+        with pytest.raises(HistoryPlannerError):
+            HistoryPlanner({"M5": ENGINE_SET}).update(FakeExtractor(m5_walk(10), 10), "EURUSD", Timeframe.M5)
@@ -359,6 +359,21 @@ class TestProfileValidation:
         
         assert not is_valid
         assert "temperature" in str(errors).lower()
+
+    def test_validate_profile_checks_timeout_positive(self):
+        """Debe validar que timeout_seconds sea positivo"""
+        manager = IAConfigManager()
+    
+        invalid_profile = {
+            "provider": "gemini",
+            "model": "gemini-1.5-pro",
+            "timeout_seconds": 0
+        }
+    
+        is_valid, errors = manager.validate_profile(invalid_profile)
+    
+        assert not is_valid
+        assert "timeout_seconds" in str(errors)
     
     def test_validate_profile_accepts_valid_profile(self):
         """Debe aceptar un perfil válido"""
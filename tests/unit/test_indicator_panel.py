@@ -0,0 +1,162 @@
+"""
+Tests unitarios para el panel de indicadores.
+
+Verifica que el cálculo vectorizado sobre (instrumentos x velas) coincida
+fila a fila con el cálculo por símbolo, incluyendo series más cortas.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-14
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (panel vectorizado)
+"""
+import pytest
+import numpy as np
+from unittest.mock import Mock
+
+from src.core.indicator_panel import (
+    PricePanel,
+    compute_panel_indicators,
+    load_panel
+)
+from src.core.indicators_calculator import (
+    IndicatorError,
+    calculate_atr,
+    calculate_indicators
+)
+from src.core.mt5_data_extractor import (
+    BulkExtractionResult,
+    BulkItemResult,
+    OHLCVData,
+    Timeframe
+)
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+
+
+@pytest.fixture
+def make_ohlcv(make_rates):
+    """Crea n velas H1 con un paseo aleatorio reproducible."""
+    def build(symbol: str, n: int, seed: int) -> OHLCVData:
+        rng = np.random.default_rng(seed)
+        rates = make_rates(
+            n, start=BASE_TIME, step=3600, price=1.0 + seed, volatility=0.001,
+            wick=rng.uniform(0, 0.001, n), volume=rng.integers(50, 500, n), seed=seed, continuous=True
+        )
+        return OHLCVData.from_rates(symbol, Timeframe.H1, rates)
+    return build
+
+
+class TestPricePanel:
+    """Tests para la construcción del panel"""
+
+    def test_rows_are_right_aligned_with_nan_padding(self, make_ohlcv):
+        """
+        Dado un símbolo con menos velas que el ancho del panel
+        Cuando se construye el panel
+        Entonces su fila se rellena con NaN a la izquierda
+        """
+        panel = PricePanel.from_ohlcv(
+            {"EURUSD": make_ohlcv("EURUSD", 100, 1), "BTCUSD": make_ohlcv("BTCUSD", 40, 2)},
+            Timeframe.H1,
+            bars=80
+        )
+
+        assert panel.shape == (2, 80)
+        assert panel.lengths.tolist() == [80, 40]
+        assert np.isnan(panel.close[1, :40]).all()
+        assert not np.isnan(panel.close[1, 40:]).any()
+
+    def test_empty_series_is_reported_missing(self, make_ohlcv):
+        """
+        Dado un símbolo sin datos
+        Cuando se construye el panel
+        Entonces queda en missing y no ocupa fila
+        """
+        panel = PricePanel.from_ohlcv(
+            {"EURUSD": make_ohlcv("EURUSD", 50, 1), "DEAD": None}, Timeframe.H1, bars=50
+        )
+
+        assert panel.symbols == ["EURUSD"]
+        assert "DEAD" in panel.missing
+
+    def test_invalid_width_raises_error(self):
+        """Debe lanzar IndicatorError con bars no positivo"""
+        with pytest.raises(IndicatorError):
+            PricePanel.from_ohlcv({}, Timeframe.H1, bars=0)
+
+
+class TestComputePanelIndicators:
+    """Tests para el cálculo vectorizado"""
+
+    def test_each_row_matches_per_symbol_calculation(self, make_ohlcv):
+        """
+        Dado un panel con series de distinta longitud
+        Cuando se calculan los indicadores
+        Entonces cada fila coincide con el cálculo por símbolo
+        """
+        data = {f"SYM{i}": make_ohlcv(f"SYM{i}", n, i) for i, n in enumerate([120, 90, 30])}
+        panel = PricePanel.from_ohlcv(data, Timeframe.H1, bars=120)
+
+        result = compute_panel_indicators(panel)
+
+        for symbol, ohlcv in data.items():
+            expected = calculate_indicators(ohlcv.close)
+            expected["atr"] = calculate_atr(ohlcv.high, ohlcv.low, ohlcv.close)
+            series = result.series(symbol)
+            for name, values in expected.items():
+                np.testing.assert_allclose(series[name], values, rtol=1e-12, equal_nan=True)
+
+    def test_series_are_views_of_the_panel(self, make_ohlcv):
+        """
+        Dado indicadores calculados
+        Cuando se piden las series de un símbolo
+        Entonces son vistas de las matrices sin copia
+        """
+        panel = PricePanel.from_ohlcv({"EURUSD": make_ohlcv("EURUSD", 60, 1)}, Timeframe.H1, bars=60)
+        result = compute_panel_indicators(panel)
+
+        assert np.shares_memory(result.series("EURUSD")["rsi"], result.arrays["rsi"])
+
+    def test_values_of_short_series_keep_warmup_as_none(self, make_ohlcv):
+        """
+        Dado una serie de 30 velas
+        Cuando se piden los valores finales
+        Entonces EMA 50 es None y RSI/ATR tienen valor
+        """
+        panel = PricePanel.from_ohlcv({"EURUSD": make_ohlcv("EURUSD", 30, 1)}, Timeframe.H1, bars=60)
+
+        result = compute_panel_indicators(panel)
+        values = result.values("EURUSD")
+
+        assert values.ema_50 is None
+        assert values.rsi is not None
+        assert result.atr("EURUSD") is not None
+        with pytest.raises(KeyError):
+            result.values("GBPUSD")
+
+
+class TestLoadPanel:
+    """Tests para la carga desde la configuración global"""
+
+    def test_load_panel_uses_configured_instruments(self, make_ohlcv):
+        """
+        Dado instrumentos configurados y una extracción masiva con un error
+        Cuando se carga el panel
+        Entonces contiene los exitosos y reporta el fallido
+        """
+        config_manager = Mock()
+        config_manager.get_all_instruments.return_value = ["EURUSD", "GBPUSD"]
+        bulk = BulkExtractionResult(items={
+            "EURUSD": {Timeframe.H1: BulkItemResult("EURUSD", Timeframe.H1, data=make_ohlcv("EURUSD", 50, 1))},
+            "GBPUSD": {Timeframe.H1: BulkItemResult("GBPUSD", Timeframe.H1, error="sin datos")},
+        })
+        extractor = Mock()
+        extractor.get_ohlcv_bulk.return_value = bulk
+
+        panel = load_panel(extractor, config_manager, Timeframe.H1, bars=50)
+
+        extractor.get_ohlcv_bulk.assert_called_once_with(
+            ["EURUSD", "GBPUSD"], [Timeframe.H1], 50, exclude_current=True
+        )
+        assert panel.symbols == ["EURUSD"]
+        assert panel.missing == {"GBPUSD": "sin datos"}
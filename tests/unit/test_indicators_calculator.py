@@ -0,0 +1,241 @@
+"""
+Tests unitarios para el cálculo de indicadores.
+
+Verifica el cálculo vectorizado (EMA, RSI, MACD) y que el motor incremental
+coincida con el recálculo completo, recalculando solo ante huecos o
+correcciones.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-14
+Ticket: T23 - Cálculo y formato de indicadores por timeframe
+"""
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.core.indicators_calculator import (
+    IndicatorEngine,
+    IndicatorError,
+    calculate_ema,
+    calculate_indicators,
+    indicator_values_at
+)
+from src.core.mt5_data_extractor import OHLCVData, Timeframe
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+
+
+@pytest.fixture
+def h1_walk(make_rates):
+    """Crea n velas H1 con un paseo aleatorio reproducible."""
+    def build(n: int, seed: int = 7) -> np.ndarray:
+        volume = np.random.default_rng(seed).integers(50, 500, n)
+        return make_rates(n, start=BASE_TIME, step=3600, volatility=0.001, wick=0.0005, volume=volume, seed=seed)
+    return build
+
+
+def window(rates: np.ndarray, end: int, size: int = 100) -> OHLCVData:
+    """OHLCVData con las `size` velas que terminan en `end` (exclusivo)."""
+    return OHLCVData.from_rates("EURUSD", Timeframe.H1, rates[max(0, end - size):end])
+
+
+def assert_values_close(actual, expected, tol=1e-10):
+    """Compara dos IndicatorValues campo a campo."""
+    for name in ("ema_20", "ema_50", "rsi", "macd_line", "signal_line", "histogram"):
+        a, e = getattr(actual, name), getattr(expected, name)
+        assert (a is None) == (e is None), name
+        if a is not None:
+            assert a == pytest.approx(e, abs=tol), name
+
+
+class TestCalculateIndicators:
+    """Tests para el cálculo vectorizado"""
+
+    def test_ema_matches_pandas_ewm(self, h1_walk):
+        """
+        Dado una serie de cierres
+        Cuando se calculan los indicadores
+        Entonces la EMA 20 coincide con ewm(span=20, adjust=False)
+        """
+        close = h1_walk(120)['close']
+
+        result = calculate_indicators(close)
+
+        expected = pd.Series(close).ewm(span=20, adjust=False).mean().to_numpy()
+        np.testing.assert_allclose(result["ema_20"][19:], expected[19:])
+
+    def test_warmup_values_are_nan(self, h1_walk):
+        """
+        Dado 30 velas
+        Cuando se calculan los indicadores
+        Entonces EMA 50 y la señal MACD quedan en NaN y RSI tiene valor
+        """
+        result = calculate_indicators(h1_walk(30)['close'])
+
+        assert np.isnan(result["ema_50"]).all()
+        assert np.isnan(result["signal_line"]).all()
+        assert not np.isnan(result["rsi"][-1])
+        assert np.isnan(result["rsi"][13])
+
+    def test_rsi_bounds(self):
+        """
+        Dado una serie solo alcista
+        Cuando se calcula el RSI
+        Entonces vale 100
+        """
+        result = calculate_indicators(np.linspace(1.0, 2.0, 40))
+
+        assert result["rsi"][-1] == 100.0
+
+    def test_empty_series_raises_error(self):
+        """Debe lanzar IndicatorError con serie vacía"""
+        with pytest.raises(IndicatorError):
+            calculate_indicators(np.array([]))
+
+    def test_calculate_ema_matches_full_calculation(self, h1_walk):
+        """
+        Dado una serie de cierres
+        Cuando se calcula solo la EMA 50
+        Entonces coincide con ema_50 del cálculo completo, incluido el calentamiento
+        """
+        close = h1_walk(120)['close']
+
+        np.testing.assert_array_equal(
+            calculate_ema(close, 50), calculate_indicators(close)["ema_50"]
+        )
+
+
+class TestIndicatorEngine:
+    """Tests para el motor incremental"""
+
+    def test_incremental_matches_full_recompute(self, h1_walk):
+        """
+        Dado un motor alimentado hora a hora con ventanas de 100 velas
+        Cuando se compara contra el cálculo completo sobre toda la historia
+        Entonces los valores coinciden y solo hubo un recálculo completo
+        """
+        rates = h1_walk(400)
+        engine = IndicatorEngine()
+        engine.update(window(rates, 100))
+
+        for end in range(101, 401):
+            values = engine.update(window(rates, end))
+
+        expected = indicator_values_at(rates['close'], rates['time'], rates['tick_volume'])
+        assert_values_close(values, expected)
+        stats = engine.get_stats()
+        assert stats["full_recomputes"] == 1
+        assert stats["incremental_updates"] == 300
+        assert stats["bars_folded"] == 300
+
+    def test_same_window_does_not_advance(self, h1_walk):
+        """
+        Dado una ventana ya procesada
+        Cuando se vuelve a pasar
+        Entonces los valores no cambian
+        """
+        rates = h1_walk(120)
+        engine = IndicatorEngine()
+        first = engine.update(window(rates, 120))
+
+        second = engine.update(window(rates, 120))
+
+        assert first == second
+        assert engine.get_stats()["bars_folded"] == 0
+
+    def test_gap_triggers_full_recompute(self, h1_walk):
+        """
+        Dado un estado hasta la vela 100
+        Cuando llega una ventana que ya no contiene esa vela
+        Entonces se recalcula desde cero sobre la nueva ventana
+        """
+        rates = h1_walk(400)
+        engine = IndicatorEngine()
+        engine.update(window(rates, 100))
+
+        values = engine.update(window(rates, 300))
+
+        segment = rates[200:300]
+        expected = indicator_values_at(segment['close'], segment['time'], segment['tick_volume'])
+        assert_values_close(values, expected)
+        assert engine.get_stats()["full_recomputes"] == 2
+
+    def test_corrected_bar_triggers_full_recompute(self, h1_walk):
+        """
+        Dado un estado hasta la vela 100
+        Cuando el broker corrige el cierre de esa vela
+        Entonces se recalcula desde cero
+        """
+        rates = h1_walk(150)
+        engine = IndicatorEngine()
+        engine.update(window(rates, 100))
+
+        corrected = rates.copy()
+        corrected['close'][99] += 0.01
+        engine.update(window(corrected, 110))
+
+        assert engine.get_stats()["full_recomputes"] == 2
+
+    def test_update_bar_advances_state(self, h1_walk):
+        """
+        Dado un estado inicializado
+        Cuando se agrega una vela individual
+        Entonces coincide con el cálculo completo
+        """
+        rates = h1_walk(121)
+        engine = IndicatorEngine()
+        assert engine.update_bar("EURUSD", Timeframe.H1, BASE_TIME, 1.1, 10) is None
+        engine.update(window(rates, 120, size=120))
+
+        last = rates[-1]
+        values = engine.update_bar(
+            "EURUSD", Timeframe.H1, int(last['time']), float(last['close']), float(last['tick_volume'])
+        )
+
+        expected = indicator_values_at(rates['close'], rates['time'], rates['tick_volume'])
+        assert_values_close(values, expected)
+        assert values.volume == float(last['tick_volume'])
+
+    def test_to_dict_matches_ai_payload_format(self, h1_walk):
+        """
+        Dado valores calculados
+        Cuando se convierten a diccionario
+        Entonces siguen el formato de indicadores de los requerimientos
+        """
+        engine = IndicatorEngine()
+        values = engine.update(window(h1_walk(100), 100))
+
+        payload = values.to_dict()
+
+        assert set(payload) == {"ema_20", "ema_50", "rsi", "macd", "volumen"}
+        assert set(payload["macd"]) == {"macd_line", "signal_line", "histogram"}
+
+    def test_continues_detects_short_windows(self, h1_walk):
+        """
+        Dado un engine con estado hasta la vela 100
+        Cuando se consultan ventanas cortas
+        Entonces solo continúa la que contiene la última vela procesada
+        """
+        rates = h1_walk(120)
+        engine = IndicatorEngine()
+        engine.update(window(rates, 100))
+
+        assert engine.continues(window(rates, 102, size=3))
+        assert not engine.continues(window(rates, 110, size=3))
+        assert not engine.continues(OHLCVData.from_rates("GBPUSD", Timeframe.H1, rates[:100]))
+
+    def test_reset_by_symbol(self, h1_walk):
+        """Debe eliminar solo el estado del símbolo indicado"""
+        engine = IndicatorEngine()
+        engine.update(window(h1_walk(60), 60))
+
+        engine.reset("GBPUSD")
+        assert engine.get("EURUSD", Timeframe.H1) is not None
+        engine.reset("EURUSD")
+        assert engine.get("EURUSD", Timeframe.H1) is None
+
+    def test_invalid_tolerance_raises_error(self):
+        """Debe lanzar IndicatorError con tolerancia negativa"""
+        with pytest.raises(IndicatorError):
+            IndicatorEngine(tolerance=-1)
@@ -0,0 +1,245 @@
+"""
+Tests unitarios para IndicatorsFormatter.
+
+Verifica el JSON de referencia (sección 10.3), que el formato compacto
+conserve la misma información redondeada a los dígitos del símbolo y que
+reduzca los tokens estimados.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-16
+Ticket: T23 - Cálculo y formato de indicadores por timeframe (formato compacto)
+"""
+import pytest
+import numpy as np
+
+from src.core.feature_store import FeatureStore
+from src.core.indicators_formatter import (
+    FormatterError,
+    IndicatorsFormatter,
+    digits_from_point,
+    estimate_tokens,
+    timeframe_label
+)
+from src.core.mt5_data_extractor import OHLCVData, Timeframe
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+
+
+@pytest.fixture
+def make_ohlcv(make_rates):
+    """Crea n velas contiguas; la apertura es el cierre anterior salvo cada 7 velas."""
+    def build(timeframe=Timeframe.M5, n: int = 200, seed: int = 11, price: float = 1.1) -> OHLCVData:
+        rng = np.random.default_rng(seed)
+        rates = make_rates(
+            n, start=BASE_TIME, step=timeframe.value * 60, price=price, volatility=0.0005,
+            wick=np.round(rng.uniform(0, 0.0005, n), 5), volume=rng.integers(10, 900, n),
+            digits=5, seed=seed, continuous=True
+        )
+        rates['open'][::7] += 0.00002
+        rates['high'] = np.maximum(rates['high'], rates['open'])
+        return OHLCVData.from_rates("EURUSD", timeframe, rates)
+    return build
+
+
+@pytest.fixture
+def make_data(make_ohlcv):
+    """Datos de los tres timeframes de los bots numéricos."""
+    def build() -> dict:
+        return {tf: make_ohlcv(tf, seed=i) for i, tf in enumerate((Timeframe.H1, Timeframe.M5, Timeframe.M15))}
+    return build
+
+
+def decode_compact(text: str) -> dict:
+    """Reconstruye los precios del formato compacto: timeframe → array (n, 5)."""
+    lines = text.splitlines()
+    header = dict(part.split("=") for part in lines[1].split()[1:])
+    ref, point = float(header["ref"]), float(header["pt"])
+    tables, current = {}, None
+    for line in lines[2:]:
+        if line.startswith(("ind ", "o,")):
+            continue
+        if "n=" in line:
+            current = line.split()[0]
+            tables[current] = []
+            continue
+        fields = line.split(",")
+        if fields[0] == "":
+            fields[0] = tables[current][-1][3]
+        values = [int(f) for f in fields[:5]]
+        tables[current].append(values)
+    return {
+        tf: np.array([[ref + v * point for v in row[:4]] + [row[4]] for row in rows])
+        for tf, rows in tables.items()
+    }
+
+
+class TestHelpers:
+    """Tests para las funciones auxiliares"""
+
+    def test_estimate_tokens_counts_digit_groups_words_and_symbols(self):
+        """
+        Dado un texto con números, palabras y signos
+        Cuando se estiman los tokens
+        Entonces los dígitos cuentan de a 3 y las palabras de a 4 letras
+        """
+        assert estimate_tokens("1234567") == 3
+        assert estimate_tokens("indicadores") == 3
+        assert estimate_tokens('{"a": -1}') == 8
+        assert estimate_tokens("   ") == 0
+
+    def test_digits_from_point(self):
+        """
+        Dado el punto de distintos símbolos
+        Cuando se calculan los dígitos
+        Entonces se obtiene la cantidad de decimales
+        """
+        assert digits_from_point(0.00001) == 5
+        assert digits_from_point(0.001) == 3
+        assert digits_from_point(1.0) == 0
+        with pytest.raises(FormatterError):
+            digits_from_point(0)
+
+    def test_timeframe_label(self):
+        """Debe usar las etiquetas de los requerimientos (5M, 1H)"""
+        assert timeframe_label(Timeframe.M5) == "5M"
+        assert timeframe_label(Timeframe.H1) == "1H"
+
+
+class TestJsonPayload:
+    """Tests para el JSON de referencia"""
+
+    def test_payload_follows_requirements_layout(self, make_data):
+        """
+        Dado velas de 5M, 15M y 1H
+        Cuando se construye el payload
+        Entonces tiene un bloque por timeframe con ultima_vela, indicadores y velas
+        """
+        data = make_data()
+        payload = IndicatorsFormatter().build_payload("EURUSD", data)
+
+        assert payload["activo"] == "EURUSD"
+        assert payload["precio_actual"] == round(float(data[Timeframe.M5].close[-1]), 5)
+        block = payload["timeframe_15M"]
+        assert set(block) == {"ultima_vela", "indicadores", "ultimas_80_velas"}
+        assert block["ultima_vela"]["close"] == block["ultimas_80_velas"][-1]["close"]
+        assert set(block["indicadores"]["macd"]) == {"macd_line", "signal_line", "histogram"}
+        assert len(payload["timeframe_5M"]["ultimas_100_velas"]) == 100
+        assert len(payload["timeframe_1H"]["ultimas_50_velas"]) == 50
+
+
+class TestCompactFormat:
+    """Tests para el formato compacto"""
+
+    def test_compact_preserves_rounded_prices(self, make_data):
+        """
+        Dado velas de tres timeframes
+        Cuando se formatean en compacto y se decodifican
+        Entonces los precios y volúmenes coinciden con los redondeados a 5 dígitos
+        """
+        data = make_data()
+        decoded = decode_compact(IndicatorsFormatter().format_compact("EURUSD", data).text)
+
+        for tf, bars in ((Timeframe.M5, 100), (Timeframe.M15, 80), (Timeframe.H1, 50)):
+            ohlcv = data[tf]
+            expected = np.column_stack([
+                ohlcv.open[-bars:], ohlcv.high[-bars:], ohlcv.low[-bars:], ohlcv.close[-bars:]
+            ])
+            table = decoded[timeframe_label(tf)]
+            np.testing.assert_allclose(table[:, :4], np.round(expected, 5), atol=1e-9)
+            np.testing.assert_array_equal(table[:, 4], ohlcv.volume[-bars:])
+
+    def test_open_equal_to_previous_close_is_omitted(self, make_ohlcv):
+        """
+        Dado aperturas iguales al cierre anterior salvo cada 7 velas
+        Cuando se formatea
+        Entonces solo esas filas (y la primera) llevan apertura
+        """
+        text = IndicatorsFormatter({"M5": 30}).format_compact("EURUSD", {Timeframe.M5: make_ohlcv()}).text
+        rows = text.splitlines()[5:]
+
+        with_open = [i for i, row in enumerate(rows) if not row.startswith(",")]
+        first_bar = 200 - 30
+        assert with_open == [0] + [i for i in range(1, 30) if (first_bar + i) % 7 == 0]
+
+    def test_gap_column_only_when_bars_are_missing(self, make_ohlcv):
+        """
+        Dado una serie con 3 velas faltantes
+        Cuando se formatea
+        Entonces aparece la columna g con el hueco en la fila correspondiente
+        """
+        ohlcv = make_ohlcv(n=60)
+        ohlcv.rates['time'][-10:] += 3 * 300
+        formatter = IndicatorsFormatter({"M5": 20})
+
+        lines = formatter.format_compact("EURUSD", {Timeframe.M5: ohlcv}).text.splitlines()
+        plain = formatter.format_compact("EURUSD", {Timeframe.M5: make_ohlcv(n=60)}).text
+
+        assert lines[4] == "o,h,l,c,v,g"
+        gaps = [int(row.split(",")[-1]) for row in lines[5:]]
+        assert gaps[10] == 3
+        assert sum(gaps) == 3
+        assert "o,h,l,c,v\n" in plain
+
+    def test_indicators_in_points_relative_to_ref(self, make_ohlcv):
+        """
+        Dado el precio actual como referencia
+        Cuando se formatea
+        Entonces la EMA 20 se expresa en puntos respecto a ref
+        """
+        data = {Timeframe.M5: make_ohlcv()}
+        payload = IndicatorsFormatter().build_payload("EURUSD", data)
+        text = IndicatorsFormatter().format_compact("EURUSD", data).text
+
+        indicators = dict(p.split("=") for p in text.splitlines()[3].split()[1:])
+        ema_20 = payload["timeframe_5M"]["indicadores"]["ema_20"]
+        assert int(indicators["e20"]) == round((ema_20 - payload["precio_actual"]) * 1e5)
+        assert float(indicators["rsi"]) == payload["timeframe_5M"]["indicadores"]["rsi"]
+
+    def test_compact_uses_far_fewer_tokens(self, make_data):
+        """
+        Dado la misma información
+        Cuando se comparan JSON y compacto
+        Entonces el compacto usa menos de un tercio de los tokens estimados
+        """
+        formatter = IndicatorsFormatter()
+        data = make_data()
+
+        verbose = formatter.format_json("EURUSD", data)
+        compact = formatter.format_compact("EURUSD", data)
+
+        assert compact.estimated_tokens * 3 < verbose.estimated_tokens
+        stats = formatter.get_stats()
+        assert stats["prompts"] == 2
+        assert stats["estimated_tokens"] == verbose.estimated_tokens + compact.estimated_tokens
+
+    def test_indicators_come_from_feature_store(self, make_ohlcv):
+        """
+        Dado un FeatureStore compartido con filtros y sizer
+        Cuando se formatea el prompt dos veces
+        Entonces los indicadores se calculan una sola vez
+        """
+        store = FeatureStore()
+        formatter = IndicatorsFormatter(feature_store=store)
+        data = {Timeframe.M5: make_ohlcv()}
+
+        formatter.format_compact("EURUSD", data)
+        formatter.format_json("EURUSD", data)
+
+        assert store.get_stats()["features"]["indicators"] == {
+            "computations": 1, "hits": 1, "recomputations": 0
+        }
+
+
+class TestErrors:
+    """Tests para errores"""
+
+    def test_empty_data_raises_error(self):
+        """Debe lanzar FormatterError sin timeframes"""
+        with pytest.raises(FormatterError):
+            IndicatorsFormatter().format_compact("EURUSD", {})
+
+    def test_invalid_bars_raise_error(self):
+        """Debe lanzar FormatterError con velas no positivas"""
+        with pytest.raises(FormatterError):
+            IndicatorsFormatter({"M5": 0})
@@ -12,12 +12,20 @@ Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import pandas as pd
 
 # Importar el módulo a testear (aún no existe, pero lo crearemos)
+import numpy as np
+
+import threading
+import time
+
 from src.core.mt5_data_extractor import (
+    BulkExtractionResult,
     MT5DataExtractor,
     MT5DataError,
+    MT5_RATES_DTYPE,
     OHLCVData,
     Timeframe
 )
@@ -126,6 +134,78 @@ class TestOHLCVData:
         assert result['timeframe'] == "M5"
         assert result['count'] == 1
         assert 'data' in result
+    
+    def _make_rates(self, n: int) -> np.ndarray:
+        """Crea n velas M5 en formato structured array de MT5."""
+        rates = np.zeros(n, dtype=MT5_RATES_DTYPE)
+        rates['time'] = int(datetime(2025, 11, 11, 10, 0).timestamp()) + np.arange(n) * 300
+        rates['open'] = 1.1
+        rates['high'] = 1.101
+        rates['low'] = 1.099
+        rates['close'] = 1.1005
+        rates['tick_volume'] = 1000
+        return rates
+    
+    def test_ohlcv_data_from_rates_exposes_zero_copy_views(self):
+        """
+        Dado un structured array de MT5
+        Cuando se crea OHLCVData desde rates
+        Entonces las columnas son vistas del array original sin copia
+        """
+        rates = self._make_rates(3)
+        
+        data = OHLCVData.from_rates("EURUSD", Timeframe.M5, rates)
+        
+        assert data.count == 3
+        assert np.shares_memory(data.close, rates)
+        assert np.shares_memory(data.volume, rates)
+        assert data.time.dtype == np.int64
+        assert data.time[0] == rates['time'][0]
+    
+    def test_ohlcv_data_builds_dataframe_lazily(self):
+        """
+        Dado un OHLCVData creado desde rates
+        Cuando se accede a data
+        Entonces el DataFrame se construye una sola vez con las columnas OHLCV
+        """
+        data = OHLCVData.from_rates("EURUSD", Timeframe.M5, self._make_rates(2))
+        
+        assert data._data is None
+        df = data.data
+        
+        assert list(df.columns) == ['time', 'open', 'high', 'low', 'close', 'volume']
+        assert pd.api.types.is_datetime64_any_dtype(df['time'])
+        assert data.data is df
+    
+    def test_ohlcv_data_from_dataframe_exposes_arrays(self):
+        """
+        Dado un OHLCVData creado desde un DataFrame
+        Cuando se accede a las columnas como arrays
+        Entonces retorna los valores y el tiempo como epoch int64
+        """
+        df = pd.DataFrame({
+            'time': [datetime(2025, 11, 11, 10, 0)],
+            'open': [1.1000],
+            'high': [1.1010],
+            'low': [1.0990],
+            'close': [1.1005],
+            'volume': [1000]
+        })
+        
+        data = OHLCVData(symbol="EURUSD", timeframe=Timeframe.M5, data=df, count=1)
+        
+        assert data.rates is None
+        assert data.close[0] == pytest.approx(1.1005)
+        assert data.time[0] == int(pd.Timestamp(datetime(2025, 11, 11, 10, 0)).timestamp())
+    
+    def test_ohlcv_data_requires_data_or_rates(self):
+        """
+        Dado que no se proporciona data ni rates
+        Cuando se crea OHLCVData
+        Entonces debe lanzar ValueError
+        """
+        with pytest.raises(ValueError):
+            OHLCVData(symbol="EURUSD", timeframe=Timeframe.M5)
 
 
 class TestMT5DataExtractor:
@@ -196,6 +276,7 @@ class TestMT5DataExtractor:
         assert result.timeframe == Timeframe.M5
         assert result.count == 2
         assert len(result.data) == 2
+        assert len(result.close) == 2
     
     def test_get_ohlcv_validates_symbol(self, extractor):
         """
@@ -487,6 +568,81 @@ class TestMT5DataExtractor:
         assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
         assert result1.count == result2.count
     
+    def test_cache_separates_exclude_current(self, mock_connector):
+        """
+        Dado un caché con la ventana que incluye la vela en formación
+        Cuando se piden las mismas velas con exclude_current=True
+        Entonces no se sirve la entrada con la vela en formación
+        """
+        base = int(datetime(2025, 11, 11).timestamp())
+        rates = [(base + i * 300, 1.1, 1.1, 1.1, 1.1 + i, 0, 1, 0) for i in range(3)]
+        mock_connector._mt5.copy_rates_from_pos.side_effect = (
+            lambda symbol, timeframe, position, count: rates[-count:]
+        )
+        extractor_with_cache = MT5DataExtractor(mock_connector, enable_cache=True)
+        
+        with_current = extractor_with_cache.get_ohlcv("EURUSD", Timeframe.M5, 2)
+        closed_only = extractor_with_cache.get_ohlcv(
+            "EURUSD", Timeframe.M5, 2, exclude_current=True
+        )
+        
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 2
+        assert closed_only.close[-1] != with_current.close[-1]
+    
+    def test_cache_expires_at_next_candle_close(self, mock_connector):
+        """
+        Dado que el caché está habilitado con un reloj controlado
+        Cuando se cruza el cierre de la vela H1
+        Entonces la entrada expira y se vuelve a consultar MT5
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 2)
+        now = [datetime(2025, 11, 11, 10, 15, tzinfo=ZoneInfo("America/Lima"))]
+        extractor = MT5DataExtractor(
+            mock_connector, enable_cache=True, cache_clock=lambda: now[0]
+        )
+        
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 2)
+        now[0] = datetime(2025, 11, 11, 10, 59, 59, tzinfo=ZoneInfo("America/Lima"))
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 2)
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
+        
+        now[0] = datetime(2025, 11, 11, 11, 0, 0, tzinfo=ZoneInfo("America/Lima"))
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 2)
+        
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 2
+        stats = extractor.get_cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["expirations"] == 1
+    
+    def test_cache_is_bounded_by_bytes(self, mock_connector):
+        """
+        Dado un caché con límite de bytes para una sola entrada
+        Cuando se guardan dos símbolos
+        Entonces el menos usado se desaloja y los bytes no superan el límite
+        """
+        entry_bytes = 2 * MT5_RATES_DTYPE.itemsize
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 2)
+        extractor = MT5DataExtractor(
+            mock_connector, enable_cache=True, cache_max_bytes=entry_bytes
+        )
+        
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 2)
+        extractor.get_ohlcv("GBPUSD", Timeframe.H1, 2)
+        
+        stats = extractor.get_cache_stats()
+        assert stats["evictions"] == 1
+        assert stats["entries"] == 1
+        assert stats["bytes"] <= entry_bytes
+    
+    def test_cache_stats_empty_when_disabled(self, extractor):
+        """
+        Dado que el caché está deshabilitado
+        Cuando se piden estadísticas
+        Entonces se retorna un diccionario vacío
+        """
+        assert extractor.get_cache_stats() == {}
+    
     # ==================== TESTS DE INTEGRACIÓN CON CANDLEWAITER ====================
     
     def test_get_ohlcv_waits_for_candle_close(self, extractor, mock_connector):
@@ -516,3 +672,685 @@ class TestMT5DataExtractor:
         )
         
         assert mock_candle_waiter.wait_for_candle_close.called
+    
+    # ==================== TESTS DE STORE INCREMENTAL ====================
+    
+    def _make_rates(self, start_hour: int, n: int):
+        """Crea n velas H1 consecutivas desde la hora indicada."""
+        base = int(datetime(2025, 11, 11).timestamp())
+        return [
+            (base + (start_hour + i) * 3600, 1.1 + i * 0.001, 1.102 + i * 0.001,
+             1.098 + i * 0.001, 1.101 + i * 0.001, 100 + i, 1, 0)
+            for i in range(n)
+        ]
+    
+    def test_bar_store_first_call_downloads_full_window(self, mock_connector):
+        """
+        Dado que el store incremental está habilitado y vacío
+        Cuando se solicita OHLCV
+        Entonces descarga la ventana completa con copy_rates_from_pos
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 11)
+        extractor = MT5DataExtractor(mock_connector, enable_bar_store=True)
+        
+        result = extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        assert result.count == 10
+        mock_connector._mt5.copy_rates_from_pos.assert_called_once()
+        mock_connector._mt5.copy_rates_range.assert_not_called()
+    
+    def test_bar_store_next_call_fetches_only_new_bars(self, mock_connector):
+        """
+        Dado que el store ya tiene la ventana
+        Cuando se solicita de nuevo tras el cierre de una vela
+        Entonces pide a MT5 solo las velas posteriores a la última cerrada
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 11)
+        extractor = MT5DataExtractor(mock_connector, enable_bar_store=True)
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        # Delta: la vela que estaba en formación (ya cerrada) + la nueva en formación
+        mock_connector._mt5.copy_rates_range.return_value = self._make_rates(10, 2)
+        
+        result = extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
+        mock_connector._mt5.copy_rates_range.assert_called_once()
+        date_from = mock_connector._mt5.copy_rates_range.call_args[0][2]
+        assert int(date_from.timestamp()) == self._make_rates(9, 1)[0][0] + 1
+        assert result.count == 10
+        assert result.data['open'].iloc[-1] == pytest.approx(1.1)
+    
+    def test_bar_store_serves_smaller_count_as_slice(self, mock_connector):
+        """
+        Dado que el store tiene 10 velas cerradas
+        Cuando se piden 5 velas
+        Entonces no se vuelve a descargar la ventana completa
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 11)
+        mock_connector._mt5.copy_rates_range.return_value = self._make_rates(10, 1)
+        extractor = MT5DataExtractor(mock_connector, enable_bar_store=True)
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        result = extractor.get_ohlcv("EURUSD", Timeframe.H1, 5, exclude_current=False)
+        
+        assert result.count == 5
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
+    
+    def test_bar_store_larger_count_refetches_window(self, mock_connector):
+        """
+        Dado que el store tiene menos velas de las solicitadas
+        Cuando se piden más velas
+        Entonces descarga de nuevo la ventana completa
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 11)
+        extractor = MT5DataExtractor(mock_connector, enable_bar_store=True)
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 21)
+        result = extractor.get_ohlcv("EURUSD", Timeframe.H1, 20, exclude_current=True)
+        
+        assert result.count == 20
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 2
+        mock_connector._mt5.copy_rates_range.assert_not_called()
+    
+    def test_bar_store_count_above_max_bars_stays_incremental(self, mock_connector):
+        """
+        Dado un store con máximo de 5 velas
+        Cuando se piden 10 velas dos veces
+        Entonces la serie crece a 10 y la segunda llamada es incremental
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 11)
+        mock_connector._mt5.copy_rates_range.return_value = self._make_rates(10, 2)
+        extractor = MT5DataExtractor(
+            mock_connector, enable_bar_store=True, bar_store_max_bars=5
+        )
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        result = extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        assert result.count == 10
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
+        mock_connector._mt5.copy_rates_range.assert_called_once()
+    
+    def test_bar_store_short_history_stays_incremental(self, mock_connector):
+        """
+        Dado un símbolo con menos historia de la solicitada
+        Cuando se pide de nuevo la misma ventana
+        Entonces no se vuelve a descargar la ventana completa
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 4)
+        mock_connector._mt5.copy_rates_range.return_value = self._make_rates(3, 2)
+        extractor = MT5DataExtractor(mock_connector, enable_bar_store=True)
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        result = extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        assert result.count == 4
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
+        mock_connector._mt5.copy_rates_range.assert_called_once()
+    
+    def test_bar_store_delta_failure_falls_back_to_full_window(self, mock_connector):
+        """
+        Dado que la actualización incremental retorna None
+        Cuando se solicita OHLCV
+        Entonces descarga la ventana completa
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 11)
+        mock_connector._mt5.copy_rates_range.return_value = None
+        extractor = MT5DataExtractor(mock_connector, enable_bar_store=True)
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        result = extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        assert result.count == 10
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 2
+    
+    def test_clear_cache_clears_bar_store(self, mock_connector):
+        """
+        Dado un store con series
+        Cuando se llama clear_cache
+        Entonces la siguiente extracción descarga la ventana completa
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 11)
+        extractor = MT5DataExtractor(mock_connector, enable_bar_store=True)
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        extractor.clear_cache()
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 10, exclude_current=True)
+        
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 2
+    
+    # ==================== TESTS DE EXTRACCIÓN MASIVA ====================
+    
+    def test_get_ohlcv_bulk_returns_nested_result(self, extractor, mock_connector):
+        """
+        Dado varios símbolos y timeframes
+        Cuando se usa get_ohlcv_bulk
+        Entonces retorna un resultado anidado símbolo → timeframe con latencias
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 3)
+        
+        result = extractor.get_ohlcv_bulk(
+            symbols=["EURUSD", "GBPUSD"],
+            timeframes=[Timeframe.M5, Timeframe.H1],
+            count=3
+        )
+        extractor.close()
+        
+        assert isinstance(result, BulkExtractionResult)
+        assert result.success_count == 4
+        assert result.error_count == 0
+        assert result.get("GBPUSD", Timeframe.H1).count == 3
+        assert result.items["EURUSD"][Timeframe.M5].fetch_ms >= 0
+        assert result.get_latency_summary()["calls"] == 4
+    
+    def test_get_ohlcv_bulk_reports_per_item_errors(self, extractor, mock_connector):
+        """
+        Dado que MT5 falla para un símbolo
+        Cuando se usa get_ohlcv_bulk
+        Entonces el error se reporta en ese item y el resto se extrae
+        """
+        def side_effect(symbol, timeframe, position, count):
+            return None if symbol == "XAUUSD" else self._make_rates(0, count)
+        
+        mock_connector._mt5.copy_rates_from_pos.side_effect = side_effect
+        
+        result = extractor.get_ohlcv_bulk(["EURUSD", "XAUUSD"], [Timeframe.H1], count=2)
+        extractor.close()
+        
+        assert result.success_count == 1
+        assert ("XAUUSD", Timeframe.H1) in result.errors()
+        assert result.get("XAUUSD", Timeframe.H1) is None
+        assert result.get("EURUSD", Timeframe.H1) is not None
+    
+    def test_get_ohlcv_bulk_uses_single_io_thread(self, extractor, mock_connector):
+        """
+        Dado una extracción masiva
+        Cuando se llama a MT5
+        Entonces todas las llamadas ocurren en un único hilo de I/O
+        """
+        threads = set()
+        
+        def side_effect(symbol, timeframe, position, count):
+            threads.add(threading.current_thread().name)
+            return self._make_rates(0, count)
+        
+        mock_connector._mt5.copy_rates_from_pos.side_effect = side_effect
+        
+        extractor.get_ohlcv_bulk(
+            ["EURUSD", "GBPUSD", "USDJPY"],
+            [Timeframe.M5, Timeframe.M15, Timeframe.H1],
+            count=5,
+            build_dataframe=True
+        )
+        extractor.close()
+        
+        assert len(threads) == 1
+        assert threads.pop().startswith("mt5-io")
+    
+    def test_terminal_calls_never_overlap(self, mock_connector):
+        """
+        Dado llamadas a get_ohlcv desde varios hilos y una extracción masiva en curso
+        Cuando todas descargan del terminal a la vez
+        Entonces nunca hay dos llamadas al terminal en paralelo
+        """
+        extractor = MT5DataExtractor(mock_connector, enable_cache=False)
+        active, overlaps = [0], []
+        guard = threading.Lock()
+        
+        def side_effect(symbol, timeframe, position, count):
+            with guard:
+                active[0] += 1
+                overlaps.append(active[0])
+            time.sleep(0.005)
+            with guard:
+                active[0] -= 1
+            return self._make_rates(0, count)
+        
+        mock_connector._mt5.copy_rates_from_pos.side_effect = side_effect
+        threads = [
+            threading.Thread(target=extractor.get_ohlcv, args=(symbol, Timeframe.M5, 5))
+            for symbol in ("EURUSD", "GBPUSD", "USDJPY", "XAUUSD")
+        ]
+        for thread in threads:
+            thread.start()
+        extractor.get_ohlcv_bulk(["AUDUSD", "NZDUSD"], [Timeframe.M5, Timeframe.H1], count=5)
+        for thread in threads:
+            thread.join(timeout=5)
+        extractor.close()
+        
+        assert len(overlaps) == 8
+        assert max(overlaps) == 1
+    
+    def test_get_ohlcv_bulk_uses_cache(self, mock_connector):
+        """
+        Dado que el caché está habilitado
+        Cuando se repite una extracción masiva
+        Entonces la segunda no llama a MT5
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 2)
+        extractor = MT5DataExtractor(mock_connector, enable_cache=True)
+        
+        extractor.get_ohlcv_bulk(["EURUSD"], [Timeframe.H1], count=2)
+        result = extractor.get_ohlcv_bulk(["EURUSD"], [Timeframe.H1], count=2)
+        extractor.close()
+        
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
+        assert result.items["EURUSD"][Timeframe.H1].from_cache
+    
+    def test_get_ohlcv_bulk_validates_inputs(self, extractor):
+        """
+        Dado parámetros inválidos
+        Cuando se usa get_ohlcv_bulk
+        Entonces debe lanzar ValueError
+        """
+        with pytest.raises(ValueError):
+            extractor.get_ohlcv_bulk([], [Timeframe.H1], count=2)
+        with pytest.raises(ValueError):
+            extractor.get_ohlcv_bulk(["EURUSD"], [], count=2)
+        with pytest.raises(ValueError):
+            extractor.get_ohlcv_bulk(["EURUSD"], [Timeframe.H1], count=0)
+    
+    # ==================== TESTS DE RESAMPLING LOCAL ====================
+    
+    def _make_m5_rates(self, n: int):
+        """Crea n velas M5 desde 2025-11-11 00:00 UTC."""
+        rates = np.zeros(n, dtype=MT5_RATES_DTYPE)
+        rates['time'] = 1_762_819_200 + np.arange(n) * 300
+        rates['open'] = 1.1 + np.arange(n) * 0.0001
+        rates['close'] = rates['open'] + 0.00005
+        rates['high'] = rates['open'] + 0.0002
+        rates['low'] = rates['open'] - 0.0002
+        rates['tick_volume'] = 1
+        return rates
+    
+    def test_resampling_fetches_only_base_timeframe(self, mock_connector):
+        """
+        Dado que el resampling está habilitado sin verificación
+        Cuando se piden M5, M15 y H1
+        Entonces solo se descarga M5 y los demás se derivan
+        """
+        m5 = self._make_m5_rates(11 * 12 + 1)
+        mock_connector._mt5.copy_rates_from_pos.return_value = m5
+        extractor = MT5DataExtractor(
+            mock_connector, enable_resampling=True, resample_check_interval=0
+        )
+        
+        result = extractor.get_ohlcv_multi_timeframe(
+            "EURUSD", [Timeframe.M5, Timeframe.M15, Timeframe.H1], count=10
+        )
+        
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
+        assert result[Timeframe.M5].count == 10
+        assert result[Timeframe.M15].count == 10
+        assert result[Timeframe.H1].count == 10
+        # Todos los timeframes terminan en la misma vela en formación
+        assert result[Timeframe.H1].close[-1] == m5['close'][-1]
+        assert result[Timeframe.M15].close[-1] == m5['close'][-1]
+    
+    def test_resampling_verifies_against_terminal(self, mock_connector):
+        """
+        Dado que el resampling verifica en la primera derivación
+        Cuando las velas del terminal difieren de las derivadas
+        Entonces se usan las velas del terminal y se registra la discrepancia
+        """
+        m5 = self._make_m5_rates(12 * 4 + 1)
+        h1_terminal = np.zeros(4, dtype=MT5_RATES_DTYPE)
+        h1_terminal['time'] = 1_762_819_200 + np.arange(4) * 3600
+        h1_terminal['close'] = 9.9
+        
+        def side_effect(symbol, timeframe, position, count):
+            if timeframe == Timeframe.H1.to_mt5_timeframe():
+                return h1_terminal
+            return m5
+        
+        mock_connector._mt5.copy_rates_from_pos.side_effect = side_effect
+        extractor = MT5DataExtractor(mock_connector, enable_resampling=True)
+        
+        result = extractor.get_ohlcv_multi_timeframe(
+            "EURUSD", [Timeframe.M5, Timeframe.H1], count=3
+        )
+        
+        assert result[Timeframe.H1].close[-1] == 9.9
+        stats = extractor.get_resample_stats()
+        assert stats["checks"] == 1
+        assert stats["mismatches"] == 1
+    
+    def test_resampling_fetches_large_ratios_directly(self, mock_connector):
+        """
+        Dado un máximo de 200 velas base
+        Cuando se piden 10 velas de M5, H1 y D1
+        Entonces H1 se deriva y D1 se descarga directamente con 10 velas
+        """
+        m5 = self._make_m5_rates(11 * 12 + 1)
+        d1 = np.zeros(10, dtype=MT5_RATES_DTYPE)
+        d1['time'] = 1_762_819_200 + np.arange(10) * 86400
+        requested = []
+        
+        def side_effect(symbol, timeframe, position, count):
+            requested.append((timeframe, count))
+            return d1 if timeframe == Timeframe.D1.to_mt5_timeframe() else m5
+        
+        mock_connector._mt5.copy_rates_from_pos.side_effect = side_effect
+        extractor = MT5DataExtractor(
+            mock_connector,
+            enable_resampling=True,
+            resample_check_interval=0,
+            resample_max_base_bars=200
+        )
+        
+        result = extractor.get_ohlcv_multi_timeframe(
+            "EURUSD", [Timeframe.M5, Timeframe.H1, Timeframe.D1], count=10
+        )
+        
+        assert requested == [
+            (Timeframe.M5.to_mt5_timeframe(), 11 * 12 + 1),
+            (Timeframe.D1.to_mt5_timeframe(), 10)
+        ]
+        assert result[Timeframe.H1].count == 10
+        assert result[Timeframe.D1].count == 10
+    
+    def test_resampling_short_history_falls_back_to_terminal(self, mock_connector):
+        """
+        Dado un broker con menos historia M5 de la necesaria
+        Cuando se deriva H1
+        Entonces H1 se descarga del terminal en lugar de retornar una serie corta
+        """
+        m5 = self._make_m5_rates(12 * 3 + 1)
+        h1 = np.zeros(10, dtype=MT5_RATES_DTYPE)
+        h1['time'] = 1_762_819_200 + np.arange(10) * 3600
+        
+        def side_effect(symbol, timeframe, position, count):
+            return h1 if timeframe == Timeframe.H1.to_mt5_timeframe() else m5
+        
+        mock_connector._mt5.copy_rates_from_pos.side_effect = side_effect
+        extractor = MT5DataExtractor(
+            mock_connector, enable_resampling=True, resample_check_interval=0
+        )
+        
+        result = extractor.get_ohlcv_multi_timeframe(
+            "EURUSD", [Timeframe.M5, Timeframe.H1], count=10
+        )
+        
+        assert result[Timeframe.H1].count == 10
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 2
+    
+    def test_resampling_disabled_returns_empty_stats(self, extractor):
+        """
+        Dado que el resampling no está habilitado
+        Cuando se consultan sus estadísticas
+        Entonces retorna un diccionario vacío
+        """
+        assert extractor.get_resample_stats() == {}
+    
+    # ==================== TESTS DE ARCHIVO HISTÓRICO ====================
+    
+    def test_get_ohlcv_range_uses_archive(self, mock_connector, temp_dir):
+        """
+        Dado que el archivo histórico está habilitado
+        Cuando se consulta dos veces el mismo rango histórico
+        Entonces la segunda consulta se sirve desde disco sin llamar a MT5
+        """
+        rates = self._make_m5_rates(48)
+        mock_connector._mt5.copy_rates_range.return_value = rates
+        extractor = MT5DataExtractor(mock_connector, archive_dir=str(temp_dir / "bars"))
+        start = datetime(2025, 11, 11, 0, 0)
+        end = datetime(2025, 11, 11, 3, 55)
+        
+        first = extractor.get_ohlcv_range("EURUSD", Timeframe.M5, start, end)
+        second = extractor.get_ohlcv_range("EURUSD", Timeframe.M5, start, end)
+        extractor.close()
+        
+        assert first.count == 48
+        assert second.count == 48
+        mock_connector._mt5.copy_rates_range.assert_called_once()
+    
+    # ==================== TESTS DE SINGLE-FLIGHT ====================
+    
+    def test_concurrent_get_ohlcv_shares_one_fetch(self, mock_connector):
+        """
+        Dado varios hilos que piden el mismo símbolo y timeframe a la vez
+        Cuando la descarga del primero aún no termina
+        Entonces los demás esperan y comparten su resultado con una sola llamada a MT5
+        """
+        release = threading.Event()
+        
+        def slow_fetch(*args):
+            release.wait(timeout=5)
+            return self._make_rates(0, 3)
+        
+        mock_connector._mt5.copy_rates_from_pos.side_effect = slow_fetch
+        extractor = MT5DataExtractor(mock_connector)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(extractor.get_ohlcv("EURUSD", Timeframe.H1, 3))
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            stats = extractor.get_single_flight_stats().get("EURUSD H1 x3", {})
+            if stats.get("calls") == 4:
+                break
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
+        assert len(results) == 4
+        assert all(r.count == 3 for r in results)
+        assert extractor.get_single_flight_stats()["EURUSD H1 x3"] == {
+            "calls": 4, "executions": 1, "coalesced": 3
+        }
+    
+    def test_single_flight_disabled_returns_empty_stats(self, mock_connector):
+        """
+        Dado que la deduplicación está deshabilitada
+        Cuando se consultan sus estadísticas
+        Entonces retorna un diccionario vacío
+        """
+        extractor = MT5DataExtractor(mock_connector, enable_single_flight=False)
+        
+        assert extractor.get_single_flight_stats() == {}
+    
+    # ==================== TESTS DE SERVE-STALE ====================
+    
+    def test_serve_stale_returns_last_good_on_failure(self, mock_connector):
+        """
+        Dado el modo serve-stale con un dato válido previo
+        Cuando MT5 retorna None
+        Entonces get_ohlcv retorna el último dato marcado como desactualizado
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 3)
+        extractor = MT5DataExtractor(mock_connector, serve_stale=True, stale_backoff_base=60)
+        fresh = extractor.get_ohlcv("EURUSD", Timeframe.H1, 3)
+        
+        mock_connector._mt5.copy_rates_from_pos.return_value = None
+        stale = extractor.get_ohlcv("EURUSD", Timeframe.H1, 3)
+        extractor.close()
+        
+        assert not fresh.is_stale
+        assert stale.is_stale
+        assert stale.count == 3
+        assert np.shares_memory(stale.close, fresh.close)
+        assert extractor.get_stale_stats()["failures"] == 1
+    
+    def test_negative_cache_skips_terminal_during_backoff(self, mock_connector):
+        """
+        Dado un símbolo que falla y no tiene datos previos
+        Cuando se vuelve a pedir dentro de la ventana negativa
+        Entonces se lanza MT5DataError sin consultar al terminal
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = None
+        extractor = MT5DataExtractor(mock_connector, serve_stale=True, stale_backoff_base=60)
+        
+        with pytest.raises(MT5DataError):
+            extractor.get_ohlcv("DEADSYM", Timeframe.H1, 3)
+        with pytest.raises(MT5DataError, match="suspendido"):
+            extractor.get_ohlcv("DEADSYM", Timeframe.H1, 3)
+        extractor.close()
+        
+        assert mock_connector._mt5.copy_rates_from_pos.call_count == 1
+        assert extractor.get_stale_stats()["failing_series"] == {"DEADSYM H1": 1}
+    
+    def test_background_refresh_recovers_series(self, mock_connector):
+        """
+        Dado una falla transitoria
+        Cuando vence el backoff
+        Entonces el reintento en segundo plano recupera la serie
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 3)
+        extractor = MT5DataExtractor(
+            mock_connector, serve_stale=True, stale_backoff_base=0.01
+        )
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 3)
+        mock_connector._mt5.copy_rates_from_pos.return_value = None
+        extractor.get_ohlcv("EURUSD", Timeframe.H1, 3)
+        
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(1, 3)
+        deadline = time.time() + 5
+        while extractor.get_stale_stats()["recoveries"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        extractor.close()
+        
+        assert extractor.get_stale_stats()["recoveries"] == 1
+        assert extractor.get_stale_stats()["failing_series"] == {}
+    
+    def test_multi_timeframe_keeps_stale_timeframe(self, mock_connector):
+        """
+        Dado el modo serve-stale
+        Cuando un timeframe falla en get_ohlcv_multi_timeframe
+        Entonces el resultado incluye ese timeframe con datos desactualizados
+        """
+        mock_connector._mt5.copy_rates_from_pos.return_value = self._make_rates(0, 3)
+        extractor = MT5DataExtractor(mock_connector, serve_stale=True, stale_backoff_base=60)
+        extractor.get_ohlcv_multi_timeframe("EURUSD", [Timeframe.H1, Timeframe.H4], count=3)
+        
+        mock_connector._mt5.copy_rates_from_pos.return_value = None
+        result = extractor.get_ohlcv_multi_timeframe("EURUSD", [Timeframe.H1, Timeframe.H4], count=3)
+        extractor.close()
+        
+        assert set(result) == {Timeframe.H1, Timeframe.H4}
+        assert all(data.is_stale for data in result.values())
+    
+    # ==================== TESTS DE RANGO EN BLOQUES ====================
+    
+    def _serve_range(self, rates):
+        """Simula copy_rates_range sirviendo `rates` por rango (inclusive)."""
+        def copy_rates_range(symbol, timeframe, date_from, date_to):
+            start, end = date_from.timestamp(), date_to.timestamp()
+            return rates[(rates['time'] >= start) & (rates['time'] <= end)]
+        return copy_rates_range
+    
+    def test_iter_ohlcv_range_yields_fixed_size_chunks(self, mock_connector):
+        """
+        Dado 100 velas M5 en el terminal
+        Cuando se recorren en bloques de 30 velas
+        Entonces se entregan 4 bloques contiguos sin duplicados ni huecos
+        """
+        rates = self._make_m5_rates(100)
+        mock_connector._mt5.copy_rates_range.side_effect = self._serve_range(rates)
+        extractor = MT5DataExtractor(mock_connector)
+        start = datetime(2025, 11, 11, 0, 0)
+        end = start + timedelta(minutes=5 * 99)
+        
+        chunks = list(extractor.iter_ohlcv_range("EURUSD", Timeframe.M5, start, end, chunk=30))
+        extractor.close()
+        
+        assert [len(c) for c in chunks] == [30, 30, 30, 10]
+        assert np.concatenate(chunks)['time'].tolist() == rates['time'].tolist()
+        assert mock_connector._mt5.copy_rates_range.call_count == 4
+    
+    def test_iter_ohlcv_range_skips_empty_windows_and_returns_dataframes(self, mock_connector):
+        """
+        Dado un rango con una ventana sin velas (fin de semana)
+        Cuando se recorre como DataFrames
+        Entonces la ventana vacía se omite
+        """
+        rates = self._make_m5_rates(100)
+        rates = np.concatenate([rates[:30], rates[60:]])
+        mock_connector._mt5.copy_rates_range.side_effect = self._serve_range(rates)
+        extractor = MT5DataExtractor(mock_connector)
+        start = datetime(2025, 11, 11, 0, 0)
+        end = start + timedelta(minutes=5 * 99)
+        
+        chunks = list(extractor.iter_ohlcv_range(
+            "EURUSD", Timeframe.M5, start, end, chunk=30, as_dataframe=True
+        ))
+        extractor.close()
+        
+        assert [len(c) for c in chunks] == [30, 30, 10]
+        assert isinstance(chunks[0], pd.DataFrame)
+    
+    def test_iter_ohlcv_range_carries_partial_windows(self, mock_connector):
+        """
+        Dado un rango con un hueco que deja dos ventanas incompletas
+        Cuando se recorre en bloques de 30 velas
+        Entonces el resto se lleva a la siguiente ventana y solo el último bloque es menor
+        """
+        rates = self._make_m5_rates(100)
+        rates = np.concatenate([rates[:20], rates[40:]])
+        mock_connector._mt5.copy_rates_range.side_effect = self._serve_range(rates)
+        extractor = MT5DataExtractor(mock_connector)
+        start = datetime(2025, 11, 11, 0, 0)
+        end = start + timedelta(minutes=5 * 99)
+        
+        chunks = list(extractor.iter_ohlcv_range("EURUSD", Timeframe.M5, start, end, chunk=30))
+        extractor.close()
+        
+        assert [len(c) for c in chunks] == [30, 30, 20]
+        assert np.concatenate(chunks)['time'].tolist() == rates['time'].tolist()
+    
+    def test_iter_ohlcv_range_stops_prefetching_when_consumer_stops(self, mock_connector):
+        """
+        Dado un rango largo
+        Cuando el consumidor solo toma el primer bloque
+        Entonces solo se descargan el bloque consumido y los prefetcheados
+        """
+        rates = self._make_m5_rates(300)
+        mock_connector._mt5.copy_rates_range.side_effect = self._serve_range(rates)
+        extractor = MT5DataExtractor(mock_connector)
+        start = datetime(2025, 11, 11, 0, 0)
+        
+        iterator = extractor.iter_ohlcv_range(
+            "EURUSD", Timeframe.M5, start, start + timedelta(days=1), chunk=10, prefetch=2
+        )
+        first = next(iterator)
+        iterator.close()
+        extractor.close()
+        
+        assert len(first) == 10
+        assert mock_connector._mt5.copy_rates_range.call_count <= 4
+    
+    def test_iter_ohlcv_range_raises_on_mt5_failure(self, mock_connector):
+        """
+        Dado que MT5 retorna None para una ventana
+        Cuando se recorre el rango
+        Entonces debe lanzar MT5DataError
+        """
+        mock_connector._mt5.copy_rates_range.side_effect = None
+        mock_connector._mt5.copy_rates_range.return_value = None
+        extractor = MT5DataExtractor(mock_connector)
+        start = datetime(2025, 11, 11, 0, 0)
+        
+        with pytest.raises(MT5DataError):
+            list(extractor.iter_ohlcv_range("EURUSD", Timeframe.M5, start, start + timedelta(hours=1)))
+        extractor.close()
+    
+    def test_iter_ohlcv_range_validates_inputs(self, extractor):
+        """
+        Dado parámetros inválidos
+        Cuando se llama iter_ohlcv_range
+        Entonces debe lanzar ValueError
+        """
+        start = datetime(2025, 11, 11)
+        with pytest.raises(ValueError):
+            next(extractor.iter_ohlcv_range("EURUSD", Timeframe.M5, start, start))
+        with pytest.raises(ValueError):
+            next(extractor.iter_ohlcv_range("EURUSD", Timeframe.M5, start, start + timedelta(days=1), chunk=0))
@@ -0,0 +1,159 @@
+"""
+Tests unitarios para el OHLCVCache.
+
+Verifica la expiración absoluta por entrada, el desalojo LRU acotado por
+bytes y las estadísticas de hits/misses.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-13
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (caché con TTL)
+"""
+import pytest
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from src.core.ohlcv_cache import OHLCVCache, OHLCVCacheError
+
+
+LIMA = ZoneInfo("America/Lima")
+
+
+class FakeClock:
+    """Reloj controlable para los tests."""
+
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs) -> None:
+        self.now += timedelta(**kwargs)
+
+
+@pytest.fixture
+def clock():
+    """Reloj fijo en 2025-11-13 10:15 Lima"""
+    return FakeClock(datetime(2025, 11, 13, 10, 15, tzinfo=LIMA))
+
+
+class TestOHLCVCache:
+    """Tests para el caché LRU con expiración"""
+
+    def test_get_returns_value_before_expiration(self, clock):
+        """
+        Dado una entrada que expira a las 11:00
+        Cuando se consulta antes de esa hora
+        Entonces se retorna el valor y cuenta como hit
+        """
+        cache = OHLCVCache(max_bytes=1000, clock=clock)
+        cache.put("k", "valor", expires_at=clock.now.replace(hour=11, minute=0), nbytes=10)
+
+        clock.advance(minutes=44)
+
+        assert cache.get("k") == "valor"
+        assert cache.get_stats()["hits"] == 1
+
+    def test_entry_expires_exactly_at_expires_at(self, clock):
+        """
+        Dado una entrada que expira a las 11:00
+        Cuando se consulta a las 11:00
+        Entonces se elimina y cuenta como miss y expiración
+        """
+        cache = OHLCVCache(max_bytes=1000, clock=clock)
+        cache.put("k", "valor", expires_at=clock.now.replace(hour=11, minute=0), nbytes=10)
+
+        clock.advance(minutes=45)
+
+        assert cache.get("k") is None
+        stats = cache.get_stats()
+        assert stats["misses"] == 1
+        assert stats["expirations"] == 1
+        assert stats["bytes"] == 0
+
+    def test_lru_eviction_respects_max_bytes(self, clock):
+        """
+        Dado un caché de 30 bytes con tres entradas de 10
+        Cuando se usa la primera y se agrega una cuarta
+        Entonces se desaloja la menos usada recientemente (la segunda)
+        """
+        cache = OHLCVCache(max_bytes=30, clock=clock)
+        expires = clock.now + timedelta(hours=1)
+        for key in ("a", "b", "c"):
+            cache.put(key, key, expires_at=expires, nbytes=10)
+
+        cache.get("a")
+        cache.put("d", "d", expires_at=expires, nbytes=10)
+
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache and "d" in cache
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes"] == 30
+
+    def test_put_replaces_existing_entry(self, clock):
+        """
+        Dado una entrada existente
+        Cuando se guarda la misma clave con otro tamaño
+        Entonces los bytes se recalculan sin duplicar
+        """
+        cache = OHLCVCache(max_bytes=100, clock=clock)
+        expires = clock.now + timedelta(hours=1)
+        cache.put("k", 1, expires_at=expires, nbytes=40)
+        cache.put("k", 2, expires_at=expires, nbytes=25)
+
+        assert cache.get("k") == 2
+        assert cache.get_stats()["bytes"] == 25
+        assert len(cache) == 1
+
+    def test_oversized_entry_is_not_stored(self, clock):
+        """
+        Dado una entrada más grande que max_bytes
+        Cuando se intenta guardar
+        Entonces se rechaza sin desalojar las demás
+        """
+        cache = OHLCVCache(max_bytes=50, clock=clock)
+        expires = clock.now + timedelta(hours=1)
+        cache.put("a", "a", expires_at=expires, nbytes=20)
+
+        assert cache.put("big", "big", expires_at=expires, nbytes=51) is False
+        assert "a" in cache
+        assert cache.get_stats()["evictions"] == 0
+
+    def test_purge_expired_removes_only_expired(self, clock):
+        """
+        Dado entradas con distintas expiraciones
+        Cuando se purga tras la primera expiración
+        Entonces solo se eliminan las vencidas
+        """
+        cache = OHLCVCache(max_bytes=100, clock=clock)
+        cache.put("m5", 1, expires_at=clock.now + timedelta(minutes=5), nbytes=10)
+        cache.put("h1", 2, expires_at=clock.now + timedelta(minutes=45), nbytes=10)
+
+        clock.advance(minutes=10)
+
+        assert cache.purge_expired() == 1
+        assert len(cache) == 1
+        assert cache.get_stats()["bytes"] == 10
+
+    def test_stats_hit_rate(self, clock):
+        """
+        Dado un hit y un miss
+        Cuando se piden estadísticas
+        Entonces hit_rate es 0.5
+        """
+        cache = OHLCVCache(max_bytes=100, clock=clock)
+        cache.put("k", 1, expires_at=clock.now + timedelta(hours=1), nbytes=10)
+        cache.get("k")
+        cache.get("otra")
+
+        assert cache.get_stats()["hit_rate"] == 0.5
+
+    def test_invalid_max_bytes_raises_error(self):
+        """
+        Dado max_bytes no positivo
+        Cuando se crea el caché
+        Entonces debe lanzar OHLCVCacheError
+        """
+        with pytest.raises(OHLCVCacheError):
+            OHLCVCache(max_bytes=0)
@@ -0,0 +1,232 @@
+"""
+Tests unitarios para el libro de cuota compartido.
+
+Verifica que los validadores de un mismo provider/API key compartan el
+consumo dentro del proceso, que varios procesos carguen atómicamente el
+mismo archivo memory-mapped y la validación del formato del archivo.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-21
+Ticket: T48 - Validación de cuota y disponibilidad de modelo IA (libro compartido)
+"""
+import multiprocessing
+
+import pytest
+
+from src.core.ia_config_manager import IAConfigManager
+from src.core.quota_ledger import QuotaLedger, QuotaLedgerError, QuotaLedgerRegistry, quota_ledgers
+from src.core.quota_validator import (
+    LEDGER_LAYOUT,
+    LocalRateLimiter,
+    QuotaReservationError,
+    QuotaValidator
+)
+
+
+NOW = 1_762_819_200.0
+
+
+def fixed_clock() -> float:
+    return NOW
+
+
+def charge_from_process(directory: str, calls: int) -> None:
+    """Registra `calls` consultas desde otro proceso sobre el libro del archivo."""
+    ledger = QuotaLedgerRegistry().get("gemini", "shared-key", LEDGER_LAYOUT, directory=directory)
+    limiter = LocalRateLimiter({}, clock=fixed_clock, ledger=ledger)
+    for _ in range(calls):
+        limiter.record(tokens=10)
+    ledger.close()
+
+
+def reserve_from_process(directory: str, attempts: int) -> None:
+    """Intenta `attempts` reservas de 100 tokens desde otro proceso y confirma las concedidas."""
+    ledger = QuotaLedgerRegistry().get("gemini", "shared-key", LEDGER_LAYOUT, directory=directory)
+    limiter = LocalRateLimiter({"tokens_per_minute": 1000}, clock=fixed_clock, ledger=ledger)
+    for _ in range(attempts):
+        try:
+            limiter.reserve(tokens=100).commit()
+        except QuotaReservationError:
+            pass
+    ledger.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_quota_ledgers():
+    """Cada test parte con el libro de cuota del proceso vacío"""
+    quota_ledgers.clear()
+    yield
+    quota_ledgers.clear()
+
+
+def make_validator(**ledger):
+    """QuotaValidator habilitado, sin caché y con reloj fijo."""
+    config = {"quota_validation": {"enabled": True, "cache_duration_seconds": 0}}
+    if ledger:
+        config["quota_validation"]["ledger"] = ledger
+    return QuotaValidator(config=config, clock=fixed_clock)
+
+
+class TestProcessRegistry:
+    """Tests para el libro compartido dentro del proceso"""
+
+    def test_validators_share_consumption(self):
+        """
+        Dado cinco validadores (uno por bot) del mismo provider
+        Cuando cada bot registra 12 consultas
+        Entonces todos ven las 60 y la cuota RPM queda agotada para todos
+        """
+        validators = [make_validator() for _ in range(5)]
+
+        for validator in validators:
+            for _ in range(12):
+                validator.record_usage(tokens=100)
+
+        for validator in validators:
+            result = validator.validate_quota()
+            assert result.requests_used == 60
+            assert not result.is_valid
+        assert len(quota_ledgers) == 1
+
+    def test_cached_result_sees_other_validators_usage(self):
+        """
+        Dado un validador B con un resultado AVAILABLE en caché
+        Cuando el validador A agota la cuota RPM compartida
+        Entonces B deja de usar su caché y reporta la cuota excedida
+        """
+        config = {"quota_validation": {"enabled": True}}
+        first = QuotaValidator(config=config, clock=fixed_clock)
+        second = QuotaValidator(config=config, clock=fixed_clock)
+        assert second.validate_quota().is_valid
+
+        first.record_usage(tokens=0, requests=60)
+
+        result = second.validate_quota()
+        assert not result.is_valid
+        assert result.requests_used == 60
+
+    def test_private_ledger_is_not_shared(self):
+        """Debe aislar el consumo si se desactiva el libro compartido"""
+        private = make_validator(shared=False)
+        shared = make_validator()
+
+        private.record_usage(tokens=100)
+
+        assert private.get_usage()["requests_per_minute"] == 1
+        assert shared.get_usage()["requests_per_minute"] == 0
+
+    def test_registry_separates_api_keys(self):
+        """Debe entregar un libro por API key y el mismo para la misma clave"""
+        registry = QuotaLedgerRegistry()
+
+        first = registry.get("gemini", "key-a", LEDGER_LAYOUT)
+
+        assert registry.get("gemini", "key-a", LEDGER_LAYOUT) is first
+        assert registry.get("gemini", "key-b", LEDGER_LAYOUT) is not first
+        registry.clear()
+
+    def test_profile_validation_sees_other_bots_usage(self):
+        """
+        Dado que otros bots consumieron las 60 requests por minuto
+        Cuando un bot pide su perfil validando cuota
+        Entonces recibe el perfil de fallback
+        """
+        config = {
+            "ia_profiles": {
+                "default_profile": "gemini-pro",
+                "profiles": {
+                    "gemini-pro": {
+                        "provider": "gemini",
+                        "model": "gemini-1.5-pro",
+                        "fallback_profile": "gemini-flash"
+                    },
+                    "gemini-flash": {"provider": "gemini", "model": "gemini-1.5-flash"}
+                }
+            }
+        }
+        manager = IAConfigManager(config=config)
+        assert manager.get_profile_for_bot("bot_1", validate_quota=True, auto_fallback=True).model == "gemini-1.5-pro"
+
+        QuotaValidator(config={"quota_validation": {"enabled": True}}).record_usage(tokens=0, requests=60)
+
+        profile = manager.get_profile_for_bot("bot_1", validate_quota=True, auto_fallback=True)
+        assert profile.model == "gemini-1.5-flash"
+
+
+class TestSharedFile:
+    """Tests para el libro compartido entre procesos"""
+
+    def test_processes_charge_the_same_ledger(self, tmp_path):
+        """
+        Dado 4 procesos que registran 50 consultas cada uno en el mismo archivo
+        Cuando terminan
+        Entonces el validador del proceso principal ve las 200 sin pérdidas
+        """
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=charge_from_process, args=(str(tmp_path), 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            assert worker.exitcode == 0
+
+        ledger = quota_ledgers.get("gemini", "shared-key", LEDGER_LAYOUT, directory=tmp_path)
+        usage = LocalRateLimiter({}, clock=fixed_clock, ledger=ledger).usage()
+
+        assert usage["requests_per_minute"] == 200
+        assert usage["tokens_per_day"] == 2000
+
+    def test_processes_reserve_up_to_the_limit(self, tmp_path):
+        """
+        Dado un límite de 1000 tokens por minuto compartido en un archivo
+        Cuando 4 procesos intentan 10 reservas de 100 tokens cada uno
+        Entonces se conceden exactamente 10 y el uso queda justo en el límite
+        """
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=reserve_from_process, args=(str(tmp_path), 10))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            assert worker.exitcode == 0
+
+        ledger = quota_ledgers.get("gemini", "shared-key", LEDGER_LAYOUT, directory=tmp_path)
+        usage = LocalRateLimiter({}, clock=fixed_clock, ledger=ledger).usage()
+
+        assert usage["tokens_per_minute"] == 1000
+        assert usage["requests_per_minute"] == 10
+
+    def test_usage_survives_reopening(self, tmp_path):
+        """Debe conservar el consumo al reabrir el archivo"""
+        validator = make_validator(directory=str(tmp_path))
+        validator.record_usage(tokens=500)
+        quota_ledgers.clear()
+
+        reopened = make_validator(directory=str(tmp_path))
+
+        assert reopened.get_usage()["tokens_per_minute"] == 500
+
+    def test_file_with_other_layout_raises_error(self, tmp_path):
+        """Debe rechazar un archivo con otro layout o tamaño"""
+        path = tmp_path / "quota.ledger"
+        QuotaLedger({"a": 4}, path=path).close()
+
+        with pytest.raises(QuotaLedgerError):
+            QuotaLedger({"b": 4}, path=path)
+        with pytest.raises(QuotaLedgerError):
+            QuotaLedger({"a": 8}, path=path)
+
+    def test_closed_ledger_raises_error(self):
+        """Debe fallar al usar un libro cerrado"""
+        ledger = QuotaLedger({"a": 4})
+        ledger.close()
+
+        with pytest.raises(QuotaLedgerError):
+            with ledger.locked():
+                pass
@@ -8,6 +8,8 @@ Autor: Sistema Botrading
 Fecha: 2025-11-06
 Ticket: T48 - Validación de cuota y disponibilidad de modelo IA
 """
+import threading
+
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock, Mock
@@ -16,15 +18,27 @@ from zoneinfo import ZoneInfo
 
 # Importar clase a testear (TDD Red - aún no existe)
 from src.core.quota_validator import (
+    LocalRateLimiter,
+    SlidingWindowCounter,
     QuotaValidator,
     QuotaValidationError,
+    QuotaReservationError,
     QuotaStatus,
     ModelAvailability
 )
+from src.core.quota_ledger import quota_ledgers
 
 
 # ==================== FIXTURES ====================
 
+@pytest.fixture(autouse=True)
+def fresh_quota_ledgers():
+    """Cada test parte con el libro de cuota del proceso vacío"""
+    quota_ledgers.clear()
+    yield
+    quota_ledgers.clear()
+
+
 @pytest.fixture
 def sample_quota_config():
     """Configuración de ejemplo para QuotaValidator"""
@@ -518,6 +532,311 @@ class TestCompleteValidation:
                 assert result.model_ok is False
 
 
+# ==================== TESTS DEL LIMITADOR LOCAL ====================
+
+class FakeClock:
+    """Reloj controlable para las ventanas deslizantes"""
+    
+    def __init__(self, now: float = 1_762_819_200.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.mark.unit
+class TestSlidingWindowCounter:
+    """Tests para el contador de ventana deslizante"""
+    
+    def test_usage_expires_after_window(self):
+        """
+        Dado 10 unidades registradas en t=0 y 5 en t=30
+        Cuando avanza el tiempo
+        Entonces a los 60 s solo quedan las 5 y a los 90 s ninguna
+        """
+        counter = SlidingWindowCounter(60, 1)
+        counter.add(10, 0.0)
+        counter.add(5, 30.0)
+        
+        assert counter.total(59.0) == 15
+        assert counter.total(60.0) == 5
+        assert counter.total(90.0) == 0
+    
+    def test_seconds_until_below_limit(self):
+        """Debe calcular cuándo el total vuelve a estar bajo el límite"""
+        counter = SlidingWindowCounter(60, 1)
+        counter.add(10, 0.0)
+        counter.add(5, 30.0)
+        
+        assert counter.seconds_until_below(12, 40.0) == 20.0
+        assert counter.seconds_until_below(16, 40.0) == 0.0
+        assert counter.seconds_until_below(1, 40.0) == 50.0
+    
+    def test_invalid_resolution_raises_error(self):
+        """Debe rechazar una ventana que no es múltiplo de la resolución"""
+        with pytest.raises(QuotaValidationError):
+            SlidingWindowCounter(60, 7)
+
+
+@pytest.mark.unit
+class TestLocalRateLimiter:
+    """Tests para el limitador local de QuotaValidator"""
+    
+    @pytest.fixture
+    def local_config(self, sample_quota_config):
+        """Configuración sin caché (el caché usa el reloj real, no FakeClock)"""
+        sample_quota_config["quota_validation"]["cache_duration_seconds"] = 0
+        return sample_quota_config
+    
+    def test_burst_over_rpm_is_blocked_until_window_slides(self, local_config):
+        """
+        Dado un límite de 60 requests por minuto
+        Cuando se registran 60 consultas en un mismo segundo
+        Entonces validate_quota bloquea hasta que pasa el minuto
+        """
+        clock = FakeClock()
+        validator = QuotaValidator(config=local_config, clock=clock)
+        
+        for _ in range(60):
+            assert validator.validate_quota().is_valid
+            validator.record_usage(tokens=100)
+        
+        blocked = validator.validate_quota()
+        assert not blocked.is_valid
+        assert blocked.status == QuotaStatus.EXCEEDED
+        assert blocked.requests_used == 60
+        
+        clock.advance(60)
+        assert validator.validate_quota().is_valid
+    
+    def test_tokens_per_minute_limit(self, local_config):
+        """Debe bloquear al alcanzar el límite de tokens por minuto"""
+        clock = FakeClock()
+        validator = QuotaValidator(config=local_config, clock=clock)
+        
+        validator.record_usage(tokens=20_000)
+        assert validator.validate_quota().status == QuotaStatus.AVAILABLE
+        validator.record_usage(tokens=6_000)
+        assert validator.validate_quota().status == QuotaStatus.WARNING
+        validator.record_usage(tokens=6_000)
+        
+        result = validator.validate_quota()
+        assert not result.is_valid
+        assert result.tokens_used == 32_000
+    
+    def test_daily_limit_outlasts_minute_window(self, sample_quota_config):
+        """
+        Dado 1500 requests repartidos en el día (límite diario)
+        Cuando pasa más de un minuto
+        Entonces sigue bloqueado por el límite diario
+        """
+        clock = FakeClock()
+        limiter = LocalRateLimiter(
+            sample_quota_config["quota_validation"]["quota_limits"], clock=clock
+        )
+        for _ in range(30):
+            limiter.record(tokens=10, requests=50)
+            clock.advance(120)
+        
+        usage = limiter.snapshot()
+        
+        assert not usage.available
+        assert usage.limiting_window == "requests_per_day"
+        assert usage.requests_used == 1500
+        assert usage.retry_after_seconds > 20 * 3600
+    
+    def test_exceeded_result_is_not_cached_past_retry_after(self, sample_quota_config):
+        """Debe volver a consultar el limitador cuando se libera la cuota"""
+        clock = FakeClock()
+        validator = QuotaValidator(config=sample_quota_config, clock=clock)
+        validator.record_usage(tokens=0, requests=60)
+        
+        result = validator.validate_quota()
+        
+        assert not result.is_valid
+        assert validator._cache_ttl_seconds <= 60
+    
+    def test_token_status_with_unlimited_requests(self, local_config):
+        """
+        Dado límites de requests en 0 (sin límite) y tokens al 90%
+        Cuando se valida la cuota
+        Entonces el estado y el mensaje usan los tokens sin dividir por cero
+        """
+        local_config["quota_validation"]["quota_limits"] = {
+            "requests_per_minute": 0,
+            "requests_per_day": 0,
+            "tokens_per_minute": 10_000,
+            "tokens_per_day": 0
+        }
+        validator = QuotaValidator(config=local_config, clock=FakeClock())
+        validator.record_usage(tokens=9_000)
+        
+        result = validator.validate_quota()
+        
+        assert result.status == QuotaStatus.WARNING
+        assert "90.0%" in result.message
+        assert "tokens" in result.message
+    
+    def test_exceeded_message_names_limiting_window(self, local_config):
+        """Debe reportar EXCEEDED con la ventana excedida en el mensaje"""
+        validator = QuotaValidator(config=local_config, clock=FakeClock())
+        validator.record_usage(tokens=32_000)
+        
+        result = validator.validate_quota()
+        
+        assert result.status == QuotaStatus.EXCEEDED
+        assert result.message.startswith("❌ Cuota excedida en tokens_per_minute")
+        assert "32000/32000 tokens" in result.message
+    
+    def test_reload_config_applies_new_limits(self, local_config):
+        """Debe aplicar los nuevos límites al uso ya registrado"""
+        validator = QuotaValidator(config=local_config, clock=FakeClock())
+        validator.record_usage(tokens=0, requests=60)
+        assert not validator.validate_quota().is_valid
+        
+        validator.reload_config({"quota_validation": {"quota_limits": {"requests_per_minute": 120}}})
+        
+        assert validator.validate_quota().is_valid
+        assert validator.get_usage()["requests_per_minute"] == 60
+    
+    def test_production_path_does_not_use_mocks(self, quota_validator):
+        """Debe responder con el uso real y no con un MagicMock"""
+        response = quota_validator._check_gemini_quota()
+        
+        assert not isinstance(response, MagicMock)
+        assert response.requests_used == 0
+        assert response.available
+
+
+@pytest.mark.unit
+class TestQuotaReservation:
+    """Tests para las reservas de cuota (reserve, commit, release)"""
+    
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+    
+    @pytest.fixture
+    def validator(self, sample_quota_config, clock):
+        """Validador sin caché con reservas de 30 segundos"""
+        sample_quota_config["quota_validation"]["cache_duration_seconds"] = 0
+        sample_quota_config["quota_validation"]["reservation"] = {"lease_seconds": 30}
+        return QuotaValidator(config=sample_quota_config, clock=clock)
+    
+    def test_concurrent_reservations_stop_at_limit(self, validator):
+        """
+        Dado un límite de 32000 tokens por minuto
+        Cuando 10 hilos reservan 5000 tokens a la vez
+        Entonces exactamente 6 reservas se conceden y el resto se rechaza
+        """
+        granted, rejected = [], []
+        barrier = threading.Barrier(10)
+        
+        def bot():
+            barrier.wait()
+            try:
+                granted.append(validator.reserve(estimated_tokens=5000))
+            except QuotaReservationError:
+                rejected.append(True)
+        
+        threads = [threading.Thread(target=bot) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(granted) == 6
+        assert len(rejected) == 4
+        assert validator.validate_quota().tokens_used == 30_000
+    
+    def test_commit_records_actual_usage(self, validator):
+        """Debe registrar los tokens reales y liberar lo reservado"""
+        lease = validator.reserve(estimated_tokens=8000)
+        
+        lease.commit(actual_tokens=1200)
+        
+        assert lease.closed
+        assert validator.get_usage()["tokens_per_minute"] == 1200
+        assert validator.get_usage()["requests_per_minute"] == 1
+        assert validator.validate_quota().tokens_used == 1200
+    
+    def test_release_frees_reservation_without_usage(self, validator):
+        """Debe devolver la cuota reservada si la consulta falla"""
+        lease = validator.reserve(estimated_tokens=32_000)
+        with pytest.raises(QuotaReservationError):
+            validator.reserve(estimated_tokens=1)
+        
+        lease.release()
+        lease.release()
+        
+        assert validator.get_usage()["tokens_per_minute"] == 0
+        assert validator.reserve(estimated_tokens=32_000)
+    
+    def test_expired_lease_is_released_automatically(self, validator, clock):
+        """
+        Dado una reserva que nunca se cierra
+        Cuando pasan los 30 segundos de la reserva
+        Entonces la cuota vuelve a estar disponible
+        """
+        lease = validator.reserve(estimated_tokens=32_000)
+        assert not validator.validate_quota().is_valid
+        
+        clock.advance(30)
+        
+        assert validator.validate_quota().is_valid
+        assert validator.reserve(estimated_tokens=32_000)
+        lease.commit(actual_tokens=500)
+        assert validator.get_usage()["tokens_per_minute"] == 500
+    
+    def test_rejection_reports_retry_after(self, validator, clock):
+        """Debe indicar la ventana y cuánto esperar cuando no hay cuota"""
+        validator.record_usage(tokens=30_000)
+        clock.advance(10)
+        
+        with pytest.raises(QuotaReservationError) as error:
+            validator.reserve(estimated_tokens=5000)
+        
+        assert error.value.limiting_window == "tokens_per_minute"
+        assert error.value.retry_after_seconds == 50.0
+    
+    def test_reservation_larger_than_limit_raises_error(self, validator):
+        """Debe rechazar una reserva que nunca cabría en el límite"""
+        with pytest.raises(QuotaReservationError) as error:
+            validator.reserve(estimated_tokens=40_000)
+        
+        assert error.value.retry_after_seconds is None
+    
+    def test_context_manager_releases_on_error(self, validator):
+        """Debe liberar con excepción y confirmar lo estimado al salir sin cerrar"""
+        with pytest.raises(RuntimeError):
+            with validator.reserve(estimated_tokens=4000):
+                raise RuntimeError("timeout de Gemini")
+        assert validator.get_usage()["tokens_per_minute"] == 0
+        
+        with validator.reserve(estimated_tokens=4000):
+            pass
+        assert validator.get_usage()["tokens_per_minute"] == 4000
+    
+    def test_double_commit_raises_error(self, validator):
+        """Debe fallar al confirmar una reserva ya cerrada"""
+        lease = validator.reserve(estimated_tokens=100)
+        lease.commit()
+        
+        with pytest.raises(QuotaValidationError):
+            lease.commit()
+    
+    def test_disabled_validation_never_rejects(self, validator):
+        """Debe conceder reservas aunque no quepan si la validación está desactivada"""
+        validator.enabled = False
+        
+        lease = validator.reserve(estimated_tokens=100_000)
+        
+        assert lease.tokens == 100_000
+
+
 # ==================== TESTS DE INTEGRACIÓN ====================
 
 @pytest.mark.integration
@@ -0,0 +1,126 @@
+"""
+Tests unitarios para SingleFlight.
+
+Verifica que las llamadas concurrentes con la misma clave compartan una sola
+ejecución, su resultado y su excepción.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-13
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (single-flight)
+"""
+import threading
+import time
+
+import pytest
+
+from src.core.single_flight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Lanza `callers` hilos sobre la misma clave y espera a que todos entren."""
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.time() + 5
+    while flight.get_stats().get(key, {}).get("calls", 0) < callers and time.time() < deadline:
+        time.sleep(0.005)
+    return threads, results, errors
+
+
+class TestSingleFlight:
+    """Tests para la deduplicación por clave"""
+
+    def test_sequential_calls_execute_each_time(self):
+        """
+        Dado llamadas que no se solapan
+        Cuando se ejecutan en secuencia
+        Entonces cada una ejecuta la función
+        """
+        flight = SingleFlight()
+        counter = iter(range(10))
+
+        assert flight.do("k", lambda: next(counter)) == 0
+        assert flight.do("k", lambda: next(counter)) == 1
+        assert flight.get_stats()["k"] == {"calls": 2, "executions": 2, "coalesced": 0}
+
+    def test_concurrent_calls_share_result(self):
+        """
+        Dado cinco hilos con la misma clave
+        Cuando la primera ejecución aún no termina
+        Entonces todos reciben el mismo objeto y la función corre una vez
+        """
+        flight = SingleFlight()
+        release = threading.Event()
+        executions = []
+
+        def fetch():
+            executions.append(1)
+            release.wait(timeout=5)
+            return object()
+
+        threads, results, _ = run_concurrently(flight, "k", fetch, 5)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert len(executions) == 1
+        assert len(results) == 5
+        assert all(r is results[0] for r in results)
+        assert flight.get_stats()["k"]["coalesced"] == 4
+        assert flight.in_flight() == 0
+
+    def test_exception_is_propagated_to_waiters(self):
+        """
+        Dado una ejecución que falla
+        Cuando hay hilos esperando la misma clave
+        Entonces todos reciben la excepción
+        """
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fetch():
+            release.wait(timeout=5)
+            raise ValueError("terminal caído")
+
+        threads, results, errors = run_concurrently(flight, "k", fetch, 3)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert results == []
+        assert len(errors) == 3
+        assert all(isinstance(e, ValueError) for e in errors)
+
+    def test_different_keys_do_not_wait(self):
+        """
+        Dado una clave con una ejecución bloqueada
+        Cuando se pide otra clave
+        Entonces se ejecuta sin esperar
+        """
+        flight = SingleFlight()
+        release = threading.Event()
+        blocked = threading.Thread(target=lambda: flight.do("a", lambda: release.wait(5)))
+        blocked.start()
+
+        assert flight.do("b", lambda: "ok") == "ok"
+
+        release.set()
+        blocked.join(timeout=5)
+
+    def test_reset_stats(self):
+        """Debe limpiar los contadores"""
+        flight = SingleFlight()
+        flight.do("k", lambda: 1)
+
+        flight.reset_stats()
+
+        assert flight.get_stats() == {}
@@ -0,0 +1,114 @@
+"""
+Tests unitarios para StaleFallback.
+
+Verifica el último dato válido con su antigüedad, el backoff exponencial de
+la ventana negativa y la recuperación de la serie.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-13
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (serve-stale)
+"""
+import pytest
+
+from src.core.mt5_data_extractor import Timeframe
+from src.core.stale_fallback import StaleFallback, StaleFallbackError
+
+
+KEY = ("EURUSD", Timeframe.H1, 100, False)
+
+
+class FakeClock:
+    """Reloj controlable en segundos."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestStaleFallback:
+    """Tests para el respaldo con ventana negativa"""
+
+    def test_last_good_reports_age(self):
+        """
+        Dado un dato guardado hace 30 segundos
+        Cuando se pide el último dato válido
+        Entonces se retorna con su antigüedad
+        """
+        clock = FakeClock()
+        fallback = StaleFallback(clock=clock)
+        fallback.record_success(KEY, "velas")
+        clock.now += 30
+
+        assert fallback.get_last_good(KEY) == ("velas", 30)
+        assert fallback.get_stats()["stale_served"] == 1
+
+    def test_last_good_older_than_max_is_not_served(self):
+        """
+        Dado un dato más antiguo que max_stale_seconds
+        Cuando se pide el último dato válido
+        Entonces se retorna None
+        """
+        clock = FakeClock()
+        fallback = StaleFallback(max_stale_seconds=60, clock=clock)
+        fallback.record_success(KEY, "velas")
+        clock.now += 61
+
+        assert fallback.get_last_good(KEY) is None
+
+    def test_failures_back_off_exponentially(self):
+        """
+        Dado fallas consecutivas
+        Cuando se registran
+        Entonces la ventana negativa se duplica hasta el máximo
+        """
+        clock = FakeClock()
+        fallback = StaleFallback(backoff_base=5, backoff_max=15, clock=clock)
+
+        windows = [fallback.record_failure(KEY, "None").retry_at - clock.now for _ in range(4)]
+
+        assert windows == [5, 10, 15, 15]
+
+    def test_suppression_is_per_series(self):
+        """
+        Dado una falla en EURUSD H1 con count=100
+        Cuando se consulta otra solicitud de la misma serie y otra serie
+        Entonces solo la misma serie queda suprimida hasta vencer el backoff
+        """
+        clock = FakeClock()
+        fallback = StaleFallback(backoff_base=10, clock=clock)
+        fallback.record_failure(KEY, "None")
+
+        assert fallback.is_suppressed(("EURUSD", Timeframe.H1, 50, True))
+        assert not fallback.is_suppressed(("EURUSD", Timeframe.M5, 100, False))
+
+        clock.now += 10
+        assert not fallback.is_suppressed(KEY)
+
+    def test_success_clears_failure(self):
+        """
+        Dado una serie con fallas
+        Cuando se registra un éxito
+        Entonces la ventana negativa se cierra y cuenta como recuperación
+        """
+        fallback = StaleFallback(clock=FakeClock())
+        fallback.record_failure(KEY, "None")
+
+        fallback.record_success(KEY, "velas")
+
+        assert fallback.get_failure(KEY) is None
+        stats = fallback.get_stats()
+        assert stats["recoveries"] == 1
+        assert stats["failing_series"] == {}
+
+    def test_invalid_parameters_raise_error(self):
+        """
+        Dado parámetros inválidos
+        Cuando se crea el fallback
+        Entonces debe lanzar StaleFallbackError
+        """
+        with pytest.raises(StaleFallbackError):
+            StaleFallback(max_stale_seconds=0)
+        with pytest.raises(StaleFallbackError):
+            StaleFallback(backoff_base=10, backoff_max=5)
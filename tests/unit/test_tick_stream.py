@@ -0,0 +1,323 @@
+"""
+Tests unitarios para el TickStream.
+
+Verifica la agregación incremental de ticks en velas, la detección de cierre
+por tick y por tiempo, la marca de agua sin duplicados y las estadísticas
+de spread.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-13
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (streaming de ticks)
+"""
+import threading
+
+import pytest
+import numpy as np
+from types import SimpleNamespace
+
+from src.core.mt5_data_extractor import Timeframe
+from src.core.tick_stream import (
+    MT5_TICKS_DTYPE,
+    SpreadStats,
+    TickBarAggregator,
+    TickStream,
+    TickStreamError
+)
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC (múltiplo de 60 y 300)
+
+
+def make_ticks(msc_offsets, bids, spread=0.0002, start=BASE_TIME):
+    """Crea ticks con time_msc = start*1000 + offset y ask = bid + spread."""
+    ticks = np.zeros(len(msc_offsets), dtype=MT5_TICKS_DTYPE)
+    ticks['time_msc'] = start * 1000 + np.asarray(msc_offsets, dtype=np.int64)
+    ticks['time'] = ticks['time_msc'] // 1000
+    ticks['bid'] = bids
+    ticks['ask'] = ticks['bid'] + spread
+    ticks['volume'] = 1
+    return ticks
+
+
+class FakeMT5:
+    """Terminal simulado que sirve ticks de una lista acumulada."""
+
+    COPY_TICKS_ALL = -1
+
+    def __init__(self, ticks: np.ndarray):
+        self.ticks = ticks
+        self.from_calls = []
+
+    def symbol_info(self, symbol):
+        return SimpleNamespace(point=0.00001)
+
+    def symbol_info_tick(self, symbol):
+        last = self.ticks[-1]
+        return SimpleNamespace(time=int(last['time']), time_msc=int(last['time_msc']))
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags):
+        t = self.ticks['time']
+        return self.ticks[(t >= date_from) & (t < date_to)]
+
+    def copy_ticks_from(self, symbol, date_from, count, flags):
+        self.from_calls.append(date_from)
+        return self.ticks[self.ticks['time'] >= date_from][:count]
+
+
+class TestTickBarAggregator:
+    """Tests para la agregación incremental"""
+
+    def test_ticks_build_current_bar(self):
+        """
+        Dado ticks dentro del mismo minuto
+        Cuando se agregan
+        Entonces forman la vela en formación sin cerrar ninguna
+        """
+        aggregator = TickBarAggregator(60, point=0.00001)
+
+        closed = aggregator.add_ticks(make_ticks([0, 10_000, 20_000], [1.1, 1.102, 1.101]))
+
+        bar = aggregator.current_bar[0]
+        assert len(closed) == 0
+        assert bar['time'] == BASE_TIME
+        assert (bar['open'], bar['high'], bar['low'], bar['close']) == (1.1, 1.102, 1.1, 1.101)
+        assert bar['tick_volume'] == 3
+        assert bar['spread'] == 20
+
+    def test_tick_of_next_period_closes_bar(self):
+        """
+        Dado una vela en formación
+        Cuando llega un tick del minuto siguiente
+        Entonces la vela se cierra combinando los lotes anteriores
+        """
+        aggregator = TickBarAggregator(60)
+        aggregator.add_ticks(make_ticks([0, 30_000], [1.1, 1.105]))
+        aggregator.add_ticks(make_ticks([45_000], [1.095]))
+
+        closed = aggregator.add_ticks(make_ticks([60_001], [1.2]))
+
+        assert len(closed) == 1
+        assert closed['open'][0] == 1.1
+        assert closed['high'][0] == 1.105
+        assert closed['low'][0] == 1.095
+        assert closed['close'][0] == 1.095
+        assert closed['tick_volume'][0] == 3
+        assert aggregator.current_bar['time'][0] == BASE_TIME + 60
+
+    def test_batch_spanning_periods_closes_all_but_last(self):
+        """
+        Dado un lote que cubre tres minutos
+        Cuando se agrega
+        Entonces se cierran dos velas y la tercera queda en formación
+        """
+        aggregator = TickBarAggregator(60)
+
+        closed = aggregator.add_ticks(make_ticks([0, 61_000, 125_000], [1.1, 1.2, 1.3]))
+
+        assert closed['time'].tolist() == [BASE_TIME, BASE_TIME + 60]
+        assert aggregator.current_bar['close'][0] == 1.3
+
+    def test_close_until_closes_on_time_without_ticks(self):
+        """
+        Dado una vela en formación sin ticks posteriores
+        Cuando la hora del servidor supera el fin del período
+        Entonces la vela se cierra y los ticks tardíos se descartan
+        """
+        aggregator = TickBarAggregator(60)
+        aggregator.add_ticks(make_ticks([0], [1.1]))
+
+        assert len(aggregator.close_until(BASE_TIME + 59.9)) == 0
+        closed = aggregator.close_until(BASE_TIME + 60)
+
+        assert closed['time'].tolist() == [BASE_TIME]
+        assert aggregator.current_bar is None
+        assert len(aggregator.add_ticks(make_ticks([59_000], [1.0]))) == 0
+        assert aggregator.late_ticks == 1
+
+    def test_spread_stats_are_running(self):
+        """
+        Dado dos lotes con distinto spread
+        Cuando se agregan
+        Entonces la media, mínimo y máximo se actualizan incrementalmente
+        """
+        aggregator = TickBarAggregator(60)
+        aggregator.add_ticks(make_ticks([0, 1000], [1.1, 1.1], spread=0.0002))
+        aggregator.add_ticks(make_ticks([2000, 3000], [1.1, 1.1], spread=0.0004))
+
+        stats = aggregator.spread.to_dict()
+        assert stats["count"] == 4
+        assert stats["mean"] == pytest.approx(0.0003)
+        assert stats["min"] == pytest.approx(0.0002)
+        assert stats["max"] == pytest.approx(0.0004)
+
+    def test_invalid_timeframe_raises_error(self):
+        """
+        Dado un período no positivo
+        Cuando se crea el agregador
+        Entonces debe lanzar TickStreamError
+        """
+        with pytest.raises(TickStreamError):
+            TickBarAggregator(0)
+
+
+class TestSpreadStats:
+    """Tests para las estadísticas de spread"""
+
+    def test_empty_stats(self):
+        """Sin datos, min debe ser None"""
+        assert SpreadStats().to_dict()["min"] is None
+
+
+class TestTickStream:
+    """Tests para el stream con marca de agua"""
+
+    def test_first_poll_backfills_current_bar(self):
+        """
+        Dado ticks desde la apertura de la vela M1 actual
+        Cuando se hace la primera consulta
+        Entonces se descargan con copy_ticks_range desde la apertura
+        """
+        mt5 = FakeMT5(make_ticks([0, 5_000, 10_000], [1.1, 1.101, 1.102]))
+        stream = TickStream(mt5, "EURUSD", Timeframe.M1, clock=lambda: 0.0)
+
+        batch = stream.poll()
+
+        assert len(batch.ticks) == 3
+        assert batch.current_bar['open'][0] == 1.1
+        assert stream.aggregator.point == 0.00001
+
+    def test_watermark_skips_already_delivered_ticks(self):
+        """
+        Dado ticks que comparten el mismo milisegundo
+        Cuando llegan nuevos ticks en ese mismo segundo
+        Entonces solo se entregan los nuevos
+        """
+        mt5 = FakeMT5(make_ticks([0, 5_000, 5_000], [1.1, 1.101, 1.102]))
+        stream = TickStream(mt5, "EURUSD", Timeframe.M1, clock=lambda: 0.0)
+        stream.poll()
+
+        mt5.ticks = np.concatenate([mt5.ticks, make_ticks([5_000, 5_500], [1.103, 1.104])])
+        batch = stream.poll()
+
+        assert batch.ticks['bid'].tolist() == [1.103, 1.104]
+        assert mt5.from_calls == [BASE_TIME + 5]
+        assert stream.poll().ticks.size == 0
+
+    def test_stream_yields_close_from_next_tick(self):
+        """
+        Dado un stream activo
+        Cuando llega un tick del siguiente minuto
+        Entonces el lote informa el cierre con su spread
+        """
+        mt5 = FakeMT5(make_ticks([0, 30_000], [1.1, 1.105]))
+        stream = TickStream(mt5, "EURUSD", Timeframe.M1, poll_interval=0, clock=lambda: 0.0)
+        generator = stream.stream(max_polls=2)
+        next(generator)
+
+        mt5.ticks = np.concatenate([mt5.ticks, make_ticks([60_050], [1.2])])
+        batch = next(generator)
+
+        assert batch.has_close
+        assert batch.closed_bars['close'][0] == 1.105
+        assert batch.spread["count"] == 3
+
+    def test_stream_closes_on_estimated_server_time(self):
+        """
+        Dado un mercado sin ticks nuevos
+        Cuando pasa el tiempo local más allá del fin del período
+        Entonces el stream emite el cierre por tiempo
+        """
+        mt5 = FakeMT5(make_ticks([50_000], [1.1]))
+        now = [100.0]
+        stream = TickStream(mt5, "EURUSD", Timeframe.M1, clock=lambda: now[0])
+        stream.poll()
+
+        now[0] = 109.9
+        assert not stream.poll().has_close
+        now[0] = 110.0
+        batch = stream.poll()
+
+        assert batch.has_close
+        assert batch.current_bar is None
+        assert stream.get_stats()["closed_bars"] == 1
+
+    def test_stop_ends_generator(self):
+        """
+        Dado un stream sin límite de consultas
+        Cuando se llama stop
+        Entonces el generador termina
+        """
+        mt5 = FakeMT5(make_ticks([0], [1.1]))
+        stream = TickStream(mt5, "EURUSD", Timeframe.M1, sleep=lambda s: stream.stop())
+
+        batches = list(stream.stream())
+
+        assert len(batches) == 1
+
+    def test_no_ticks_available_raises_error(self):
+        """
+        Dado un símbolo sin ticks
+        Cuando se hace la primera consulta
+        Entonces debe lanzar TickStreamError
+        """
+        mt5 = FakeMT5(make_ticks([0], [1.1]))
+        mt5.symbol_info_tick = lambda symbol: None
+        stream = TickStream(mt5, "EURUSD", Timeframe.M1)
+
+        with pytest.raises(TickStreamError):
+            stream.poll()
+
+    def test_failed_tick_request_raises_error(self):
+        """
+        Dado un terminal que retorna None en copy_ticks_from
+        Cuando se consultan ticks nuevos
+        Entonces debe lanzar TickStreamError con el error de MT5 en vez de un lote vacío
+        """
+        mt5 = FakeMT5(make_ticks([0], [1.1]))
+        mt5.last_error = lambda: (-10004, "No IPC connection")
+        stream = TickStream(mt5, "EURUSD", Timeframe.M1)
+        stream.poll()
+        mt5.copy_ticks_from = lambda *args: None
+
+        with pytest.raises(TickStreamError, match="-10004"):
+            stream.poll()
+
+    def test_saturated_second_is_completed_by_range(self):
+        """
+        Dado más de batch_size ticks dentro del mismo segundo
+        Cuando se consultan ticks nuevos
+        Entonces el resto del segundo se pide por rango y no se pierde ningún tick
+        """
+        mt5 = FakeMT5(make_ticks([0], [1.1]))
+        stream = TickStream(mt5, "EURUSD", Timeframe.M1, batch_size=3, clock=lambda: 0.0)
+        stream.poll()
+
+        burst = make_ticks([1_000, 1_100, 1_200, 1_300, 1_400, 2_000], [1.101, 1.102, 1.103, 1.104, 1.105, 1.106])
+        mt5.ticks = np.concatenate([mt5.ticks, burst])
+        first = stream.poll()
+        mt5.ticks = np.concatenate([mt5.ticks, make_ticks([2_500], [1.107])])
+        second = stream.poll()
+
+        assert first.ticks['bid'].tolist() == [1.101, 1.102, 1.103, 1.104, 1.105, 1.106]
+        assert second.ticks['bid'].tolist() == [1.107]
+
+    def test_terminal_calls_use_extractor_lock(self):
+        """
+        Dado un stream creado desde un extractor
+        Cuando consulta el terminal
+        Entonces cada llamada se hace con el lock del extractor tomado
+        """
+        lock = threading.Lock()
+        mt5 = FakeMT5(make_ticks([0, 1_000], [1.1, 1.101]))
+        held = []
+        for name in ("symbol_info", "symbol_info_tick", "copy_ticks_range", "copy_ticks_from"):
+            call = getattr(mt5, name)
+            setattr(mt5, name, lambda *args, call=call: held.append(lock.locked()) or call(*args))
+        extractor = SimpleNamespace(_mt5=mt5, terminal_lock=lock)
+
+        stream = TickStream.from_extractor(extractor, "EURUSD", Timeframe.M1, clock=lambda: 0.0)
+        stream.poll()
+        stream.poll()
+
+        assert len(held) == 4
+        assert all(held)
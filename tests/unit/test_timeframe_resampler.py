@@ -0,0 +1,203 @@
+"""
+Tests unitarios para el TimeframeResampler.
+
+Verifica la agregación vectorizada por buckets de timeframes superiores y la
+verificación contra velas del terminal.
+
+Autor: Sistema Botrading
+Fecha: 2025-11-12
+Ticket: T07 - Extracción de velas cerradas OHLCV por timeframe (resampling local)
+"""
+import pytest
+import numpy as np
+
+from src.core.mt5_data_extractor import Timeframe
+from src.core.timeframe_resampler import (
+    ResampleError,
+    TimeframeResampler,
+    can_resample,
+    compare_rates,
+    resample_rates
+)
+
+
+BASE_TIME = 1_762_819_200  # 2025-11-11 00:00 UTC
+
+
+@pytest.fixture
+def m5_rates(make_rates):
+    """Crea n velas M5 con precios crecientes y volumen 1 por vela."""
+    def build(n: int, start: int = BASE_TIME) -> np.ndarray:
+        return make_rates(n, start=start, trend=0.0001, body=0.00005, wick=0.0002, volume=1, spread=10)
+    return build
+
+
+class TestResampleRates:
+    """Tests para la agregación por buckets"""
+
+    def test_can_resample_requires_multiple(self):
+        """
+        Dado pares de timeframes
+        Cuando se consulta si se pueden derivar
+        Entonces solo acepta múltiplos mayores
+        """
+        assert can_resample(Timeframe.M5, Timeframe.H1)
+        assert can_resample(Timeframe.M15, Timeframe.H4)
+        assert not can_resample(Timeframe.H1, Timeframe.M5)
+        assert not can_resample(Timeframe.H1, Timeframe.H1)
+
+    def test_resample_m5_to_h1_aggregates_ohlcv(self, m5_rates):
+        """
+        Dado 24 velas M5 (2 horas completas)
+        Cuando se derivan velas H1
+        Entonces cada vela H1 agrega open, high, low, close y volumen
+        """
+        rates = m5_rates(24)
+
+        h1 = resample_rates(rates, Timeframe.M5, Timeframe.H1)
+
+        assert len(h1) == 2
+        assert list(h1['time']) == [BASE_TIME, BASE_TIME + 3600]
+        assert h1['open'][0] == rates['open'][0]
+        assert h1['close'][0] == rates['close'][11]
+        assert h1['high'][0] == rates['high'][:12].max()
+        assert h1['low'][0] == rates['low'][:12].min()
+        assert h1['tick_volume'][0] == 12
+
+    def test_resample_drops_incomplete_last_bucket(self, m5_rates):
+        """
+        Dado velas M5 que cubren solo parte de la última hora
+        Cuando se deriva con drop_incomplete_last
+        Entonces la vela H1 en formación se descarta
+        """
+        rates = m5_rates(18)
+
+        assert len(resample_rates(rates, Timeframe.M5, Timeframe.H1)) == 2
+        assert len(resample_rates(rates, Timeframe.M5, Timeframe.H1, drop_incomplete_last=True)) == 1
+
+    def test_resample_aligns_h4_buckets(self, m5_rates):
+        """
+        Dado velas que empiezan a mitad de un bucket H4
+        Cuando se derivan velas H4
+        Entonces el bucket se alinea a múltiplos de 4 horas
+        """
+        rates = m5_rates(60, start=BASE_TIME + 2 * 3600)
+
+        h4 = resample_rates(rates, Timeframe.M5, Timeframe.H4)
+
+        assert h4['time'][0] == BASE_TIME
+        assert h4['time'][1] == BASE_TIME + 4 * 3600
+
+    def test_resample_invalid_pair_raises_error(self, m5_rates):
+        """
+        Dado un timeframe destino que no es múltiplo del base
+        Cuando se intenta derivar
+        Entonces debe lanzar ResampleError
+        """
+        with pytest.raises(ResampleError):
+            resample_rates(m5_rates(3), Timeframe.H1, Timeframe.M15)
+
+    def test_compare_rates_detects_mismatch(self, m5_rates):
+        """
+        Dado velas derivadas y de referencia
+        Cuando difieren en un precio
+        Entonces compare_rates reporta el tiempo de la vela
+        """
+        derived = resample_rates(m5_rates(24), Timeframe.M5, Timeframe.H1)
+        reference = derived.copy()
+
+        assert compare_rates(derived, reference, 1e-8) == []
+
+        reference['high'][1] += 0.001
+        assert compare_rates(derived, reference, 1e-8) == [BASE_TIME + 3600]
+
+
+class TestTimeframeResampler:
+    """Tests para el coordinador de resampling"""
+
+    def test_required_base_count_covers_largest_target(self):
+        """
+        Dado M5 como base y H1 como destino
+        Cuando se calcula cuántas velas base pedir
+        Entonces cubre count velas H1 más un bucket de alineación
+        """
+        count = TimeframeResampler.required_base_count(
+            Timeframe.M5, [Timeframe.M15, Timeframe.H1], 10
+        )
+
+        assert count == 11 * 12 + 1
+
+    def test_derivable_targets_respects_max_base_bars(self):
+        """
+        Dado un máximo de 10000 velas base
+        Cuando se piden 200 velas de M15, H1, H4 y D1 desde M5
+        Entonces D1 no se deriva (requiere 57889 velas M5)
+        """
+        resampler = TimeframeResampler(max_base_bars=10_000)
+
+        targets = resampler.derivable_targets(
+            Timeframe.M5,
+            [Timeframe.M5, Timeframe.M15, Timeframe.H1, Timeframe.H4, Timeframe.D1],
+            200
+        )
+
+        assert targets == [Timeframe.M15, Timeframe.H1, Timeframe.H4]
+        assert resampler.required_base_count(Timeframe.M5, targets, 200) <= 10_000
+
+    def test_resample_returns_last_count_without_first_bucket(self, m5_rates):
+        """
+        Dado una serie base que empieza a mitad de hora
+        Cuando se derivan velas H1
+        Entonces el primer bucket (incompleto) se descarta
+        """
+        resampler = TimeframeResampler()
+        rates = m5_rates(30, start=BASE_TIME + 1800)
+
+        h1 = resampler.resample(rates, Timeframe.M5, Timeframe.H1, 5)
+
+        assert h1['time'][0] == BASE_TIME + 3600
+        assert resampler.get_stats()["derived"] == 1
+
+    def test_should_verify_every_interval(self):
+        """
+        Dado un intervalo de verificación de 3
+        Cuando se derivan velas varias veces
+        Entonces se verifica en la primera y cada 3 derivaciones
+        """
+        resampler = TimeframeResampler(check_interval=3)
+
+        checks = [resampler.should_verify("EURUSD", Timeframe.H1) for _ in range(6)]
+
+        assert checks == [True, False, False, True, False, False]
+        assert not TimeframeResampler(check_interval=0).should_verify("EURUSD", Timeframe.H1)
+
+    def test_verify_records_mismatches(self, m5_rates):
+        """
+        Dado velas derivadas distintas a las del terminal
+        Cuando se verifican
+        Entonces se registra la discrepancia en las estadísticas
+        """
+        resampler = TimeframeResampler()
+        derived = resample_rates(m5_rates(24), Timeframe.M5, Timeframe.H1)
+        reference = derived.copy()
+        reference['close'][0] += 0.01
+
+        assert resampler.verify("EURUSD", Timeframe.H1, derived, reference) is False
+
+        stats = resampler.get_stats()
+        assert stats["checks"] == 1
+        assert stats["mismatches"] == 1
+        assert stats["last_mismatch"]["symbol"] == "EURUSD"
+
+    def test_invalid_parameters_raise_error(self):
+        """
+        Dado parámetros negativos
+        Cuando se crea el resampler
+        Entonces debe lanzar ResampleError
+        """
+        with pytest.raises(ResampleError):
+            TimeframeResampler(check_interval=-1)
+        with pytest.raises(ResampleError):
+            TimeframeResampler(tolerance=-1.0)
+        with pytest.raises(ResampleError):
+            TimeframeResampler(max_base_bars=0)